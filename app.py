@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+"""
+Local HTTP extraction service for CSI MasterFormat PDFs.
+
+    POST /extract      Parse a PDF: upload its bytes (Content-Type: application/pdf)
+                       or post JSON {"path": "..."}. Options go in the JSON body or
+                       the query string: validate (default true) and profile.
+                       Streams JSONL records as the job progresses:
+                         {"type": "job", "job": ..., "sha256": ..., "coalesced": false}
+                         {"type": "page", "page": 3, "pages": 40, "codes": 57}
+                         {"type": "code", "division": ..., "code": ..., "title": ..., ...}
+                         {"type": "summary", "codes": ..., "errors": ..., "validation": {...}}
+                         {"type": "error", "message": ...}
+    GET  /jobs/<id>    Progress of a running or recently finished job
+    GET  /health       Worker and job counts, and whether the pool is broken
+
+Jobs run in a pool of warm worker processes that import the parser and load
+the validation orchestrator once, at start-up, so a request pays neither
+process nor import start-up. Concurrent requests for the same PDF content
+and options share one job; every request streams the job's records from the
+beginning. A worker that dies breaks its pool; the pool is replaced, and
+its running jobs end with an error record. Requests that find no working
+pool are answered with 503.
+
+Usage:
+    python app.py --port 8765 --workers 2 -c config/validation_config.yaml
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from loguru import logger
+
+from src.agents.profiles import PROFILES
+
+
+DEFAULT_CONFIG = Path(__file__).parent / "config" / "validation_config.yaml"
+MAX_UPLOAD_BYTES = 256 * 1024 * 1024
+FINISHED_JOBS_KEPT = 100     # Finished jobs still answered by GET /jobs/<id>
+READ_CHUNK = 1 << 20
+DISPATCH_POLL_SECONDS = 1.0  # How soon the dispatcher of a replaced pool notices
+
+# Fields of each streamed code, as exported by parse_csi.py
+CODE_FIELDS = ("division", "code", "title", "group", "subgroup", "page_number")
+
+
+# ---------------------------------------------------------------------------
+# Worker processes
+# ---------------------------------------------------------------------------
+
+# Per-process state, set up once by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(config_path: Optional[str], events) -> None:
+    """Import the parser and agents and load the orchestrator once per worker."""
+    from src.parsers.csi_parser_final import CSIParser
+    from src.models.csi_masterformat import CSICode
+    from src.agents.orchestrator import ValidationOrchestrator
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    if config_path:
+        orchestrator = ValidationOrchestrator.load_config(config_path)
+    else:
+        orchestrator = ValidationOrchestrator()
+    _worker.update(events=events, parser_class=CSIParser, code_model=CSICode,
+                   orchestrator=orchestrator)
+    events.put((None, os.getpid()))  # Ready
+
+
+def _start_worker() -> None:
+    """No-op task: submitting one makes the pool start another worker."""
+
+
+def _run_job(job_id: str, pdf_path: str, validate: bool, profile: Optional[str]) -> None:
+    """Parse (and validate) one PDF, posting its records to the event queue."""
+    events = _worker["events"]
+    code_model = _worker["code_model"]
+    codes: List[Dict[str, Any]] = []
+    errors = 0
+
+    def on_page(page: int, pages: int, raw_codes: List[dict]) -> None:
+        nonlocal errors
+        records = []
+        for raw_code in raw_codes:
+            try:
+                code = code_model(**{name: raw_code.get(name) for name in CODE_FIELDS})
+            except Exception:
+                errors += 1
+                continue
+            entry = {name: getattr(code, name) for name in CODE_FIELDS}
+            codes.append(entry)
+            records.append({"type": "code", **entry})
+        events.put((job_id, [{"type": "page", "page": page, "pages": pages,
+                              "codes": len(codes)}] + records))
+
+    try:
+        _worker["parser_class"](column_split_x=320.0).parse_pdf(pdf_path, on_page=on_page)
+
+        validation = None
+        if validate:
+            result = _worker["orchestrator"].validate(codes, source_pdf=pdf_path,
+                                                      export_report=False, profile=profile)
+            validation = result.to_dict()
+            validation.pop("issues_summary")  # Every issue; too large for a summary
+            validation["profile"] = result.profile
+        events.put((job_id, [{"type": "summary", "codes": len(codes), "errors": errors,
+                              "validation": validation}]))
+    except Exception as e:
+        logger.exception(f"Job {job_id} failed")
+        events.put((job_id, [{"type": "error", "message": f"{type(e).__name__}: {e}"}]))
+
+
+# ---------------------------------------------------------------------------
+# Service
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Job:
+    """One extraction job and the records streamed so far."""
+    id: str
+    sha256: str
+    options: Tuple[bool, Optional[str]]         # (validate, profile)
+    upload: Optional[Path] = None               # Uploaded file, deleted when the job ends
+    state: str = "queued"                       # queued, running, done, failed
+    page: int = 0
+    pages: int = 0
+    codes: int = 0
+    requests: int = 1                           # Requests sharing this job
+    records: List[Dict[str, Any]] = field(default_factory=list)
+    changed: threading.Condition = field(default_factory=threading.Condition)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "failed")
+
+    def status(self) -> Dict[str, Any]:
+        with self.changed:
+            return {"job": self.id, "sha256": self.sha256, "state": self.state,
+                    "page": self.page, "pages": self.pages, "codes": self.codes,
+                    "requests": self.requests}
+
+
+class ServiceUnavailable(Exception):
+    """No worker could take the job, answered with HTTP 503."""
+
+
+class ExtractionService:
+    """Warm worker pool plus coalescing of concurrent jobs for the same PDF."""
+
+    def __init__(self, workers: int = 2, config_path: str = None):
+        """
+        Start the worker pool.
+
+        Args:
+            workers: Number of worker processes
+            config_path: Validation config YAML (None for defaults)
+        """
+        # Spawn rather than fork: the HTTP server is multi-threaded
+        self._context = multiprocessing.get_context("spawn")
+        self.workers = workers
+        self.config_path = config_path
+        self.upload_dir = Path(tempfile.mkdtemp(prefix="csi-uploads-"))
+        self._lock = threading.Lock()
+        self._active: Dict[Tuple, Job] = {}          # (sha256, options) -> running job
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._ready: List[int] = []                 # PIDs of initialized workers
+        self._ready_changed = threading.Condition(self._lock)
+        self.pool = self._new_pool()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        """
+        A worker pool posting to its own event queue, read by its own dispatcher.
+
+        A worker killed while writing to a queue can leave the queue's lock held,
+        which would block every later writer; a new pool never shares its queue.
+        """
+        self.events = self._context.Queue()
+        self._dispatcher = threading.Thread(target=self._dispatch, args=(self.events,),
+                                            name="extraction-events", daemon=True)
+        self._dispatcher.start()
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context,
+                                   initializer=_init_worker,
+                                   initargs=(self.config_path, self.events))
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """
+        Replace a pool broken by a dead worker (it accepts no more work) and
+        start warming the new one; returns the current pool.
+        """
+        with self._lock:
+            if self.pool is broken:
+                logger.warning("A worker process died; starting a new worker pool")
+                self.pool = self._new_pool()
+                self._ready.clear()
+                for _ in range(self.workers):
+                    self.pool.submit(_start_worker)
+            pool = self.pool
+        broken.shutdown(wait=False, cancel_futures=True)
+        return pool
+
+    def warm_up(self, timeout: float = None) -> List[int]:
+        """
+        Start every worker now rather than on the first requests.
+
+        Returns:
+            PIDs of the initialized workers (all of them unless `timeout` expired)
+        """
+        for _ in range(self.workers):
+            self.pool.submit(_start_worker)
+        with self._ready_changed:
+            self._ready_changed.wait_for(lambda: len(self._ready) >= self.workers, timeout)
+            return sorted(self._ready)
+
+    def submit(self, pdf_path: Path, sha256: str, validate: bool = True,
+               profile: str = None, upload: Path = None) -> Tuple[Job, bool]:
+        """
+        Start a job, or join the running job for the same content and options.
+
+        Args:
+            pdf_path: PDF to parse
+            sha256: Hex SHA-256 of the PDF's content
+            validate: Run the multi-agent validation after parsing
+            profile: Validation profile (default: configured profile)
+            upload: Uploaded temporary file owned by the job (deleted when it ends)
+
+        Returns:
+            (job, whether the request joined an existing job)
+        """
+        key = (sha256, (validate, profile))
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                with job.changed:
+                    job.requests += 1
+                if upload is not None:
+                    upload.unlink(missing_ok=True)
+                return job, True
+
+            job = Job(id=uuid.uuid4().hex[:12], sha256=sha256, options=key[1], upload=upload)
+            self._active[key] = job
+            self._jobs[job.id] = job
+            self._trim_finished()
+
+        pool = self.pool
+        try:
+            try:
+                future = pool.submit(_run_job, job.id, str(pdf_path), validate, profile)
+            except BrokenProcessPool:
+                # A worker died since the last job; retry once in a fresh pool
+                pool = self._replace_pool(pool)
+                future = pool.submit(_run_job, job.id, str(pdf_path), validate, profile)
+        except Exception as e:
+            message = f"Could not start job: {type(e).__name__}: {e}"
+            logger.error(f"Job {job.id}: {message}")
+            self._apply(job, [{"type": "error", "message": message}])
+            raise ServiceUnavailable(message) from e
+        future.add_done_callback(lambda f: self._check_crash(job.id, pool, f))
+        logger.info(f"Job {job.id}: {pdf_path} ({sha256[:12]})")
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stream(self, job: Job) -> Iterator[List[Dict[str, Any]]]:
+        """Batches of the job's records, from the first, until the job ends."""
+        index = 0
+        while True:
+            with job.changed:
+                while index == len(job.records) and not job.finished:
+                    job.changed.wait()
+                batch = job.records[index:]
+                finished = job.finished
+            index += len(batch)
+            if batch:
+                yield batch
+            if finished and not batch:
+                return
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            # The executor marks itself broken as soon as a worker dies, even when idle;
+            # the next job replaces it
+            broken = bool(getattr(self.pool, "_broken", False))
+            return {"workers": self.workers, "pool": "broken" if broken else "ok",
+                    "ready_workers": 0 if broken else len(self._ready),
+                    "active_jobs": len(self._active), "jobs": len(self._jobs)}
+
+    def close(self) -> None:
+        """Stop the workers and the event dispatcher, and delete leftover uploads."""
+        self.pool.shutdown(cancel_futures=True)
+        self.events.put(None)
+        self._dispatcher.join()
+        shutil.rmtree(self.upload_dir, ignore_errors=True)
+
+    def __enter__(self) -> "ExtractionService":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _dispatch(self, events) -> None:
+        """Apply worker records to their jobs and wake the streaming requests."""
+        while True:
+            try:
+                item = events.get(timeout=DISPATCH_POLL_SECONDS)
+            except queue.Empty:
+                if events is not self.events:
+                    return  # The queue of a replaced pool
+                continue
+            if item is None:
+                return
+            job_id, records = item
+            if job_id is None:
+                with self._ready_changed:
+                    if events is not self.events:
+                        continue  # A worker of a replaced pool
+                    self._ready.append(records)  # A worker's PID
+                    self._ready_changed.notify_all()
+                continue
+            job = self.get(job_id)
+            if job is not None:
+                self._apply(job, records)
+
+    def _apply(self, job: Job, records: List[Dict[str, Any]]) -> None:
+        """Add records to a job and wake its streaming requests."""
+        with job.changed:
+            if job.finished:
+                return
+
+        # Clean up before publishing the final record, so a client that has
+        # seen it can rely on the job being gone
+        finishing = records[-1]["type"] in ("summary", "error")
+        if finishing:
+            with self._lock:
+                if self._active.get((job.sha256, job.options)) is job:
+                    del self._active[(job.sha256, job.options)]
+            if job.upload is not None:
+                job.upload.unlink(missing_ok=True)
+
+        with job.changed:
+            for record in records:
+                if record["type"] == "page":
+                    job.state = "running"
+                    job.page, job.pages, job.codes = (record["page"], record["pages"],
+                                                      record["codes"])
+                elif record["type"] == "summary":
+                    job.state = "done"
+                elif record["type"] == "error":
+                    job.state = "failed"
+            job.records.extend(records)
+            job.changed.notify_all()
+
+        if finishing:
+            logger.info(f"Job {job.id}: {job.state} ({job.codes} codes, "
+                        f"{job.requests} requests)")
+
+    def _check_crash(self, job_id: str, pool: ProcessPoolExecutor, future: Future) -> None:
+        # _run_job reports its own errors; this only sees a worker that died
+        if future.cancelled() or future.exception() is None:
+            return
+        self.events.put((job_id, [{"type": "error",
+                                   "message": f"Worker failed: {future.exception()}"}]))
+        if isinstance(future.exception(), BrokenProcessPool):
+            self._replace_pool(pool)
+
+    def _trim_finished(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - FINISHED_JOBS_KEPT)]:
+            del self._jobs[job_id]
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+class RequestError(Exception):
+    """Bad request, answered with HTTP 400."""
+
+
+def _parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if str(value).lower() in ("1", "true", "yes"):
+        return True
+    if str(value).lower() in ("0", "false", "no"):
+        return False
+    raise RequestError(f"Invalid boolean: {value}")
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionHandler(BaseHTTPRequestHandler):
+    """Routes requests to the server's ExtractionService."""
+
+    server_version = "CSIExtraction/1.0"
+
+    @property
+    def service(self) -> ExtractionService:
+        return self.server.service
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._send_json(200, self.service.health())
+        elif path.startswith("/jobs/"):
+            job = self.service.get(path[len("/jobs/"):])
+            if job is None:
+                self._send_json(404, {"error": "Unknown job"})
+            else:
+                self._send_json(200, job.status())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/extract":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        upload = None
+        try:
+            options = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            content_type = self.headers.get("Content-Type", "").split(";")[0].strip()
+            if content_type == "application/json":
+                body = json.loads(self._read_body() or b"{}")
+                options.update(body)
+                if "path" not in body:
+                    raise RequestError("JSON body needs a 'path'")
+                pdf_path = Path(body["path"])
+                if not pdf_path.is_file():
+                    raise RequestError(f"No such file: {pdf_path}")
+                sha256 = _hash_file(pdf_path)
+            else:
+                pdf_path, sha256 = self._receive_upload()
+                upload = pdf_path
+
+            validate = _parse_bool(options.get("validate", True))
+            profile = options.get("profile")
+            if profile is not None and profile not in PROFILES:
+                raise RequestError(f"Unknown profile '{profile}' "
+                                   f"(expected one of: {', '.join(PROFILES)})")
+        except (RequestError, ValueError) as e:
+            if upload is not None:
+                upload.unlink(missing_ok=True)
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            job, coalesced = self.service.submit(pdf_path, sha256, validate=validate,
+                                                 profile=profile, upload=upload)
+        except ServiceUnavailable as e:
+            self._send_json(503, {"error": str(e)})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            self._write_records([{"type": "job", "job": job.id, "sha256": sha256,
+                                  "coalesced": coalesced}])
+            for batch in self.service.stream(job):
+                self._write_records(batch)
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug(f"Client left job {job.id}")
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_UPLOAD_BYTES:
+            raise RequestError("Request body too large")
+        return self.rfile.read(length)
+
+    def _receive_upload(self) -> Tuple[Path, str]:
+        """Stream the request body to a temporary file, hashing it on the way."""
+        length = int(self.headers.get("Content-Length", 0))
+        if length <= 0:
+            raise RequestError("Upload a PDF body or post JSON with a 'path'")
+        if length > MAX_UPLOAD_BYTES:
+            raise RequestError("Upload too large")
+
+        digest = hashlib.sha256()
+        fd, name = tempfile.mkstemp(suffix=".pdf", dir=self.service.upload_dir)
+        with os.fdopen(fd, "wb") as f:
+            remaining = length
+            while remaining:
+                chunk = self.rfile.read(min(READ_CHUNK, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+                remaining -= len(chunk)
+        if remaining:
+            os.unlink(name)
+            raise RequestError("Upload ended early")
+        return Path(name), digest.hexdigest()
+
+    def _write_records(self, records: List[Dict[str, Any]]) -> None:
+        self.wfile.write("".join(json.dumps(record) + "\n" for record in records).encode("utf-8"))
+        self.wfile.flush()
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def make_server(service: ExtractionService, host: str = "127.0.0.1",
+                port: int = 8765) -> ThreadingHTTPServer:
+    """HTTP server for `service` (port 0 picks a free port)."""
+    server = ThreadingHTTPServer((host, port), ExtractionHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main():
+    """Main CLI entry point."""
+    parser = argparse.ArgumentParser(description="Local HTTP service for CSI MasterFormat PDF extraction")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=2, help="Warm worker processes")
+    parser.add_argument("-c", "--config", help="Path to validation config YAML file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose logging")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stdout, level="DEBUG" if args.verbose else "INFO")
+
+    config_path = args.config or (str(DEFAULT_CONFIG) if DEFAULT_CONFIG.exists() else None)
+    with ExtractionService(workers=args.workers, config_path=config_path) as service:
+        pids = service.warm_up()
+        server = make_server(service, args.host, args.port)
+        logger.info(f"Serving on http://{args.host}:{server.server_port} "
+                    f"({len(pids)} warm workers)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Shutting down")
+        finally:
+            server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
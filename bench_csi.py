@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Synthetic MasterFormat documents and code datasets, and parser and agent scaling benchmarks.
+
+    python bench_csi.py generate 600 -o data/benchmarks/600.pdf     # PDF + ground truth CSV
+    python bench_csi.py run                                         # 10/100/1000 pages, all variants
+    python bench_csi.py run --pages 10 100 --variants final final-pymupdf -o results.json
+    python bench_csi.py codes 100000 -o data/benchmarks/codes.csv   # Codes with injected defects
+    python bench_csi.py agents                                      # 1k-1M codes, every agent
+    python bench_csi.py agents --rows 1000 10000 --stages orchestrator -o agents.json
+    python bench_csi.py gate --save-baseline                        # On main: record the baseline
+    python bench_csi.py gate                                        # On a branch: exit 1 if slower
+
+See src/utils/synthetic_masterformat.py, src/utils/parser_benchmark.py,
+src/utils/synthetic_codes.py, src/utils/agent_benchmark.py and src/utils/perf_gate.py.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+import yaml
+from loguru import logger
+from src.utils import agent_benchmark, perf_gate
+from src.utils.parser_benchmark import (DEFAULT_SIZES, VARIANTS, format_results,
+                                        results_as_dicts, run_benchmark)
+from src.utils.synthetic_codes import DEFECT_TYPES, generate_codes, write_codes
+from src.utils.synthetic_masterformat import generate
+
+
+def setup_logging(level: str = "INFO"):
+    """Configure logging (to stderr, so results can go to stdout)."""
+    logger.remove()
+    logger.add(sys.stderr, level=level)
+
+
+def run_gate(args) -> int:
+    """Run the regression suite and compare it with the stored baseline."""
+    suite = [benchmark for benchmark in perf_gate.SUITE
+             if not args.only or benchmark.name.startswith(tuple(args.only))]
+    if not suite:
+        logger.error(f"No benchmarks match {args.only}")
+        return 2
+    if perf_gate.smallest_p_value(args.repeat) >= args.alpha:
+        logger.warning(f"{args.repeat} runs per benchmark can never show a significant "
+                       f"slowdown at alpha {args.alpha}; use --repeat 4 or more")
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    history = perf_gate.PerfHistory(args.history)
+    fingerprint = perf_gate.machine_fingerprint()
+    baseline_run = history.baseline(fingerprint["id"], commit=args.baseline)
+    if baseline_run is None and args.baseline:
+        logger.error(f"No run of commit {args.baseline} on this machine in {args.history}")
+        return 2
+
+    measurements = perf_gate.run_suite(suite, repeat=args.repeat, directory=args.dir,
+                                       config=config)
+    comparisons = perf_gate.compare(measurements, perf_gate.measurements_of(baseline_run),
+                                    threshold=args.threshold, alpha=args.alpha)
+    print(perf_gate.format_comparisons(comparisons, baseline_run))
+
+    failed = perf_gate.regressions(comparisons)
+    if not args.no_save:
+        # The first run on a machine becomes its baseline
+        save_baseline = args.save_baseline or history.baseline(fingerprint["id"]) is None
+        history.append(perf_gate.new_run(measurements, args.repeat,
+                                         baseline=save_baseline and not failed))
+        logger.info(f"Run added to {args.history}"
+                    + (" as the new baseline" if save_baseline and not failed else ""))
+    if baseline_run is None:
+        logger.info("No baseline to compare with on this machine yet")
+    if failed:
+        logger.error(f"{len(failed)} benchmark(s) failed the gate: "
+                     f"{', '.join(c.name for c in failed)}")
+        return 1
+    return 0
+
+
+def main():
+    """Main CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic MasterFormat PDFs and code datasets, and benchmark "
+                    "the parsers and validation agents on them"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose logging")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="Write a synthetic PDF and its ground truth CSV")
+    gen.add_argument("pages", type=int, help="Page count")
+    gen.add_argument("-o", "--output", required=True, help="Output PDF path")
+    gen.add_argument("--truth", help="Ground truth CSV path (default: next to the PDF)")
+    gen.add_argument("--seed", type=int, default=0, help="Random seed (same seed, same document)")
+
+    run = commands.add_parser("run", help="Benchmark parser variants on synthetic documents")
+    run.add_argument("--pages", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                     help="Document sizes in pages")
+    run.add_argument("--variants", nargs="+", choices=list(VARIANTS),
+                     help="Parser variants (default: all)")
+    run.add_argument("--seed", type=int, default=0, help="Random seed of the documents")
+    run.add_argument("--dir", default="data/benchmarks",
+                     help="Where generated documents are kept between runs")
+    run.add_argument("-o", "--output", help="Also write the results as JSON")
+
+    codes = commands.add_parser("codes", help="Write a synthetic code dataset CSV with injected defects")
+    codes.add_argument("rows", type=int, help="Number of codes")
+    codes.add_argument("-o", "--output", required=True, help="Output CSV path")
+    codes.add_argument("--defect-rate", type=float, default=agent_benchmark.DEFAULT_DEFECT_RATE,
+                       help="Share of rows with each defect type (default: %(default)s)")
+    codes.add_argument("--seed", type=int, default=0, help="Random seed (same seed, same dataset)")
+
+    agents = commands.add_parser("agents", help="Benchmark the validation agents against their "
+                                                "documented time and memory budgets")
+    agents.add_argument("--rows", type=int, nargs="+", default=list(agent_benchmark.DEFAULT_ROWS),
+                        help="Dataset sizes in codes")
+    agents.add_argument("--stages", nargs="+", choices=list(agent_benchmark.STAGES),
+                        help="Agents to benchmark (default: all, and the orchestrator)")
+    agents.add_argument("--defect-rate", type=float, default=agent_benchmark.DEFAULT_DEFECT_RATE,
+                        help="Share of rows with each defect type (default: %(default)s)")
+    agents.add_argument("--seed", type=int, default=0, help="Random seed of the datasets")
+    agents.add_argument("--config", default="config/validation_config.yaml",
+                        help="Validation config the agents are built from")
+    agents.add_argument("-o", "--output", help="Also write the results as JSON")
+
+    gate = commands.add_parser("gate", help="Time the regression suite, compare it with the "
+                                            "stored baseline and exit 1 on a significant slowdown")
+    gate.add_argument("--history", default=perf_gate.DEFAULT_HISTORY,
+                      help="JSON history of runs (default: %(default)s)")
+    gate.add_argument("--repeat", type=int, default=perf_gate.DEFAULT_REPEAT,
+                      help="Timed runs per benchmark (default: %(default)s)")
+    gate.add_argument("--threshold", type=float, default=perf_gate.DEFAULT_THRESHOLD,
+                      help="Relative median slowdown that can fail the gate (default: %(default)s)")
+    gate.add_argument("--alpha", type=float, default=perf_gate.DEFAULT_ALPHA,
+                      help="Significance level of the slowdown (default: %(default)s)")
+    gate.add_argument("--baseline", metavar="COMMIT",
+                      help="Compare with this machine's latest run of COMMIT (a prefix) "
+                           "instead of its baseline")
+    gate.add_argument("--only", nargs="+", metavar="PREFIX",
+                      help="Only benchmarks whose name starts with one of these, e.g. parse/ "
+                           "or agents/auditor")
+    gate.add_argument("--save-baseline", action="store_true",
+                      help="Record this run as the machine's new baseline")
+    gate.add_argument("--no-save", action="store_true", help="Do not add this run to the history")
+    gate.add_argument("--config", default="config/validation_config.yaml",
+                      help="Validation config the agents are built from")
+    gate.add_argument("--dir", default="data/benchmarks",
+                      help="Where generated documents are kept between runs")
+
+    args = parser.parse_args()
+    setup_logging("DEBUG" if args.verbose else "INFO")
+
+    if args.command == "generate":
+        truth_path = args.truth or str(Path(args.output).with_suffix(".csv"))
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        truth = generate(args.output, args.pages, seed=args.seed, truth_path=truth_path)
+        logger.success(f"Wrote {args.pages} pages with {len(truth)} codes to {args.output} "
+                       f"(ground truth: {truth_path})")
+        return 0
+
+    if args.command == "codes":
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        dataset = generate_codes(args.rows, seed=args.seed,
+                                 defect_rates={defect: args.defect_rate for defect in DEFECT_TYPES})
+        write_codes(dataset, args.output)
+        counts = ", ".join(f"{count} {defect}" for defect, count in dataset.counts().items())
+        logger.success(f"Wrote {args.rows} codes to {args.output} (defects: {counts})")
+        return 0
+
+    if args.command == "agents":
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+        results = agent_benchmark.run_benchmark(args.rows, args.stages, seed=args.seed,
+                                                defect_rate=args.defect_rate, config=config)
+        print(agent_benchmark.format_results(results))
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(agent_benchmark.results_as_dicts(results), f, indent=2)
+            logger.info(f"Results written to {args.output}")
+        return 1 if any(result.error or result.over_budget for result in results) else 0
+
+    if args.command == "gate":
+        return run_gate(args)
+
+    results = run_benchmark(args.pages, args.variants, seed=args.seed, directory=args.dir)
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results_as_dicts(results), f, indent=2)
+        logger.info(f"Results written to {args.output}")
+    return 1 if any(result.error for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
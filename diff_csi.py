@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Compare two parsed CSI MasterFormat editions (e.g. 2018 vs 2020).
+"""
+import argparse
+import sys
+from loguru import logger
+from src.utils.edition_diff import EditionDiff, read_rows, write_csv, write_jsonl
+
+
+def setup_logging(level: str = "INFO"):
+    """Configure logging (to stderr, so diff output can go to stdout)."""
+    logger.remove()
+    logger.add(sys.stderr, level=level)
+
+
+def main():
+    """Main CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Diff two parsed MasterFormat editions (CSV, JSONL/JSON, Parquet or SQLite)"
+    )
+    parser.add_argument("old", help="Parsed output of the older edition")
+    parser.add_argument("new", help="Parsed output of the newer edition")
+    parser.add_argument("-o", "--output", help="Output file path (default: stdout)")
+    parser.add_argument("-f", "--format", choices=["jsonl", "csv"], default="jsonl",
+                       help="Output format")
+    parser.add_argument("--rename-threshold", type=float, default=0.8,
+                       help="Minimum title similarity to report a code as renumbered")
+    parser.add_argument("--table", default="codes",
+                       help="Table name for SQLite inputs")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose logging")
+
+    args = parser.parse_args()
+
+    log_level = "DEBUG" if args.verbose else "INFO"
+    setup_logging(log_level)
+
+    engine = EditionDiff(rename_threshold=args.rename_threshold)
+    writer = write_csv if args.format == "csv" else write_jsonl
+
+    try:
+        records = engine.diff(read_rows(args.old, table=args.table),
+                              read_rows(args.new, table=args.table))
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8', newline='') as f:
+                written = writer(records, f)
+        else:
+            written = writer(records, sys.stdout)
+    except (OSError, ValueError, ImportError) as e:
+        logger.error(f"Diff failed: {e}")
+        return 1
+
+    summary = ", ".join(f"{change}: {count}" for change, count in sorted(engine.counts.items()))
+    logger.info(f"{written} differences ({summary})")
+    if engine.skipped_rows:
+        logger.warning(f"Skipped {engine.skipped_rows} rows with unparseable codes")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
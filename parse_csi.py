@@ -1,63 +1,150 @@
 #!/usr/bin/env python3
 """
 Main entry point for CSI MasterFormat PDF parsing with multi-agent validation.
+
+Heavy dependencies (pdfplumber, pydantic, the agents) are imported where they
+are first needed, so `--help` and `--no-validate` runs start quickly. Use
+`--profile-startup` to see where start-up time goes.
 """
 import argparse
+import os
 import sys
 import json
 import csv
 from pathlib import Path
-from loguru import logger
-from src.parsers.csi_parser_final import CSIParser
-from src.models.csi_masterformat import CSICode
-from src.agents.orchestrator import ValidationOrchestrator
+from src.agents.profiles import PROFILES
 
 
 def setup_logging(level: str = "INFO"):
     """Configure logging."""
+    from loguru import logger
+
     logger.remove()
     logger.add(sys.stdout, level=level)
 
 
+def load_env():
+    """Load `.env` into the environment, if python-dotenv is installed."""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+
+def extraction_limits(workers: int = None, page_timeout: float = None,
+                      document_timeout: float = None):
+    """
+    Page extraction workers and time limits, defaulting to MAX_WORKERS,
+    PAGE_TIMEOUT_SECONDS and TIMEOUT_SECONDS from the environment.
+
+    Returns:
+        (workers, page timeout, document timeout); 0 workers means no supervision
+    """
+    if workers is None:
+        workers = int(os.getenv("MAX_WORKERS", 0))
+    if page_timeout is None:
+        page_timeout = float(os.getenv("PAGE_TIMEOUT_SECONDS", 60))
+    if document_timeout is None and os.getenv("TIMEOUT_SECONDS"):
+        document_timeout = float(os.getenv("TIMEOUT_SECONDS"))
+    return workers, page_timeout or None, document_timeout or None
+
+
 def parse_pdf(pdf_path: str, output_path: str = None, format: str = "csv",
-              validate: bool = True, config_path: str = None):
-    """Parse CSI MasterFormat PDF and export results with optional multi-agent validation."""
+              validate: bool = True, config_path: str = None,
+              profile: str = None, time_budget: float = None, report_path: str = None,
+              on_page=None, timings: dict = None, page_workers: int = 0,
+              page_timeout: float = None, document_timeout: float = None, fallback: str = None,
+              metrics=None, profiler=None, memory=None, repair: bool = False):
+    """
+    Parse CSI MasterFormat PDF and export results with optional multi-agent validation.
+
+    `on_page(page, pages, codes)` is called after each parsed page; if given,
+    `timings` receives the seconds spent in each stage (parse, validate, export).
+    With `page_workers` > 0, pages are extracted in supervised processes under
+    the page and document time limits; pages that time out are reported in
+    the returned errors. Throughput, stage latencies and cache hits are added
+    to `metrics` (a RunMetrics), if given. A RunProfiler `profiler` receives
+    per-page, per-stage and per-check timings; profiled pages are extracted
+    in this process so cProfile sees them. A MemoryTracker `memory` receives
+    per-page and per-stage peak and retained memory (pages also extracted
+    in this process). With `repair`, QC's low-confidence entries get an LLM
+    repair pass (the config's `repair` section) whatever its `enabled` flag;
+    suggested repairs at or above repair.apply_min_confidence are exported.
+    """
+    import time
+    from contextlib import contextmanager, nullcontext
+    from loguru import logger
+    from src.parsers.csi_parser_final import CSIParser
+    from src.models.csi_masterformat import CSICode
+    from src.utils.metrics import RunMetrics
+
     logger.info(f"Starting parse of: {pdf_path}")
+    metrics = metrics if metrics is not None else RunMetrics()
+    document_started = time.perf_counter()
+
+    @contextmanager
+    def stage(name):
+        """Profile a document stage and track its memory (where enabled)."""
+        with memory.stage(name) if memory is not None else nullcontext(), \
+                profiler.stage(name) if profiler is not None else nullcontext():
+            yield
 
     # Initialize parser
-    parser = CSIParser(column_split_x=320.0)
+    parser = CSIParser(column_split_x=320.0, metrics=metrics)
+    parser.profiler = profiler
+    parser.memory = memory
+    if (profiler is not None or memory is not None) and page_workers:
+        logger.info("Profiling or tracking memory: extracting pages in-process "
+                    "(page workers and time limits off)")
+        page_workers = 0
+
+    timings = timings if timings is not None else {}
+    started = time.perf_counter()
 
     # Parse PDF
-    raw_codes = parser.parse_pdf(pdf_path)
+    with memory.stage('extraction') if memory is not None else nullcontext():
+        raw_codes = parser.parse_pdf(pdf_path, on_page=on_page, workers=page_workers,
+                                     page_timeout=page_timeout,
+                                     document_timeout=document_timeout, fallback=fallback)
 
     # Convert to Pydantic models for basic validation
     validated_codes = []
     errors = []
+    conversion_started = time.perf_counter()
 
-    for raw_code in raw_codes:
-        try:
-            code = CSICode(
-                division=raw_code['division'],
-                code=raw_code['code'],
-                title=raw_code['title'],
-                group=raw_code.get('group'),
-                subgroup=raw_code.get('subgroup'),
-                page_number=raw_code.get('page_number')
-            )
-            validated_codes.append(code)
-        except Exception as e:
-            errors.append(f"Validation error for {raw_code}: {e}")
-            logger.warning(f"Skipping invalid code: {e}")
+    with stage('model_conversion'):
+        for raw_code in raw_codes:
+            try:
+                code = CSICode(
+                    division=raw_code['division'],
+                    code=raw_code['code'],
+                    title=raw_code['title'],
+                    group=raw_code.get('group'),
+                    subgroup=raw_code.get('subgroup'),
+                    page_number=raw_code.get('page_number')
+                )
+                validated_codes.append(code)
+            except Exception as e:
+                errors.append(f"Validation error for {raw_code}: {e}")
+                logger.warning(f"Skipping invalid code: {e}")
+    metrics.observe('model_conversion', time.perf_counter() - conversion_started)
+
+    errors.extend(str(failure) for failure in parser.page_failures)
 
     logger.info(f"Validated {len(validated_codes)} codes ({len(errors)} errors)")
+    timings['parse'] = time.perf_counter() - started
 
     # Run multi-agent validation if requested
     validation_result = None
     if validate:
+        started = time.perf_counter()
         logger.info("\n" + "="*80)
         logger.info("Running Multi-Agent Validation System")
         logger.info("="*80)
 
+        from src.agents.orchestrator import ValidationOrchestrator
+
         # Load configuration
         if config_path:
             orchestrator = ValidationOrchestrator.load_config(config_path)
@@ -68,23 +155,37 @@ def parse_pdf(pdf_path: str, output_path: str = None, format: str = "csv",
                 orchestrator = ValidationOrchestrator.load_config(str(default_config_path))
             else:
                 orchestrator = ValidationOrchestrator()
+        # Closing the orchestrator shuts down its executor and releases its
+        # catalog and caches, which would otherwise outlive every document
+        # of a long-running queue or watcher
+        with orchestrator:
+            orchestrator.metrics = metrics
+            orchestrator.profiler = profiler
+            orchestrator.memory = memory
+            if repair and orchestrator.repair is None:
+                from src.agents.repair_agent import RepairAgent
+                orchestrator.repair = RepairAgent(orchestrator.config.get('repair', {}))
 
-        # Convert validated codes back to dicts for agent processing
-        codes_as_dicts = [
-            {
-                'division': c.division,
-                'code': c.code,
-                'title': c.title
-            }
-            for c in validated_codes
-        ]
-
-        # Run validation pipeline
-        validation_result = orchestrator.validate(
-            codes_as_dicts,
-            source_pdf=pdf_path,
-            export_report=True
-        )
+            # Convert validated codes back to dicts for agent processing
+            codes_as_dicts = [
+                {
+                    'division': c.division,
+                    'code': c.code,
+                    'title': c.title,
+                    'page_number': c.page_number
+                }
+                for c in validated_codes
+            ]
+
+            # Run validation pipeline
+            validation_result = orchestrator.validate(
+                codes_as_dicts,
+                source_pdf=pdf_path,
+                export_report=True,
+                report_path=report_path,
+                profile=profile,
+                time_budget=time_budget
+            )
 
         # Log validation summary
         logger.info("\n" + "="*80)
@@ -100,10 +201,30 @@ def parse_pdf(pdf_path: str, output_path: str = None, format: str = "csv",
         logger.info(f"Requires Review: {validation_result.requires_human_review}")
         logger.info(f"Recommendation: {validation_result.recommendation}")
         logger.info("="*80 + "\n")
+        timings['validate'] = time.perf_counter() - started
+
+        # Apply the repairs the model is confident enough in
+        repair_result = validation_result.repair_result
+        min_confidence = orchestrator.repair.apply_min_confidence if orchestrator.repair else None
+        if repair_result is not None and min_confidence is not None:
+            applied = 0
+            for fix in repair_result.applicable(min_confidence):
+                original = validated_codes[fix.line_number - 1]
+                try:
+                    validated_codes[fix.line_number - 1] = CSICode(
+                        **dict(original.dict(), code=fix.suggested_code, title=fix.suggested_title)
+                    )
+                    applied += 1
+                except Exception as e:
+                    logger.warning(f"Repair of line {fix.line_number} not applied: {e}")
+            logger.info(f"Applied {applied} of {len(repair_result.repairs)} suggested repairs "
+                        f"(model confidence >= {min_confidence})")
 
         # Stop export if validation failed critically
         if validation_result.status == "FAIL":
             logger.error("Validation FAILED - export cancelled. Fix critical issues and retry.")
+            metrics.inc('documents_total', status=validation_result.status)
+            metrics.inc('document_seconds_total', time.perf_counter() - document_started)
             return validated_codes, errors, validation_result
 
     # Determine output path
@@ -112,26 +233,33 @@ def parse_pdf(pdf_path: str, output_path: str = None, format: str = "csv",
         output_path = f"data/output/{pdf_name}_parsed.{format}"
 
     # Export
+    started = time.perf_counter()
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    if format == "csv":
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Division", "Code", "Title", "Group", "Subgroup", "Page"])
-            for code in validated_codes:
-                writer.writerow([
-                    code.division,
-                    code.code,
-                    code.title,
-                    code.group or '',
-                    code.subgroup or '',
-                    code.page_number or ''
-                ])
-    elif format == "json":
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump([code.dict() for code in validated_codes], f, indent=2)
+    with stage('export'):
+        if format == "csv":
+            with open(output_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(["Division", "Code", "Title", "Group", "Subgroup", "Page"])
+                for code in validated_codes:
+                    writer.writerow([
+                        code.division,
+                        code.code,
+                        code.title,
+                        code.group or '',
+                        code.subgroup or '',
+                        code.page_number or ''
+                    ])
+        elif format == "json":
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump([code.dict() for code in validated_codes], f, indent=2)
 
+    timings['export'] = time.perf_counter() - started
+    metrics.observe('export', timings['export'])
+    metrics.inc('documents_total',
+                status=validation_result.status if validation_result else 'UNVALIDATED')
+    metrics.inc('document_seconds_total', time.perf_counter() - document_started)
     logger.success(f"Exported {len(validated_codes)} codes to: {output_path}")
 
     return validated_codes, errors, validation_result
@@ -139,6 +267,9 @@ def parse_pdf(pdf_path: str, output_path: str = None, format: str = "csv",
 
 def main():
     """Main CLI entry point."""
+    if "--profile-startup" in sys.argv[1:]:
+        return profile_startup([arg for arg in sys.argv[1:] if arg != "--profile-startup"])
+
     parser = argparse.ArgumentParser(
         description="Parse CSI MasterFormat PDFs with multi-agent validation"
     )
@@ -149,13 +280,57 @@ def main():
     parser.add_argument("--no-validate", action="store_true",
                        help="Skip multi-agent validation (faster but less thorough)")
     parser.add_argument("-c", "--config", help="Path to validation config YAML file")
+    parser.add_argument("-p", "--profile", choices=list(PROFILES),
+                       help="Validation profile (default: from config, else standard)")
+    parser.add_argument("--time-budget", type=float, metavar="SECONDS",
+                       help="Wall-clock validation budget; LOW-severity row checks are sampled to fit")
+    parser.add_argument("-w", "--workers", type=int,
+                       help="Supervised page extraction processes (default: $MAX_WORKERS, "
+                            "else 0 = extract in-process without time limits)")
+    parser.add_argument("--page-timeout", type=float, metavar="SECONDS",
+                       help="Time limit per page (default: $PAGE_TIMEOUT_SECONDS or 60)")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS",
+                       help="Time limit for page extraction of the whole PDF (default: $TIMEOUT_SECONDS)")
+    parser.add_argument("--fallback", choices=["pymupdf"],
+                       help="Retry pages that time out or fail with this extraction backend")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                       help="Write run metrics as a Prometheus textfile (default: $METRICS_FILE)")
+    parser.add_argument("--profile-run", metavar="DIR",
+                       help="Profile the run: write cProfile stats (run.pstats), per-page and "
+                            "per-check timings and a slowest-pages report to DIR")
+    parser.add_argument("--track-memory", action="store_true",
+                       help="Report peak and retained memory per page and pipeline stage, with "
+                            "top allocation sites, against the ARCHITECTURE.md budgets "
+                            "(tracemalloc; slower)")
+    parser.add_argument("--repair", action="store_true",
+                       help="Suggest LLM repairs for low-confidence entries (config 'repair' "
+                            "section; needs ANTHROPIC_API_KEY)")
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose logging")
+    parser.add_argument("--profile-startup", action="store_true",
+                       help="Run with the given arguments and print the import-time breakdown")
 
     args = parser.parse_args()
 
     # Setup logging
     log_level = "DEBUG" if args.verbose else "INFO"
     setup_logging(log_level)
+    from loguru import logger
+    load_env()
+    page_workers, page_timeout, document_timeout = extraction_limits(
+        args.workers, args.page_timeout, args.timeout)
+    from src.utils.metrics import RunMetrics
+    metrics = RunMetrics()
+    metrics_file = args.metrics_file or os.getenv("METRICS_FILE")
+    profiler = None
+    if args.profile_run:
+        from src.utils.run_profile import RunProfiler
+        profiler = RunProfiler()
+        profiler.start()
+    memory = None
+    if args.track_memory:
+        from src.utils.memory_profile import MemoryTracker
+        memory = MemoryTracker()
+        memory.start()
 
     # Parse and export
     try:
@@ -164,8 +339,23 @@ def main():
             args.output,
             args.format,
             validate=not args.no_validate,
-            config_path=args.config
+            config_path=args.config,
+            profile=args.profile,
+            time_budget=args.time_budget,
+            page_workers=page_workers,
+            page_timeout=page_timeout,
+            document_timeout=document_timeout,
+            fallback=args.fallback,
+            metrics=metrics,
+            profiler=profiler,
+            memory=memory,
+            repair=args.repair
         )
+        logger.info(metrics.format_summary())
+        if memory is not None:
+            logger.info(memory.format_report())
+            for over in memory.over_budget():
+                logger.warning(f"Memory budget exceeded: {over}")
 
         if errors:
             logger.warning(f"Completed with {len(errors)} validation errors")
@@ -185,6 +375,26 @@ def main():
         import traceback
         logger.debug(traceback.format_exc())
         return 1
+    finally:
+        if memory is not None:
+            memory.stop()
+        if metrics_file:
+            metrics.write_textfile(metrics_file)
+            logger.info(f"Metrics written to {metrics_file}")
+        if profiler is not None:
+            profiler.write(args.profile_run)
+            print(profiler.format_report(), file=sys.stderr)
+            logger.info(f"Profile written to {args.profile_run} "
+                        f"(view run.pstats with: snakeviz {Path(args.profile_run) / 'run.pstats'})")
+
+
+def profile_startup(args):
+    """Run the CLI with `args` under -X importtime and print where import time went."""
+    from src.utils.import_profile import profile_command
+
+    profile = profile_command([__file__, *args])
+    print(profile.format(), file=sys.stderr)
+    return profile.returncode
 
 
 if __name__ == "__main__":
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Batch runs through a persistent job queue (see src/utils/job_queue.py).
+
+    python queue_csi.py add data/input/ --priority 5     # Queue PDFs
+    python queue_csi.py work -w 4                        # Run four workers
+    python queue_csi.py status                           # Depth and throughput
+    python queue_csi.py retry                            # Requeue failed jobs
+
+Workers on the same machine share the queue file; each job runs the usual
+parse -> ValidationOrchestrator -> export flow of parse_csi.py. A job whose
+worker dies is picked up again once its lease expires.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from parse_csi import extraction_limits, load_env, parse_pdf, setup_logging
+from src.agents.profiles import PROFILES
+from src.utils.job_queue import LEASE_SECONDS, JobQueue
+from src.utils.metrics import RunMetrics
+
+
+DEFAULT_QUEUE = "data/jobs.sqlite"
+IDLE_SECONDS = 2.0
+
+
+class LeaseLost(Exception):
+    """The job's lease expired and it may be running elsewhere."""
+
+
+def collect_pdfs(inputs):
+    """PDF files among `inputs`, expanding directories (recursively)."""
+    for item in map(Path, inputs):
+        if item.is_dir():
+            yield from sorted(p for p in item.rglob("*") if p.suffix.lower() == ".pdf")
+        else:
+            yield item
+
+
+def run_job(queue: JobQueue, job, lease_seconds: float) -> None:
+    """Process one leased job and record the outcome."""
+    from loguru import logger
+
+    # Keep the lease alive through long stages without page callbacks (validation)
+    done = threading.Event()
+    lost = threading.Event()
+
+    def keep_alive():
+        while not done.wait(lease_seconds / 3):
+            if not queue.heartbeat(job, lease_seconds):
+                lost.set()
+                return
+
+    total = {'codes': 0}
+
+    def on_page(page, pages, codes):
+        total['codes'] += len(codes)
+        if lost.is_set() or not queue.heartbeat(job, lease_seconds, page=page, pages=pages,
+                                                codes=total['codes']):
+            raise LeaseLost(f"Lost the lease on job {job.id}")
+
+    heart = threading.Thread(target=keep_alive, daemon=True)
+    heart.start()
+    timings = {}
+    metrics = RunMetrics()
+    started = time.perf_counter()
+    logger.info(f"Job {job.id} (attempt {job.attempts}/{job.max_attempts}): {job.pdf_path}")
+    try:
+        codes, errors, validation_result = parse_pdf(job.pdf_path, on_page=on_page,
+                                                     timings=timings, metrics=metrics,
+                                                     **job.options)
+    except LeaseLost as e:
+        logger.warning(str(e))
+        return
+    except Exception as e:
+        state = queue.fail(job, f"{type(e).__name__}: {e}")
+        logger.error(f"Job {job.id} failed ({state or 'lease lost'}): {e}")
+        return
+    finally:
+        done.set()
+        heart.join()
+
+    timings['total'] = time.perf_counter() - started
+    summary = {
+        'codes': len(codes),
+        'errors': len(errors),
+        'status': validation_result.status if validation_result else None,
+        'exported': not (validation_result and validation_result.status == "FAIL"),
+        'metrics': metrics.summary()
+    }
+    if queue.complete(job, summary, {k: round(v, 3) for k, v in timings.items()}):
+        logger.success(f"Job {job.id} done in {timings['total']:.1f}s: "
+                       f"{summary['codes']} codes, status {summary['status']}")
+    else:
+        logger.warning(f"Job {job.id} finished after its lease was lost; result discarded")
+
+
+def work(queue_path: str, lease_seconds: float, drain: bool, log_level: str) -> None:
+    """Worker loop: lease and run jobs until stopped (or, with `drain`, the queue is empty)."""
+    setup_logging(log_level)
+    from loguru import logger
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    queue = JobQueue(queue_path)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info(f"Worker {worker} pulling from {queue_path}")
+    try:
+        while not stop.is_set():
+            job = queue.lease(worker, lease_seconds)
+            if job is not None:
+                run_job(queue, job, lease_seconds)
+                continue
+            counts = queue.stats().counts
+            if drain and not (counts['queued'] or counts['running']):
+                break
+            stop.wait(IDLE_SECONDS)
+    finally:
+        queue.close()
+
+
+def main():
+    """Main CLI entry point."""
+    parser = argparse.ArgumentParser(description="Persistent job queue for batch PDF parsing")
+    parser.add_argument("-q", "--queue", default=DEFAULT_QUEUE,
+                        help=f"Queue database (default: {DEFAULT_QUEUE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Queue PDFs (directories are searched recursively)")
+    add.add_argument("inputs", nargs="+", help="PDF files or directories")
+    add.add_argument("--priority", type=int, default=0, help="Higher runs first (default: 0)")
+    add.add_argument("--max-attempts", type=int, default=3,
+                     help="Attempts before a job is marked failed (default: 3)")
+    add.add_argument("-o", "--output-dir", default="data/output", help="Output folder")
+    add.add_argument("-f", "--format", choices=["csv", "json"], default="csv",
+                     help="Output format")
+    add.add_argument("--no-validate", action="store_true", help="Skip multi-agent validation")
+    add.add_argument("-c", "--config", help="Path to validation config YAML file")
+    add.add_argument("-p", "--profile", choices=list(PROFILES),
+                     help="Validation profile (default: from config, else standard)")
+    add.add_argument("--time-budget", type=float, metavar="SECONDS",
+                     help="Wall-clock validation budget per PDF")
+    add.add_argument("--page-timeout", type=float, metavar="SECONDS",
+                     help="Time limit per page (default: $PAGE_TIMEOUT_SECONDS or 60)")
+    add.add_argument("--timeout", type=float, metavar="SECONDS",
+                     help="Time limit for page extraction of each PDF (default: $TIMEOUT_SECONDS)")
+    add.add_argument("--fallback", choices=["pymupdf"],
+                     help="Retry pages that time out or fail with this extraction backend")
+
+    run = commands.add_parser("work", help="Run worker processes")
+    run.add_argument("-w", "--workers", type=int, default=int(os.getenv("MAX_WORKERS", 1)),
+                     help="Worker processes (default: $MAX_WORKERS or 1)")
+    run.add_argument("--lease", type=float, default=LEASE_SECONDS, metavar="SECONDS",
+                     help=f"Lease length; renewed while a job runs (default: {LEASE_SECONDS:.0f})")
+    run.add_argument("--drain", action="store_true",
+                     help="Exit once no jobs are queued or running")
+    run.add_argument("-v", "--verbose", action="store_true", help="Verbose logging")
+
+    status = commands.add_parser("status", help="Show queue depth and throughput")
+    status.add_argument("--window", type=float, default=15.0, metavar="MINUTES",
+                        help="Throughput window (default: 15)")
+    status.add_argument("--json", action="store_true", help="Print JSON")
+
+    commands.add_parser("retry", help="Requeue failed jobs")
+
+    args = parser.parse_args()
+
+    if args.command == "work":
+        log_level = "DEBUG" if args.verbose else "INFO"
+        if args.workers == 1:
+            work(args.queue, args.lease, args.drain, log_level)
+            return 0
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=work, args=(args.queue, args.lease, args.drain,
+                                                        log_level))
+                     for _ in range(args.workers)]
+        for process in processes:
+            process.start()
+        # Workers finish their current job on SIGINT/SIGTERM; pass SIGTERM on to them
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda *_: [p.terminate() for p in processes])
+        for process in processes:
+            process.join()
+        return 0
+
+    queue = JobQueue(args.queue)
+    try:
+        if args.command == "add":
+            load_env()
+            _, page_timeout, document_timeout = extraction_limits(1, args.page_timeout,
+                                                                  args.timeout)
+            options = {
+                'format': args.format,
+                'validate': not args.no_validate,
+                'config_path': args.config,
+                'profile': args.profile,
+                'time_budget': args.time_budget,
+                # Pages run in a supervised child, so a stalled page fails the
+                # attempt instead of hanging the worker
+                'page_workers': 1,
+                'page_timeout': page_timeout,
+                'document_timeout': document_timeout,
+                'fallback': args.fallback
+            }
+            output_dir = Path(args.output_dir)
+            added = 0
+            for pdf in collect_pdfs(args.inputs):
+                queue.enqueue(str(pdf), dict(
+                    options,
+                    output_path=str(output_dir / f"{pdf.stem}_parsed.{args.format}"),
+                    report_path=str(output_dir / f"{pdf.stem}_validation.json")
+                ), priority=args.priority, max_attempts=args.max_attempts)
+                added += 1
+            print(f"Queued {added} PDFs (priority {args.priority})")
+        elif args.command == "status":
+            stats = queue.stats(window=args.window * 60)
+            print(json.dumps(stats.to_dict(), indent=2) if args.json else stats.format())
+        elif args.command == "retry":
+            print(f"Requeued {queue.retry_failed()} failed jobs")
+    finally:
+        queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,12 +5,19 @@ This agent performs hierarchical analysis, sequence verification, and cross-refe
 validation to ensure logical consistency and completeness of the parsed data.
 """
 
-import re
-from typing import List, Dict, Any, Set, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict
+from pathlib import Path
+import numpy as np
 from loguru import logger
 
+from src.agents.features import FeatureFrame
+from src.agents.checks import ArtifactStore, CheckContext, SamplingPlan, default_registry
+from src.utils.reference_catalog import ReferenceCatalog, format_code_key
+from src.utils.row_cache import RowResultCache
+from src.utils.running_stats import RunningStats
+
 
 @dataclass
 class AuditIssue:
@@ -30,6 +37,9 @@ class AuditResult:
     issues: List[AuditIssue] = field(default_factory=list)
     stats: Dict[str, Any] = field(default_factory=dict)
     anomalies: List[Dict[str, Any]] = field(default_factory=list)
+    # Per-division title length statistics; mergeable across chunks with
+    # src.utils.running_stats.merge_grouped_stats
+    title_length_stats: Dict[str, RunningStats] = field(default_factory=dict)
 
 
 class AuditorAgent:
@@ -46,18 +56,44 @@ class AuditorAgent:
     - Coverage verification
     """
 
-    def __init__(self, config: Dict[str, Any] = None):
+    def __init__(self, config: Dict[str, Any] = None,
+                 catalog: ReferenceCatalog = None):
         """
         Initialize the Auditor Agent.
 
         Args:
             config: Configuration dictionary with audit rules
+            catalog: Optional reference catalog for code-level cross-referencing
+                     (opened from config['reference_catalog'] if not provided)
         """
         self.config = config or {}
         self.require_sequence_order = self.config.get('require_sequence_order', True)
         self.check_cross_references = self.config.get('check_cross_references', True)
         self.hierarchy_depth = self.config.get('hierarchy_depth', 3)
         self.detect_anomalies = self.config.get('detect_anomalies', True)
+        self.max_reported_codes = self.config.get('max_reported_codes', 50)
+
+        # Anomaly detection thresholds
+        self.anomaly_z_threshold = self.config.get('anomaly_z_threshold', 3.0)
+        self.anomaly_min_samples = self.config.get('anomaly_min_samples', 8)
+        self.gap_iqr_multiplier = self.config.get('gap_iqr_multiplier', 3.0)
+        self.min_sequence_gap = self.config.get('min_sequence_gap', 1000)
+
+        # Check scheduling (see src/agents/checks.py)
+        self.registry = default_registry
+        self.disabled_checks = set(self.config.get('disabled_checks', []))
+        self.check_workers = self.config.get('check_workers', 1)
+        self.row_cache: Optional[RowResultCache] = None  # Set by the orchestrator
+
+        # Reference catalog of full Level 2/3 codes (optional)
+        self.catalog = catalog
+        catalog_path = self.config.get('reference_catalog')
+        if self.catalog is None and catalog_path:
+            if Path(catalog_path).exists():
+                self.catalog = ReferenceCatalog.open(catalog_path)
+            else:
+                logger.warning(f"Reference catalog not found: {catalog_path} "
+                               f"(falling back to division-level checks)")
 
         # Known CSI MasterFormat divisions (for cross-reference)
         self.known_divisions = {
@@ -100,12 +136,20 @@ class AuditorAgent:
 
         logger.info("Auditor Agent initialized")
 
-    def audit(self, codes: List[Dict[str, str]]) -> AuditResult:
+    def audit(self, codes: List[Dict[str, str]],
+              features: FeatureFrame = None,
+              artifacts: ArtifactStore = None,
+              sampling: SamplingPlan = None,
+              profiler: Any = None) -> AuditResult:
         """
         Perform comprehensive audit on validated codes.
 
         Args:
             codes: List of parsed and validated code dictionaries
+            features: Precomputed feature frame for `codes` (built if not provided)
+            artifacts: Shared artifact store of the current run (created if not provided)
+            sampling: Row checks to run on a sample of rows (from the validation profile)
+            profiler: Optional RunProfiler receiving each check's wall and CPU time
 
         Returns:
             AuditResult with issues, anomalies, and statistics
@@ -113,7 +157,6 @@ class AuditorAgent:
         logger.info(f"Starting audit of {len(codes)} codes")
 
         issues = []
-        anomalies = []
 
         # Track statistics
         stats = {
@@ -134,16 +177,20 @@ class AuditorAgent:
             ))
             return AuditResult(passed=False, issues=issues, stats=stats)
 
-        # Run audit checks
-        issues.extend(self._check_hierarchical_consistency(codes, stats))
-        issues.extend(self._verify_sequence_order(codes, stats))
-        issues.extend(self._cross_reference_validation(codes, stats))
-        issues.extend(self._analyze_context(codes))
-
-        if self.detect_anomalies:
-            anomalies = self._detect_anomalies(codes, stats)
-
-        issues.extend(self._verify_coverage(codes, stats))
+        if features is None:
+            features = FeatureFrame.build(codes)
+
+        # Run the registered audit checks
+        context = CheckContext(codes=codes, features=features, stats=stats,
+                               registry=self.registry,
+                               artifacts=artifacts if artifacts is not None else ArtifactStore())
+        results = self.registry.run('auditor', self, context,
+                                    disabled=self.disabled_checks, workers=self.check_workers,
+                                    cache=self.row_cache, sampling=sampling,
+                                    profiler=profiler)
+        issues.extend(results.get('issues', []))
+        anomalies = results.get('anomalies', [])
+        title_length_stats = context.outputs.get('title_length_stats', {})
 
         # Determine pass/fail
         critical_issues = [i for i in issues if i.severity == 'CRITICAL']
@@ -160,30 +207,30 @@ class AuditorAgent:
             passed=passed,
             issues=issues,
             stats=stats,
-            anomalies=anomalies
+            anomalies=anomalies,
+            title_length_stats=title_length_stats
         )
 
     def _check_hierarchical_consistency(self, codes: List[Dict[str, str]],
-                                       stats: Dict) -> List[AuditIssue]:
-        """Verify parent-child code relationships and hierarchical structure."""
+                                       features: FeatureFrame,
+                                       stats: Dict,
+                                       code_prefixes: Set[str]) -> List[AuditIssue]:
+        """
+        Verify parent-child code relationships and hierarchical structure.
+
+        code_prefixes: 4-digit code prefixes present in the dataset (hierarchy index)
+        """
         issues = []
 
         # Build hierarchy map: division -> level1 -> level2
         hierarchy = defaultdict(lambda: defaultdict(set))
 
-        for idx, code_entry in enumerate(codes, 1):
-            division = code_entry.get('division', '')
-            code = code_entry.get('code', '')
-
-            # Parse code levels
-            code_parts = re.sub(r'\s+', '', code).split()
-
-            if len(code_parts) == 0:
+        for division, code_digits in zip(features.divisions, features.code_digits):
+            if not code_digits:
                 continue
 
             # For 4-digit codes: XX XX -> level 1
             # For 6-digit codes: XX XX XX -> level 2
-            code_digits = ''.join(code_parts)
 
             if len(code_digits) == 4:
                 level1 = code_digits[2:4]
@@ -202,10 +249,7 @@ class AuditorAgent:
                 if level2_codes and None not in level2_codes and len(level2_codes) > 0:
                     # Check if parent level 1 exists
                     parent_code = f"{division} {level1}"
-                    has_parent = any(
-                        c.get('code', '').replace(' ', '')[:4] == f"{division}{level1}"
-                        for c in codes
-                    )
+                    has_parent = f"{division}{level1}" in code_prefixes
 
                     if not has_parent:
                         issues.append(AuditIssue(
@@ -221,6 +265,7 @@ class AuditorAgent:
         return issues
 
     def _verify_sequence_order(self, codes: List[Dict[str, str]],
+                               features: FeatureFrame,
                                stats: Dict) -> List[AuditIssue]:
         """Verify that codes follow proper sequential ordering."""
         issues = []
@@ -236,9 +281,10 @@ class AuditorAgent:
             code = code_entry.get('code', '')
 
             try:
-                # Convert code to integer for comparison
-                code_digits = re.sub(r'\s+', '', code)
-                code_int = int(code_digits)
+                # Integer form of the code for comparison
+                code_int = features.code_ints[idx - 1]
+                if code_int is None:
+                    raise ValueError(f"Non-numeric code: {code}")
                 division_int = int(division)
 
                 # Check division sequence
@@ -285,6 +331,7 @@ class AuditorAgent:
         return issues
 
     def _cross_reference_validation(self, codes: List[Dict[str, str]],
+                                    features: FeatureFrame,
                                     stats: Dict) -> List[AuditIssue]:
         """Cross-reference codes against known CSI MasterFormat structure."""
         issues = []
@@ -321,9 +368,49 @@ class AuditorAgent:
                 details={'note': 'This may be expected if document is a subset'}
             ))
 
+        if self.catalog is not None:
+            issues.extend(self._cross_reference_catalog(features, stats))
+
         return issues
 
-    def _analyze_context(self, codes: List[Dict[str, str]]) -> List[AuditIssue]:
+    def _cross_reference_catalog(self, features: FeatureFrame,
+                                 stats: Dict) -> List[AuditIssue]:
+        """Check every parsed code against the reference catalog."""
+        issues = []
+
+        keys = np.asarray(features.code_keys, dtype=np.int64)
+        valid = keys >= 0
+        found = self.catalog.contains_many(keys) & valid
+
+        stats['catalog_edition'] = self.catalog.edition
+        stats['catalog_matched'] = int(found.sum())
+        stats['catalog_unexpected'] = int((valid & ~found).sum())
+
+        # Group codes missing from the catalog by division
+        unexpected_by_division = defaultdict(list)
+        for idx in np.flatnonzero(valid & ~found):
+            unexpected_by_division[int(keys[idx]) // 10000].append(int(idx))
+
+        for division, rows in sorted(unexpected_by_division.items()):
+            reported = rows[:self.max_reported_codes]
+            issues.append(AuditIssue(
+                severity='MEDIUM',
+                category='CrossReference',
+                message=(f'{len(rows)} codes in division {division:02d} not found in '
+                         f'MasterFormat {self.catalog.edition} reference catalog'),
+                line_number=reported[0] + 1,
+                code=format_code_key(int(keys[reported[0]])),
+                details={
+                    'unexpected_count': len(rows),
+                    'unexpected_codes': [format_code_key(int(keys[i])) for i in reported],
+                    'line_numbers': [i + 1 for i in reported]
+                }
+            ))
+
+        return issues
+
+    def _analyze_context(self, codes: List[Dict[str, str]],
+                         features: FeatureFrame) -> List[AuditIssue]:
         """Analyze whether titles make contextual sense for their codes."""
         issues = []
 
@@ -342,8 +429,8 @@ class AuditorAgent:
         }
 
         for idx, code_entry in enumerate(codes, 1):
-            division = code_entry.get('division', '')
-            title = code_entry.get('title', '').lower()
+            division = features.divisions[idx - 1]
+            title = features.titles_lower[idx - 1]
             code = code_entry.get('code', '')
 
             # Skip if not a division we have keywords for
@@ -370,75 +457,134 @@ class AuditorAgent:
         return issues
 
     def _detect_anomalies(self, codes: List[Dict[str, str]],
-                         stats: Dict) -> List[Dict[str, Any]]:
-        """Detect unusual patterns or outliers in the data."""
+                         features: FeatureFrame,
+                         stats: Dict,
+                         division_stats: Dict[str, RunningStats]) -> List[Dict[str, Any]]:
+        """
+        Detect unusual patterns or outliers in the data.
+
+        Title lengths are compared with one-pass statistics of their own
+        division, falling back to the dataset statistics for small divisions.
+        Lengths are right-skewed (a few long titles, none below one word), so
+        a z-score on the raw length can never reach the threshold on the
+        short side: long titles are flagged by the z-score of their length,
+        short ones by the z-score of their log-length. Sequence gaps are
+        found with a vectorized diff over the packed code keys of each
+        division and flagged by an IQR fence.
+        """
         anomalies = []
 
-        # Analyze title lengths
-        title_lengths = [len(c.get('title', '')) for c in codes]
-        avg_length = sum(title_lengths) / len(title_lengths) if title_lengths else 0
+        lengths = np.asarray(features.title_lengths, dtype=np.float64)
+        division_ids, division_index = np.unique(
+            np.asarray(features.divisions, dtype=object), return_inverse=True
+        )
+        division_index = division_index.ravel()
 
-        # Detect unusually long or short titles
-        for idx, code_entry in enumerate(codes, 1):
-            title = code_entry.get('title', '')
-            code = code_entry.get('code', '')
+        # Rows of each division, from one stable sort
+        order = np.argsort(division_index, kind='stable')
+        division_rows = np.split(order, np.flatnonzero(np.diff(division_index[order])) + 1)
 
-            if len(title) > avg_length * 3:  # 3x longer than average
-                anomalies.append({
-                    'type': 'unusually_long_title',
-                    'line_number': idx,
-                    'code': code,
-                    'title': title,
-                    'length': len(title),
-                    'avg_length': avg_length
-                })
-                stats['anomalies_detected'] += 1
-            elif len(title) < avg_length * 0.3 and len(title) > 0:  # 30% of average
+        # Empty titles are reported by the Validator and have no log-length
+        nonempty = lengths > 0
+        log_lengths = np.log(np.where(nonempty, lengths, 1.0))
+
+        # One accumulator per division (of lengths, and of log-lengths for the
+        # short side); merged for dataset-level statistics
+        log_stats: Dict[str, RunningStats] = {}
+        for rows in division_rows:
+            if len(rows) == 0:
+                continue
+            division = division_ids[division_index[rows[0]]]
+            division_stats[division] = RunningStats()
+            division_stats[division].push_many(lengths[rows])
+            log_stats[division] = RunningStats()
+            log_stats[division].push_many(log_lengths[rows[nonempty[rows]]])
+
+        overall, overall_log = RunningStats(), RunningStats()
+        for division, accumulator in division_stats.items():
+            overall.merge(accumulator)
+            overall_log.merge(log_stats[division])
+
+        stats['title_length_stats'] = overall.to_dict()
+
+        # Detect unusually long or short titles
+        for rows in division_rows:
+            if len(rows) == 0:
+                continue
+            division = division_ids[division_index[rows[0]]]
+            rows = rows[nonempty[rows]]
+            small = division_stats[division].count < self.anomaly_min_samples
+            reference = overall if small else division_stats[division]
+            log_reference = overall_log if small else log_stats[division]
+
+            flagged = []
+            if reference.stddev > 0:
+                zscores = (lengths[rows] - reference.mean) / reference.stddev
+                long_titles = zscores > self.anomaly_z_threshold
+                flagged += [('unusually_long_title', row, z) for row, z in
+                            zip(rows[long_titles].tolist(), zscores[long_titles].tolist())]
+            if log_reference.stddev > 0:
+                zscores = (log_lengths[rows] - log_reference.mean) / log_reference.stddev
+                short_titles = zscores < -self.anomaly_z_threshold
+                flagged += [('unusually_short_title', row, z) for row, z in
+                            zip(rows[short_titles].tolist(), zscores[short_titles].tolist())]
+
+            for kind, row, z in sorted(flagged, key=lambda item: item[1]):
                 anomalies.append({
-                    'type': 'unusually_short_title',
-                    'line_number': idx,
-                    'code': code,
-                    'title': title,
-                    'length': len(title),
-                    'avg_length': avg_length
+                    'type': kind,
+                    'line_number': row + 1,
+                    'code': codes[row].get('code', ''),
+                    'division': division,
+                    'title': features.titles[row],
+                    'length': int(lengths[row]),
+                    'avg_length': reference.mean,
+                    'stddev': reference.stddev,
+                    # Short titles: z-score of the log-length
+                    'z_score': z
                 })
                 stats['anomalies_detected'] += 1
 
-        # Detect gaps in code sequences
-        codes_by_division = defaultdict(list)
-        for code_entry in codes:
-            division = code_entry.get('division', '')
-            code = code_entry.get('code', '')
-            try:
-                code_int = int(re.sub(r'\s+', '', code))
-                codes_by_division[division].append(code_int)
-            except (ValueError, AttributeError):
-                pass
-
-        # Check for large gaps in sequences
-        for division, code_list in codes_by_division.items():
-            if len(code_list) < 2:
+        # Detect gaps in code sequences: sort packed keys by (division, key)
+        # and diff neighbours within each division
+        keys = np.asarray(features.code_keys, dtype=np.int64)
+        valid = keys >= 0
+        order = np.lexsort((keys[valid], division_index[valid]))
+        sorted_keys = keys[valid][order]
+        sorted_divisions = division_index[valid][order]
+        gaps = np.diff(sorted_keys)
+
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_divisions)) + 1))
+        ends = np.concatenate((starts[1:], [len(sorted_keys)]))
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            division_gaps = gaps[start:end - 1]
+            positive_gaps = division_gaps[division_gaps > 0]
+            if len(positive_gaps) == 0:
                 continue
 
-            sorted_codes = sorted(code_list)
-            for i in range(len(sorted_codes) - 1):
-                gap = sorted_codes[i + 1] - sorted_codes[i]
-                if gap > 1000:  # Large gap detected
-                    anomalies.append({
-                        'type': 'large_sequence_gap',
-                        'division': division,
-                        'gap_size': gap,
-                        'before_code': sorted_codes[i],
-                        'after_code': sorted_codes[i + 1]
-                    })
-                    stats['anomalies_detected'] += 1
+            q1, q3 = np.percentile(positive_gaps, [25, 75])
+            fence = max(self.min_sequence_gap, q3 + self.gap_iqr_multiplier * (q3 - q1))
+
+            for position in (np.flatnonzero(division_gaps > fence) + start).tolist():
+                anomalies.append({
+                    'type': 'large_sequence_gap',
+                    'division': division_ids[sorted_divisions[start]],
+                    'gap_size': int(gaps[position]),
+                    'gap_fence': float(fence),
+                    'before_code': format_code_key(int(sorted_keys[position])),
+                    'after_code': format_code_key(int(sorted_keys[position + 1]))
+                })
+                stats['anomalies_detected'] += 1
 
         logger.info(f"Detected {len(anomalies)} anomalies")
         return anomalies
 
     def _verify_coverage(self, codes: List[Dict[str, str]],
+                        features: FeatureFrame,
                         stats: Dict) -> List[AuditIssue]:
         """Verify that expected codes are present (coverage analysis)."""
+        if self.catalog is not None:
+            return self._verify_catalog_coverage(features, stats)
+
         issues = []
 
         # Count codes per division
@@ -459,3 +605,88 @@ class AuditorAgent:
                 ))
 
         return issues
+
+    def _verify_catalog_coverage(self, features: FeatureFrame,
+                                 stats: Dict) -> List[AuditIssue]:
+        """Report exact catalog codes missing from each parsed division."""
+        issues = []
+
+        keys = np.asarray(features.code_keys, dtype=np.int64)
+        keys = np.unique(keys[keys >= 0])
+
+        # Only divisions present in the document are checked, since a
+        # document may legitimately be a subset of the full edition.
+        missing_total = 0
+        for division in np.unique(keys // 10000):
+            division = int(division)
+            expected = self.catalog.keys[self.catalog.division_slice(division)]
+            if len(expected) == 0:
+                continue
+
+            missing = np.setdiff1d(expected, keys, assume_unique=True)
+            if len(missing) == 0:
+                continue
+
+            missing_total += len(missing)
+            issues.append(AuditIssue(
+                severity='MEDIUM',
+                category='Coverage',
+                message=(f'Division {division:02d} is missing {len(missing)} of '
+                         f'{len(expected)} MasterFormat {self.catalog.edition} codes'),
+                code=f"{division:02d}",
+                details={
+                    'missing_count': int(len(missing)),
+                    'expected_count': int(len(expected)),
+                    'missing_codes': [format_code_key(int(k))
+                                      for k in missing[:self.max_reported_codes]]
+                }
+            ))
+
+        stats['catalog_missing'] = missing_total
+
+        return issues
+
+
+# ---------------------------------------------------------------------------
+# Built-in checks, registered in reporting order
+# ---------------------------------------------------------------------------
+
+@default_registry.check('auditor.hierarchy', agent='auditor', inputs=['hierarchy_index'],
+                        cost='moderate', severity='MEDIUM', row_cost=1e-6)
+def check_hierarchy(agent: AuditorAgent, context: CheckContext) -> List[AuditIssue]:
+    return agent._check_hierarchical_consistency(context.codes, context.features, context.stats,
+                                                 context.get('hierarchy_index'))
+
+
+@default_registry.check('auditor.sequence', agent='auditor', cost='moderate',
+                        severity='HIGH', enabled_if='require_sequence_order', row_cost=1e-6)
+def check_sequence(agent: AuditorAgent, context: CheckContext) -> List[AuditIssue]:
+    return agent._verify_sequence_order(context.codes, context.features, context.stats)
+
+
+@default_registry.check('auditor.cross_reference', agent='auditor', cost='moderate',
+                        severity='MEDIUM', enabled_if='check_cross_references')
+def check_cross_reference(agent: AuditorAgent, context: CheckContext) -> List[AuditIssue]:
+    return agent._cross_reference_validation(context.codes, context.features, context.stats)
+
+
+@default_registry.check('auditor.context', agent='auditor', scope='row', severity='LOW')
+def check_context(agent: AuditorAgent, context: CheckContext) -> List[AuditIssue]:
+    return agent._analyze_context(context.codes, context.features)
+
+
+@default_registry.check('auditor.anomalies', agent='auditor', outputs=['title_length_stats'],
+                        cost='expensive', severity='LOW', result='anomalies',
+                        enabled_if='detect_anomalies', row_cost=2e-6)
+def check_anomalies(agent: AuditorAgent, context: CheckContext) -> List[Dict[str, Any]]:
+    title_length_stats: Dict[str, RunningStats] = {}
+    anomalies = agent._detect_anomalies(context.codes, context.features, context.stats,
+                                        title_length_stats)
+    context.outputs['title_length_stats'] = title_length_stats
+    return anomalies
+
+
+@default_registry.check('auditor.coverage', agent='auditor', cost='moderate', severity='MEDIUM',
+                        row_cost=0.5e-6)
+def check_coverage(agent: AuditorAgent, context: CheckContext) -> List[AuditIssue]:
+    return agent._verify_coverage(context.codes, context.features, context.stats)
@@ -0,0 +1,507 @@
+"""
+Check Registry - Declarative validation checks scheduled as a DAG.
+
+Every check run by the Validator, Auditor and QC agents is registered here
+with the data it reads (inputs), the data it produces for later checks
+(outputs), a cost class and the highest severity it reports. Inputs are
+either outputs of other checks or shared artifacts: values such as the
+duplicate map or the hierarchy index that are built lazily, at most once
+per run, and shared between checks and agents.
+
+Each agent asks the registry for its enabled checks, arranges them into
+dependency levels and runs each level, optionally in parallel. Disabled
+checks are never run, and artifacts only they would need are never built.
+
+Third-party checks register without touching the agent classes:
+
+    from src.agents.checks import default_registry
+    from src.agents.qc_agent import QCIssue
+
+    @default_registry.check('qc.no_todo_titles', agent='qc', severity='MEDIUM')
+    def no_todo_titles(agent, context):
+        return [QCIssue(severity='MEDIUM', category='Plugin', message='TODO in title',
+                        line_number=row + 1)
+                for row, title in enumerate(context.features.titles) if 'TODO' in title]
+
+and are loaded by listing their module under `check_plugins` in the
+validation config. Check functions receive the agent instance and a
+CheckContext, and return a list of the agent's issue objects.
+
+Checks whose findings for a row depend only on that row are registered
+with scope='row'. When an agent has a RowResultCache (see
+src/utils/row_cache.py), row checks above the 'cheap' cost class run only
+on rows whose content, rules or configuration changed since a previous
+run; the findings of all other rows come from the cache. Loading a row's
+findings costs about as much as running a cheap check, so those re-run.
+
+Validation profiles (src/agents/profiles.py) may run LOW-severity row
+checks on a random sample of rows instead; the agent's stats then report
+the sampled rate of flagged rows with a confidence interval.
+
+Row checks must report every issue with a line number, must not write to
+`context.stats`, and cannot have inputs or outputs. Bump a check's
+`version` whenever its logic changes, and RULESET_VERSION when shared row
+logic changes, so stale findings are not reused.
+"""
+
+import importlib
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from src.agents.features import FeatureFrame
+from src.utils.row_cache import RowResultCache, hash_row, hash_ruleset, paused_gc
+from src.utils.sequential_sampling import wilson_interval
+
+
+AGENTS = ('validator', 'auditor', 'qc')
+COST_CLASSES = ('cheap', 'moderate', 'expensive')
+# Estimated seconds per row by cost class (measured on the built-in checks)
+COST_ESTIMATES = {'cheap': 2e-6, 'moderate': 8e-6, 'expensive': 20e-6}
+SEVERITIES = ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW')
+SCOPES = ('dataset', 'row')
+MEMOIZED_COSTS = ('moderate', 'expensive')  # Row checks worth caching
+
+# Part of every row cache key; bump to invalidate all cached row findings
+RULESET_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Check:
+    """A registered validation check."""
+    name: str                          # Unique, prefixed by agent ("validator.duplicates")
+    agent: str                         # validator, auditor or qc
+    func: Callable[[Any, 'CheckContext'], List[Any]]
+    inputs: Tuple[str, ...] = ()       # Artifacts or other checks' outputs it reads
+    outputs: Tuple[str, ...] = ()      # Values it stores in context.outputs
+    cost: str = 'cheap'                # cheap, moderate, expensive
+    severity: str = 'LOW'              # Highest severity it reports
+    result: str = 'issues'             # Result list its findings go to (e.g. errors, warnings)
+    enabled_if: Optional[str] = None   # Agent attribute that must be truthy for it to run
+    scope: str = 'dataset'             # 'row' if each row's findings depend only on that row
+    version: int = 1                   # Bump when the check's logic changes
+    row_cost: Optional[float] = None   # Estimated seconds per row (default: by cost class)
+    fixed_cost: float = 0.0            # Estimated seconds per run, independent of rows
+
+    def estimate(self, rows: int) -> float:
+        """Estimated run time in seconds on `rows` rows."""
+        per_row = self.row_cost if self.row_cost is not None else COST_ESTIMATES[self.cost]
+        return self.fixed_cost + per_row * rows
+
+
+@dataclass(frozen=True)
+class Artifact:
+    """A shared value derived from the codes, built on first use."""
+    name: str
+    func: Callable[['CheckContext'], Any]
+    inputs: Tuple[str, ...] = ()
+
+
+class ArtifactStore:
+    """Per-run cache of built artifacts, safe to share between threads and agents."""
+
+    def __init__(self):
+        self.values: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def lock(self, name: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.values
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Locks cannot be pickled (process executors); built values travel as they are
+        return {'values': self.values}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.values = state['values']
+        self._locks = {}
+        self._guard = threading.Lock()
+
+
+@dataclass
+class SamplingPlan:
+    """Row checks to run on a random sample of rows instead of on every row."""
+    sizes: Dict[str, int] = field(default_factory=dict)  # Check name -> rows to sample
+    seed: Optional[int] = None                           # Fix for reproducible samples
+
+
+@dataclass
+class CheckContext:
+    """Everything a check can read: the codes, shared features and artifacts."""
+    codes: List[Dict[str, Any]]
+    features: FeatureFrame
+    stats: Dict[str, Any]
+    registry: 'CheckRegistry'
+    artifacts: ArtifactStore = field(default_factory=ArtifactStore)
+    outputs: Dict[str, Any] = field(default_factory=dict)  # Values produced by checks
+    extra: Dict[str, Any] = field(default_factory=dict)    # Agent-specific run inputs
+
+    def get(self, name: str) -> Any:
+        """Value of a check output, or of a shared artifact (built on first use)."""
+        if name in self.outputs:
+            return self.outputs[name]
+        return self.registry.build_artifact(name, self)
+
+    def subset(self, rows: List[int]) -> 'CheckContext':
+        """Context over the selected rows only (for row checks); line numbers restart at 1."""
+        return CheckContext(codes=[self.codes[row] for row in rows],
+                            features=self.features.take(rows), stats={},
+                            registry=self.registry, extra=self.extra)
+
+
+class CheckRegistry:
+    """Registered checks and artifacts, and the scheduler that runs them."""
+
+    def __init__(self):
+        self.checks: Dict[str, Check] = {}
+        self.artifacts: Dict[str, Artifact] = {}
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def register(self, check: Check) -> Check:
+        if check.agent not in AGENTS:
+            raise ValueError(f"Check {check.name}: unknown agent '{check.agent}'")
+        if check.cost not in COST_CLASSES:
+            raise ValueError(f"Check {check.name}: unknown cost class '{check.cost}'")
+        if check.severity not in SEVERITIES:
+            raise ValueError(f"Check {check.name}: unknown severity '{check.severity}'")
+        if check.scope not in SCOPES:
+            raise ValueError(f"Check {check.name}: unknown scope '{check.scope}'")
+        if check.scope == 'row' and (check.inputs or check.outputs):
+            raise ValueError(f"Check {check.name}: row checks cannot have inputs or outputs")
+        if (check.row_cost is not None and check.row_cost < 0) or check.fixed_cost < 0:
+            raise ValueError(f"Check {check.name}: cost estimates must not be negative")
+        if check.name in self.checks:
+            raise ValueError(f"Check already registered: {check.name}")
+        self.checks[check.name] = check
+        return check
+
+    def check(self, name: str, agent: str, inputs: Iterable[str] = (),
+              outputs: Iterable[str] = (), cost: str = 'cheap', severity: str = 'LOW',
+              result: str = 'issues', enabled_if: str = None, scope: str = 'dataset',
+              version: int = 1, row_cost: float = None, fixed_cost: float = 0.0):
+        """Decorator registering a check function `func(agent, context) -> List[issue]`."""
+        def decorator(func):
+            self.register(Check(name=name, agent=agent, func=func, inputs=tuple(inputs),
+                                outputs=tuple(outputs), cost=cost, severity=severity,
+                                result=result, enabled_if=enabled_if, scope=scope,
+                                version=version, row_cost=row_cost,
+                                fixed_cost=fixed_cost))
+            return func
+        return decorator
+
+    def artifact(self, name: str, inputs: Iterable[str] = ()):
+        """Decorator registering an artifact builder `func(context) -> value`."""
+        def decorator(func):
+            if name in self.artifacts:
+                raise ValueError(f"Artifact already registered: {name}")
+            self.artifacts[name] = Artifact(name=name, func=func, inputs=tuple(inputs))
+            return func
+        return decorator
+
+    def build_artifact(self, name: str, context: CheckContext) -> Any:
+        """Build an artifact once per store; concurrent requests wait for the first build."""
+        store = context.artifacts
+        if name in store:
+            return store.values[name]
+        if name not in self.artifacts:
+            raise KeyError(f"Unknown artifact or check output: {name}")
+
+        with store.lock(name):
+            if name not in store:
+                artifact = self.artifacts[name]
+                for dependency in artifact.inputs:
+                    context.get(dependency)
+                store.values[name] = artifact.func(context)
+                logger.debug(f"Built artifact {name}")
+        return store.values[name]
+
+    # ------------------------------------------------------------------
+    # Planning
+    # ------------------------------------------------------------------
+
+    def plan(self, agent_name: str, agent: Any = None,
+             disabled: Iterable[str] = ()) -> List[List[Check]]:
+        """
+        Arrange an agent's enabled checks into dependency levels.
+
+        A check depends on the checks producing its inputs; checks in the
+        same level are independent of each other. Checks that are disabled
+        (by name or by their `enabled_if` flag), or whose inputs are
+        produced by a disabled check, are left out.
+        """
+        disabled = set(disabled)
+        candidates = [c for c in self.checks.values() if c.agent == agent_name]
+        enabled = []
+        for check in candidates:
+            if check.name in disabled:
+                continue
+            if check.enabled_if and agent is not None and not getattr(agent, check.enabled_if):
+                continue
+            enabled.append(check)
+
+        producers: Dict[str, Check] = {}
+        for check in enabled:
+            for output in check.outputs:
+                producers[output] = check
+        unavailable = {output for check in candidates if check not in enabled
+                       for output in check.outputs} - set(producers)
+
+        levels: List[List[Check]] = []
+        placed: Dict[str, int] = {}
+        pending = list(enabled)
+        while pending:
+            progressed = False
+            for check in list(pending):
+                missing = [name for name in check.inputs if name in unavailable]
+                if missing:
+                    logger.warning(f"Skipping check {check.name}: inputs {missing} come from disabled checks")
+                    pending.remove(check)
+                    unavailable.update(check.outputs)
+                    progressed = True
+                    continue
+                dependencies = [producers[name].name for name in check.inputs if name in producers]
+                if all(dep in placed for dep in dependencies):
+                    level = 1 + max((placed[dep] for dep in dependencies), default=-1)
+                    if level == len(levels):
+                        levels.append([])
+                    levels[level].append(check)
+                    placed[check.name] = level
+                    pending.remove(check)
+                    progressed = True
+            if not progressed:
+                raise ValueError(f"Dependency cycle between checks: {[c.name for c in pending]}")
+
+        return levels
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def run(self, agent_name: str, agent: Any, context: CheckContext,
+            disabled: Iterable[str] = (), workers: int = 1,
+            cache: RowResultCache = None,
+            sampling: SamplingPlan = None,
+            profiler: Any = None) -> Dict[str, List[Any]]:
+        """
+        Run an agent's checks level by level.
+
+        Independent checks of a level run in parallel threads when
+        `workers` > 1 (most expensive first). Findings are collected per
+        result list in registration order, so reports do not depend on
+        scheduling. Row checks listed in `sampling` run on a random sample
+        of rows. With a row result `cache`, memoized row checks run first
+        and only on rows missing from the cache. A RunProfiler `profiler`
+        receives each check's wall and CPU time.
+
+        Returns:
+            Result list name -> findings (e.g. {'errors': [...], 'warnings': [...]})
+        """
+        levels = self.plan(agent_name, agent, disabled)
+        findings: Dict[str, List[Any]] = {}
+
+        if sampling is not None and sampling.sizes:
+            sampled = [check for level in levels for check in level
+                       if check.scope == 'row' and check.name in sampling.sizes
+                       and sampling.sizes[check.name] < len(context.codes)]
+            for check in sampled:
+                findings[check.name] = self._run_sampled(check, agent, context,
+                                                         sampling.sizes[check.name],
+                                                         sampling.seed, profiler)
+            levels = [[check for check in level if check not in sampled] for level in levels]
+
+        if cache is not None:
+            memoized = [check for level in levels for check in level
+                        if check.scope == 'row' and check.cost in MEMOIZED_COSTS]
+            if memoized:
+                findings.update(self._run_row_checks(agent_name, agent, memoized,
+                                                     context, cache, profiler))
+                levels = [[check for check in level if check not in memoized]
+                          for level in levels]
+
+        for level in levels:
+            if workers > 1 and len(level) > 1:
+                ordered = sorted(level, key=lambda c: -COST_CLASSES.index(c.cost))
+                with ThreadPoolExecutor(max_workers=min(workers, len(level))) as executor:
+                    futures = {check.name: executor.submit(self._call, agent_name, check, agent,
+                                                           context, profiler)
+                               for check in ordered}
+                    findings.update({check.name: futures[check.name].result() for check in level})
+            else:
+                for check in level:
+                    findings[check.name] = self._call(agent_name, check, agent, context, profiler)
+
+        results: Dict[str, List[Any]] = {}
+        for check in self.checks.values():
+            if check.name in findings:
+                results.setdefault(check.result, []).extend(findings[check.name] or [])
+        return results
+
+    @staticmethod
+    def _call(agent_name: str, check: Check, agent: Any, context: CheckContext,
+              profiler: Any = None) -> List[Any]:
+        if profiler is None:
+            return check.func(agent, context)
+        with profiler.check(agent_name, check.name):
+            return check.func(agent, context)
+
+    def _run_row_checks(self, agent_name: str, agent: Any, checks: List[Check],
+                        context: CheckContext, cache: RowResultCache,
+                        profiler: Any = None) -> Dict[str, List[Any]]:
+        """Row checks with memoized per-row findings; only uncached rows are checked."""
+        row_hashes = context.get('row_hashes')
+        ruleset = hash_ruleset(RULESET_VERSION, agent_name,
+                               [(check.name, check.version) for check in checks],
+                               getattr(agent, 'config', None))
+        cached = cache.get_many(ruleset, row_hashes)
+
+        # One representative row per uncached content hash
+        missing: Dict[bytes, int] = {}
+        uncached_rows = 0
+        for row, row_hash in enumerate(row_hashes):
+            if row_hash not in cached:
+                missing.setdefault(row_hash, row)
+                uncached_rows += 1
+
+        # Issues are stored as (class name, field values) with the line number
+        # cleared: plain tuples and strings unpickle much faster than dataclass
+        # instances, which resolve their class through the import system
+        fresh: Dict[bytes, Dict[str, List[Tuple[str, tuple]]]] = {row_hash: {} for row_hash in missing}
+        if missing:
+            rows = list(missing.values())
+            subset = context.subset(rows)
+            for check in checks:
+                for issue in self._call(agent_name, check, agent, subset, profiler) or []:
+                    if issue.line_number is None:
+                        raise ValueError(f"Row check {check.name} reported an issue without a line number")
+                    row_hash = row_hashes[rows[issue.line_number - 1]]
+                    issue.line_number = None
+                    issue_type = type(issue)
+                    fresh[row_hash].setdefault(check.name, []).append(
+                        (f"{issue_type.__module__}:{issue_type.__qualname__}",
+                         tuple(getattr(issue, f.name) for f in fields(issue))))
+            cache.put_many(ruleset, fresh.items())
+
+        # Rebuild the issues in row order with this dataset's line numbers
+        findings: Dict[str, List[Any]] = {check.name: [] for check in checks}
+        issue_types: Dict[str, type] = {}
+        with paused_gc():
+            for line_number, row_hash in enumerate(row_hashes, 1):
+                row_findings = cached.get(row_hash) or fresh.get(row_hash)
+                if not row_findings:
+                    continue
+                for name, issues in row_findings.items():
+                    for type_name, values in issues:
+                        issue_type = issue_types.get(type_name)
+                        if issue_type is None:
+                            issue_type = issue_types[type_name] = _resolve_type(type_name)
+                        issue = issue_type(*values)
+                        issue.line_number = line_number
+                        findings[name].append(issue)
+
+        # Lookups by distinct content hash, as counted by the cache; they travel
+        # back with the agent's result from process workers
+        context.stats.setdefault('row_cache', {})[agent_name] = {
+            'rows': len(row_hashes),
+            'rows_checked': len(missing),
+            'rows_cached': len(row_hashes) - uncached_rows,
+            'hits': len(cached),
+            'misses': len(missing)
+        }
+        logger.debug(f"Row checks of {agent_name}: {len(missing)} of {len(row_hashes)} rows checked")
+        return findings
+
+    def _run_sampled(self, check: Check, agent: Any, context: CheckContext,
+                     size: int, seed: Optional[int], profiler: Any = None) -> List[Any]:
+        """Run a row check on `size` random rows; records the flagged rate in the stats."""
+        total = len(context.codes)
+        rng = random.Random(f"{seed}:{check.name}") if seed is not None else random.Random()
+        rows = sorted(rng.sample(range(total), size))
+
+        issues = self._call(check.agent, check, agent, context.subset(rows), profiler) or []
+        for issue in issues:
+            if issue.line_number is None:
+                raise ValueError(f"Row check {check.name} reported an issue without a line number")
+            issue.line_number = rows[issue.line_number - 1] + 1
+
+        flagged = len({issue.line_number for issue in issues})
+        low, high = wilson_interval(flagged, size)
+        context.stats.setdefault('sampled_checks', {})[check.name] = {
+            'rows': total,
+            'sampled_rows': size,
+            'flagged_rows': flagged,
+            'issues': len(issues),
+            'estimated_issues': round(len(issues) / size * total) if size else 0,
+            'flagged_rate': flagged / size if size else 0.0,
+            'flagged_rate_ci95': [low, high],
+            'estimated_flagged_rows': round(flagged / size * total) if size else 0,
+            'estimated_flagged_rows_ci95': [round(low * total), round(high * total)]
+        }
+        logger.debug(f"Sampled check {check.name}: {flagged} of {size} rows flagged")
+        return issues
+
+    def describe(self, agent_name: str = None) -> List[Dict[str, Any]]:
+        """Registered checks as dicts (for listings and reports)."""
+        return [
+            {'name': c.name, 'agent': c.agent, 'inputs': list(c.inputs),
+             'outputs': list(c.outputs), 'cost': c.cost, 'severity': c.severity,
+             'scope': c.scope, 'row_cost': c.estimate(1) - c.fixed_cost,
+             'fixed_cost': c.fixed_cost}
+            for c in self.checks.values() if agent_name is None or c.agent == agent_name
+        ]
+
+
+def _resolve_type(type_name: str) -> type:
+    """Class from a "module:qualname" string."""
+    module_name, _, qualname = type_name.partition(':')
+    value = importlib.import_module(module_name)
+    for attribute in qualname.split('.'):
+        value = getattr(value, attribute)
+    return value
+
+
+# Registry holding the built-in checks of all agents and any plugin checks
+default_registry = CheckRegistry()
+
+
+def load_check_plugins(modules: Iterable[str]) -> None:
+    """Import plugin modules so their checks register with the default registry."""
+    for module in modules:
+        importlib.import_module(module)
+        logger.info(f"Loaded check plugin: {module}")
+
+
+# ---------------------------------------------------------------------------
+# Shared artifacts
+# ---------------------------------------------------------------------------
+
+@default_registry.artifact('duplicate_map')
+def build_duplicate_map(context: CheckContext) -> Dict[str, int]:
+    """"division-code" -> 1-based line number of its first occurrence."""
+    first_occurrence: Dict[str, int] = {}
+    for idx, (division, code) in enumerate(zip(context.features.divisions,
+                                               context.features.codes), 1):
+        first_occurrence.setdefault(f"{division}-{code}", idx)
+    return first_occurrence
+
+
+@default_registry.artifact('row_hashes')
+def build_row_hashes(context: CheckContext) -> List[bytes]:
+    """Content hash of every row (keys of the row result cache)."""
+    return [hash_row(code_entry) for code_entry in context.codes]
+
+
+@default_registry.artifact('hierarchy_index')
+def build_hierarchy_index(context: CheckContext) -> Set[str]:
+    """4-digit code prefixes present in the dataset, for parent lookups."""
+    return {digits[:4] for digits in context.features.code_digits}
@@ -0,0 +1,160 @@
+"""
+Feature Frame - Per-row derived values shared by all validation agents.
+
+The Validator, Auditor, and QC agents all need the same derived values for
+every code (whitespace-free code digits, integer code keys, title lengths,
+lowercased titles). The orchestrator builds one FeatureFrame per run and
+hands it to every agent so these values are computed exactly once.
+"""
+
+import re
+from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, field
+
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_code_digits(code: str) -> str:
+    """Strip all whitespace from a code string ("10 10 00" -> "101000")."""
+    return WHITESPACE_PATTERN.sub('', code)
+
+
+def pack_code_key(division: str, code_digits: str) -> int:
+    """
+    Pack a division and code into a single sortable integer.
+
+    4-digit codes ("10 00") are relative to their division, so the division
+    is prepended; 6-digit codes already carry the division prefix. The result
+    is the full 6-digit MasterFormat number as an int ("00 10 00" -> 1000),
+    or -1 if the code cannot be packed.
+    """
+    if len(code_digits) == 4:
+        full = f"{division}{code_digits}"
+    elif len(code_digits) == 6:
+        full = code_digits
+    else:
+        return -1
+
+    if len(full) != 6 or not (full.isascii() and full.isdigit()):
+        return -1
+
+    return int(full)
+
+
+def code_level(code_key: int) -> int:
+    """
+    Hierarchy level of a packed code key.
+
+    Level 1: XX 00 00 (division), Level 2: XX XX 00, Level 3: XX XX XX.
+    Returns 0 for keys that could not be packed.
+    """
+    if code_key < 0:
+        return 0
+    if code_key % 10000 == 0:
+        return 1
+    if code_key % 100 == 0:
+        return 2
+    return 3
+
+
+def _as_text(value: Any) -> str:
+    """Coerce a field value to text (None becomes an empty string)."""
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else str(value)
+
+
+@dataclass
+class FeatureFrame:
+    """
+    Column-oriented derived features for a list of parsed codes.
+
+    All per-row lists are aligned with the input `codes` list (index 0 is
+    line number 1 in agent reports).
+    """
+    divisions: List[str] = field(default_factory=list)
+    codes: List[str] = field(default_factory=list)
+    titles: List[str] = field(default_factory=list)
+
+    # Derived per-row values
+    code_digits: List[str] = field(default_factory=list)    # whitespace-free code
+    code_ints: List[Optional[int]] = field(default_factory=list)  # int(code_digits) or None
+    code_keys: List[int] = field(default_factory=list)      # packed division+code, -1 if invalid
+    levels: List[int] = field(default_factory=list)         # 1-3, 0 if invalid
+    title_lengths: List[int] = field(default_factory=list)
+    titles_lower: List[str] = field(default_factory=list)
+
+    # Dataset-level statistics
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @classmethod
+    def build(cls, codes: List[Dict[str, str]]) -> 'FeatureFrame':
+        """
+        Derive all features from parsed code dictionaries in a single pass.
+
+        Args:
+            codes: List of parsed code dictionaries with 'division', 'code', 'title' keys
+
+        Returns:
+            FeatureFrame aligned with `codes`
+        """
+        frame = cls()
+
+        for code_entry in codes:
+            division = code_entry.get('division', '')
+            code = code_entry.get('code', '')
+            title = code_entry.get('title', '')
+
+            # Non-string values are reported by the Validator's schema check;
+            # derive features from their string form so other checks can run.
+            division = _as_text(division)
+            code = _as_text(code)
+            title = _as_text(title)
+
+            digits = normalize_code_digits(code)
+            try:
+                code_int = int(digits)
+            except ValueError:
+                code_int = None
+            key = pack_code_key(division, digits)
+
+            frame.divisions.append(division)
+            frame.codes.append(code)
+            frame.titles.append(title)
+            frame.code_digits.append(digits)
+            frame.code_ints.append(code_int)
+            frame.code_keys.append(key)
+            frame.levels.append(code_level(key))
+            frame.title_lengths.append(len(title))
+            frame.titles_lower.append(title.lower())
+
+        total = len(frame.codes)
+        frame.stats = {
+            'total_codes': total,
+            'avg_title_length': sum(frame.title_lengths) / total if total else 0,
+            'max_title_length': max(frame.title_lengths) if total else 0,
+            'divisions': sorted(set(frame.divisions)),
+            'level_counts': {
+                level: frame.levels.count(level) for level in (0, 1, 2, 3)
+            }
+        }
+
+        return frame
+
+    def take(self, rows: List[int]) -> 'FeatureFrame':
+        """
+        Frame of the selected rows (0-based indices), in the given order.
+
+        Per-row values are copied; dataset-level `stats` are those of the
+        full frame, since they describe the dataset rather than the rows.
+        """
+        frame = FeatureFrame(stats=self.stats)
+        for name in ('divisions', 'codes', 'titles', 'code_digits', 'code_ints',
+                     'code_keys', 'levels', 'title_lengths', 'titles_lower'):
+            values = getattr(self, name)
+            setattr(frame, name, [values[row] for row in rows])
+        return frame
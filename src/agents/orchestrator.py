@@ -5,16 +5,28 @@ This orchestrator manages the workflow of Validator, Auditor, and QC agents,
 aggregates their results, and makes final quality decisions.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+import asyncio
+import functools
 import json
+import time
 from pathlib import Path
 from loguru import logger
 
+from src.agents.features import FeatureFrame
+from src.agents.checks import ArtifactStore, SamplingPlan, default_registry, load_check_plugins
+from src.agents.profiles import ProfilePlan, get_profile, plan_profile
 from src.agents.validator_agent import ValidatorAgent, ValidationResult
 from src.agents.auditor_agent import AuditorAgent, AuditResult
 from src.agents.qc_agent import QualityControlAgent, QCResult
+from src.agents.repair_agent import RepairAgent, RepairResult
+from src.utils.metrics import RunMetrics
+from src.utils.reference_catalog import ReferenceCatalog
+from src.utils.row_cache import RowResultCache
 
 
 @dataclass
@@ -28,6 +40,7 @@ class OrchestrationResult:
     validator_result: Optional[ValidationResult] = None
     auditor_result: Optional[AuditResult] = None
     qc_result: Optional[QCResult] = None
+    repair_result: Optional[RepairResult] = None  # Only when the repair pass is enabled
 
     # Aggregated data
     total_issues: int = 0
@@ -38,6 +51,7 @@ class OrchestrationResult:
 
     issues_summary: List[Dict[str, Any]] = field(default_factory=list)
     recommendation: str = ""
+    profile: Dict[str, Any] = field(default_factory=dict)  # Validation profile plan of the run
     timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
 
     def to_dict(self) -> Dict[str, Any]:
@@ -65,6 +79,10 @@ class ValidationOrchestrator:
     1. Validator Agent: First-pass structural validation
     2. Auditor Agent: Logical verification and cross-referencing
     3. QC Agent: Final quality control and confidence scoring
+    4. Repair Agent (optional): LLM repair suggestions for QC's low-confidence entries
+
+    The Auditor and QC agents only depend on the Validator passing the
+    critical gate, so they run concurrently on the configured executor.
 
     Quality Gates:
     - Critical Gate: Validator must pass with 0 critical errors
@@ -72,6 +90,8 @@ class ValidationOrchestrator:
     - Confidence Gate: QC confidence > threshold
     """
 
+    EXECUTOR_TYPES = ('thread', 'process', 'none')
+
     def __init__(self, config: Dict[str, Any] = None):
         """
         Initialize the Validation Orchestrator.
@@ -81,26 +101,162 @@ class ValidationOrchestrator:
         """
         self.config = config or {}
 
+        # Third-party checks register with the check registry on import
+        load_check_plugins(self.config.get('check_plugins', []))
+
         # Initialize agents with their specific configs
         validator_config = self.config.get('validator', {})
         auditor_config = self.config.get('auditor', {})
         qc_config = self.config.get('qc', {})
 
+        # Reference catalog is memory-mapped once and shared by the agents
+        self.catalog = None
+        catalog_path = self.config.get('reference_catalog')
+        if catalog_path:
+            if Path(catalog_path).exists():
+                self.catalog = ReferenceCatalog.open(catalog_path)
+            else:
+                logger.warning(f"Reference catalog not found: {catalog_path}")
+
         self.validator = ValidatorAgent(validator_config)
-        self.auditor = AuditorAgent(auditor_config)
-        self.qc = QualityControlAgent(qc_config)
+        self.auditor = AuditorAgent(auditor_config, catalog=self.catalog)
+        self.qc = QualityControlAgent(qc_config, catalog=self.catalog)
+
+        # Persistent memo of row-check findings: re-validating an edited
+        # dataset only re-runs row checks on the rows that changed
+        self.row_cache = None
+        row_cache_path = self.config.get('row_cache')
+        if row_cache_path:
+            self.row_cache = RowResultCache(
+                row_cache_path, max_entries=self.config.get('row_cache_max_entries', 1_000_000)
+            )
+            for agent in (self.validator, self.auditor, self.qc):
+                agent.row_cache = self.row_cache
+
+        # Optional LLM repair pass over QC's low-confidence entries
+        self.repair: Optional[RepairAgent] = None
+        repair_config = self.config.get('repair', {})
+        if repair_config.get('enabled'):
+            self.repair = RepairAgent(repair_config)
 
         # Quality gate thresholds
         self.max_critical_errors = self.config.get('max_critical_errors', 0)
         self.max_high_issues = self.config.get('max_high_issues', 5)
         self.min_confidence = self.config.get('min_confidence', 95.0)
 
+        # Validation profile (fast, standard, exhaustive) and wall-clock budget in seconds
+        self.profile = get_profile(self.config.get('profile', 'standard'))
+        self.time_budget = self.config.get('time_budget')
+
+        # Executor for the concurrent Auditor/QC stage: thread, process or none
+        self.executor_type = self.config.get('executor', 'thread')
+        if self.executor_type not in self.EXECUTOR_TYPES:
+            raise ValueError(f"Unknown executor '{self.executor_type}' "
+                             f"(expected one of: {', '.join(self.EXECUTOR_TYPES)})")
+        self._executor: Optional[Executor] = None
+
+        # Optional RunMetrics receiving per-agent timings and cache hit counts
+        self.metrics: Optional[RunMetrics] = None
+
+        # Optional RunProfiler receiving per-agent and per-check wall/CPU times;
+        # while profiling, the Auditor and QC agents run sequentially in this thread
+        self.profiler = None
+
+        # Optional MemoryTracker receiving per-stage peak and retained memory;
+        # while tracking, the Auditor and QC agents also run sequentially
+        self.memory = None
+
         logger.info("Validation Orchestrator initialized")
 
+    @property
+    def executor(self) -> Optional[Executor]:
+        """Executor for the Auditor/QC stage (created on first use, None when sequential)."""
+        if self._executor is None and self.executor_type != 'none':
+            if self.executor_type == 'process':
+                # Imported here: multiprocessing is slow to import and rarely used
+                from concurrent.futures import ProcessPoolExecutor
+                # Agents and the feature frame are pickled into the workers;
+                # the reference catalog re-opens its memory map by path
+                self._executor = ProcessPoolExecutor(max_workers=2)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=2,
+                                                    thread_name_prefix='validation')
+        return self._executor
+
+    @contextmanager
+    def _stage(self, name: str):
+        """Observe a block as an agent stage in the metrics, profiler and memory tracker (where set)."""
+        # Memory outermost: its snapshots stay out of the timings
+        with self._memory_stage(name), \
+                self.metrics.stage(name) if self.metrics is not None else nullcontext(), \
+                self.profiler.stage(name) if self.profiler is not None else nullcontext():
+            yield
+
+    def _memory_stage(self, name: str):
+        """Track a block's memory as a pipeline stage (no-op unless tracking memory)."""
+        return self.memory.stage(name) if self.memory is not None else nullcontext()
+
+    def _time_future(self, name: str, future) -> None:
+        """Observe an agent's duration from now until its future completes."""
+        if self.metrics is not None:
+            started = time.perf_counter()
+            future.add_done_callback(
+                lambda _: self.metrics.observe(name, time.perf_counter() - started))
+
+    def _record_caches(self, validator_result: ValidationResult, auditor_result: AuditResult,
+                       qc_result: QCResult) -> None:
+        """Count this run's row-cache and spot-check page-cache lookups."""
+        if self.metrics is None:
+            return
+        if self.row_cache is not None:
+            # Summed from the agents' results: under the process executor the
+            # lookups are made by the workers' copies of the cache
+            lookups = [counts for result in (validator_result, auditor_result, qc_result)
+                       for counts in result.stats.get('row_cache', {}).values()]
+            self.metrics.cache('row_results', sum(c['hits'] for c in lookups),
+                               sum(c['misses'] for c in lookups))
+        spot_check = qc_result.stats.get('spot_check')
+        if spot_check:
+            self.metrics.cache('spot_check_pages', spot_check.get('page_cache_hits', 0),
+                               spot_check.get('pages_loaded', 0))
+
+    def _sampling(self, plan: ProfilePlan) -> SamplingPlan:
+        """Sample sizes of a run's profile plan, passed to each agent call."""
+        return SamplingPlan(sizes=plan.sample_sizes, seed=self.config.get('random_seed'))
+
+    def plan(self) -> Dict[str, List[List[str]]]:
+        """Names of the checks each agent will run, grouped into dependency levels."""
+        plans = {}
+        for name, agent in (('validator', self.validator), ('auditor', self.auditor),
+                            ('qc', self.qc)):
+            levels = default_registry.plan(name, agent, agent.disabled_checks)
+            plans[name] = [[check.name for check in level] for level in levels]
+        return plans
+
+    def close(self) -> None:
+        """Shut down the executor and release the reference catalog, row cache and repair cache."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.catalog is not None:
+            self.catalog.close()
+        if self.row_cache is not None:
+            self.row_cache.close()
+        if self.repair is not None:
+            self.repair.close()
+
+    def __enter__(self) -> 'ValidationOrchestrator':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def validate(self, codes: List[Dict[str, str]],
                 source_pdf: str = None,
                 export_report: bool = True,
-                report_path: str = None) -> OrchestrationResult:
+                report_path: str = None,
+                profile: str = None,
+                time_budget: float = None) -> OrchestrationResult:
         """
         Run the complete multi-agent validation pipeline.
 
@@ -109,34 +265,140 @@ class ValidationOrchestrator:
             source_pdf: Optional path to source PDF for QC spot-checking
             export_report: Whether to export detailed report
             report_path: Path for report export (auto-generated if not provided)
+            profile: Validation profile for this run (default: configured profile)
+            time_budget: Wall-clock budget in seconds (default: configured budget)
 
         Returns:
             OrchestrationResult with complete validation assessment
         """
+        features, artifacts, validator_result, plan, failure = self._run_validator_stage(
+            codes, source_pdf, profile, time_budget
+        )
+        if failure is not None:
+            return failure
+        sampling = self._sampling(plan)
+
+        executor = self.executor if self.profiler is None and self.memory is None else None
+        if executor is None:
+            logger.info("\n[STAGE 2/3] Running Auditor Agent...")
+            with self._stage('auditor'):
+                auditor_result = self.auditor.audit(codes, features=features, artifacts=artifacts,
+                                                    sampling=sampling, profiler=self.profiler)
+            logger.info("\n[STAGE 3/3] Running Quality Control Agent...")
+            with self._stage('qc'):
+                qc_result = self.qc.verify(codes, source_pdf=source_pdf, features=features,
+                                           artifacts=artifacts, sampling=sampling,
+                                           profiler=self.profiler)
+        else:
+            logger.info(f"\n[STAGE 2-3/3] Running Auditor and Quality Control Agents "
+                        f"concurrently ({self.executor_type} executor)...")
+            auditor_future = executor.submit(self.auditor.audit, codes, features=features,
+                                             artifacts=artifacts, sampling=sampling)
+            qc_future = executor.submit(self.qc.verify, codes, source_pdf=source_pdf,
+                                        features=features, artifacts=artifacts,
+                                        sampling=sampling)
+            self._time_future('auditor', auditor_future)
+            self._time_future('qc', qc_future)
+            auditor_result = auditor_future.result()
+            qc_result = qc_future.result()
+
+        return self._finish(codes, features, validator_result, auditor_result, qc_result,
+                            plan, export_report, report_path, source_pdf)
+
+    async def validate_async(self, codes: List[Dict[str, str]],
+                             source_pdf: str = None,
+                             export_report: bool = True,
+                             report_path: str = None,
+                             profile: str = None,
+                             time_budget: float = None) -> OrchestrationResult:
+        """
+        Asyncio variant of validate() for embedding in async services.
+
+        Every stage runs off the event loop: the Validator stage on the loop's
+        default executor, then the Auditor and QC agents concurrently on the
+        configured executor (the loop's default one when executor is 'none').
+        """
+        loop = asyncio.get_running_loop()
+
+        features, artifacts, validator_result, plan, failure = await loop.run_in_executor(
+            None, self._run_validator_stage, codes, source_pdf, profile, time_budget
+        )
+        if failure is not None:
+            return failure
+        sampling = self._sampling(plan)
+
+        logger.info("\n[STAGE 2-3/3] Running Auditor and Quality Control Agents concurrently...")
+        executor = self.executor
+        auditor_future = loop.run_in_executor(executor, functools.partial(
+            self.auditor.audit, codes, features=features, artifacts=artifacts,
+            sampling=sampling, profiler=self.profiler))
+        qc_future = loop.run_in_executor(executor, functools.partial(
+            self.qc.verify, codes, source_pdf=source_pdf, features=features,
+            artifacts=artifacts, sampling=sampling, profiler=self.profiler))
+        self._time_future('auditor', auditor_future)
+        self._time_future('qc', qc_future)
+        auditor_result, qc_result = await asyncio.gather(auditor_future, qc_future)
+
+        return await loop.run_in_executor(None, functools.partial(
+            self._finish, codes, features, validator_result, auditor_result, qc_result,
+            plan, export_report, report_path, source_pdf
+        ))
+
+    def _run_validator_stage(self, codes: List[Dict[str, str]], source_pdf: str = None,
+                             profile: str = None, time_budget: float = None
+                             ) -> Tuple[FeatureFrame, ArtifactStore, ValidationResult,
+                                        ProfilePlan, Optional[OrchestrationResult]]:
+        """Plan the profile, build the shared features and artifact store, then run the Validator and its critical gate."""
         logger.info("="*80)
         logger.info("Starting Multi-Agent Validation Pipeline")
         logger.info(f"Total codes to validate: {len(codes)}")
         logger.info("="*80)
 
+        # Decide which checks to sample for the profile and time budget
+        plan = plan_profile(
+            get_profile(profile) if profile else self.profile,
+            {'validator': self.validator, 'auditor': self.auditor, 'qc': self.qc},
+            rows=len(codes),
+            time_budget=time_budget if time_budget is not None else self.time_budget,
+            inactive=() if source_pdf else ('qc.spot_check',)
+        )
+        # Derive shared per-row features once for all agents; artifacts built
+        # by one agent's checks (e.g. the duplicate map) are reused by the others
+        with self._memory_stage('features'):
+            features = FeatureFrame.build(codes)
+        artifacts = ArtifactStore()
+        if self.memory is not None and not self.memory.page_count:
+            self.memory.document_pages = max((c.get('page_number') or 0 for c in codes), default=0)
+        if self.row_cache is not None:
+            self.row_cache.new_generation()
+
         # Stage 1: Validator Agent
         logger.info("\n[STAGE 1/3] Running Validator Agent...")
-        validator_result = self.validator.validate(codes)
+        with self._stage('validator'):
+            validator_result = self.validator.validate(codes, features=features,
+                                                       artifacts=artifacts,
+                                                       sampling=self._sampling(plan),
+                                                       profiler=self.profiler)
 
         # Check critical gate
         critical_errors = [e for e in validator_result.errors if e.severity == 'CRITICAL']
         if len(critical_errors) > self.max_critical_errors:
             logger.error(f"CRITICAL GATE FAILED: {len(critical_errors)} critical errors (max: {self.max_critical_errors})")
-            return self._create_failure_result(
+            failure = self._create_failure_result(
                 validator_result=validator_result,
                 reason=f"Critical validation errors: {len(critical_errors)} found"
             )
+            failure.profile = plan.to_dict()
+            return features, artifacts, validator_result, plan, failure
 
         logger.info(f"✓ Validator passed with {validator_result.confidence_score:.1f}% confidence")
+        return features, artifacts, validator_result, plan, None
 
-        # Stage 2: Auditor Agent
-        logger.info("\n[STAGE 2/3] Running Auditor Agent...")
-        auditor_result = self.auditor.audit(codes)
-
+    def _finish(self, codes: List[Dict[str, str]], features: FeatureFrame,
+                validator_result: ValidationResult, auditor_result: AuditResult,
+                qc_result: QCResult, plan: ProfilePlan, export_report: bool,
+                report_path: Optional[str], source_pdf: str = None) -> OrchestrationResult:
+        """Apply the remaining gates, repair low-confidence entries (if enabled), aggregate the agent results and export the report."""
         # Check warning gate
         high_issues = [i for i in auditor_result.issues if i.severity == 'HIGH']
         if len(high_issues) > self.max_high_issues:
@@ -145,19 +407,31 @@ class ValidationOrchestrator:
 
         logger.info(f"✓ Auditor completed with {len(auditor_result.issues)} issues, {len(auditor_result.anomalies)} anomalies")
 
-        # Stage 3: QC Agent
-        logger.info("\n[STAGE 3/3] Running Quality Control Agent...")
-        qc_result = self.qc.verify(codes, source_pdf=source_pdf)
-
         # Check confidence gate
         if qc_result.overall_confidence < self.min_confidence:
             logger.warning(f"CONFIDENCE GATE: {qc_result.overall_confidence:.1f}% (threshold: {self.min_confidence}%)")
 
         logger.info(f"✓ QC completed with {qc_result.overall_confidence:.1f}% confidence")
+        self._record_caches(validator_result, auditor_result, qc_result)
+
+        # Suggest repairs for the low-confidence entries only
+        repair_result = None
+        if self.repair is not None and qc_result.low_confidence_entries:
+            logger.info(f"\n[REPAIR] Repairing {len(qc_result.low_confidence_entries)} "
+                        f"low-confidence entries...")
+            with self._stage('repair'):
+                repair_result = self.repair.repair(codes, qc_result.low_confidence_entries,
+                                                   source_pdf=source_pdf)
+            if self.metrics is not None:
+                self.metrics.cache('repairs', repair_result.stats['cache_hits'],
+                                   repair_result.stats['cache_misses'])
 
         # Aggregate results
         logger.info("\n[AGGREGATION] Combining agent results...")
-        result = self._aggregate_results(validator_result, auditor_result, qc_result)
+        with self._memory_stage('aggregation'):
+            result = self._aggregate_results(validator_result, auditor_result, qc_result)
+        result.profile = plan.to_dict()
+        result.repair_result = repair_result
 
         # Log final decision
         logger.info("="*80)
@@ -170,7 +444,8 @@ class ValidationOrchestrator:
 
         # Export detailed report if requested
         if export_report:
-            self._export_report(result, codes, report_path)
+            with self._memory_stage('report_export'):
+                self._export_report(result, codes, features, report_path)
 
         return result
 
@@ -240,9 +515,15 @@ class ValidationOrchestrator:
         auditor_weight = 0.3
         qc_weight = 0.4
 
+        # Sampled checks count their issues as extrapolated to every row
+        auditor_issue_count = len(auditor_result.issues) + sum(
+            sampled['estimated_issues'] - sampled['issues']
+            for sampled in auditor_result.stats.get('sampled_checks', {}).values()
+        )
+
         overall_confidence = (
             validator_result.confidence_score * validator_weight +
-            (100 - len(auditor_result.issues) * 2) * auditor_weight +  # Rough scoring for auditor
+            (100 - auditor_issue_count * 2) * auditor_weight +  # Rough scoring for auditor
             qc_result.overall_confidence * qc_weight
         )
         overall_confidence = max(0.0, min(100.0, overall_confidence))
@@ -343,6 +624,7 @@ class ValidationOrchestrator:
 
     def _export_report(self, result: OrchestrationResult,
                       codes: List[Dict[str, str]],
+                      features: FeatureFrame,
                       report_path: str = None) -> None:
         """Export detailed validation report to JSON."""
 
@@ -357,6 +639,7 @@ class ValidationOrchestrator:
         # Prepare detailed report
         report = {
             'summary': result.to_dict(),
+            'profile': result.profile,
             'validator': {
                 'passed': result.validator_result.passed if result.validator_result else False,
                 'confidence': result.validator_result.confidence_score if result.validator_result else 0,
@@ -369,16 +652,23 @@ class ValidationOrchestrator:
             },
             'qc': {
                 'confidence': result.qc_result.overall_confidence if result.qc_result else 0,
-                'edge_cases': len(result.qc_result.edge_cases) if result.qc_result else 0,
+                'edge_cases': result.qc_result.total_edge_cases if result.qc_result else 0,
+                'edge_case_counts': result.qc_result.edge_case_counts if result.qc_result else {},
+                'edge_case_examples': result.qc_result.edge_cases if result.qc_result else [],
                 'low_confidence_entries': len(result.qc_result.low_confidence_entries) if result.qc_result else 0,
                 'stats': result.qc_result.stats if result.qc_result else {}
             },
             'detailed_issues': result.issues_summary,
             'dataset_info': {
                 'total_codes': len(codes),
-                'divisions': len(set(c.get('division', '') for c in codes))
+                'divisions': len(features.stats['divisions'])
             }
         }
+        if result.repair_result is not None:
+            report['repair'] = result.repair_result.to_dict()
+        if self.memory is not None:
+            # Stages up to this one (report export and CLI export finish later)
+            report['memory'] = self.memory.summary()
 
         # Write report
         with open(report_path, 'w') as f:
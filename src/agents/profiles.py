@@ -0,0 +1,143 @@
+"""
+Validation Profiles - Named trade-offs between validation depth and run time.
+
+    fast        CRITICAL to MEDIUM checks on every row; LOW-severity row checks
+                (readability, division context) on a random sample, reported
+                with confidence intervals. For interactive use.
+    standard    Every check on every row, unless the time budget requires
+                sampling the LOW-severity row checks.
+    exhaustive  Every check on every row, regardless of the time budget.
+                For nightly jobs.
+
+The planner estimates each enabled check's run time from its cost estimate
+(see Check.estimate) and fits the optional wall-clock budget by shrinking
+the samples of LOW-severity row checks. CRITICAL, HIGH and MEDIUM checks
+always run in full, so a budget that even they exceed is reported as missed
+rather than met by skipping them.
+
+This module imports nothing heavy at import time, so the CLI can list the
+PROFILES without loading the agents.
+"""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional
+
+if TYPE_CHECKING:
+    from src.agents.checks import CheckRegistry
+
+
+# Feature frame, confidence scoring and aggregation (seconds per row)
+PIPELINE_ROW_COST = 15e-6
+
+# Smallest sample worth reporting a rate for
+MIN_SAMPLE_SIZE = 100
+
+
+@dataclass(frozen=True)
+class ValidationProfile:
+    """How thoroughly to validate, and whether to fit a time budget."""
+    name: str
+    sample_low_severity: bool    # Sample LOW-severity row checks instead of running them in full
+    sample_size: int = 1000      # Rows per sampled check
+    fit_budget: bool = True      # Sample LOW-severity row checks when over the time budget
+
+
+PROFILES = {
+    'fast': ValidationProfile('fast', sample_low_severity=True),
+    'standard': ValidationProfile('standard', sample_low_severity=False),
+    'exhaustive': ValidationProfile('exhaustive', sample_low_severity=False, fit_budget=False)
+}
+
+
+def get_profile(name: str) -> ValidationProfile:
+    """Profile by name (ValueError if unknown)."""
+    if name not in PROFILES:
+        raise ValueError(f"Unknown validation profile '{name}' "
+                         f"(expected one of: {', '.join(PROFILES)})")
+    return PROFILES[name]
+
+
+@dataclass
+class ProfilePlan:
+    """Checks to sample for one run, and the estimated run time."""
+    profile: str
+    rows: int
+    time_budget: Optional[float]
+    estimated_seconds: float
+    sample_sizes: Dict[str, int] = field(default_factory=dict)  # Check name -> rows to sample
+
+    @property
+    def within_budget(self) -> bool:
+        return self.time_budget is None or self.estimated_seconds <= self.time_budget
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary for reports."""
+        return {
+            'profile': self.profile,
+            'rows': self.rows,
+            'time_budget': self.time_budget,
+            'estimated_seconds': round(self.estimated_seconds, 3),
+            'within_budget': self.within_budget,
+            'sampled_checks': self.sample_sizes
+        }
+
+
+def plan_profile(profile: ValidationProfile, agents: Dict[str, Any], rows: int,
+                 time_budget: float = None, inactive: Iterable[str] = (),
+                 registry: 'CheckRegistry' = None) -> ProfilePlan:
+    """
+    Decide which checks to sample so a run fits the profile and budget.
+
+    Args:
+        profile: Validation profile
+        agents: Agent name -> agent instance ('validator', 'auditor', 'qc')
+        rows: Number of codes to validate
+        time_budget: Wall-clock budget in seconds (None for no budget)
+        inactive: Checks that will do no work this run (e.g. spot checks without a source PDF)
+        registry: Check registry the agents run (default: default_registry)
+
+    Returns:
+        ProfilePlan with the sample size of every sampled check
+    """
+    from loguru import logger
+    from src.agents.checks import default_registry
+
+    registry = registry or default_registry
+    full_cost = 0.0
+    samplable = []
+    for agent_name, agent in agents.items():
+        for level in registry.plan(agent_name, agent, getattr(agent, 'disabled_checks', ())):
+            for check in level:
+                if check.name in inactive:
+                    continue
+                if check.scope == 'row' and check.severity == 'LOW':
+                    samplable.append(check)
+                else:
+                    full_cost += check.estimate(rows)
+    fixed_cost = PIPELINE_ROW_COST * rows + full_cost
+    samplable_row_cost = sum(check.estimate(1) for check in samplable)
+
+    sample_size = rows
+    if profile.sample_low_severity:
+        sample_size = min(rows, profile.sample_size)
+    if time_budget is not None and profile.fit_budget and samplable_row_cost > 0:
+        affordable = int((time_budget - fixed_cost) / samplable_row_cost)
+        sample_size = min(sample_size, max(MIN_SAMPLE_SIZE, affordable))
+
+    sample_sizes = {check.name: sample_size for check in samplable if sample_size < rows}
+    plan = ProfilePlan(
+        profile=profile.name,
+        rows=rows,
+        time_budget=time_budget,
+        estimated_seconds=fixed_cost + samplable_row_cost * min(sample_size, rows),
+        sample_sizes=sample_sizes
+    )
+
+    if not plan.within_budget:
+        logger.warning(f"Profile '{profile.name}': estimated {plan.estimated_seconds:.1f}s "
+                       f"exceeds the {time_budget:.1f}s budget; CRITICAL to MEDIUM checks "
+                       f"still run in full")
+    if sample_sizes:
+        logger.info(f"Profile '{profile.name}': sampling {sample_size} of {rows} rows for "
+                    f"{', '.join(sample_sizes)}")
+    return plan
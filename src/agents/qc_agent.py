@@ -7,11 +7,27 @@ assessment with human-like reasoning to catch anything the other agents missed.
 
 import re
 import random
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from collections import Counter
+from pathlib import Path
+import numpy as np
 from loguru import logger
 
+from src.agents.features import FeatureFrame
+from src.agents.checks import ArtifactStore, CheckContext, SamplingPlan, default_registry
+from src.utils.reference_catalog import ReferenceCatalog
+from src.utils.row_cache import RowResultCache
+from src.utils.running_stats import Reservoir
+from src.utils.title_matcher import TitleMatcher, TitleMatchResult
+from src.utils.sequential_sampling import (
+    SequentialProbabilityRatioTest, stratified_sample_order, DECISION_REJECT, DECISION_UNDECIDED
+)
+from src.utils.source_spot_check import (
+    SourceSpotChecker, SpotCheckResult, STATUS_MATCH, STATUS_TITLE_MISMATCH,
+    STATUS_CODE_MISMATCH, STATUS_PAGE_MISSING
+)
+
 
 @dataclass
 class QCIssue:
@@ -25,6 +41,18 @@ class QCIssue:
     details: Dict[str, Any] = field(default_factory=dict)
 
 
+# Edge case types, in bit order of QCResult.edge_case_flags
+EDGE_CASE_TYPES = (
+    'category_code',       # Code ends in 00
+    'short_code',          # Fewer than 4 digits
+    'special_characters',
+    'numeric_content',     # 3+ consecutive digits in the title
+    'all_caps',
+    'repeated_words',
+)
+EDGE_CASE_BITS = {case_type: 1 << bit for bit, case_type in enumerate(EDGE_CASE_TYPES)}
+
+
 @dataclass
 class QCResult:
     """Result of quality control process."""
@@ -33,10 +61,29 @@ class QCResult:
     requires_human_review: bool
     issues: List[QCIssue] = field(default_factory=list)
     low_confidence_entries: List[Dict[str, Any]] = field(default_factory=list)
-    edge_cases: List[Dict[str, Any]] = field(default_factory=list)
+    edge_cases: List[Dict[str, Any]] = field(default_factory=list)  # Bounded random examples per type
+    edge_case_counts: Dict[str, int] = field(default_factory=dict)
+    edge_case_flags: Optional[np.ndarray] = None  # uint8 EDGE_CASE_BITS per input row
     stats: Dict[str, Any] = field(default_factory=dict)
     recommendation: str = ""
 
+    @property
+    def total_edge_cases(self) -> int:
+        return sum(self.edge_case_counts.values())
+
+    def edge_case_lines(self, case_type: str) -> List[int]:
+        """Line numbers (1-based) of every entry flagged with an edge case type."""
+        if self.edge_case_flags is None:
+            return []
+        return (np.flatnonzero(self.edge_case_flags & EDGE_CASE_BITS[case_type]) + 1).tolist()
+
+    def edge_case_types_at(self, line_number: int) -> List[str]:
+        """Edge case types flagged for one entry (1-based line number)."""
+        if self.edge_case_flags is None:
+            return []
+        flags = int(self.edge_case_flags[line_number - 1])
+        return [case_type for case_type in EDGE_CASE_TYPES if flags & EDGE_CASE_BITS[case_type]]
+
 
 class QualityControlAgent:
     """
@@ -53,28 +100,71 @@ class QualityControlAgent:
     - Final pass/fail recommendation
     """
 
-    def __init__(self, config: Dict[str, Any] = None):
+    def __init__(self, config: Dict[str, Any] = None,
+                 catalog: ReferenceCatalog = None):
         """
         Initialize the Quality Control Agent.
 
         Args:
             config: Configuration dictionary with QC parameters
+            catalog: Optional reference catalog for title similarity scoring
+                     (opened from config['reference_catalog'] if not provided)
         """
         self.config = config or {}
         self.confidence_threshold = self.config.get('confidence_threshold', 0.95)
         self.sample_size = self.config.get('sample_size', 100)
         self.spot_check_percentage = self.config.get('spot_check_percentage', 5)
+        self.title_similarity_threshold = self.config.get('title_similarity_threshold', 0.7)
+        self.title_mismatch_penalty = self.config.get('title_mismatch_penalty', 0.3)
+        self.spot_check_workers = self.config.get('spot_check_workers', 4)
+        self.spot_check_min_similarity = self.config.get('spot_check_min_similarity', 0.9)
+        # Sequential spot-check sampling (SPRT); the tolerated error rate is
+        # 1 - confidence_threshold, the acceptable one defaults to a quarter of it
+        self.spot_check_acceptable_error_rate = self.config.get('spot_check_acceptable_error_rate')
+        self.spot_check_alpha = self.config.get('spot_check_alpha', 0.05)
+        self.spot_check_beta = self.config.get('spot_check_beta', 0.05)
+        self.spot_check_batch_size = self.config.get('spot_check_batch_size', 10)
+        self.spot_check_max_batch_size = self.config.get('spot_check_max_batch_size', 80)
+        self.spot_check_max_samples = self.config.get('spot_check_max_samples', 400)
+        self.edge_case_examples = self.config.get('edge_case_examples', 20)
+        # Separate generators so edge-case sampling and spot-check sampling
+        # stay reproducible independently (and can run in parallel checks)
+        self.rng = random.Random(self.config.get('random_seed'))
+        self.spot_check_rng = random.Random(self.config.get('random_seed'))
+
+        # Check scheduling (see src/agents/checks.py)
+        self.registry = default_registry
+        self.disabled_checks = set(self.config.get('disabled_checks', []))
+        self.check_workers = self.config.get('check_workers', 1)
+        self.row_cache: Optional[RowResultCache] = None  # Set by the orchestrator
+
+        # Reference titles for fuzzy title matching (optional)
+        catalog_path = self.config.get('reference_catalog')
+        if catalog is None and catalog_path:
+            if Path(catalog_path).exists():
+                catalog = ReferenceCatalog.open(catalog_path)
+            else:
+                logger.warning(f"Reference catalog not found: {catalog_path}")
+        self.title_matcher = TitleMatcher(catalog) if catalog is not None else None
 
         logger.info("Quality Control Agent initialized")
 
     def verify(self, codes: List[Dict[str, str]],
-              source_pdf: str = None) -> QCResult:
+              source_pdf: str = None,
+              features: FeatureFrame = None,
+              artifacts: ArtifactStore = None,
+              sampling: SamplingPlan = None,
+              profiler: Any = None) -> QCResult:
         """
         Perform final quality control verification.
 
         Args:
             codes: List of parsed and validated code dictionaries
             source_pdf: Optional path to source PDF for spot-checking
+            features: Precomputed feature frame for `codes` (built if not provided)
+            artifacts: Shared artifact store of the current run (created if not provided)
+            sampling: Row checks to run on a sample of rows (from the validation profile)
+            profiler: Optional RunProfiler receiving each check's wall and CPU time
 
         Returns:
             QCResult with final assessment and recommendations
@@ -83,7 +173,6 @@ class QualityControlAgent:
 
         issues = []
         low_confidence_entries = []
-        edge_cases = []
 
         # Track statistics
         stats = {
@@ -104,24 +193,41 @@ class QualityControlAgent:
                 stats=stats
             )
 
-        # Run QC checks
-        issues.extend(self._detect_edge_cases(codes, edge_cases, stats))
-        issues.extend(self._check_formatting_consistency(codes, stats))
-        issues.extend(self._assess_readability(codes))
+        if features is None:
+            features = FeatureFrame.build(codes)
 
-        # Calculate confidence scores
-        confidence_results = self._calculate_confidence_scores(codes, stats)
+        # Edge cases are counted per type with a bounded sample of examples;
+        # the per-row flags are kept as one byte per input row
+        edge_case_samples = {
+            case_type: Reservoir(self.edge_case_examples) for case_type in EDGE_CASE_TYPES
+        }
+        edge_case_flags = bytearray(len(codes))
+
+        # Run the registered QC checks
+        context = CheckContext(
+            codes=codes, features=features, stats=stats, registry=self.registry,
+            artifacts=artifacts if artifacts is not None else ArtifactStore(),
+            extra={
+                'source_pdf': source_pdf,
+                'edge_case_samples': edge_case_samples,
+                'edge_case_flags': edge_case_flags
+            }
+        )
+        results = self.registry.run('qc', self, context,
+                                    disabled=self.disabled_checks, workers=self.check_workers,
+                                    cache=self.row_cache, sampling=sampling,
+                                    profiler=profiler)
+        issues.extend(results.get('issues', []))
+
+        # Calculate confidence scores (using the catalog title matches, if any)
+        title_matches = context.outputs.get('title_matches')
+        confidence_results = self._calculate_confidence_scores(
+            codes, features, stats, title_matches
+        )
         low_confidence_entries = confidence_results['low_confidence']
         stats['avg_confidence'] = confidence_results['avg_confidence']
         stats['low_confidence_count'] = len(low_confidence_entries)
 
-        # Perform spot check if source PDF provided
-        if source_pdf:
-            issues.extend(self._spot_check_sample(codes, source_pdf, stats))
-
-        # Final completeness check
-        issues.extend(self._verify_final_completeness(codes))
-
         # Calculate overall confidence and make recommendation
         overall_confidence = self._calculate_overall_confidence(
             codes, issues, stats, confidence_results
@@ -154,34 +260,55 @@ class QualityControlAgent:
             requires_human_review=requires_review,
             issues=issues,
             low_confidence_entries=low_confidence_entries,
-            edge_cases=edge_cases,
+            edge_cases=[example for case_type in EDGE_CASE_TYPES
+                        for example in edge_case_samples[case_type].items],
+            edge_case_counts={case_type: sample.seen
+                              for case_type, sample in edge_case_samples.items() if sample.seen},
+            edge_case_flags=np.frombuffer(edge_case_flags, dtype=np.uint8),
             stats=stats,
             recommendation=recommendation
         )
 
     def _detect_edge_cases(self, codes: List[Dict[str, str]],
-                          edge_cases: List[Dict], stats: Dict) -> List[QCIssue]:
-        """Detect edge cases and boundary conditions."""
+                          features: FeatureFrame,
+                          edge_cases: Dict[str, Reservoir],
+                          flags: bytearray, stats: Dict) -> List[QCIssue]:
+        """
+        Detect edge cases and boundary conditions.
+
+        Every edge case sets its bit in `flags` (one byte per row) and is
+        offered to the reservoir of its type; example dicts are only built
+        for the entries a reservoir keeps.
+        """
         issues = []
+        special_char_pattern = re.compile(r'[^\w\s\-,().&/]')
+        numeric_pattern = re.compile(r'\d{3,}')  # 3+ consecutive digits
+        rng = self.rng
+
+        def record(case_type: str, idx: int, code: str, title: str, **details) -> None:
+            flags[idx - 1] |= EDGE_CASE_BITS[case_type]
+            sample = edge_cases[case_type]
+            slot = sample.reserve(rng)
+            if slot >= 0:
+                sample.items[slot] = {
+                    'type': case_type,
+                    'line_number': idx,
+                    'code': code,
+                    'title': title,
+                    **details
+                }
 
         for idx, code_entry in enumerate(codes, 1):
-            division = code_entry.get('division', '')
             code = code_entry.get('code', '')
             title = code_entry.get('title', '')
 
             # Edge case: Codes ending in 00 (typically high-level categories)
             if code.strip().endswith('00'):
-                edge_cases.append({
-                    'type': 'category_code',
-                    'line_number': idx,
-                    'code': code,
-                    'title': title,
-                    'note': 'High-level category code (ends in 00)'
-                })
-                stats['edge_cases_found'] += 1
+                record('category_code', idx, code, title,
+                       note='High-level category code (ends in 00)')
 
             # Edge case: Very short codes (potentially incomplete)
-            code_digits = re.sub(r'\s+', '', code)
+            code_digits = features.code_digits[idx - 1]
             if len(code_digits) < 4:
                 issues.append(QCIssue(
                     severity='MEDIUM',
@@ -191,63 +318,34 @@ class QualityControlAgent:
                     code=code,
                     confidence=0.7
                 ))
-                edge_cases.append({
-                    'type': 'short_code',
-                    'line_number': idx,
-                    'code': code,
-                    'title': title
-                })
-                stats['edge_cases_found'] += 1
+                record('short_code', idx, code, title)
 
             # Edge case: Titles with special characters
-            special_char_pattern = re.compile(r'[^\w\s\-,().&/]')
-            if special_char_pattern.search(title):
-                edge_cases.append({
-                    'type': 'special_characters',
-                    'line_number': idx,
-                    'code': code,
-                    'title': title,
-                    'characters': special_char_pattern.findall(title)
-                })
-                stats['edge_cases_found'] += 1
+            special_chars = special_char_pattern.findall(title)
+            if special_chars:
+                record('special_characters', idx, code, title, characters=special_chars)
 
             # Edge case: Titles with numbers (potentially reference codes)
-            if re.search(r'\d{3,}', title):  # 3+ consecutive digits
-                edge_cases.append({
-                    'type': 'numeric_content',
-                    'line_number': idx,
-                    'code': code,
-                    'title': title,
-                    'note': 'Title contains numeric sequences'
-                })
-                stats['edge_cases_found'] += 1
+            if numeric_pattern.search(title):
+                record('numeric_content', idx, code, title,
+                       note='Title contains numeric sequences')
 
             # Edge case: All caps titles (might be section headers)
             if title.isupper() and len(title) > 5:
-                edge_cases.append({
-                    'type': 'all_caps',
-                    'line_number': idx,
-                    'code': code,
-                    'title': title,
-                    'note': 'All caps title (possibly section header)'
-                })
-                stats['edge_cases_found'] += 1
+                record('all_caps', idx, code, title,
+                       note='All caps title (possibly section header)')
 
             # Edge case: Repeated words in title
-            words = title.lower().split()
-            word_counts = Counter(words)
-            repeated = [word for word, count in word_counts.items() if count > 1 and len(word) > 3]
-            if repeated:
-                edge_cases.append({
-                    'type': 'repeated_words',
-                    'line_number': idx,
-                    'code': code,
-                    'title': title,
-                    'repeated_words': repeated
-                })
-                stats['edge_cases_found'] += 1
-
-        logger.info(f"Detected {len(edge_cases)} edge cases")
+            words = features.titles_lower[idx - 1].split()
+            if len(words) != len(set(words)):
+                word_counts = Counter(words)
+                repeated = [word for word, count in word_counts.items() if count > 1 and len(word) > 3]
+                if repeated:
+                    record('repeated_words', idx, code, title, repeated_words=repeated)
+
+        found = sum(sample.seen for sample in edge_cases.values())
+        stats['edge_cases_found'] += found
+        logger.info(f"Detected {found} edge cases")
         return issues
 
     def _check_formatting_consistency(self, codes: List[Dict[str, str]],
@@ -347,19 +445,24 @@ class QualityControlAgent:
         return issues
 
     def _calculate_confidence_scores(self, codes: List[Dict[str, str]],
-                                     stats: Dict) -> Dict[str, Any]:
+                                     features: FeatureFrame,
+                                     stats: Dict,
+                                     title_matches: TitleMatchResult = None) -> Dict[str, Any]:
         """Calculate confidence score for each code entry."""
         low_confidence = []
         confidence_scores = []
+        title_mismatches = 0
+        similarities = title_matches.scores.tolist() if title_matches is not None else None
+        special_char_pattern = re.compile(r'[^\w\s\-,().&/]')
 
-        # Calculate average title length for comparison
-        title_lengths = [len(c.get('title', '')) for c in codes]
-        avg_title_length = sum(title_lengths) / len(title_lengths) if title_lengths else 0
+        # Average title length for comparison
+        avg_title_length = features.stats['avg_title_length']
 
         for idx, code_entry in enumerate(codes, 1):
             division = code_entry.get('division', '')
             code = code_entry.get('code', '')
-            title = code_entry.get('title', '')
+            title = features.titles[idx - 1]
+            title_length = features.title_lengths[idx - 1]
 
             confidence = 1.0  # Start with perfect confidence
             reasons = []
@@ -367,21 +470,21 @@ class QualityControlAgent:
             # Reduce confidence for various issues
 
             # Title length anomalies
-            if len(title) < avg_title_length * 0.3:
+            if title_length < avg_title_length * 0.3:
                 confidence -= 0.2
                 reasons.append('Title significantly shorter than average')
-            elif len(title) > avg_title_length * 3:
+            elif title_length > avg_title_length * 3:
                 confidence -= 0.1
                 reasons.append('Title significantly longer than average')
 
             # Code format issues
-            code_digits = re.sub(r'\s+', '', code)
+            code_digits = features.code_digits[idx - 1]
             if len(code_digits) < 4:
                 confidence -= 0.3
                 reasons.append('Code appears incomplete')
 
             # Special characters or unusual patterns
-            if re.search(r'[^\w\s\-,().&/]', title):
+            if special_char_pattern.search(title):
                 confidence -= 0.1
                 reasons.append('Special characters in title')
 
@@ -396,6 +499,14 @@ class QualityControlAgent:
                 confidence -= 0.15
                 reasons.append('Many single-letter words')
 
+            # Title differs from the reference catalog
+            if similarities is not None and similarities[idx - 1] < self.title_similarity_threshold:
+                similarity = similarities[idx - 1]
+                confidence -= self.title_mismatch_penalty * (1.0 - similarity)
+                reasons.append(f'Title differs from reference catalog '
+                               f'({similarity:.2f} similarity, {title_matches.method_name(idx - 1)} match)')
+                title_mismatches += 1
+
             # Missing title
             if not title.strip():
                 confidence = 0.0
@@ -418,6 +529,9 @@ class QualityControlAgent:
 
         avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
 
+        if title_matches is not None:
+            stats['title_mismatches'] = title_mismatches
+
         return {
             'avg_confidence': avg_confidence * 100,  # Convert to percentage
             'low_confidence': low_confidence,
@@ -425,39 +539,178 @@ class QualityControlAgent:
         }
 
     def _spot_check_sample(self, codes: List[Dict[str, str]],
+                          features: FeatureFrame,
                           source_pdf: str, stats: Dict) -> List[QCIssue]:
-        """Perform spot-check sampling against source PDF."""
+        """
+        Spot-check entries against their source page with sequential sampling.
+
+        Samples are drawn in stratified order (by division, spread over
+        pages) and checked in batches until an SPRT decides whether the
+        error rate is below 1 - confidence_threshold, or the sample budget
+        runs out. Batches double in size after a batch with mismatches.
+        """
         issues = []
 
-        # Calculate sample size
-        total_codes = len(codes)
-        sample_size = min(
-            self.sample_size,
-            max(int(total_codes * (self.spot_check_percentage / 100)), 5)
+        # Only entries with a source page and a well-formed code can be checked
+        candidates = []
+        for row, code_entry in enumerate(codes):
+            page_number = code_entry.get('page_number')
+            if (isinstance(page_number, int) and page_number > 0 and
+                    features.code_keys[row] >= 0):
+                candidates.append((row, page_number))
+
+        if not candidates:
+            # Nothing to re-extract: fall back to a fixed-size manual sample
+            total_codes = len(codes)
+            sample_size = min(
+                self.sample_size,
+                max(int(total_codes * (self.spot_check_percentage / 100)), 5)
+            )
+            if total_codes > sample_size:
+                sample_indices = sorted(self.spot_check_rng.sample(range(total_codes), sample_size))
+            else:
+                sample_indices = list(range(total_codes))
+            issues.append(QCIssue(
+                severity='LOW',
+                category='SpotCheck',
+                message=f'Manual spot-check recommended for {len(sample_indices)} samples '
+                        f'(entries carry no source page numbers)',
+                details={
+                    'sample_count': len(sample_indices),
+                    'sample_indices': sample_indices[:10]  # Show first 10
+                }
+            ))
+            return issues
+
+        # A 100% threshold tolerates no errors, which no finite sample can show
+        tolerated_error_rate = max(1.0 - self.confidence_threshold, 0.001)
+        test = SequentialProbabilityRatioTest(
+            p0=self.spot_check_acceptable_error_rate or tolerated_error_rate / 4,
+            p1=tolerated_error_rate,
+            alpha=self.spot_check_alpha,
+            beta=self.spot_check_beta
         )
 
-        # Random sampling
-        if total_codes > sample_size:
-            sample_indices = random.sample(range(total_codes), sample_size)
-        else:
-            sample_indices = range(total_codes)
-
-        logger.info(f"Spot-checking {len(sample_indices)} random samples")
-
-        # Note: Actual PDF comparison would require PDF parsing
-        # For now, log that spot-check is needed
-        issues.append(QCIssue(
-            severity='LOW',
-            category='SpotCheck',
-            message=f'Manual spot-check recommended for {len(sample_indices)} samples',
-            details={
-                'sample_count': len(sample_indices),
-                'sample_indices': list(sample_indices)[:10]  # Show first 10
-            }
-        ))
+        order = stratified_sample_order(
+            [features.divisions[row] for row, _ in candidates],
+            [page_number for _, page_number in candidates],
+            self.spot_check_rng
+        )
+        order = [candidates[position] for position in order[:self.spot_check_max_samples]]
+
+        checker = SourceSpotChecker(
+            source_pdf,
+            workers=self.spot_check_workers,
+            min_similarity=self.spot_check_min_similarity
+        )
+
+        logger.info(
+            f"Sequential spot-check against {source_pdf}: tolerated error rate "
+            f"{tolerated_error_rate:.1%}, up to {len(order)} samples"
+        )
+
+        results = []
+        batch_size = self.spot_check_batch_size
+        position = 0
+        try:
+            while position < len(order) and test.decision == DECISION_UNDECIDED:
+                batch = order[position:position + batch_size]
+                position += len(batch)
+                batch_results = checker.check([
+                    (row, page_number, features.code_keys[row], features.titles[row])
+                    for row, page_number in batch
+                ])
+
+                batch_errors = 0
+                for result in batch_results:
+                    results.append(result)
+                    error = result.status != STATUS_MATCH
+                    batch_errors += error
+                    if test.update(error) != DECISION_UNDECIDED:
+                        break
+
+                # Mismatches call for more evidence, faster
+                if batch_errors:
+                    batch_size = min(batch_size * 2, self.spot_check_max_batch_size)
+        except (OSError, RuntimeError, ValueError) as e:
+            logger.warning(f"Spot-check failed: {e}")
+            issues.append(QCIssue(
+                severity='LOW',
+                category='SpotCheck',
+                message=f'Spot-check could not read source PDF: {e}',
+                details={'source_pdf': source_pdf}
+            ))
+            return issues
+
+        outcomes = Counter(result.status for result in results)
+        for result in results:
+            if result.status == STATUS_MATCH:
+                continue
+            issues.append(QCIssue(
+                severity='MEDIUM',
+                category='SpotCheck',
+                message=self._spot_check_message(result),
+                line_number=result.row + 1,
+                code=codes[result.row].get('code', ''),
+                confidence=result.similarity,
+                details={
+                    'status': result.status,
+                    'page_number': result.page_number,
+                    'parsed_code': result.code,
+                    'parsed_title': result.parsed_title,
+                    'source_code': result.source_code,
+                    'source_title': result.source_title
+                }
+            ))
+
+        summary = test.to_dict()
+        if test.decision == DECISION_REJECT:
+            issues.append(QCIssue(
+                severity='HIGH',
+                category='SpotCheck',
+                message=f'Spot-check error rate above tolerance: {test.errors}/{test.samples} '
+                        f'sampled entries differ from the source PDF '
+                        f'(tolerated: {tolerated_error_rate:.1%})',
+                details=summary
+            ))
+        elif test.decision == DECISION_UNDECIDED:
+            issues.append(QCIssue(
+                severity='MEDIUM',
+                category='SpotCheck',
+                message=f'Spot-check inconclusive after {test.samples} samples '
+                        f'({test.errors} mismatches); manual review recommended',
+                details=summary
+            ))
+
+        stats['spot_check'] = {
+            **summary,
+            'candidates': len(candidates),
+            'unverifiable': len(codes) - len(candidates),
+            'outcomes': dict(outcomes),
+            'pages_loaded': checker.pages_loaded,
+            'page_cache_hits': checker.cache_hits
+        }
+
+        logger.info(
+            f"Spot-check {test.decision}: {test.errors} mismatches in {test.samples} samples "
+            f"({checker.pages_loaded} pages loaded)"
+        )
 
         return issues
 
+    @staticmethod
+    def _spot_check_message(result: SpotCheckResult) -> str:
+        """Describe a failed spot check."""
+        if result.status == STATUS_TITLE_MISMATCH:
+            return (f'Title differs from source page {result.page_number} '
+                    f'({result.similarity:.2f} similarity)')
+        if result.status == STATUS_CODE_MISMATCH:
+            return (f'Title found on source page {result.page_number} under code '
+                    f'{result.source_code}, parsed as {result.code}')
+        if result.status == STATUS_PAGE_MISSING:
+            return f'Source page {result.page_number} does not exist in the PDF'
+        return f'Code {result.code} not found on source page {result.page_number}'
+
     def _verify_final_completeness(self, codes: List[Dict[str, str]]) -> List[QCIssue]:
         """Final completeness verification."""
         issues = []
@@ -520,3 +773,49 @@ class QualityControlAgent:
             return f"REVIEW: Acceptable quality ({confidence:.1f}% confidence). Recommend spot-check before production use."
         else:
             return f"REVIEW: Below threshold ({confidence:.1f}% confidence). Manual review required before use."
+
+
+# ---------------------------------------------------------------------------
+# Built-in checks, registered in reporting order
+# ---------------------------------------------------------------------------
+
+@default_registry.check('qc.edge_cases', agent='qc', cost='moderate', severity='MEDIUM')
+def check_edge_cases(agent: QualityControlAgent, context: CheckContext) -> List[QCIssue]:
+    return agent._detect_edge_cases(context.codes, context.features,
+                                    context.extra['edge_case_samples'],
+                                    context.extra['edge_case_flags'], context.stats)
+
+
+@default_registry.check('qc.formatting', agent='qc', severity='LOW')
+def check_formatting(agent: QualityControlAgent, context: CheckContext) -> List[QCIssue]:
+    return agent._check_formatting_consistency(context.codes, context.stats)
+
+
+@default_registry.check('qc.readability', agent='qc', scope='row', cost='moderate',
+                        severity='LOW')
+def check_readability(agent: QualityControlAgent, context: CheckContext) -> List[QCIssue]:
+    return agent._assess_readability(context.codes)
+
+
+@default_registry.check('qc.title_match', agent='qc', outputs=['title_matches'],
+                        cost='expensive', severity='LOW', enabled_if='title_matcher')
+def check_title_match(agent: QualityControlAgent, context: CheckContext) -> List[QCIssue]:
+    """Score titles against the reference catalog (feeds confidence scoring)."""
+    title_matches = agent.title_matcher.match(context.features)
+    context.stats['title_match'] = title_matches.stats
+    context.outputs['title_matches'] = title_matches
+    return []
+
+
+@default_registry.check('qc.spot_check', agent='qc', cost='expensive', severity='HIGH',
+                        row_cost=0.0, fixed_cost=1.5)  # Sequential sample of page loads
+def check_spot_check(agent: QualityControlAgent, context: CheckContext) -> List[QCIssue]:
+    source_pdf = context.extra.get('source_pdf')
+    if not source_pdf:
+        return []
+    return agent._spot_check_sample(context.codes, context.features, source_pdf, context.stats)
+
+
+@default_registry.check('qc.completeness', agent='qc', severity='CRITICAL')
+def check_completeness(agent: QualityControlAgent, context: CheckContext) -> List[QCIssue]:
+    return agent._verify_final_completeness(context.codes)
@@ -0,0 +1,393 @@
+"""
+Repair Agent - LLM repair pass over QC's low-confidence entries.
+
+Only the entries QC scored below its confidence threshold are sent, each
+with the text around it on its source page, so the number of calls follows
+the number of defects rather than the size of the document:
+
+    1. Entries already in the response cache are answered from it
+    2. The rest are batched (batch_size entries per request)
+    3. Batches are sent to the Messages API on at most max_concurrency threads
+    4. Every valid answer is stored in the cache
+
+The response cache is a SQLite file keyed by a hash of the model, the prompt
+version and the normalized entry (division, code, title and page context),
+so a rerun over the same document makes no calls at all.
+
+The pass only suggests repairs; they are reported with the validation
+results, and parse_csi.py applies those the model is confident enough in
+(repair.apply_min_confidence). The API endpoint can be pointed at a local
+server with repair.base_url or ANTHROPIC_BASE_URL.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+
+# Bump when the prompt or the answer format changes: cached answers of the
+# previous version are then no longer used
+PROMPT_VERSION = 1
+
+SYSTEM_PROMPT = """\
+You repair entries parsed from CSI MasterFormat PDFs. Each entry has a \
+division ("DD"), a code ("LL TT", two groups of two digits), a title, the \
+reasons it was flagged and the text of its source page around it.
+
+Correct an entry only where the page text shows what it should be, e.g. a \
+truncated or garbled title, or digits misread in the code. Leave correct \
+fields unchanged.
+
+Answer with a JSON array only, one object per entry:
+[{"id": <entry id>, "code": "LL TT", "title": "<title>", \
+"confidence": <0.0-1.0>, "note": "<what was changed and why, or empty>"}]"""
+
+CODE_PATTERN = re.compile(r'^\d{2} \d{2}$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repairs (
+    key BLOB PRIMARY KEY,
+    answer TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Repair outcomes
+STATUS_REPAIRED = 'repaired'      # The model changed the code or title
+STATUS_UNCHANGED = 'unchanged'    # The model kept the entry as it is
+STATUS_INVALID = 'invalid'        # Missing from the answer, or not a valid code
+STATUS_FAILED = 'failed'          # The request failed
+STATUS_SKIPPED = 'skipped'        # Over max_entries, or no API key
+
+
+def normalize_text(text: Any) -> str:
+    """NFKC-normalize and collapse whitespace, so cosmetic differences share a cache entry."""
+    return ' '.join(unicodedata.normalize('NFKC', str(text or '')).split())
+
+
+@dataclass
+class Repair:
+    """Suggested repair of one low-confidence entry."""
+    line_number: int                  # 1-based, as in QCResult.low_confidence_entries
+    division: str
+    code: str
+    title: str
+    status: str
+    suggested_code: Optional[str] = None
+    suggested_title: Optional[str] = None
+    confidence: float = 0.0           # The model's own confidence in its answer
+    note: str = ""
+    cached: bool = False
+
+    @property
+    def changed(self) -> bool:
+        return self.status == STATUS_REPAIRED
+
+
+@dataclass
+class RepairResult:
+    """Outcome of a repair pass."""
+    repairs: List[Repair] = field(default_factory=list)
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+    def applicable(self, min_confidence: float) -> List[Repair]:
+        """Repairs that changed an entry with at least `min_confidence`."""
+        return [r for r in self.repairs if r.changed and r.confidence >= min_confidence]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'stats': self.stats, 'repairs': [asdict(r) for r in self.repairs]}
+
+
+class RepairCache:
+    """Persistent answers of the repair pass, keyed by normalized input."""
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # validate_async() runs the repair pass on an executor thread
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+
+    @staticmethod
+    def key(model: str, entry: Dict[str, Any]) -> bytes:
+        payload = json.dumps([PROMPT_VERSION, model, entry['division'], entry['code'],
+                              entry['title'], entry['context']], ensure_ascii=False)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, Dict[str, Any]]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):  # SQLite's host parameter limit
+                chunk = keys[start:start + 500]
+                rows = self._connection.execute(
+                    f"SELECT key, answer FROM repairs WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                found.update((key, json.loads(answer)) for key, answer in rows)
+        return found
+
+    def put_many(self, answers: Dict[bytes, Dict[str, Any]]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO repairs (key, answer) VALUES (?, ?)",
+                [(key, json.dumps(answer)) for key, answer in answers.items()]
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class PageContext:
+    """Text lines of source pages around an entry (pages read with PyMuPDF once each)."""
+
+    def __init__(self, pdf_path: Optional[str], lines: int = 6):
+        self.pdf_path = pdf_path
+        self.lines = lines
+        self._document = None
+        self._pages: Dict[int, List[str]] = {}
+
+    def _page_lines(self, page_number: int) -> List[str]:
+        if page_number not in self._pages:
+            if self._document is None:
+                import fitz  # Imported here: only needed when repairing with a source PDF
+                self._document = fitz.open(self.pdf_path)
+            if 1 <= page_number <= len(self._document):
+                text = self._document[page_number - 1].get_text()
+                self._pages[page_number] = [line for line in map(normalize_text, text.splitlines())
+                                            if line]
+            else:
+                self._pages[page_number] = []
+        return self._pages[page_number]
+
+    def around(self, page_number: Optional[int], division: str, code: str, title: str) -> str:
+        """Lines around the entry's code (or title) on its page; the top of the page if neither is found."""
+        if not self.pdf_path or not page_number:
+            return ''
+        lines = self._page_lines(page_number)
+        full_code = f"{division} {code}"
+        title_start = normalize_text(title)[:20]
+        index = next((i for i, line in enumerate(lines) if full_code in line), None)
+        if index is None and title_start:
+            index = next((i for i, line in enumerate(lines) if title_start in line), None)
+        start = 0 if index is None else max(0, index - self.lines)
+        end = 2 * self.lines + 1 if index is None else index + self.lines + 1
+        return '\n'.join(lines[start:end])
+
+    def close(self) -> None:
+        if self._document is not None:
+            self._document.close()
+            self._document = None
+
+
+def _parse_answer(text: str) -> List[Dict[str, Any]]:
+    """The JSON array of a model answer (surrounding prose or code fences ignored)."""
+    start, end = text.find('['), text.rfind(']')
+    if start < 0 or end < start:
+        raise ValueError("no JSON array in the answer")
+    answer = json.loads(text[start:end + 1])
+    if not isinstance(answer, list):
+        raise ValueError("answer is not a JSON array")
+    return [item for item in answer if isinstance(item, dict)]
+
+
+class RepairAgent:
+    """
+    Suggests repairs of low-confidence entries with batched, cached LLM calls.
+
+    Configured by the `repair` section of the validation config.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        Initialize the Repair Agent.
+
+        Args:
+            config: Configuration dictionary with repair parameters
+        """
+        self.config = config or {}
+        self.model = self.config.get('model', 'claude-3-5-haiku-20241022')
+        self.batch_size = self.config.get('batch_size', 20)
+        self.max_concurrency = self.config.get('max_concurrency', 4)
+        self.max_entries = self.config.get('max_entries', 200)
+        self.max_tokens = self.config.get('max_tokens', 4096)
+        self.timeout = self.config.get('timeout', 60.0)
+        self.max_retries = self.config.get('max_retries', 2)
+        self.context_lines = self.config.get('context_lines', 6)
+        # Repairs the model is at least this confident in are applied to the export
+        self.apply_min_confidence = self.config.get('apply_min_confidence')
+        self.base_url = self.config.get('base_url') or os.environ.get('ANTHROPIC_BASE_URL')
+        self.api_key = os.environ.get(self.config.get('api_key_env', 'ANTHROPIC_API_KEY'))
+
+        cache_path = self.config.get('cache', 'data/cache/repairs.sqlite')
+        self.cache = RepairCache(cache_path) if cache_path else None
+        self._client = None
+
+        logger.info("Repair Agent initialized")
+
+    @property
+    def client(self):
+        """Messages API client (created on first use)."""
+        if self._client is None:
+            import anthropic  # Imported here: slow to import and only needed on a cache miss
+            self._client = anthropic.Anthropic(api_key=self.api_key or 'unused',
+                                               base_url=self.base_url,
+                                               timeout=self.timeout,
+                                               max_retries=self.max_retries)
+        return self._client
+
+    def close(self) -> None:
+        if self.cache is not None:
+            self.cache.close()
+
+    def repair(self, codes: List[Dict[str, Any]],
+               low_confidence_entries: Iterable[Dict[str, Any]],
+               source_pdf: str = None) -> RepairResult:
+        """
+        Suggest repairs for QC's low-confidence entries.
+
+        Args:
+            codes: Parsed code dictionaries the entries' line numbers refer to
+            low_confidence_entries: QCResult.low_confidence_entries
+            source_pdf: Optional path to the source PDF for page context
+
+        Returns:
+            RepairResult with one Repair per entry
+        """
+        # The least confident entries first when there are more than max_entries
+        entries = sorted(low_confidence_entries,
+                         key=lambda e: (e.get('confidence', 0.0), e['line_number']))
+        stats = {'entries': len(entries), 'cache_hits': 0, 'cache_misses': 0, 'requests': 0,
+                 'failed_requests': 0, 'input_tokens': 0, 'output_tokens': 0}
+        repairs: Dict[int, Repair] = {}
+
+        for entry in entries[self.max_entries:]:
+            repairs[entry['line_number']] = self._repair(entry, STATUS_SKIPPED)
+        entries = entries[:self.max_entries]
+
+        context = PageContext(source_pdf, self.context_lines)
+        try:
+            inputs = []
+            for entry in entries:
+                row = codes[entry['line_number'] - 1]
+                division, code = normalize_text(entry['division']), normalize_text(entry['code'])
+                title = normalize_text(entry['title'])
+                inputs.append({'id': entry['line_number'], 'division': division, 'code': code,
+                               'title': title, 'reasons': entry.get('reasons', []),
+                               'context': context.around(row.get('page_number'), division,
+                                                         code, title)})
+        finally:
+            context.close()
+
+        keys = {item['id']: RepairCache.key(self.model, item) for item in inputs}
+        cached = self.cache.get_many(list(keys.values())) if self.cache is not None else {}
+        pending = []
+        for entry, item in zip(entries, inputs):
+            answer = cached.get(keys[item['id']])
+            if answer is not None:
+                repairs[item['id']] = self._from_answer(entry, answer, cached=True)
+            else:
+                pending.append((entry, item))
+        stats['cache_hits'], stats['cache_misses'] = len(inputs) - len(pending), len(pending)
+
+        if pending and not self.api_key and not self.base_url:
+            logger.warning(f"Repair: no API key set, {len(pending)} entries left unrepaired")
+            for entry, _ in pending:
+                repairs[entry['line_number']] = self._repair(entry, STATUS_SKIPPED,
+                                                             note='no API key')
+            pending = []
+
+        batches = [pending[start:start + self.batch_size]
+                   for start in range(0, len(pending), self.batch_size)]
+        if batches:
+            logger.info(f"Repair: {len(pending)} entries in {len(batches)} requests "
+                        f"({stats['cache_hits']} cached)")
+            new_answers = {}
+            workers = max(1, min(self.max_concurrency, len(batches)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='repair') as pool:
+                for batch, outcome in zip(batches, pool.map(self._request, batches)):
+                    answers, error, (input_tokens, output_tokens) = outcome
+                    stats['requests'] += 1
+                    stats['input_tokens'] += input_tokens
+                    stats['output_tokens'] += output_tokens
+                    if error:
+                        stats['failed_requests'] += 1
+                        logger.warning(f"Repair request failed ({len(batch)} entries): {error}")
+                    for entry, item in batch:
+                        answer = answers.get(item['id'])
+                        if error:
+                            repairs[item['id']] = self._repair(entry, STATUS_FAILED, note=error)
+                            continue
+                        repair = self._from_answer(entry, answer)
+                        if repair.status != STATUS_INVALID:
+                            new_answers[keys[item['id']]] = answer
+                        repairs[item['id']] = repair
+            if self.cache is not None and new_answers:
+                self.cache.put_many(new_answers)
+
+        result = RepairResult([repairs[line] for line in sorted(repairs)], stats)
+        for status in (STATUS_REPAIRED, STATUS_UNCHANGED, STATUS_INVALID,
+                       STATUS_FAILED, STATUS_SKIPPED):
+            stats[status] = sum(1 for r in result.repairs if r.status == status)
+        logger.info(f"Repair complete: {stats[STATUS_REPAIRED]} repaired, "
+                    f"{stats[STATUS_UNCHANGED]} unchanged of {stats['entries']} entries "
+                    f"({stats['requests']} requests, {stats['cache_hits']} cached)")
+        return result
+
+    def _request(self, batch: List[tuple]) -> tuple:
+        """Send one batch; returns (answers by entry id, error message or '', (input, output tokens))."""
+        payload = [{key: item[key] for key in ('id', 'division', 'code', 'title',
+                                               'reasons', 'context')}
+                   for _, item in batch]
+        tokens = (0, 0)
+        try:
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=self.max_tokens,
+                system=SYSTEM_PROMPT,
+                messages=[{'role': 'user',
+                           'content': json.dumps(payload, ensure_ascii=False, indent=1)}]
+            )
+            usage = getattr(response, 'usage', None)
+            if usage is not None:
+                tokens = (usage.input_tokens, usage.output_tokens)
+            text = ''.join(block.text for block in response.content
+                           if getattr(block, 'type', '') == 'text')
+            answers = {item.get('id'): item for item in _parse_answer(text)}
+        except Exception as e:
+            return {}, f"{type(e).__name__}: {e}", tokens
+        return answers, '', tokens
+
+    @staticmethod
+    def _repair(entry: Dict[str, Any], status: str, note: str = "") -> Repair:
+        return Repair(entry['line_number'], entry['division'], entry['code'], entry['title'],
+                      status, note=note)
+
+    def _from_answer(self, entry: Dict[str, Any], answer: Optional[Dict[str, Any]],
+                     cached: bool = False) -> Repair:
+        """Repair from the model's answer for one entry."""
+        if answer is None:
+            return self._repair(entry, STATUS_INVALID, note='missing from the answer')
+        code = normalize_text(answer.get('code'))
+        title = normalize_text(answer.get('title'))
+        if not CODE_PATTERN.match(code) or not title:
+            return self._repair(entry, STATUS_INVALID, note=f"invalid answer: {answer}")
+        try:
+            confidence = min(1.0, max(0.0, float(answer.get('confidence', 0.0))))
+        except (TypeError, ValueError):
+            confidence = 0.0
+        changed = (code, title) != (normalize_text(entry['code']), normalize_text(entry['title']))
+        return Repair(entry['line_number'], entry['division'], entry['code'], entry['title'],
+                      STATUS_REPAIRED if changed else STATUS_UNCHANGED,
+                      suggested_code=code, suggested_title=title, confidence=confidence,
+                      note=str(answer.get('note') or ''), cached=cached)
@@ -6,10 +6,23 @@ to ensure the parsed data meets fundamental quality standards.
 """
 
 import re
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from loguru import logger
 
+from src.agents.features import FeatureFrame
+from src.agents.checks import ArtifactStore, CheckContext, SamplingPlan, default_registry
+from src.utils.row_cache import RowResultCache
+
+
+# Parser metadata that may accompany the required string fields:
+# field -> (accepted types, description for error messages)
+OPTIONAL_FIELD_TYPES = {
+    'group': ((str, type(None)), 'string or None'),
+    'subgroup': ((str, type(None)), 'string or None'),
+    'page_number': ((int, type(None)), 'int or None'),
+}
+
 
 @dataclass
 class ValidationError:
@@ -60,6 +73,12 @@ class ValidatorAgent:
         self.max_title_length = self.config.get('max_title_length', 200)
         self.min_title_length = self.config.get('min_title_length', 2)
 
+        # Check scheduling (see src/agents/checks.py)
+        self.registry = default_registry
+        self.disabled_checks = set(self.config.get('disabled_checks', []))
+        self.check_workers = self.config.get('check_workers', 1)
+        self.row_cache: Optional[RowResultCache] = None  # Set by the orchestrator
+
         # Patterns
         self.code_4_digit_pattern = re.compile(r'^\d{2}\s+\d{2}$')
         self.code_6_digit_pattern = re.compile(r'^\d{2}\s+\d{2}\s+\d{2}$')
@@ -67,12 +86,20 @@ class ValidatorAgent:
 
         logger.info("Validator Agent initialized")
 
-    def validate(self, codes: List[Dict[str, str]]) -> ValidationResult:
+    def validate(self, codes: List[Dict[str, str]],
+                 features: FeatureFrame = None,
+                 artifacts: ArtifactStore = None,
+                 sampling: SamplingPlan = None,
+                 profiler: Any = None) -> ValidationResult:
         """
         Perform comprehensive validation on parsed codes.
 
         Args:
             codes: List of parsed code dictionaries with 'division', 'code', 'title' keys
+            features: Precomputed feature frame for `codes` (built if not provided)
+            artifacts: Shared artifact store of the current run (created if not provided)
+            sampling: Row checks to run on a sample of rows (from the validation profile)
+            profiler: Optional RunProfiler receiving each check's wall and CPU time
 
         Returns:
             ValidationResult with errors, warnings, and confidence score
@@ -100,13 +127,23 @@ class ValidatorAgent:
             ))
             return ValidationResult(passed=False, confidence_score=0.0, errors=errors, stats=stats)
 
-        # Run validation checks
-        errors.extend(self._validate_schema(codes))
-        errors.extend(self._validate_format(codes, stats))
-        errors.extend(self._validate_division_consistency(codes))
-        errors.extend(self._validate_completeness(codes))
-        warnings.extend(self._validate_encoding(codes, stats))
-        errors.extend(self._detect_duplicates(codes, stats))
+        if features is None:
+            features = FeatureFrame.build(codes)
+
+        # Run the registered validation checks
+        context = CheckContext(codes=codes, features=features, stats=stats,
+                               registry=self.registry,
+                               artifacts=artifacts if artifacts is not None else ArtifactStore())
+        results = self.registry.run('validator', self, context,
+                                    disabled=self.disabled_checks, workers=self.check_workers,
+                                    cache=self.row_cache, sampling=sampling,
+                                    profiler=profiler)
+        errors.extend(results.get('errors', []))
+        warnings.extend(results.get('warnings', []))
+
+        # Dataset-level counters of the row-local checks
+        self._count_code_formats(features, stats)
+        stats['encoding_issues'] = sum(1 for w in warnings if w.category == 'Encoding')
 
         # Calculate confidence score
         critical_errors = [e for e in errors if e.severity == 'CRITICAL']
@@ -155,20 +192,21 @@ class ValidatorAgent:
                     code=code_entry.get('code', 'UNKNOWN')
                 ))
 
-            # Check that all fields are strings
+            # Check field types (parser metadata may be None or an int page number)
             for field, value in code_entry.items():
-                if not isinstance(value, str):
+                types, expected = OPTIONAL_FIELD_TYPES.get(field, (str, 'string'))
+                if not isinstance(value, types) or isinstance(value, bool):
                     errors.append(ValidationError(
                         severity='HIGH',
                         category='Schema',
-                        message=f'Field "{field}" must be string, got {type(value).__name__}',
+                        message=f'Field "{field}" must be {expected}, got {type(value).__name__}',
                         line_number=idx,
                         code=code_entry.get('code', 'UNKNOWN')
                     ))
 
         return errors
 
-    def _validate_format(self, codes: List[Dict[str, str]], stats: Dict) -> List[ValidationError]:
+    def _validate_format(self, codes: List[Dict[str, str]]) -> List[ValidationError]:
         """Validate code and division format compliance."""
         errors = []
 
@@ -215,15 +253,18 @@ class ValidatorAgent:
                     code=code
                 ))
 
-            # Track statistics
-            if is_4_digit:
+        return errors
+
+    def _count_code_formats(self, features: FeatureFrame, stats: Dict) -> None:
+        """Count 4- and 6-digit codes (kept out of the row-local format check)."""
+        for code in features.codes:
+            if self.code_4_digit_pattern.match(code):
                 stats['codes_4_digit'] += 1
-            elif is_6_digit:
+            elif self.code_6_digit_pattern.match(code):
                 stats['codes_6_digit'] += 1
 
-        return errors
-
-    def _validate_division_consistency(self, codes: List[Dict[str, str]]) -> List[ValidationError]:
+    def _validate_division_consistency(self, codes: List[Dict[str, str]],
+                                       features: FeatureFrame) -> List[ValidationError]:
         """Ensure code's first two digits match its division."""
         errors = []
 
@@ -234,8 +275,8 @@ class ValidatorAgent:
             if not division or not code:
                 continue
 
-            # Extract first two digits from code
-            code_digits = re.sub(r'\s+', '', code)  # Remove spaces
+            # First two digits of the whitespace-free code
+            code_digits = features.code_digits[idx - 1]
             if len(code_digits) >= 2:
                 code_prefix = code_digits[:2]
 
@@ -250,12 +291,14 @@ class ValidatorAgent:
 
         return errors
 
-    def _validate_completeness(self, codes: List[Dict[str, str]]) -> List[ValidationError]:
+    def _validate_completeness(self, codes: List[Dict[str, str]],
+                               features: FeatureFrame) -> List[ValidationError]:
         """Validate that titles are complete (no truncation, proper length)."""
         errors = []
 
         for idx, code_entry in enumerate(codes, 1):
-            title = code_entry.get('title', '')
+            title = features.titles[idx - 1]
+            title_length = features.title_lengths[idx - 1]
             code = code_entry.get('code', '')
 
             # Check for empty title
@@ -274,17 +317,17 @@ class ValidatorAgent:
                 errors.append(ValidationError(
                     severity='HIGH',
                     category='Completeness',
-                    message=f'Title suspiciously short: "{title}" ({len(title)} chars)',
+                    message=f'Title suspiciously short: "{title}" ({title_length} chars)',
                     line_number=idx,
                     code=code
                 ))
 
             # Check for suspiciously long titles (possible merge error)
-            if len(title) > self.max_title_length:
+            if title_length > self.max_title_length:
                 errors.append(ValidationError(
                     severity='MEDIUM',
                     category='Completeness',
-                    message=f'Title suspiciously long: {len(title)} chars (max: {self.max_title_length})',
+                    message=f'Title suspiciously long: {title_length} chars (max: {self.max_title_length})',
                     line_number=idx,
                     code=code,
                     details={'title_preview': title[:100] + '...'}
@@ -305,7 +348,7 @@ class ValidatorAgent:
 
         return errors
 
-    def _validate_encoding(self, codes: List[Dict[str, str]], stats: Dict) -> List[ValidationError]:
+    def _validate_encoding(self, codes: List[Dict[str, str]]) -> List[ValidationError]:
         """Check for character encoding issues."""
         warnings = []
 
@@ -326,22 +369,19 @@ class ValidatorAgent:
                         code=code,
                         details={'title': title}
                     ))
-                    stats['encoding_issues'] += 1
                     break
 
         return warnings
 
-    def _detect_duplicates(self, codes: List[Dict[str, str]], stats: Dict) -> List[ValidationError]:
-        """Detect duplicate code entries."""
+    def _detect_duplicates(self, codes: List[Dict[str, str]], features: FeatureFrame,
+                           stats: Dict, first_occurrence: Dict[str, int]) -> List[ValidationError]:
+        """Detect duplicate code entries (first_occurrence: shared duplicate map)."""
         errors = []
-        seen_codes = {}
 
-        for idx, code_entry in enumerate(codes, 1):
-            division = code_entry.get('division', '')
-            code = code_entry.get('code', '')
+        for idx, (division, code) in enumerate(zip(features.divisions, features.codes), 1):
             full_code = f"{division}-{code}"
 
-            if full_code in seen_codes:
+            if first_occurrence[full_code] != idx:
                 errors.append(ValidationError(
                     severity='HIGH',
                     category='Duplicate',
@@ -349,13 +389,11 @@ class ValidatorAgent:
                     line_number=idx,
                     code=code,
                     details={
-                        'first_occurrence': seen_codes[full_code],
+                        'first_occurrence': first_occurrence[full_code],
                         'duplicate_occurrence': idx
                     }
                 ))
                 stats['duplicates_found'] += 1
-            else:
-                seen_codes[full_code] = idx
 
         return errors
 
@@ -383,3 +421,44 @@ class ValidatorAgent:
         score = max(0.0, min(100.0, score))
 
         return score
+
+
+# ---------------------------------------------------------------------------
+# Built-in checks, registered in reporting order
+# ---------------------------------------------------------------------------
+
+@default_registry.check('validator.schema', agent='validator', scope='row',
+                        severity='CRITICAL', result='errors', row_cost=3.5e-6)
+def check_schema(agent: ValidatorAgent, context: CheckContext) -> List[ValidationError]:
+    return agent._validate_schema(context.codes)
+
+
+@default_registry.check('validator.format', agent='validator', scope='row',
+                        severity='CRITICAL', result='errors')
+def check_format(agent: ValidatorAgent, context: CheckContext) -> List[ValidationError]:
+    return agent._validate_format(context.codes)
+
+
+@default_registry.check('validator.division_consistency', agent='validator', scope='row',
+                        severity='HIGH', result='errors', row_cost=4.5e-6)
+def check_division_consistency(agent: ValidatorAgent, context: CheckContext) -> List[ValidationError]:
+    return agent._validate_division_consistency(context.codes, context.features)
+
+
+@default_registry.check('validator.completeness', agent='validator', scope='row',
+                        severity='CRITICAL', result='errors')
+def check_completeness(agent: ValidatorAgent, context: CheckContext) -> List[ValidationError]:
+    return agent._validate_completeness(context.codes, context.features)
+
+
+@default_registry.check('validator.encoding', agent='validator', scope='row',
+                        severity='MEDIUM', result='warnings')
+def check_encoding(agent: ValidatorAgent, context: CheckContext) -> List[ValidationError]:
+    return agent._validate_encoding(context.codes)
+
+
+@default_registry.check('validator.duplicates', agent='validator', inputs=['duplicate_map'],
+                        severity='HIGH', result='errors', row_cost=3.5e-6)
+def check_duplicates(agent: ValidatorAgent, context: CheckContext) -> List[ValidationError]:
+    return agent._detect_duplicates(context.codes, context.features, context.stats,
+                                    context.get('duplicate_map'))
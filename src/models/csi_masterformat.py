@@ -1,7 +1,7 @@
 """
 Data models for CSI MasterFormat 2020 parsing.
 """
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, validator
 from typing import Optional, List
 from datetime import datetime
 import re
@@ -60,12 +60,17 @@ class CSICode(BaseModel):
 
 class CSIGroup(BaseModel):
     """Represents a CSI MasterFormat group."""
+    # Schemas are built on first use: the CLI only needs CSICode
+    model_config = ConfigDict(defer_build=True)
+
     name: str
     divisions: List[str] = Field(default_factory=list)
 
 
 class CSISubgroup(BaseModel):
     """Represents a CSI MasterFormat subgroup."""
+    model_config = ConfigDict(defer_build=True)
+
     name: str
     parent_group: str
     divisions: List[str] = Field(default_factory=list)
@@ -73,6 +78,8 @@ class CSISubgroup(BaseModel):
 
 class ParsingResult(BaseModel):
     """Complete parsing result for a PDF."""
+    model_config = ConfigDict(defer_build=True)
+
     codes: List[CSICode] = Field(default_factory=list)
     groups: List[CSIGroup] = Field(default_factory=list)
     subgroups: List[CSISubgroup] = Field(default_factory=list)
@@ -6,6 +6,8 @@ from typing import List, Tuple, Optional
 from loguru import logger
 import pdfplumber
 
+from src.parsers.page_index import PageIndex
+
 
 class CSIParser:
     """
@@ -61,10 +63,9 @@ class CSIParser:
             return (div, code, title)
         return None
     
-    def extract_column_text(self, page, bbox) -> List[str]:
-        """Extract text from a specific bounding box (column)."""
-        cropped = page.crop(bbox)
-        text = cropped.extract_text()
+    def extract_column_text(self, page, bbox, index: PageIndex = None) -> List[str]:
+        """Extract text from a specific bounding box (column), through the page's index if given."""
+        text = index.text_in(bbox) if index is not None else page.crop(bbox).extract_text()
         if not text:
             return []
         
@@ -134,9 +135,10 @@ class CSIParser:
     
     def parse_page(self, page, page_num: int) -> List[dict]:
         """Parse a single PDF page using bbox-based column extraction."""
-        # Extract each column separately
-        left_col = self.extract_column_text(page, self.left_bbox)
-        right_col = self.extract_column_text(page, self.right_bbox)
+        # Extract each column separately; the page's chars are indexed once for both
+        index = PageIndex(page)
+        left_col = self.extract_column_text(page, self.left_bbox, index)
+        right_col = self.extract_column_text(page, self.right_bbox, index)
         
         # Update context from both columns
         self.update_context(left_col + right_col)
@@ -2,10 +2,14 @@
 CSI MasterFormat parser - using word-level extraction to avoid cut-off titles.
 """
 import re
-from typing import List, Tuple, Optional
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, List, Tuple, Optional
 from loguru import logger
 import pdfplumber
 
+from src.utils.metrics import RunMetrics
+
 
 class CSIParser:
     """
@@ -17,17 +21,22 @@ class CSIParser:
     GROUP_PATTERN = re.compile(r'^(.+)\s+(Group|Subgroup)$')
     FOOTER_PATTERN = re.compile(r'CSI grants to .+ a non-exclusive')
     
-    def __init__(self, column_split_x: float = 320.0):
+    def __init__(self, column_split_x: float = 320.0, metrics: RunMetrics = None):
         """
         Initialize parser with column split X position.
         
         Args:
             column_split_x: X-coordinate that separates left and right columns
+            metrics: Receives page counts and per-page stage timings
         """
         self.current_group = None
         self.current_subgroup = None
         self.current_division = None
         self.column_split_x = column_split_x
+        self.page_failures = []  # PageFailure records of the last supervised parse
+        self.metrics = metrics if metrics is not None else RunMetrics()
+        self.profiler = None  # RunProfiler, set for --profile-run
+        self.memory = None  # MemoryTracker, set for --track-memory
         
     def is_footer(self, line: str) -> bool:
         """Check if line is part of footer."""
@@ -89,7 +98,10 @@ class CSIParser:
     def extract_columns(self, page) -> Tuple[List[str], List[str]]:
         """Extract left and right columns using word-level detection."""
         words = page.extract_words(x_tolerance=3, y_tolerance=3)
-        
+        return self.columns_from_words(words)
+    
+    def columns_from_words(self, words: List[dict]) -> Tuple[List[str], List[str]]:
+        """Split words (dicts with x0, top and text) into left and right column lines."""
         # Separate words into columns
         left_words = [w for w in words if w['x0'] < self.column_split_x]
         right_words = [w for w in words if w['x0'] >= self.column_split_x]
@@ -172,8 +184,47 @@ class CSIParser:
     def parse_page(self, page, page_num: int) -> List[dict]:
         """Parse a single PDF page using word-level extraction."""
         # Extract columns
-        left_col, right_col = self.extract_columns(page)
-        
+        with self._stage('extract', page_num):
+            words = page.extract_words(x_tolerance=3, y_tolerance=3)
+        return self.parse_words(words, page_num)
+    
+    def parse_words(self, words: List[dict], page_num: int) -> List[dict]:
+        """Parse a page from its extracted words (dicts with x0, top and text)."""
+        with self._stage('line_assembly', page_num):
+            left_col, right_col = self.columns_from_words(words)
+        if self.profiler is not None:
+            profile = self.profiler.page(page_num)
+            profile.words = len(words)
+            profile.chars = sum(len(word['text']) for word in words)
+        return self.assemble_page(left_col, right_col, page_num)
+    
+    def assemble_page(self, left_col: List[str], right_col: List[str], page_num: int) -> List[dict]:
+        """Build a page's code entries from its column lines (pages must come in order)."""
+        with self._stage('classification', page_num):
+            codes = self._classify_page(left_col, right_col, page_num)
+        if self.profiler is not None:
+            profile = self.profiler.page(page_num)
+            profile.left_lines, profile.right_lines = len(left_col), len(right_col)
+            profile.codes = len(codes)
+        return codes
+    
+    @contextmanager
+    def _stage(self, name: str, page_num: int):
+        """Time a page stage into the metrics and, when profiling, the profiler."""
+        started, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - started
+            self.metrics.observe(name, wall)
+            if self.profiler is not None:
+                self.profiler.page_stage(page_num, name, wall, time.thread_time() - cpu)
+    
+    def _page_memory(self, page_num: int):
+        """Track a page's memory (no-op unless tracking memory)."""
+        return self.memory.page(page_num) if self.memory is not None else nullcontext()
+    
+    def _classify_page(self, left_col: List[str], right_col: List[str], page_num: int) -> List[dict]:
         # Update context from both columns
         self.update_context(left_col + right_col)
         
@@ -198,18 +249,84 @@ class CSIParser:
         
         return results
     
-    def parse_pdf(self, pdf_path: str) -> List[dict]:
-        """Parse entire CSI MasterFormat PDF."""
+    def parse_pdf(self, pdf_path: str,
+                  on_page: Optional[Callable[[int, int, List[dict]], None]] = None,
+                  workers: int = 0, page_timeout: float = None,
+                  document_timeout: float = None, fallback: str = None,
+                  backend: str = 'pdfplumber') -> List[dict]:
+        """
+        Parse entire CSI MasterFormat PDF.
+
+        With `workers` > 0, pages are extracted in supervised worker processes
+        (see page_watchdog.py) under the page and document time limits; pages
+        that time out or fail yield no codes and are listed in `page_failures`.
+
+        Args:
+            pdf_path: Path to the PDF
+            on_page: Called after each page with (page number, page count, page's codes)
+            workers: Supervised extraction processes (0: extract in this process, no limits)
+            page_timeout: Seconds allowed per page (supervised only)
+            document_timeout: Seconds allowed for the whole document (supervised only)
+            fallback: Backend to retry failed pages with, e.g. 'pymupdf' (supervised only)
+            backend: Word extraction backend, 'pdfplumber' or 'pymupdf'
+        """
         logger.info(f"Parsing: {pdf_path}")
         all_codes = []
+        self.page_failures = []
         
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                logger.debug(f"Page {page_num + 1}/{len(pdf.pages)}")
-                codes = self.parse_page(page, page_num + 1)
+        if workers > 0:
+            from src.parsers.page_watchdog import PageSupervisor
+
+            supervisor = PageSupervisor(pdf_path, workers=workers, page_timeout=page_timeout,
+                                        document_timeout=document_timeout,
+                                        column_split_x=self.column_split_x, backend=backend,
+                                        fallback=fallback, metrics=self.metrics)
+            for page_num, left_col, right_col in supervisor.pages():
+                codes = (self.assemble_page(left_col, right_col, page_num)
+                         if left_col is not None else [])
                 all_codes.extend(codes)
-                if codes:
-                    logger.debug(f"Extracted {len(codes)} codes")
+                if on_page is not None:
+                    on_page(page_num, supervisor.page_count, codes)
+            self.page_failures = supervisor.failures
+            for failure in self.page_failures:
+                self.metrics.inc('page_failures_total', reason=failure.reason)
+            pages = supervisor.page_count
+        elif backend == 'pdfplumber':
+            with pdfplumber.open(pdf_path) as pdf:
+                for page_num, page in enumerate(pdf.pages):
+                    logger.debug(f"Page {page_num + 1}/{len(pdf.pages)}")
+                    with self._page_memory(page_num + 1):
+                        try:
+                            codes = self.parse_page(page, page_num + 1)
+                        finally:
+                            # pdfplumber caches every page's objects until the PDF closes
+                            page.close()
+                    all_codes.extend(codes)
+                    if codes:
+                        logger.debug(f"Extracted {len(codes)} codes")
+                    if on_page is not None:
+                        on_page(page_num + 1, len(pdf.pages), codes)
+                pages = len(pdf.pages)
+        else:
+            from src.parsers.page_watchdog import BACKENDS, open_document, page_words
+
+            if backend not in BACKENDS:
+                raise ValueError(f"Unknown extraction backend {backend!r} (expected one of {BACKENDS})")
+            document = open_document(pdf_path, backend)
+            try:
+                pages = document.page_count
+                for index in range(pages):
+                    with self._page_memory(index + 1):
+                        with self._stage('extract', index + 1):
+                            words = page_words(document, backend, index)
+                        codes = self.parse_words(words, index + 1)
+                    all_codes.extend(codes)
+                    if on_page is not None:
+                        on_page(index + 1, pages, codes)
+            finally:
+                document.close()
         
+        self.metrics.inc('pages_total', pages)
+        self.metrics.inc('codes_total', len(all_codes))
         logger.info(f"Total: {len(all_codes)} codes")
         return all_codes
@@ -0,0 +1,166 @@
+"""
+Page Index - Uniform grid over a page's objects for region queries.
+
+Filtering a page's objects by region (pdfplumber's page.crop(), or a list
+comprehension over the words) tests every object on the page, for every
+query. SpatialGrid buckets the objects into square cells once; a query then
+only tests the objects in the cells its region covers, so it costs time in
+proportion to what it returns rather than to the size of the page.
+
+Objects are dicts in pdfplumber's coordinates (x0, top, x1, bottom; top
+down). Objects with only x0 and top, such as the words page_watchdog reads
+with PyMuPDF, are indexed as points. Queries return objects in their
+original order, so results match filtering the list directly:
+
+    intersecting(bbox)  objects overlapping the region (page.crop() semantics)
+    within(bbox)        objects entirely inside it (page.within_bbox())
+    anchored(bbox)      objects whose top-left corner (x0, top) lies in it;
+                        the region's right and bottom edges are excluded, so
+                        adjacent regions split objects exactly once (columns
+                        at a split X, or header and footer bands)
+
+PageIndex holds the grids of one pdfplumber page: chars, words and rects,
+each built on first use and kept for the page's later queries.
+
+Building a grid is a pass over every object, so it pays off once a page is
+queried for regions smaller than the page, or more than once: the bbox
+parser's two column crops take about a third of the time through the
+index. A single split of all of a page's words, as the final parser's
+column split, is cheaper as one list comprehension.
+"""
+
+from functools import cached_property
+from math import floor, inf
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from pdfplumber.utils import chars_to_textmap, clip_obj
+
+
+# Points per cell side: about three text lines of a MasterFormat page
+CELL_SIZE = 32.0
+
+# Regions may be unbounded on any side, e.g. (-inf, -inf, split_x, inf)
+BBox = Tuple[float, float, float, float]
+
+
+def _extent(obj: dict) -> BBox:
+    x0, top = obj['x0'], obj['top']
+    return x0, top, obj.get('x1', x0), obj.get('bottom', top)
+
+
+class SpatialGrid:
+    """Objects bucketed into square cells by the area they cover."""
+
+    def __init__(self, objects: Sequence[dict], cell_size: float = CELL_SIZE):
+        self.objects = list(objects)
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._spanning = False  # Whether any object covers more than one cell
+        self._bounds = (0, 0, -1, -1)  # Occupied cell range (empty when inverted)
+
+        cells = self._cells
+        columns, rows = [], []
+        for index, obj in enumerate(self.objects):
+            x0, top, x1, bottom = _extent(obj)
+            first_column, first_row = floor(x0 / cell_size), floor(top / cell_size)
+            last_column, last_row = floor(x1 / cell_size), floor(bottom / cell_size)
+            if first_column == last_column and first_row == last_row:
+                cells.setdefault((first_column, first_row), []).append(index)
+            else:
+                self._spanning = True
+                for column in range(first_column, last_column + 1):
+                    for row in range(first_row, last_row + 1):
+                        cells.setdefault((column, row), []).append(index)
+            columns += (first_column, last_column)
+            rows += (first_row, last_row)
+        if self.objects:
+            self._bounds = (min(columns), min(rows), max(columns), max(rows))
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def _candidates(self, bbox: BBox) -> List[int]:
+        """Indices of the objects in the cells covering `bbox`, in their original order."""
+        x0, top, x1, bottom = bbox
+        min_column, min_row, max_column, max_row = self._bounds
+        size = self.cell_size
+        first_column = min_column if x0 == -inf else max(min_column, floor(x0 / size))
+        first_row = min_row if top == -inf else max(min_row, floor(top / size))
+        last_column = max_column if x1 == inf else min(max_column, floor(x1 / size))
+        last_row = max_row if bottom == inf else min(max_row, floor(bottom / size))
+
+        cells = self._cells
+        found: List[int] = []
+        for column in range(first_column, last_column + 1):
+            for row in range(first_row, last_row + 1):
+                cell = cells.get((column, row))
+                if cell:
+                    found.extend(cell)
+        if self._spanning:
+            found = list(set(found))
+        found.sort()
+        return found
+
+    def _select(self, bbox: BBox, test) -> List[dict]:
+        objects = self.objects
+        return [objects[i] for i in self._candidates(bbox) if test(_extent(objects[i]))]
+
+    def intersecting(self, bbox: BBox) -> List[dict]:
+        """Objects overlapping `bbox` (touching counts, as in pdfplumber's crop)."""
+        x0, top, x1, bottom = bbox
+
+        def overlaps(extent: BBox) -> bool:
+            left, upper = max(extent[0], x0), max(extent[1], top)
+            right, lower = min(extent[2], x1), min(extent[3], bottom)
+            return right >= left and lower >= upper and (right - left) + (lower - upper) > 0
+
+        return self._select(bbox, overlaps)
+
+    def within(self, bbox: BBox) -> List[dict]:
+        """Objects entirely inside `bbox`."""
+        x0, top, x1, bottom = bbox
+        return self._select(bbox, lambda e: e[0] >= x0 and e[1] >= top
+                            and e[2] <= x1 and e[3] <= bottom)
+
+    def anchored(self, bbox: BBox) -> List[dict]:
+        """Objects whose top-left corner lies in `bbox`, right and bottom edges excluded."""
+        x0, top, x1, bottom = bbox
+        return self._select(bbox, lambda e: x0 <= e[0] < x1 and top <= e[1] < bottom)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.objects)
+
+
+class PageIndex:
+    """Spatial grids over the chars, words and rects of one pdfplumber page."""
+
+    def __init__(self, page, cell_size: float = CELL_SIZE, x_tolerance: float = 3,
+                 y_tolerance: float = 3):
+        self.page = page
+        self.cell_size = cell_size
+        self.x_tolerance = x_tolerance
+        self.y_tolerance = y_tolerance
+
+    @cached_property
+    def chars(self) -> SpatialGrid:
+        return SpatialGrid(self.page.chars, self.cell_size)
+
+    @cached_property
+    def words(self) -> SpatialGrid:
+        """Words as page.extract_words() groups them (with this index's tolerances)."""
+        return SpatialGrid(self.page.extract_words(x_tolerance=self.x_tolerance,
+                                                   y_tolerance=self.y_tolerance),
+                           self.cell_size)
+
+    @cached_property
+    def rects(self) -> SpatialGrid:
+        return SpatialGrid(self.page.rects, self.cell_size)
+
+    def text_in(self, bbox: BBox) -> str:
+        """Text of a region; the same as page.crop(bbox).extract_text()."""
+        # The grid narrows the candidates; clip_obj applies crop()'s own overlap test
+        clipped = (clip_obj(char, bbox) for char in self.chars.intersecting(bbox))
+        chars = [char for char in clipped if char is not None]
+        x0, top, x1, bottom = bbox
+        return chars_to_textmap(chars, layout_bbox=bbox, layout_width=x1 - x0,
+                                layout_height=bottom - top).as_string
@@ -0,0 +1,316 @@
+"""
+Page Watchdog - Extract pages in supervised worker processes with time limits.
+
+Word extraction is the only stage of parsing that can stall: a vector-heavy
+drawing or a corrupt content stream can keep `page.extract_words` busy
+indefinitely. PageSupervisor runs that stage in worker processes, one page
+at a time per worker, and enforces two limits:
+
+    page_timeout       A worker that spends longer on one page is killed and
+                       replaced; the page is marked as timed out (or first
+                       retried with the fallback backend)
+    document_timeout   Once the whole document takes longer, pages not yet
+                       extracted are marked as timed out and the run ends
+
+Workers only return column lines; the caller assembles pages in order (group
+and subgroup context carries from page to page), so the results are the same
+as an unsupervised run apart from the pages that failed.
+
+Backends:
+    pdfplumber   The parser's own extraction (default)
+    pymupdf      MuPDF's word list, a different code path for pages that
+                 stall pdfplumber
+"""
+
+import multiprocessing
+import time
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+
+BACKENDS = ('pdfplumber', 'pymupdf')
+
+# Page failure reasons
+REASON_TIMEOUT = 'timeout'
+REASON_ERROR = 'error'
+REASON_DOCUMENT_TIMEOUT = 'document_timeout'
+
+
+@dataclass
+class PageFailure:
+    """A page whose words could not be extracted."""
+    page: int                   # 1-based page number
+    reason: str                 # REASON_* constant
+    backend: str                # Backend of the last attempt
+    detail: str = ''
+
+    def __str__(self) -> str:
+        if self.reason == REASON_TIMEOUT:
+            message = f"timed out ({self.detail})"
+        elif self.reason == REASON_DOCUMENT_TIMEOUT:
+            message = f"not extracted, document time limit reached ({self.detail})"
+        else:
+            message = f"extraction failed ({self.detail})"
+        return f"Page {self.page} {message} [{self.backend}]"
+
+
+def page_words(document, backend: str, index: int) -> List[dict]:
+    """Words of one page of an open_document() as dicts with x0, top and text."""
+    if backend == 'pymupdf':
+        return [{'x0': w[0], 'top': w[1], 'text': w[4]}
+                for w in document[index].get_text("words")]
+    page = document.pages[index]
+    try:
+        return page.extract_words(x_tolerance=3, y_tolerance=3)
+    finally:
+        page.close()  # Drop the page's cached objects
+
+
+def open_document(pdf_path: str, backend: str):
+    """Open a PDF with the given backend (see BACKENDS)."""
+    if backend == 'pymupdf':
+        import fitz
+        return fitz.open(pdf_path)
+    import pdfplumber
+    return pdfplumber.open(pdf_path)
+
+
+def _worker(pdf_path: str, column_split_x: float, backend: str, connection) -> None:
+    """
+    Worker process: announce readiness with None once the document is open,
+    then receive (page index, backend) and reply with
+    (page index, left lines, right lines, error, (extract seconds, line assembly seconds)).
+    """
+    from src.parsers.csi_parser_final import CSIParser
+
+    parser = CSIParser(column_split_x=column_split_x)
+    documents = {}
+    try:
+        try:
+            documents[backend] = open_document(pdf_path, backend)
+        except Exception:
+            pass  # Reported with the first page
+        connection.send(None)
+        while True:
+            task = connection.recv()
+            if task is None:
+                return
+            index, backend = task
+            try:
+                if backend not in documents:
+                    documents[backend] = open_document(pdf_path, backend)
+                started = time.perf_counter()
+                words = page_words(documents[backend], backend, index)
+                extracted = time.perf_counter()
+                left, right = parser.columns_from_words(words)
+                timings = (extracted - started, time.perf_counter() - extracted)
+                connection.send((index, left, right, None, timings))
+            except Exception as e:
+                connection.send((index, None, None, f"{type(e).__name__}: {e}", None))
+    except (EOFError, BrokenPipeError, KeyboardInterrupt):
+        return
+    finally:
+        for document in documents.values():
+            document.close()
+
+
+class _Slot:
+    """One worker process and the page it is working on."""
+
+    def __init__(self, context, pdf_path: str, column_split_x: float, backend: str):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_worker,
+                                       args=(pdf_path, column_split_x, backend, child),
+                                       daemon=True)
+        self.process.start()
+        child.close()
+        self.ready = False  # Start-up does not count against the page time limit
+        self.task: Optional[Tuple[int, str]] = None
+        self.started = 0.0
+
+    def assign(self, task: Tuple[int, str]) -> None:
+        self.task = task
+        self.started = time.monotonic()
+        self.connection.send(task)
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def stop(self) -> None:
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+class PageSupervisor:
+    """Extracts a PDF's column lines page by page under time limits."""
+
+    def __init__(self, pdf_path: str, workers: int = 2, page_timeout: float = 60.0,
+                 document_timeout: float = None, column_split_x: float = 320.0,
+                 backend: str = 'pdfplumber', fallback: str = None, metrics=None):
+        """
+        Args:
+            pdf_path: PDF to extract
+            workers: Worker processes (at most one per page)
+            page_timeout: Seconds a worker may spend on one page (None: no limit)
+            document_timeout: Seconds for the whole document (None: no limit)
+            column_split_x: X-coordinate that separates left and right columns
+            backend: Extraction backend (see BACKENDS)
+            fallback: Backend to retry a page with after a timeout or error
+            metrics: RunMetrics receiving stage timings and worker utilization
+        """
+        for name in (backend, fallback):
+            if name is not None and name not in BACKENDS:
+                raise ValueError(f"Unknown extraction backend {name!r} (expected one of {BACKENDS})")
+        self.pdf_path = str(pdf_path)
+        self.workers = max(1, workers)
+        self.page_timeout = page_timeout
+        self.document_timeout = document_timeout
+        self.column_split_x = column_split_x
+        self.backend = backend
+        self.fallback = fallback if fallback != backend else None
+        self.metrics = metrics
+        self.failures: List[PageFailure] = []
+        self.page_count = 0
+        self.busy_seconds = 0.0       # Worker time spent on pages
+        self.capacity_seconds = 0.0   # Workers x wall time
+
+    def pages(self) -> Iterator[Tuple[int, Optional[List[str]], Optional[List[str]]]]:
+        """
+        Yield (page number, left lines, right lines) in page order.
+
+        Lines are None for pages that failed; their PageFailure is in `failures`.
+        """
+        import pdfplumber
+
+        with pdfplumber.open(self.pdf_path) as pdf:
+            self.page_count = len(pdf.pages)
+        if not self.page_count:
+            return
+
+        context = multiprocessing.get_context('spawn')
+        started = time.monotonic()
+        deadline = (time.monotonic() + self.document_timeout
+                    if self.document_timeout is not None else None)
+        pending: Deque[Tuple[int, str]] = deque((i, self.backend) for i in range(self.page_count))
+        done: Dict[int, Tuple[Optional[List[str]], Optional[List[str]]]] = {}
+        slots = [_Slot(context, self.pdf_path, self.column_split_x, self.backend)
+                 for _ in range(min(self.workers, self.page_count))]
+        next_page = 0
+
+        try:
+            while next_page < self.page_count:
+                for slot in slots:
+                    if slot.ready and slot.task is None and pending:
+                        slot.assign(pending.popleft())
+
+                busy = {slot.connection: slot for slot in slots
+                        if slot.task is not None or not slot.ready}
+                working = [slot for slot in busy.values() if slot.task is not None]
+                ready = wait(list(busy), self._wait_time(working, deadline)) if busy else []
+                for connection in ready:
+                    slot = busy[connection]
+                    try:
+                        message = connection.recv()
+                    except (EOFError, OSError):
+                        if slot.task is None:
+                            raise RuntimeError("Page extraction worker failed to start")
+                        slots[slots.index(slot)] = self._replace(context, slot, pending, done,
+                                                                 REASON_ERROR, "worker process died")
+                        continue
+                    if message is None:
+                        slot.ready = True
+                        continue
+                    index, left, right, error, timings = message
+                    backend = slot.task[1]
+                    slot.task = None
+                    self.busy_seconds += time.monotonic() - slot.started
+                    if timings is not None and self.metrics is not None:
+                        self.metrics.observe('extract', timings[0])
+                        self.metrics.observe('line_assembly', timings[1])
+                    if error is None:
+                        done[index] = (left, right)
+                    else:
+                        self._failed(index, backend, REASON_ERROR, error, pending, done)
+
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    self._abandon(pending, slots, done)
+                elif self.page_timeout is not None:
+                    for i, slot in enumerate(slots):
+                        if slot.task is not None and now - slot.started >= self.page_timeout:
+                            slots[i] = self._replace(context, slot, pending, done, REASON_TIMEOUT,
+                                                     f"{self.page_timeout:g}s")
+
+                while next_page in done:
+                    left, right = done.pop(next_page)
+                    next_page += 1
+                    yield next_page, left, right
+        finally:
+            for slot in slots:
+                if slot.task is not None:
+                    slot.kill()
+                elif not slot.connection.closed:
+                    slot.stop()
+            self.capacity_seconds = len(slots) * (time.monotonic() - started)
+            if self.metrics is not None:
+                self.metrics.workers('page_extraction', self.busy_seconds, self.capacity_seconds)
+
+    def _wait_time(self, slots, deadline: Optional[float]) -> Optional[float]:
+        """Seconds until the next page or document limit runs out."""
+        limits = []
+        if self.page_timeout is not None:
+            limits.extend(slot.started + self.page_timeout for slot in slots)
+        if deadline is not None:
+            limits.append(deadline)
+        return max(0.0, min(limits) - time.monotonic()) if limits else None
+
+    def _replace(self, context, slot: _Slot, pending, done, reason: str, detail: str) -> _Slot:
+        """Kill a worker that hung or died, record its page and start a fresh worker."""
+        index, backend = slot.task
+        self.busy_seconds += time.monotonic() - slot.started
+        slot.kill()
+        self._failed(index, backend, reason, detail, pending, done)
+        return _Slot(context, self.pdf_path, self.column_split_x, self.backend)
+
+    def _failed(self, index: int, backend: str, reason: str, detail: str, pending, done) -> None:
+        if self.fallback is not None and backend != self.fallback:
+            logger.warning(f"Page {index + 1}: {backend} {reason} ({detail}); "
+                           f"retrying with {self.fallback}")
+            pending.appendleft((index, self.fallback))
+            return
+        failure = PageFailure(index + 1, reason, backend, detail)
+        logger.warning(str(failure))
+        self.failures.append(failure)
+        done[index] = (None, None)
+
+    def _abandon(self, pending, slots: List[_Slot], done) -> None:
+        """Document time limit reached: stop all work and mark unfinished pages."""
+        unfinished = [index for index, _ in pending]
+        for slot in slots:
+            if slot.task is not None:
+                unfinished.append(slot.task[0])
+                slot.kill()
+                slot.task = None
+        pending.clear()
+        if not unfinished:
+            return
+        detail = f"{self.document_timeout:g}s"
+        for index in sorted(unfinished):
+            failure = PageFailure(index + 1, REASON_DOCUMENT_TIMEOUT, self.backend, detail)
+            self.failures.append(failure)
+            done[index] = (None, None)
+        logger.warning(f"Document time limit of {detail} reached; "
+                       f"{len(unfinished)} pages not extracted")
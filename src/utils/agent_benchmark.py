@@ -0,0 +1,334 @@
+"""
+Agent Benchmark - Validation agents against their documented performance targets.
+
+Each case runs one stage on a synthetic code dataset (see synthetic_codes.py)
+in a fresh process, so its peak resident memory is its own:
+
+    validator      ValidatorAgent.validate
+    auditor        AuditorAgent.audit
+    qc             QualityControlAgent.verify
+    orchestrator   ValidationOrchestrator.validate (all three, shared features)
+
+Stages are checked against the budgets in docs/agents/ARCHITECTURE.md (per
+100 pages, taken as CODES_PER_PAGE codes a page) and, for the orchestrator,
+docs/agents/VALIDATION_SYSTEM.md (< 1 second per 1000 codes, < 500MB for
+10,000 codes). Time budgets scale linearly with the row count; memory budgets
+too, but never below the documented amount.
+
+The orchestrator case also scores detection: the share of each injected
+defect type reported by the check meant to catch it (DETECTED_BY), and the
+share of clean rows with any row-level issue, against the documented 99.9%
+detection and < 1% false-positive targets.
+"""
+
+import functools
+import math
+import multiprocessing
+import resource
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from src.utils.memory_profile import MEMORY_BUDGETS_MB
+from src.utils.synthetic_codes import DEFECT_TYPES, SyntheticCodes, generate_codes
+
+
+STAGES = ('validator', 'auditor', 'qc', 'orchestrator')
+DEFAULT_ROWS = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_DEFECT_RATE = 0.01  # Per defect type
+
+# Codes per page of the MasterFormat excerpt (1,092 codes on 23 pages)
+CODES_PER_PAGE = 47
+
+# Issue category expected to report each defect type
+DETECTED_BY = {
+    'format': 'Format',
+    'duplicate': 'Duplicate',
+    'truncation': 'Completeness',
+    'sequence': 'Sequence',
+    'encoding': 'Encoding',
+}
+
+# Documented accuracy targets (docs/agents/VALIDATION_SYSTEM.md)
+TARGET_DETECTION = 0.999
+TARGET_FALSE_POSITIVES = 0.01
+
+
+@dataclass(frozen=True)
+class Budget:
+    """A documented time and memory target, for a number of codes."""
+    seconds: float
+    seconds_codes: int
+    memory_mb: float
+    memory_codes: int
+    source: str
+
+    def seconds_for(self, rows: int) -> float:
+        return self.seconds * rows / self.seconds_codes
+
+    def memory_for(self, rows: int) -> float:
+        return self.memory_mb * max(1.0, rows / self.memory_codes)
+
+
+_PER_100_PAGES = 100 * CODES_PER_PAGE
+
+BUDGETS = {
+    'validator': Budget(10.0, _PER_100_PAGES, MEMORY_BUDGETS_MB['validator'], _PER_100_PAGES,
+                        'ARCHITECTURE.md'),
+    'auditor': Budget(20.0, _PER_100_PAGES, MEMORY_BUDGETS_MB['auditor'], _PER_100_PAGES,
+                      'ARCHITECTURE.md'),
+    'qc': Budget(5.0, _PER_100_PAGES, MEMORY_BUDGETS_MB['qc'], _PER_100_PAGES, 'ARCHITECTURE.md'),
+    'orchestrator': Budget(1.0, 1_000, 500.0, 10_000, 'VALIDATION_SYSTEM.md'),
+}
+
+
+@dataclass
+class AgentResult:
+    """One stage on one dataset."""
+    stage: str
+    rows: int
+    seconds: float
+    peak_rss_mb: float            # Peak resident memory growth while the stage ran
+    issues: int
+    budget_seconds: float
+    budget_mb: float
+    detection: Dict[str, float] = field(default_factory=dict)  # Defect type -> share reported
+    false_positive_rate: Optional[float] = None                # Share of clean rows flagged
+    false_positives: Dict[str, int] = field(default_factory=dict)  # Category -> clean rows flagged
+    error: str = ''
+    cpu_seconds: float = 0.0      # CPU time of this process (executor worker processes not included)
+
+    @property
+    def us_per_code(self) -> float:
+        return self.seconds / self.rows * 1e6 if self.rows else 0.0
+
+    @property
+    def over_budget(self) -> List[str]:
+        """Time and memory budgets this case exceeded."""
+        over = []
+        if self.seconds > self.budget_seconds:
+            over.append(f"time {self.seconds:.2f}s > {self.budget_seconds:.2f}s")
+        if self.peak_rss_mb > self.budget_mb:
+            over.append(f"memory {self.peak_rss_mb:.0f}MB > {self.budget_mb:.0f}MB")
+        return over
+
+    @property
+    def below_target(self) -> List[str]:
+        """Accuracy targets this case missed (orchestrator only)."""
+        missed = [f"{defect} detection {rate:.1%}" for defect, rate in self.detection.items()
+                  if rate < TARGET_DETECTION]
+        if self.false_positive_rate is not None and self.false_positive_rate > TARGET_FALSE_POSITIVES:
+            missed.append(f"false positives {self.false_positive_rate:.1%}")
+        return missed
+
+
+def _peak_rss_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024  # bytes vs KB
+
+
+def _current_rss_mb() -> float:
+    """Current resident memory (the peak so far where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return _peak_rss_mb()
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+
+def benchmark_config(config: Optional[dict] = None) -> dict:
+    """
+    `config` set up for benchmarking: no critical gate (defective datasets
+    always have critical errors, and the Auditor and QC must still run)
+    and no row cache (a warm cache would time the lookups, not the checks).
+    """
+    config = dict(config or {})
+    config['max_critical_errors'] = sys.maxsize
+    config.pop('row_cache', None)
+    return config
+
+
+def _flagged_rows(result) -> Dict[int, set]:
+    """0-based row -> issue categories of every row-level issue in an OrchestrationResult."""
+    issues = [*result.validator_result.errors, *result.validator_result.warnings,
+              *result.auditor_result.issues, *result.qc_result.issues]
+    flagged: Dict[int, set] = {}
+    for issue in issues:
+        if issue.line_number is not None:
+            flagged.setdefault(issue.line_number - 1, set()).add(issue.category)
+    return flagged
+
+
+def score_detection(dataset: SyntheticCodes, flagged: Dict[int, set]) -> tuple:
+    """(detection rate per defect type, false-positive rate, clean rows flagged per category)."""
+    found, injected = Counter(), Counter(dataset.defects.values())
+    for row, defect in dataset.defects.items():
+        category = DETECTED_BY[defect]
+        if any(category in flagged.get(r, ()) for r in dataset.defect_rows[row]):
+            found[defect] += 1
+    detection = {defect: found[defect] / injected[defect]
+                 for defect in DEFECT_TYPES if injected[defect]}
+
+    defect_rows = {r for rows in dataset.defect_rows.values() for r in rows}
+    clean = len(dataset.codes) - len(defect_rows)
+    false_positives = Counter()
+    flagged_clean = 0
+    for row, categories in flagged.items():
+        if row not in defect_rows:
+            flagged_clean += 1
+            false_positives.update(categories)
+    rate = flagged_clean / clean if clean else 0.0
+    return detection, rate, dict(false_positives.most_common())
+
+
+def run_case(stage: str, rows: int, seed: int = 0, defect_rate: float = DEFAULT_DEFECT_RATE,
+             config: Optional[dict] = None) -> AgentResult:
+    """Run `stage` on a `rows`-row synthetic dataset in this process (see run_benchmark)."""
+    from src.agents.auditor_agent import AuditorAgent
+    from src.agents.orchestrator import ValidationOrchestrator
+    from src.agents.qc_agent import QualityControlAgent
+    from src.agents.validator_agent import ValidatorAgent
+
+    dataset = generate_codes(rows, seed=seed,
+                             defect_rates={defect: defect_rate for defect in DEFECT_TYPES})
+    config = benchmark_config(config)
+    budget = BUDGETS[stage]
+    result = AgentResult(stage=stage, rows=rows, seconds=0.0, peak_rss_mb=0.0, issues=0,
+                         budget_seconds=budget.seconds_for(rows),
+                         budget_mb=budget.memory_for(rows))
+
+    if stage == 'orchestrator':
+        run = functools.partial(ValidationOrchestrator(config).validate, export_report=False)
+    elif stage == 'validator':
+        run = ValidatorAgent(config.get('validator', {})).validate
+    elif stage == 'auditor':
+        run = AuditorAgent(config.get('auditor', {})).audit
+    elif stage == 'qc':
+        run = QualityControlAgent(config.get('qc', {})).verify
+    else:
+        raise ValueError(f"Unknown stage '{stage}' (expected one of: {', '.join(STAGES)})")
+
+    baseline = _current_rss_mb()
+    started, cpu_started = time.perf_counter(), time.process_time()
+    try:
+        outcome = run(dataset.codes)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+        return result
+    finally:
+        result.seconds = time.perf_counter() - started
+        result.cpu_seconds = time.process_time() - cpu_started
+        result.peak_rss_mb = max(0.0, _peak_rss_mb() - baseline)
+
+    if stage == 'orchestrator':
+        result.issues = outcome.total_issues
+        result.detection, result.false_positive_rate, result.false_positives = \
+            score_detection(dataset, _flagged_rows(outcome))
+    elif stage == 'validator':
+        result.issues = len(outcome.errors) + len(outcome.warnings)
+    else:
+        result.issues = len(outcome.issues)
+    return result
+
+
+def _quiet() -> None:
+    logger.remove()  # Agents log every stage
+
+
+def run_benchmark(rows: Iterable[int] = DEFAULT_ROWS, stages: Optional[List[str]] = None,
+                  seed: int = 0, defect_rate: float = DEFAULT_DEFECT_RATE,
+                  config: Optional[dict] = None) -> List[AgentResult]:
+    """Run every stage on a dataset of every size, each case in a fresh process."""
+    stages = list(stages or STAGES)
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stages {unknown} (expected some of {list(STAGES)})")
+
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for size in rows:
+        for stage in stages:
+            logger.info(f"Benchmarking {stage} on {size:,} codes...")
+            try:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context,
+                                         initializer=_quiet) as executor:
+                    result = executor.submit(run_case, stage, size, seed, defect_rate,
+                                             config).result()
+            except BrokenProcessPool:
+                # E.g. killed by the OOM killer; the other cases still run
+                budget = BUDGETS[stage]
+                result = AgentResult(stage=stage, rows=size, seconds=0.0, peak_rss_mb=0.0,
+                                     issues=0, budget_seconds=budget.seconds_for(size),
+                                     budget_mb=budget.memory_for(size),
+                                     error="worker process died")
+            logger.info(f"  {result.seconds:.2f}s ({result.us_per_code:.1f} µs/code), "
+                        f"peak +{result.peak_rss_mb:.0f} MB")
+            results.append(result)
+    return results
+
+
+def scaling_exponents(results: List[AgentResult]) -> Dict[tuple, float]:
+    """
+    (stage, rows) -> log-log slope of run time from the stage's previous size:
+    1.0 is linear scaling, 2.0 quadratic.
+    """
+    exponents = {}
+    previous: Dict[str, AgentResult] = {}
+    for result in sorted(results, key=lambda r: (r.stage, r.rows)):
+        before = previous.get(result.stage)
+        if (before is not None and not (before.error or result.error)
+                and before.seconds > 0 and result.seconds > 0 and result.rows > before.rows):
+            exponents[(result.stage, result.rows)] = (
+                math.log(result.seconds / before.seconds) / math.log(result.rows / before.rows)
+            )
+        previous[result.stage] = result
+    return exponents
+
+
+def format_results(results: List[AgentResult]) -> str:
+    exponents = scaling_exponents(results)
+    lines = [f"{'stage':<13} {'rows':>9} {'seconds':>9} {'µs/code':>8} {'scaling':>7} "
+             f"{'budget s':>9} {'+MB':>6} {'budget MB':>9} {'issues':>8}  flags"]
+    for r in results:
+        exponent = exponents.get((r.stage, r.rows))
+        flags = r.error or '; '.join(f"OVER BUDGET: {over}" for over in r.over_budget)
+        lines.append(
+            f"{r.stage:<13} {r.rows:>9,} {r.seconds:>9.2f} {r.us_per_code:>8.1f} "
+            f"{'' if exponent is None else f'{exponent:.2f}':>7} {r.budget_seconds:>9.2f} "
+            f"{r.peak_rss_mb:>6.0f} {r.budget_mb:>9.0f} {r.issues:>8}  {flags}"
+        )
+
+    scored = [r for r in results if r.detection]
+    if scored:
+        lines.append('')
+        lines.append(f"{'rows':>9} " + ' '.join(f"{defect:>10}" for defect in DEFECT_TYPES)
+                     + f" {'false pos':>9}  top false-positive categories")
+        for r in scored:
+            top = ', '.join(f"{category} {count:,}"
+                            for category, count in list(r.false_positives.items())[:3])
+            lines.append(
+                f"{r.rows:>9,} "
+                + ' '.join(f"{r.detection[d]:>10.1%}" if d in r.detection else f"{'-':>10}"
+                           for d in DEFECT_TYPES)
+                + f" {r.false_positive_rate:>9.1%}  {top}"
+            )
+        missed = [f"{r.rows:,} codes: {', '.join(r.below_target)}" for r in scored if r.below_target]
+        if missed:
+            lines.append(f"Below the documented accuracy targets ({TARGET_DETECTION:.1%} detection, "
+                         f"< {TARGET_FALSE_POSITIVES:.0%} false positives):")
+            lines.extend(f"  {line}" for line in missed)
+    return '\n'.join(lines)
+
+
+def results_as_dicts(results: List[AgentResult]) -> List[dict]:
+    exponents = scaling_exponents(results)
+    return [{**asdict(r), 'us_per_code': r.us_per_code, 'over_budget': r.over_budget,
+             'below_target': r.below_target, 'scaling': exponents.get((r.stage, r.rows))}
+            for r in results]
@@ -0,0 +1,288 @@
+"""
+Edition Diff - Compare two parsed MasterFormat editions.
+
+Parsed outputs (CSV, JSONL/JSON, Parquet or SQLite) are hash-joined on
+(division, code). The older edition is held in a compact dict; the newer one
+is streamed, and changes are yielded as soon as they are known:
+
+- retitled:   same code, different title
+- moved:      same code, different group/subgroup
+- renumbered: a removed code and an added code whose titles match
+- added / removed: everything else
+
+Renumbering is detected with the trigram index from the title matcher, so
+only the (usually small) sets of added and removed codes are compared.
+"""
+
+import csv
+import json
+import sqlite3
+from collections import Counter
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from src.agents.features import normalize_code_digits, pack_code_key
+from src.utils.reference_catalog import format_code_key
+from src.utils.title_matcher import TrigramIndex, title_trigrams, dice_similarity, same_title
+
+
+ROW_FIELDS = ('division', 'code', 'title', 'group', 'subgroup')
+
+
+@dataclass
+class DiffRecord:
+    """A single difference between two editions."""
+    change: str  # added, removed, retitled, moved, renumbered
+    code: str  # Full code ("XX XX XX") in the new edition (old edition for removed)
+    old_code: Optional[str] = None
+    old_title: Optional[str] = None
+    new_title: Optional[str] = None
+    old_group: Optional[str] = None
+    new_group: Optional[str] = None
+    old_subgroup: Optional[str] = None
+    new_subgroup: Optional[str] = None
+    similarity: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# ---------------------------------------------------------------------------
+# Readers: each yields dicts with the ROW_FIELDS keys
+# ---------------------------------------------------------------------------
+
+def _normalize_row(row: Dict[str, Any]) -> Dict[str, str]:
+    """Map a row with any key casing (e.g. CSV 'Division') onto ROW_FIELDS."""
+    lowered = {str(k).strip().lower(): v for k, v in row.items()}
+    return {name: ('' if lowered.get(name) is None else str(lowered.get(name)))
+            for name in ROW_FIELDS}
+
+
+def read_csv_rows(path: str) -> Iterator[Dict[str, str]]:
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            yield _normalize_row(row)
+
+
+def read_jsonl_rows(path: str) -> Iterator[Dict[str, str]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield _normalize_row(json.loads(line))
+
+
+def read_json_rows(path: str) -> Iterator[Dict[str, str]]:
+    """JSON array as written by `parse_csi.py -f json` (loaded whole)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in json.load(f):
+            yield _normalize_row(row)
+
+
+def read_parquet_rows(path: str, batch_size: int = 10000) -> Iterator[Dict[str, str]]:
+    """Parquet file, streamed in record batches (requires pyarrow)."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet requires pyarrow: pip install pyarrow") from e
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        for row in batch.to_pylist():
+            yield _normalize_row(row)
+
+
+def read_sqlite_rows(path: str, table: str = 'codes') -> Iterator[Dict[str, str]]:
+    """Rows of a SQLite table with division, code and title columns."""
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    connection.row_factory = sqlite3.Row
+    try:
+        # Only names of existing tables or views are interpolated into the query
+        names = [row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")]
+        if table not in names:
+            raise ValueError(f"No table '{table}' in {path} "
+                             f"(tables: {', '.join(sorted(names)) or 'none'})")
+        quoted = table.replace('"', '""')
+        cursor = connection.execute(f'SELECT * FROM "{quoted}"')
+        for row in cursor:
+            yield _normalize_row(dict(row))
+    finally:
+        connection.close()
+
+
+READERS = {
+    '.csv': read_csv_rows,
+    '.jsonl': read_jsonl_rows,
+    '.ndjson': read_jsonl_rows,
+    '.json': read_json_rows,
+    '.parquet': read_parquet_rows,
+    '.sqlite': read_sqlite_rows,
+    '.sqlite3': read_sqlite_rows,
+    '.db': read_sqlite_rows,
+}
+
+
+def read_rows(path: str, table: str = 'codes') -> Iterator[Dict[str, str]]:
+    """Stream rows from a parsed output, choosing the reader by file extension."""
+    suffix = Path(path).suffix.lower()
+    reader = READERS.get(suffix)
+    if reader is None:
+        raise ValueError(f"Unsupported input format '{suffix}' for {path} "
+                         f"(expected one of: {', '.join(sorted(READERS))})")
+    if reader is read_sqlite_rows:
+        return reader(path, table=table)
+    return reader(path)
+
+
+# ---------------------------------------------------------------------------
+# Diff engine
+# ---------------------------------------------------------------------------
+
+def _row_key(row: Dict[str, str]) -> int:
+    """Join key: packed (division, code); -1 if the code cannot be packed."""
+    return pack_code_key(row['division'].strip(), normalize_code_digits(row['code']))
+
+
+class EditionDiff:
+    """Streaming diff of two parsed editions."""
+
+    def __init__(self, rename_threshold: float = 0.8):
+        """
+        Args:
+            rename_threshold: Minimum title similarity for a removed/added pair
+                              to be reported as renumbered
+        """
+        self.rename_threshold = rename_threshold
+        self.counts = Counter()
+        self.skipped_rows = 0
+
+    def diff(self, old_rows: Iterator[Dict[str, str]],
+             new_rows: Iterator[Dict[str, str]]) -> Iterator[DiffRecord]:
+        """
+        Yield the differences between two editions.
+
+        Only the old edition (as compact tuples) and the codes added in the
+        new edition are held in memory; the new edition is streamed.
+        """
+        self.counts.clear()
+        self.skipped_rows = 0
+
+        # Build side: key -> (title, group, subgroup)
+        old_index: Dict[int, Tuple[str, str, str]] = {}
+        for row in old_rows:
+            key = _row_key(row)
+            if key < 0:
+                self.skipped_rows += 1
+                continue
+            old_index.setdefault(key, (row['title'].strip(), row['group'], row['subgroup']))
+
+        logger.info(f"Indexed {len(old_index)} codes from old edition")
+
+        # Probe side: stream the new edition
+        added: List[Tuple[int, str, str, str]] = []
+        seen_new = set()
+        for row in new_rows:
+            key = _row_key(row)
+            if key < 0:
+                self.skipped_rows += 1
+                continue
+            if key in seen_new:
+                continue
+            seen_new.add(key)
+
+            title = row['title'].strip()
+            old = old_index.pop(key, None)
+            if old is None:
+                added.append((key, title, row['group'], row['subgroup']))
+                continue
+
+            self.counts['matched_codes'] += 1
+            old_title, old_group, old_subgroup = old
+            if not same_title(old_title, title):
+                yield self._record('retitled', key, old_title=old_title, new_title=title,
+                                   similarity=dice_similarity(
+                                       title_trigrams(old_title.lower()),
+                                       title_trigrams(title.lower())))
+            # Group changes are only meaningful when both editions carry groups
+            if (old_group and row['group'] and
+                    (old_group, old_subgroup) != (row['group'], row['subgroup'])):
+                yield self._record('moved', key, old_title=old_title, new_title=title,
+                                   old_group=old_group, new_group=row['group'],
+                                   old_subgroup=old_subgroup, new_subgroup=row['subgroup'])
+
+        # Whatever is left of the old edition was removed or renumbered
+        removed_keys = sorted(old_index)
+        renumbered_from = {}
+        if removed_keys and added:
+            removed_trigrams = [title_trigrams(old_index[k][0].lower()) for k in removed_keys]
+            index = TrigramIndex(removed_trigrams)
+
+            # Best match of each added code, then assign pairs greedily by score
+            candidates = []
+            for position, (key, title, _, _) in enumerate(added):
+                match, score = index.best_match(title_trigrams(title.lower()),
+                                                self.rename_threshold)
+                if match >= 0:
+                    candidates.append((score, position, match))
+
+            used_removed = set()
+            for score, position, match in sorted(candidates, reverse=True):
+                if match in used_removed:
+                    continue
+                used_removed.add(match)
+                renumbered_from[position] = (removed_keys[match], score)
+
+        for position, (key, title, group, subgroup) in enumerate(added):
+            if position in renumbered_from:
+                old_key, score = renumbered_from.pop(position)
+                old_title, old_group, old_subgroup = old_index.pop(old_key)
+                yield self._record('renumbered', key, old_key=old_key,
+                                   old_title=old_title, new_title=title,
+                                   old_group=old_group, new_group=group,
+                                   old_subgroup=old_subgroup, new_subgroup=subgroup,
+                                   similarity=score)
+            else:
+                yield self._record('added', key, new_title=title,
+                                   new_group=group, new_subgroup=subgroup)
+
+        for key in sorted(old_index):
+            old_title, old_group, old_subgroup = old_index[key]
+            yield self._record('removed', key, old_title=old_title,
+                               old_group=old_group, old_subgroup=old_subgroup)
+
+    def _record(self, change: str, key: int, old_key: int = None, **fields) -> DiffRecord:
+        self.counts[change] += 1
+        return DiffRecord(
+            change=change,
+            code=format_code_key(key),
+            old_code=format_code_key(old_key) if old_key is not None else None,
+            **fields
+        )
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+
+def write_jsonl(records: Iterator[DiffRecord], stream) -> int:
+    """Write records as JSON lines; returns the number written."""
+    count = 0
+    for record in records:
+        stream.write(json.dumps(record.to_dict(), ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def write_csv(records: Iterator[DiffRecord], stream) -> int:
+    """Write records as CSV; returns the number written."""
+    writer = csv.DictWriter(stream, fieldnames=list(DiffRecord.__dataclass_fields__))
+    writer.writeheader()
+    count = 0
+    for record in records:
+        writer.writerow(record.to_dict())
+        count += 1
+    return count
@@ -0,0 +1,153 @@
+"""
+Folder Watch - Notice new files in a directory and wait until they settle.
+
+Two watchers share one interface, `changes(timeout) -> set of file names`:
+
+    InotifyWatcher   Linux inotify through libc (no extra dependency); wakes
+                     as soon as a file is created, written, closed or moved in
+    PollingWatcher   Re-lists the directory and compares sizes and mtimes;
+                     used where inotify is unavailable (macOS, network mounts)
+
+A copy into the folder shows up as a burst of changes, so a file is only
+handed on once its size and mtime have not changed for `settle_seconds`
+(SettleTracker).
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+READ_SIZE = 64 * 1024
+
+
+class InotifyWatcher:
+    """Changed file names from Linux inotify (non-recursive)."""
+
+    def __init__(self, directory: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"Cannot watch {directory}")
+
+    def changes(self, timeout: float) -> Set[str]:
+        """Names of files changed since the last call, waiting up to `timeout` seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        names = set()
+        while True:
+            try:
+                data = os.read(self.fd, READ_SIZE)  # Whole events only
+            except BlockingIOError:
+                return names
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if name:
+                    names.add(os.fsdecode(name))
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Changed file names from re-listing the directory."""
+
+    def __init__(self, directory: Path, interval: float = 1.0):
+        self.directory = Path(directory)
+        self.interval = interval
+        self._seen = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+                except FileNotFoundError:
+                    continue
+        return snapshot
+
+    def changes(self, timeout: float) -> Set[str]:
+        """Names of files changed since the last call, after waiting up to `timeout` seconds."""
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._snapshot()
+        changed = {name for name, signature in snapshot.items()
+                   if self._seen.get(name) != signature}
+        self._seen = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def open_watcher(directory: Path, use_inotify: bool = True, poll_interval: float = 1.0):
+    """InotifyWatcher where available, else PollingWatcher."""
+    if use_inotify:
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify unavailable ({e}); polling {directory} every {poll_interval}s")
+    return PollingWatcher(directory, poll_interval)
+
+
+class SettleTracker:
+    """Files are ready once their size and mtime stop changing for `settle_seconds`."""
+
+    def __init__(self, settle_seconds: float = 2.0, clock: Callable[[], float] = time.monotonic):
+        self.settle_seconds = settle_seconds
+        self.clock = clock
+        self._pending: Dict[Path, Tuple[Optional[Tuple[int, int]], float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, path: Path) -> None:
+        """Note that `path` changed; its settle period starts over."""
+        self._pending[path] = (None, self.clock())
+
+    def ready(self) -> List[Path]:
+        """Pending files that have settled (removed from the pending set)."""
+        now = self.clock()
+        settled = []
+        for path, (signature, since) in list(self._pending.items()):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                del self._pending[path]  # Deleted or moved away before it settled
+                continue
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current != signature:
+                self._pending[path] = (current, now if signature is not None else since)
+            elif current[0] and now - since >= self.settle_seconds:  # Empty: not written yet
+                settled.append(path)
+                del self._pending[path]
+        return settled
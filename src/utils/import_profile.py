@@ -0,0 +1,96 @@
+"""
+Import Profile - Where a command's start-up time goes.
+
+Runs a Python command under `-X importtime` and collects the interpreter's
+per-module import timings. Only imports after interpreter start-up (`site`)
+are counted, so the profile shows what the command itself pulls in. Used by
+`parse_csi.py --profile-startup` and the CLI start-up budget test.
+"""
+
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+
+IMPORTTIME_PREFIX = 'import time:'
+
+
+def parse_importtime(stderr: str) -> Tuple[Dict[str, int], List[str]]:
+    """
+    Split `-X importtime` output from a command's other stderr output.
+
+    Args:
+        stderr: Captured standard error of a `python -X importtime ...` run
+
+    Returns:
+        (module -> self time in microseconds for imports after start-up,
+         remaining stderr lines)
+    """
+    modules: Dict[str, int] = {}
+    other_lines = []
+    started = False
+
+    for line in stderr.splitlines():
+        if not line.startswith(IMPORTTIME_PREFIX):
+            other_lines.append(line)
+            continue
+        self_us, _, name = line[len(IMPORTTIME_PREFIX):].split('|', 2)
+        if not self_us.strip().isdigit():
+            continue  # Column header
+        if not started:
+            # Everything up to and including site is interpreter start-up
+            started = name.rstrip() == ' site'  # Top-level names have one leading space
+            continue
+        modules[name.strip()] = modules.get(name.strip(), 0) + int(self_us)
+
+    return modules, other_lines
+
+
+@dataclass
+class ImportProfile:
+    """Import timings of one command run."""
+    modules: Dict[str, int] = field(default_factory=dict)  # Module -> self time (µs)
+    returncode: int = 0
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.modules.values()) / 1000
+
+    def by_package(self) -> Dict[str, int]:
+        """Self times summed per top-level package (µs), slowest first."""
+        packages: Dict[str, int] = {}
+        for name, self_us in self.modules.items():
+            package = name.split('.', 1)[0]
+            packages[package] = packages.get(package, 0) + self_us
+        return dict(sorted(packages.items(), key=lambda item: -item[1]))
+
+    def format(self, top: int = 15) -> str:
+        """Breakdown table of the slowest top-level packages."""
+        lines = [f"Import time: {self.total_ms:.1f} ms in {len(self.modules)} modules",
+                 f"{'package':<32} {'ms':>8} {'share':>6}"]
+        total = sum(self.modules.values()) or 1
+        for package, self_us in list(self.by_package().items())[:top]:
+            lines.append(f"{package:<32} {self_us / 1000:>8.1f} {self_us / total:>6.1%}")
+        return '\n'.join(lines)
+
+
+def profile_command(args: Sequence[str]) -> ImportProfile:
+    """
+    Run `python -X importtime <args>` and profile its imports.
+
+    The command's standard output passes through; its other standard error
+    output is re-emitted on this process's standard error.
+
+    Args:
+        args: Arguments after the interpreter (e.g. ['parse_csi.py', '--help'])
+
+    Returns:
+        ImportProfile of the run
+    """
+    completed = subprocess.run([sys.executable, '-X', 'importtime', *args],
+                               stderr=subprocess.PIPE, text=True)
+    modules, other_lines = parse_importtime(completed.stderr)
+    for line in other_lines:
+        print(line, file=sys.stderr)
+    return ImportProfile(modules=modules, returncode=completed.returncode)
@@ -0,0 +1,328 @@
+"""
+Folder Ingestion - Process every PDF dropped into a folder exactly once.
+
+IngestDaemon watches an input folder (src/utils/folder_watch.py), waits for
+new PDFs to settle and hashes their content. New content is handed to a
+bounded process pool running the process function (parse, validate and
+export; see watch_csi.py). Each job writes into its own directory under the
+temp folder, and its outputs are moved into the output folder only once the
+job has finished, so consumers never see partial files.
+
+The IngestLedger, a SQLite file in the output folder, records every content
+hash with its state. Finished content (done or failed) is never processed
+again, whatever the file is called. Jobs that were still running when the
+daemon stopped are retried at the next start.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from src.utils.folder_watch import SettleTracker, open_watcher
+
+
+LEDGER_NAME = '.ingest_ledger.sqlite'
+READ_CHUNK = 1 << 20
+TICK_SECONDS = 0.5      # Longest wait for watcher events between bookkeeping passes
+MAX_ATTEMPTS = 2        # Jobs lost to a crashed worker are retried this many times
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested (
+    sha256 TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    state TEXT NOT NULL,            -- running, done, failed
+    summary TEXT,                   -- JSON returned by the process function
+    outputs TEXT,                   -- JSON list of file names in the output folder
+    error TEXT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT
+)
+"""
+
+
+def hash_file(path: Path) -> str:
+    """Hex SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IngestLedger:
+    """Content hashes seen by the daemon, with their processing state."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # run() may be called from a thread other than the one that built the daemon
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.connection.execute(SCHEMA)
+
+    def reset_interrupted(self) -> int:
+        """Forget jobs left running by a previous process, so they are retried."""
+        with self.connection:
+            return self.connection.execute(
+                "DELETE FROM ingested WHERE state = 'running'"
+            ).rowcount
+
+    def claim(self, sha256: str, source: str) -> Optional[Dict[str, Any]]:
+        """
+        Record `sha256` as running.
+
+        Returns:
+            None if claimed, else the existing entry for the same content
+        """
+        with self.connection:
+            inserted = self.connection.execute(
+                "INSERT OR IGNORE INTO ingested (sha256, source, state, started_at) "
+                "VALUES (?, ?, 'running', ?)",
+                (sha256, source, datetime.now().isoformat(timespec='seconds'))
+            ).rowcount
+        return None if inserted else self.get(sha256)
+
+    def release(self, sha256: str) -> None:
+        """Drop a claim so the content can be processed again."""
+        with self.connection:
+            self.connection.execute("DELETE FROM ingested WHERE sha256 = ?", (sha256,))
+
+    def finish(self, sha256: str, state: str, summary: Dict[str, Any] = None,
+               outputs: Sequence[str] = (), error: str = None) -> None:
+        with self.connection:
+            self.connection.execute(
+                "UPDATE ingested SET state = ?, summary = ?, outputs = ?, error = ?, "
+                "finished_at = ? WHERE sha256 = ?",
+                (state, json.dumps(summary), json.dumps(list(outputs)), error,
+                 datetime.now().isoformat(timespec='seconds'), sha256)
+            )
+
+    def get(self, sha256: str) -> Optional[Dict[str, Any]]:
+        row = self.connection.execute(
+            "SELECT sha256, source, state, summary, outputs, error, started_at, finished_at "
+            "FROM ingested WHERE sha256 = ?", (sha256,)
+        ).fetchone()
+        if row is None:
+            return None
+        entry = dict(zip(('sha256', 'source', 'state', 'summary', 'outputs', 'error',
+                          'started_at', 'finished_at'), row))
+        entry['summary'] = json.loads(entry['summary']) if entry['summary'] else None
+        entry['outputs'] = json.loads(entry['outputs']) if entry['outputs'] else []
+        return entry
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class IngestDaemon:
+    """Watch a folder and run each new PDF through `process` once."""
+
+    def __init__(self, input_dir: str, output_dir: str, temp_dir: str,
+                 process: Callable[[str, str], Dict[str, Any]],
+                 workers: int = 4, settle_seconds: float = 2.0,
+                 use_inotify: bool = True, poll_interval: float = 1.0,
+                 suffixes: Sequence[str] = ('.pdf',),
+                 initializer: Callable = None, initargs: Tuple = (),
+                 on_finished: Callable[[Path, Dict[str, Any], float], None] = None):
+        """
+        Args:
+            input_dir: Folder to watch (not recursive)
+            output_dir: Folder that receives finished outputs and the ledger
+            temp_dir: Folder for in-progress job directories
+            process: Picklable `process(pdf_path, work_dir) -> summary dict`, run in a
+                worker process; every file it writes into work_dir is an output
+            workers: Worker processes (jobs beyond this wait in a queue)
+            settle_seconds: Quiet time before a new or changed file is processed
+            use_inotify: Use inotify where available instead of polling
+            poll_interval: Seconds between directory listings when polling
+            suffixes: File name suffixes to ingest (case-insensitive)
+            initializer, initargs: Run once in every worker process
+            on_finished: Called with (source path, summary, seconds) for every job that
+                finished; it may remove keys from the summary before it is recorded
+        """
+        self.input_dir = Path(input_dir)
+        self.output_dir = Path(output_dir)
+        self.jobs_dir = Path(temp_dir) / 'ingest'
+        self.process = process
+        self.workers = workers
+        self.settle_seconds = settle_seconds
+        self.use_inotify = use_inotify
+        self.poll_interval = poll_interval
+        self.suffixes = tuple(suffix.lower() for suffix in suffixes)
+        self.initializer = initializer
+        self.initargs = initargs
+        self.on_finished = on_finished
+
+        self.ledger = IngestLedger(self.output_dir / LEDGER_NAME)
+        self.stats = {'processed': 0, 'failed': 0, 'skipped': 0}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Future -> (sha256, source, work dir, pool it runs in, start time)
+        self._running: Dict[Future, Tuple[str, Path, Path, ProcessPoolExecutor, float]] = {}
+        self._attempts: Dict[str, int] = {}
+        # Settled files waiting for a free worker (retries go to the front)
+        self._waiting: Deque[Path] = deque()
+
+    def run(self, stop: threading.Event = None, once: bool = False) -> Dict[str, int]:
+        """
+        Process the folder's PDFs, then keep watching until `stop` is set.
+
+        Args:
+            stop: Event that ends the loop; running jobs are finished first
+            once: Return as soon as the files present at start-up are processed
+
+        Returns:
+            Counts of processed, failed and skipped (already seen) files
+        """
+        stop = stop or threading.Event()
+        for directory in (self.input_dir, self.output_dir, self.jobs_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        # Work directories of interrupted jobs are stale; the jobs are retried
+        shutil.rmtree(self.jobs_dir, ignore_errors=True)
+        self.jobs_dir.mkdir(parents=True)
+        retried = self.ledger.reset_interrupted()
+        if retried:
+            logger.info(f"Retrying {retried} jobs interrupted by the last shutdown")
+
+        watcher = open_watcher(self.input_dir, self.use_inotify, self.poll_interval)
+        tracker = SettleTracker(self.settle_seconds)
+        self._waiting.clear()  # Every file in the folder is touched again below
+        for path in sorted(self.input_dir.iterdir()):
+            if self._wanted(path.name):
+                tracker.touch(path)
+        logger.info(f"Watching {self.input_dir} ({type(watcher).__name__}, "
+                    f"{self.workers} workers)")
+
+        try:
+            while not stop.is_set():
+                for name in watcher.changes(TICK_SECONDS):
+                    if self._wanted(name):
+                        tracker.touch(self.input_dir / name)
+                self._waiting.extend(tracker.ready())
+                self._collect()
+                while self._waiting and len(self._running) < self.workers:
+                    self._start(self._waiting.popleft())
+                if once and not (self._waiting or self._running or len(tracker)):
+                    break
+
+            # Let running jobs finish; anything killed mid-job or still waiting for
+            # a retry is picked up at the next start
+            while self._running:
+                self._collect(wait=True)
+        finally:
+            watcher.close()
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+        return dict(self.stats)
+
+    def close(self) -> None:
+        self.ledger.close()
+
+    def _wanted(self, name: str) -> bool:
+        return name.lower().endswith(self.suffixes) and not name.startswith('.')
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             initializer=self.initializer,
+                                             initargs=self.initargs)
+        return self._pool
+
+    def _start(self, path: Path) -> None:
+        """Hash a settled file and submit it unless its content was seen before."""
+        try:
+            sha256 = hash_file(path)
+        except FileNotFoundError:
+            return
+        existing = self.ledger.claim(sha256, path.name)
+        if existing is not None:
+            self.stats['skipped'] += 1
+            if existing['source'] == path.name:
+                logger.debug(f"Skipping {path.name}: already {existing['state']}")
+            else:
+                logger.info(f"Skipping {path.name}: same content as {existing['source']} "
+                            f"({existing['state']})")
+            return
+
+        work_dir = self.jobs_dir / sha256[:16]
+        shutil.rmtree(work_dir, ignore_errors=True)
+        work_dir.mkdir(parents=True)
+        logger.info(f"Processing {path.name} ({sha256[:12]})")
+        pool = self.pool
+        try:
+            future = pool.submit(self.process, str(path), str(work_dir))
+        except BrokenProcessPool:
+            # A worker died since the last collect; its jobs are retried there
+            self._pool = None
+            pool = self.pool
+            future = pool.submit(self.process, str(path), str(work_dir))
+        self._running[future] = (sha256, path, work_dir, pool, time.monotonic())
+
+    def _collect(self, wait: bool = False) -> None:
+        """Publish the outputs of finished jobs and record them in the ledger."""
+        if wait and self._running:
+            next(iter(self._running)).exception()  # Block until the oldest job ends
+
+        for future in [f for f in self._running if f.done()]:
+            sha256, path, work_dir, pool, started = self._running.pop(future)
+            try:
+                summary = future.result()
+            except BrokenProcessPool:
+                # A broken pool accepts no more work; retry in a fresh one
+                if self._pool is pool:
+                    self._pool = None
+                shutil.rmtree(work_dir, ignore_errors=True)
+                self._retry_or_fail(sha256, path, "Worker process died")
+                continue
+            except Exception as e:
+                self.stats['failed'] += 1
+                self.ledger.finish(sha256, 'failed', error=f"{type(e).__name__}: {e}")
+                logger.error(f"Failed {path.name}: {e}")
+                shutil.rmtree(work_dir, ignore_errors=True)
+                continue
+
+            outputs = self._publish(work_dir)
+            if self.on_finished is not None:
+                self.on_finished(path, summary, time.monotonic() - started)
+            self.stats['processed'] += 1
+            self.ledger.finish(sha256, 'done', summary=summary, outputs=outputs)
+            logger.success(f"Finished {path.name}: {', '.join(outputs) or 'no outputs'}")
+
+    def _retry_or_fail(self, sha256: str, path: Path, error: str) -> None:
+        self._attempts[sha256] = self._attempts.get(sha256, 0) + 1
+        if self._attempts[sha256] < MAX_ATTEMPTS:
+            logger.warning(f"{error} while processing {path.name}; retrying")
+            self.ledger.release(sha256)
+            self._waiting.appendleft(path)  # Started when a worker is free
+        else:
+            self.stats['failed'] += 1
+            self.ledger.finish(sha256, 'failed', error=error)
+            logger.error(f"Failed {path.name}: {error}")
+
+    def _publish(self, work_dir: Path) -> List[str]:
+        """Move a finished job's files into the output folder (replacing older ones)."""
+        outputs = []
+        for source in sorted(work_dir.iterdir()):
+            if source.is_file():
+                target = self.output_dir / source.name
+                if source.stat().st_dev == self.output_dir.stat().st_dev:
+                    os.replace(source, target)  # Atomic on one file system
+                else:
+                    shutil.move(str(source), str(target))
+                outputs.append(source.name)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return outputs
@@ -0,0 +1,331 @@
+"""
+Job Queue - Durable, leased PDF jobs for large batch runs.
+
+Jobs live in a SQLite file shared by any number of worker processes on the
+same machine. A worker leases the highest-priority job that is due; the
+lease expires unless the worker keeps extending it (heartbeat), so the jobs
+of a crashed worker become available again once their lease runs out.
+
+    queued --lease--> running --complete--> done
+       ^                 |
+       |                 +--fail / lease expired--> queued (after backoff)
+       |                                            or failed (attempts used up)
+       +---------------------retry------------------------+
+
+Each lease counts as an attempt. Failed attempts are retried after an
+exponential backoff (BACKOFF_BASE * 2^(attempt - 1), at most BACKOFF_MAX
+seconds) until the job's max_attempts are used up.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+
+BACKOFF_BASE = 30.0     # Seconds before the first retry
+BACKOFF_MAX = 3600.0    # Longest wait between retries
+LEASE_SECONDS = 300.0   # Default lease; workers extend it while they run
+
+STATES = ('queued', 'running', 'done', 'failed')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    pdf_path TEXT NOT NULL,
+    options TEXT NOT NULL,              -- JSON keyword arguments for the worker
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,         -- Not leased before this time (backoff)
+    lease_owner TEXT,
+    lease_expires REAL,
+    page INTEGER,                       -- Progress of the current attempt
+    pages INTEGER,
+    codes INTEGER,
+    summary TEXT,                       -- JSON returned by the worker
+    timings TEXT,                       -- JSON seconds per stage
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_due ON jobs (state, priority DESC, available_at, id);
+"""
+
+
+@dataclass
+class Job:
+    """A leased job, as handed to a worker."""
+    id: int
+    pdf_path: str
+    options: Dict[str, Any]
+    priority: int
+    attempts: int
+    max_attempts: int
+    lease_owner: str
+
+
+@dataclass
+class QueueStats:
+    """Queue depth and recent throughput."""
+    counts: Dict[str, int]              # Jobs per state
+    ready: int                          # Queued jobs that are due now
+    delayed: int                        # Queued jobs waiting out a backoff
+    expired: int                        # Running jobs whose lease ran out
+    window: float                       # Seconds covered by the throughput figures
+    finished: int                       # Jobs done in the window
+    pages: int                          # Pages of those jobs
+    mean_seconds: Optional[float]       # Mean wall time of those jobs
+    workers: List[str] = field(default_factory=list)
+
+    @property
+    def jobs_per_hour(self) -> float:
+        return self.finished * 3600.0 / self.window
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.window
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'counts': self.counts,
+            'ready': self.ready,
+            'delayed': self.delayed,
+            'expired': self.expired,
+            'window_seconds': self.window,
+            'finished': self.finished,
+            'jobs_per_hour': round(self.jobs_per_hour, 1),
+            'pages_per_second': round(self.pages_per_second, 2),
+            'mean_seconds': round(self.mean_seconds, 2) if self.mean_seconds is not None else None,
+            'workers': self.workers
+        }
+
+    def format(self) -> str:
+        counts = ', '.join(f"{self.counts[state]} {state}" for state in STATES)
+        lines = [
+            f"Jobs: {counts}",
+            f"Queued: {self.ready} ready, {self.delayed} in backoff; "
+            f"{self.expired} running with an expired lease",
+            f"Last {self.window / 60:.0f} min: {self.finished} done, "
+            f"{self.jobs_per_hour:.1f} jobs/h, {self.pages_per_second:.2f} pages/s",
+        ]
+        if self.mean_seconds is not None:
+            lines.append(f"Mean job time: {self.mean_seconds:.1f}s")
+        if self.workers:
+            lines.append(f"Active workers: {', '.join(self.workers)}")
+        return '\n'.join(lines)
+
+
+def backoff(attempts: int) -> float:
+    """Seconds to wait before retrying a job that has failed `attempts` times."""
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+
+class JobQueue:
+    """SQLite-backed priority queue of PDF jobs with leases and retries."""
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        """
+        Open (or create) a queue file.
+
+        Args:
+            path: SQLite file path
+            clock: Time source in seconds since the epoch (shared by all workers)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.clock = clock
+        self._lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly (see _transaction)
+        self.connection = sqlite3.connect(str(self.path), timeout=30, isolation_level=None,
+                                          check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; IMMEDIATE takes the lock up front, so reads in it are current."""
+        with self._lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.connection
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    def enqueue(self, pdf_path: str, options: Dict[str, Any] = None, priority: int = 0,
+                max_attempts: int = 3) -> int:
+        """
+        Add a job.
+
+        Args:
+            pdf_path: PDF to process
+            options: Keyword arguments for the worker (JSON-serializable)
+            priority: Higher priorities are leased first
+            max_attempts: Leases before the job is marked failed
+
+        Returns:
+            Job id
+        """
+        now = self.clock()
+        with self._transaction() as connection:
+            return connection.execute(
+                "INSERT INTO jobs (pdf_path, options, priority, max_attempts, available_at, "
+                "created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (str(pdf_path), json.dumps(options or {}), priority, max_attempts, now, now)
+            ).lastrowid
+
+    def lease(self, worker: str, lease_seconds: float = LEASE_SECONDS) -> Optional[Job]:
+        """
+        Take the highest-priority due job, or None if nothing is due.
+
+        Jobs whose lease expired are requeued (or failed) first, so a crashed
+        worker's job is picked up by the next lease after its lease runs out.
+        """
+        now = self.clock()
+        with self._transaction() as connection:
+            self._expire_leases(connection, now)
+            row = connection.execute(
+                "SELECT id, pdf_path, options, priority, attempts, max_attempts FROM jobs "
+                "WHERE state = 'queued' AND available_at <= ? "
+                "ORDER BY priority DESC, id LIMIT 1", (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE jobs SET state = 'running', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires = ?, page = NULL, pages = NULL, codes = NULL, started_at = ? "
+                "WHERE id = ?", (worker, now + lease_seconds, now, row[0])
+            )
+        job_id, pdf_path, options, priority, attempts, max_attempts = row
+        return Job(job_id, pdf_path, json.loads(options), priority, attempts + 1,
+                   max_attempts, worker)
+
+    def _expire_leases(self, connection: sqlite3.Connection, now: float) -> None:
+        expired = connection.execute(
+            "SELECT id, attempts, max_attempts, lease_owner FROM jobs "
+            "WHERE state = 'running' AND lease_expires < ?", (now,)
+        ).fetchall()
+        for job_id, attempts, max_attempts, owner in expired:
+            error = f"Lease expired (worker {owner})"
+            logger.warning(f"Job {job_id}: {error}")
+            self._retry_or_fail(connection, job_id, attempts, max_attempts, error, now)
+
+    def _retry_or_fail(self, connection: sqlite3.Connection, job_id: int, attempts: int,
+                       max_attempts: int, error: str, now: float) -> str:
+        if attempts < max_attempts:
+            connection.execute(
+                "UPDATE jobs SET state = 'queued', available_at = ?, lease_owner = NULL, "
+                "lease_expires = NULL, error = ? WHERE id = ?",
+                (now + backoff(attempts), error, job_id)
+            )
+            return 'queued'
+        connection.execute(
+            "UPDATE jobs SET state = 'failed', lease_owner = NULL, lease_expires = NULL, "
+            "error = ?, finished_at = ? WHERE id = ?", (error, now, job_id)
+        )
+        return 'failed'
+
+    def heartbeat(self, job: Job, lease_seconds: float = LEASE_SECONDS, page: int = None,
+                  pages: int = None, codes: int = None) -> bool:
+        """
+        Extend a job's lease and record its progress.
+
+        Returns:
+            False if the worker no longer holds the lease (it expired and the
+            job was requeued); the worker should then abandon the job
+        """
+        with self._transaction() as connection:
+            return connection.execute(
+                "UPDATE jobs SET lease_expires = ?, page = COALESCE(?, page), "
+                "pages = COALESCE(?, pages), codes = COALESCE(?, codes) "
+                "WHERE id = ? AND state = 'running' AND lease_owner = ?",
+                (self.clock() + lease_seconds, page, pages, codes, job.id, job.lease_owner)
+            ).rowcount == 1
+
+    def complete(self, job: Job, summary: Dict[str, Any] = None,
+                 timings: Dict[str, float] = None) -> bool:
+        """Mark a leased job done. Returns False if the lease was lost."""
+        with self._transaction() as connection:
+            return connection.execute(
+                "UPDATE jobs SET state = 'done', summary = ?, timings = ?, error = NULL, "
+                "lease_owner = NULL, lease_expires = NULL, finished_at = ? "
+                "WHERE id = ? AND state = 'running' AND lease_owner = ?",
+                (json.dumps(summary), json.dumps(timings), self.clock(), job.id, job.lease_owner)
+            ).rowcount == 1
+
+    def fail(self, job: Job, error: str) -> Optional[str]:
+        """
+        Record a failed attempt.
+
+        Returns:
+            'queued' (retried after a backoff), 'failed' (attempts used up), or
+            None if the lease was lost
+        """
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT attempts, max_attempts FROM jobs "
+                "WHERE id = ? AND state = 'running' AND lease_owner = ?",
+                (job.id, job.lease_owner)
+            ).fetchone()
+            if row is None:
+                return None
+            return self._retry_or_fail(connection, job.id, row[0], row[1], error, self.clock())
+
+    def retry_failed(self) -> int:
+        """Requeue every failed job with fresh attempts. Returns the number requeued."""
+        with self._transaction() as connection:
+            return connection.execute(
+                "UPDATE jobs SET state = 'queued', attempts = 0, available_at = ?, "
+                "finished_at = NULL WHERE state = 'failed'", (self.clock(),)
+            ).rowcount
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """A job's full record, with JSON columns decoded."""
+        cursor = self.connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        record = dict(zip([column[0] for column in cursor.description], row))
+        for key in ('options', 'summary', 'timings'):
+            record[key] = json.loads(record[key]) if record[key] else None
+        return record
+
+    def stats(self, window: float = 900.0) -> QueueStats:
+        """
+        Depth by state and throughput over the last `window` seconds.
+        """
+        now = self.clock()
+        connection = self.connection
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(connection.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+        ready, delayed = connection.execute(
+            "SELECT COALESCE(SUM(available_at <= ?), 0), COALESCE(SUM(available_at > ?), 0) "
+            "FROM jobs WHERE state = 'queued'", (now, now)
+        ).fetchone()
+        expired = connection.execute(
+            "SELECT COUNT(*) FROM jobs WHERE state = 'running' AND lease_expires < ?", (now,)
+        ).fetchone()[0]
+        finished, pages, mean_seconds = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(pages), 0), AVG(finished_at - started_at) "
+            "FROM jobs WHERE state = 'done' AND finished_at >= ?", (now - window,)
+        ).fetchone()
+        workers = [owner for (owner,) in connection.execute(
+            "SELECT DISTINCT lease_owner FROM jobs WHERE state = 'running' "
+            "AND lease_expires >= ? ORDER BY lease_owner", (now,)
+        )]
+        return QueueStats(counts, ready, delayed, expired, window, finished, pages,
+                          mean_seconds, workers)
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,287 @@
+"""
+Memory Profile - Peak and retained memory of each pipeline stage.
+
+MemoryTracker measures, for every stage it wraps,
+
+    peak       the highest traced Python heap (tracemalloc) above the stage's
+               starting point, and how far the stage raised the process's
+               resident high-water mark (ru_maxrss)
+    retained   traced heap and resident memory still held when it ended
+
+for
+
+    extraction        the whole parse, and each page within it; retained
+                      memory that keeps growing page after page is reported
+                      as a leak rate (KB per page)
+    model_conversion  CSICode models from the parsed rows
+    features          the shared feature frame of the agents
+    validator, auditor, qc, aggregation, report_export, export
+
+Extraction and the agents are checked against the memory budgets in
+docs/agents/ARCHITECTURE.md, which are given per 100 pages, and also record
+their top allocation sites: the source lines whose allocations the stage
+still held at its end (a diff of tracemalloc snapshots, which take about a
+second per few hundred thousand live blocks).
+
+Tracing makes allocation-heavy code noticeably slower, so tracking is
+opt-in (parse_csi.py --track-memory). Only this process is traced: page
+workers and the concurrent Auditor/QC stage are turned off while tracking.
+"""
+
+import os
+import resource
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# docs/agents/ARCHITECTURE.md: MB per 100 pages
+MEMORY_BUDGETS_MB = {'extraction': 500.0, 'validator': 100.0, 'auditor': 200.0, 'qc': 50.0}
+BUDGET_PAGES = 100
+
+MB = 1024 * 1024
+
+# Not reported as allocation sites
+_IGNORED_FILES = frozenset({tracemalloc.__file__, __file__, '<unknown>',
+                            '<frozen importlib._bootstrap>',
+                            '<frozen importlib._bootstrap_external>'})
+
+
+def _rss_high_water_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / MB if sys.platform == 'darwin' else usage / 1024  # bytes vs KB
+
+
+def _rss_mb() -> float:
+    """Current resident memory (the high-water mark where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return _rss_high_water_mb()
+    return pages * resource.getpagesize() / MB
+
+
+def _line_totals() -> Dict[Tuple[str, int], Tuple[int, int]]:
+    """Traced bytes and blocks held by each source line (file, line)."""
+    totals = {}
+    for statistic in tracemalloc.take_snapshot().statistics('lineno'):
+        frame = statistic.traceback[0]
+        totals[(frame.filename, frame.lineno)] = (statistic.size, statistic.count)
+    return totals
+
+
+def _location(filename: str, lineno: int) -> str:
+    """file:line, relative to the working directory or shortened to package/module."""
+    relative = os.path.relpath(filename)
+    if relative.startswith('..'):
+        parts = filename.replace('\\', '/').split('/')
+        relative = '/'.join(parts[-2:])
+    return f"{relative}:{lineno}"
+
+
+@dataclass
+class AllocationSite:
+    """A source line and the memory its allocations held at the end of a stage."""
+    location: str
+    size_mb: float
+    blocks: int
+
+
+@dataclass
+class StageMemory:
+    """Memory of a stage, over all its runs."""
+    name: str
+    calls: int = 0
+    peak_mb: float = 0.0            # Highest traced heap above the starting point (max over runs)
+    retained_mb: float = 0.0        # Traced heap still held at the end (sum over runs)
+    rss_peak_mb: float = 0.0        # Growth of the resident high-water mark (sum over runs)
+    rss_retained_mb: float = 0.0    # Resident memory still held at the end (sum over runs)
+    top_sites: List[AllocationSite] = field(default_factory=list)
+
+    @property
+    def high_mb(self) -> float:
+        """What the stage's budget is checked against: the larger peak measure."""
+        return max(self.peak_mb, self.rss_peak_mb)
+
+
+@dataclass
+class PageMemory:
+    """Memory of one page's extraction."""
+    page: int
+    peak_mb: float = 0.0
+    retained_mb: float = 0.0
+    traced_mb: float = 0.0          # Traced heap after the page
+
+
+@dataclass
+class _Frame:
+    """An open stage."""
+    name: str
+    traced: int
+    rss: float
+    rss_high_water: float
+    peak: int = 0                   # Highest traced heap seen so far, absolute
+    traced_after: int = 0
+    lines: Optional[Dict[Tuple[str, int], Tuple[int, int]]] = None  # Line totals at the start
+
+
+class MemoryTracker:
+    """Peak and retained memory of the pipeline stages of one run."""
+
+    def __init__(self, top_sites: int = 3):
+        self.top_sites = top_sites
+        self.stages: Dict[str, StageMemory] = {}
+        self.pages: Dict[int, PageMemory] = {}
+        self.document_pages: Optional[int] = None  # For budgets when no pages were parsed
+        self._stack: List[_Frame] = []
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+
+    def stop(self) -> None:
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    @contextmanager
+    def _tracked(self, name: str, sites: bool) -> Iterator[_Frame]:
+        with self._lock:
+            traced, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # reset_peak() below would lose the enclosing stage's peak so far
+                self._stack[-1].peak = max(self._stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            frame = _Frame(name, traced, _rss_mb(), _rss_high_water_mb(), peak=traced)
+            self._stack.append(frame)
+        if sites and tracemalloc.is_tracing():
+            frame.lines = _line_totals()
+        try:
+            yield frame
+        finally:
+            with self._lock:
+                traced, peak = tracemalloc.get_traced_memory()
+                frame.peak = max(frame.peak, peak)
+                self._stack.remove(frame)
+                if self._stack:
+                    self._stack[-1].peak = max(self._stack[-1].peak, frame.peak)
+            frame.traced_after = traced
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Track the enclosed block as a document-level stage (budgeted ones with their top allocation sites)."""
+        sites = self.top_sites > 0 and name in MEMORY_BUDGETS_MB
+        with self._tracked(name, sites=sites) as frame:
+            yield
+        stage = self.stages.setdefault(name, StageMemory(name))
+        stage.calls += 1
+        stage.peak_mb = max(stage.peak_mb, (frame.peak - frame.traced) / MB)
+        stage.retained_mb += (frame.traced_after - frame.traced) / MB
+        stage.rss_peak_mb += _rss_high_water_mb() - frame.rss_high_water
+        stage.rss_retained_mb += _rss_mb() - frame.rss
+        if frame.lines is not None:
+            stage.top_sites = self._top_sites(frame.lines)
+
+    @contextmanager
+    def page(self, page: int) -> Iterator[None]:
+        """Track the enclosed block as the extraction of one page."""
+        with self._tracked('page', sites=False) as frame:
+            yield
+        self.pages[page] = PageMemory(page, peak_mb=(frame.peak - frame.traced) / MB,
+                                      retained_mb=(frame.traced_after - frame.traced) / MB,
+                                      traced_mb=frame.traced_after / MB)
+
+    def _top_sites(self, before: Dict[Tuple[str, int], Tuple[int, int]]) -> List[AllocationSite]:
+        """Lines holding the most memory allocated since `before`."""
+        grown = []
+        for (filename, lineno), (size, blocks) in _line_totals().items():
+            size_before, blocks_before = before.get((filename, lineno), (0, 0))
+            if size > size_before and filename not in _IGNORED_FILES:
+                grown.append((size - size_before, blocks - blocks_before, filename, lineno))
+        grown.sort(reverse=True)
+        return [AllocationSite(_location(filename, lineno), size / MB, blocks)
+                for size, blocks, filename, lineno in grown[:self.top_sites]]
+
+    # ------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages) or self.document_pages or 0
+
+    def budget_mb(self, stage: str) -> Optional[float]:
+        """Memory budget of a stage for this run's page count (None if it has none)."""
+        if stage not in MEMORY_BUDGETS_MB:
+            return None
+        return MEMORY_BUDGETS_MB[stage] * max(1.0, self.page_count / BUDGET_PAGES)
+
+    def over_budget(self) -> List[str]:
+        over = []
+        for name, stage in self.stages.items():
+            budget = self.budget_mb(name)
+            if budget is not None and stage.high_mb > budget:
+                over.append(f"{name} {stage.high_mb:.0f}MB > {budget:.0f}MB")
+        return over
+
+    def leak_rate_kb(self) -> Optional[float]:
+        """Least-squares growth of the traced heap across pages, in KB per page (None under 3 pages)."""
+        if len(self.pages) < 3:
+            return None
+        pages = sorted(self.pages.values(), key=lambda p: p.page)
+        xs = [p.page for p in pages]
+        ys = [p.traced_mb for p in pages]
+        mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+        spread = sum((x - mean_x) ** 2 for x in xs)
+        if not spread:
+            return None
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread
+        return slope * 1024
+
+    def summary(self) -> dict:
+        """JSON-serializable figures for reports."""
+        pages = sorted(self.pages.values(), key=lambda p: p.page)
+        leak_rate = self.leak_rate_kb()
+        return {
+            'pages': self.page_count,
+            'stages': {name: {**asdict(stage), 'budget_mb': self.budget_mb(name)}
+                       for name, stage in self.stages.items()},
+            'page_peak_mb': max((p.peak_mb for p in pages), default=0.0),
+            'pages_retained_mb': sum(p.retained_mb for p in pages),
+            'leak_kb_per_page': None if leak_rate is None else round(leak_rate, 1),
+            'largest_pages': [asdict(p) for p in
+                              sorted(pages, key=lambda p: (-p.peak_mb, p.page))[:5]],
+            'over_budget': self.over_budget(),
+        }
+
+    def format_report(self) -> str:
+        lines = [f"Memory by stage ({self.page_count} pages; peak above the stage's start, "
+                 f"retained at its end):",
+                 f"  {'stage':<17} {'peak MB':>8} {'retained':>9} {'RSS peak':>9} "
+                 f"{'RSS kept':>9} {'budget':>7}"]
+        for name, stage in self.stages.items():
+            budget = self.budget_mb(name)
+            flag = '  OVER BUDGET' if budget is not None and stage.high_mb > budget else ''
+            lines.append(f"  {name:<17} {stage.peak_mb:>8.1f} {stage.retained_mb:>9.1f} "
+                         f"{stage.rss_peak_mb:>9.1f} {stage.rss_retained_mb:>9.1f} "
+                         f"{'' if budget is None else f'{budget:.0f}':>7}{flag}")
+        if self.pages:
+            pages = self.pages.values()
+            leak_rate = self.leak_rate_kb()
+            lines.append(f"  pages: largest peak {max(p.peak_mb for p in pages):.1f} MB, "
+                         f"{sum(p.retained_mb for p in pages):.1f} MB retained over "
+                         f"{len(self.pages)} pages"
+                         + ('' if leak_rate is None else f" ({leak_rate:+.1f} KB/page)"))
+        for name, stage in self.stages.items():
+            if stage.top_sites:
+                lines.append(f"  top allocation sites held after {name}:")
+                lines.extend(f"    {site.size_mb:>8.2f} MB {site.blocks:>8} blocks  {site.location}"
+                             for site in stage.top_sites)
+        return '\n'.join(lines)
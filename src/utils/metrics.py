@@ -0,0 +1,328 @@
+"""
+Run Metrics - Throughput, stage latencies, cache hit rates and worker utilization.
+
+RunMetrics collects counters and latency histograms in memory while PDFs are
+parsed, validated and exported, and renders them in the Prometheus text
+format. `write_textfile` replaces a `.prom` file atomically, so node_exporter's
+textfile collector can scrape the figures without the tool serving anything:
+
+    node_exporter --collector.textfile.directory=/var/lib/node_exporter/textfile
+    python parse_csi.py document.pdf --metrics-file /var/lib/node_exporter/textfile/csi.prom
+
+Stages (label `stage` of csi_stage_duration_seconds):
+
+    extract            pdfplumber word extraction, per page
+    line_assembly      Words grouped into column lines, per page
+    classification     Lines classified as codes, headers and continuations, per page
+    model_conversion   Raw codes converted to CSICode models, per document
+    validator          Validator agent, per document
+    auditor            Auditor agent, per document
+    qc                 QC agent, per document
+    export             CSV/JSON export, per document
+
+Counters accumulate for the life of the process; a one-shot CLI run writes
+the figures of that run. Metrics from worker processes are combined with
+`snapshot()` and `merge()`.
+"""
+
+import bisect
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+PREFIX = 'csi'
+
+# Upper bounds in seconds; per-page stages take milliseconds, agents seconds
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                 10.0, 30.0, 60.0, 300.0)
+
+# name -> (type, help) of every metric that is collected
+METRICS = {
+    'pages_total': ('counter', 'PDF pages parsed'),
+    'codes_total': ('counter', 'Codes extracted'),
+    'documents_total': ('counter', 'Documents processed, by validation status'),
+    'document_seconds_total': ('counter', 'Wall time spent processing documents'),
+    'page_failures_total': ('counter', 'Pages not extracted, by reason'),
+    'cache_requests_total': ('counter', 'Cache lookups, by cache and result (hit or miss)'),
+    'worker_busy_seconds_total': ('counter', 'Time workers spent on tasks, by pool'),
+    'worker_capacity_seconds_total': ('counter', 'Worker time available, by pool'),
+    'stage_duration_seconds': ('histogram', 'Time spent per pipeline stage'),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram."""
+
+    def __init__(self, buckets: Sequence[float] = STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot: above every bound
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the max if above every bound)."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'buckets': list(self.buckets), 'counts': list(self.counts), 'sum': self.sum,
+                'count': self.count, 'max': self.max}
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        if tuple(data['buckets']) != self.buckets:
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.counts = [a + b for a, b in zip(self.counts, data['counts'])]
+        self.sum += data['sum']
+        self.count += data['count']
+        self.max = max(self.max, data['max'])
+
+
+class RunMetrics:
+    """In-memory counters and stage histograms, exportable as a Prometheus textfile."""
+
+    def __init__(self, prefix: str = PREFIX):
+        self.prefix = prefix
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()  # Agents may report from executor threads
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record one duration of a pipeline stage."""
+        key = ('stage_duration_seconds', _labels({'stage': stage}))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as one observation of `stage`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def cache(self, cache: str, hits: int, misses: int) -> None:
+        """Count cache lookups."""
+        if hits:
+            self.inc('cache_requests_total', hits, cache=cache, result='hit')
+        if misses:
+            self.inc('cache_requests_total', misses, cache=cache, result='miss')
+
+    def workers(self, pool: str, busy_seconds: float, capacity_seconds: float) -> None:
+        """Count worker time: busy out of the capacity `workers x wall time`."""
+        self.inc('worker_busy_seconds_total', busy_seconds, pool=pool)
+        self.inc('worker_capacity_seconds_total', capacity_seconds, pool=pool)
+
+    def total(self, name: str, **match) -> float:
+        """Sum of a counter over every label set containing `match`."""
+        wanted = set(_labels(match))
+        return sum(value for (counter, labels), value in self.counters.items()
+                   if counter == name and wanted <= set(labels))
+
+    def _by_label(self, name: str, label: str) -> Dict[str, float]:
+        values: Dict[str, float] = {}
+        for (counter, labels), value in self.counters.items():
+            if counter == name:
+                key = dict(labels).get(label)
+                values[key] = values.get(key, 0) + value
+        return values
+
+    def derived(self) -> Dict[str, Any]:
+        """Rates and ratios computed from the counters."""
+        seconds = self.total('document_seconds_total')
+        busy = self._by_label('worker_busy_seconds_total', 'pool')
+        capacity = self._by_label('worker_capacity_seconds_total', 'pool')
+        hits = {cache: self.total('cache_requests_total', cache=cache, result='hit')
+                for cache in self._by_label('cache_requests_total', 'cache')}
+        return {
+            'pages_per_second': self.total('pages_total') / seconds if seconds else 0.0,
+            'codes_per_second': self.total('codes_total') / seconds if seconds else 0.0,
+            'cache_hit_ratio': {
+                cache: hits[cache] / self.total('cache_requests_total', cache=cache)
+                for cache in hits
+            },
+            'worker_utilization': {
+                pool: busy.get(pool, 0.0) / capacity[pool] for pool in capacity if capacity[pool]
+            },
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact figures for run summaries and logs."""
+        with self._lock:
+            derived = self.derived()
+            stages = {
+                dict(labels)['stage']: {
+                    'count': histogram.count,
+                    'seconds': round(histogram.sum, 4),
+                    'mean': round(histogram.sum / histogram.count, 4),
+                    'p95': round(histogram.quantile(0.95), 4),
+                }
+                for (_, labels), histogram in sorted(self.histograms.items())
+            }
+            return {
+                'documents': int(self.total('documents_total')),
+                'pages': int(self.total('pages_total')),
+                'codes': int(self.total('codes_total')),
+                'seconds': round(self.total('document_seconds_total'), 3),
+                'pages_per_second': round(derived['pages_per_second'], 2),
+                'codes_per_second': round(derived['codes_per_second'], 1),
+                'stages': stages,
+                'cache_hit_ratio': {k: round(v, 4) for k, v in derived['cache_hit_ratio'].items()},
+                'worker_utilization': {k: round(v, 4)
+                                       for k, v in derived['worker_utilization'].items()},
+            }
+
+    def format_summary(self) -> str:
+        summary = self.summary()
+        lines = [f"Throughput: {summary['pages_per_second']} pages/s, "
+                 f"{summary['codes_per_second']} codes/s "
+                 f"({summary['pages']} pages, {summary['codes']} codes in {summary['seconds']}s)"]
+        for stage, figures in summary['stages'].items():
+            lines.append(f"  {stage:<17} {figures['seconds']:>9.3f}s total, "
+                         f"{figures['count']:>6} x {figures['mean'] * 1000:.1f} ms mean")
+        for cache, ratio in summary['cache_hit_ratio'].items():
+            lines.append(f"  cache {cache}: {ratio:.1%} hits")
+        for pool, ratio in summary['worker_utilization'].items():
+            lines.append(f"  workers {pool}: {ratio:.1%} busy")
+        return '\n'.join(lines)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Picklable, JSON-serializable copy of the raw metrics (see merge)."""
+        with self._lock:
+            return {
+                'counters': [[name, list(map(list, labels)), value]
+                             for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(map(list, labels)), histogram.to_dict()]
+                               for (name, labels), histogram in self.histograms.items()],
+            }
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """Add another process's snapshot to these metrics."""
+        with self._lock:
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                self.counters[key] = self.counters.get(key, 0) + value
+            for name, labels, data in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(data['buckets'])
+                histogram.merge(data)
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name, (kind, help_text) in METRICS.items():
+                if kind == 'counter':
+                    series = sorted((labels, value) for (counter, labels), value
+                                    in self.counters.items() if counter == name)
+                    if series:
+                        lines.extend(self._header(name, kind, help_text))
+                        lines.extend(f"{self.prefix}_{name}{_format_labels(labels)} "
+                                     f"{_format_value(value)}" for labels, value in series)
+                else:
+                    series = sorted((labels, histogram) for (metric, labels), histogram
+                                    in self.histograms.items() if metric == name)
+                    if series:
+                        lines.extend(self._header(name, kind, help_text))
+                        for labels, histogram in series:
+                            lines.extend(self._histogram_lines(name, labels, histogram))
+
+            derived = self.derived()
+            for name, help_text, series in (
+                ('pages_per_second', 'Pages parsed per second of document processing',
+                 [((), derived['pages_per_second'])]),
+                ('codes_per_second', 'Codes extracted per second of document processing',
+                 [((), derived['codes_per_second'])]),
+                ('cache_hit_ratio', 'Share of cache lookups that hit, by cache',
+                 [(_labels({'cache': k}), v) for k, v in derived['cache_hit_ratio'].items()]),
+                ('worker_utilization', 'Share of worker time spent busy, by pool',
+                 [(_labels({'pool': k}), v) for k, v in derived['worker_utilization'].items()]),
+                ('last_update_timestamp_seconds', 'Unix time the metrics were written',
+                 [((), time.time())]),
+            ):
+                if series:
+                    lines.extend(self._header(name, 'gauge', help_text))
+                    lines.extend(f"{self.prefix}_{name}{_format_labels(labels)} "
+                                 f"{_format_value(value)}" for labels, value in sorted(series))
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, name: str, kind: str, help_text: str) -> List[str]:
+        return [f"# HELP {self.prefix}_{name} {help_text}", f"# TYPE {self.prefix}_{name} {kind}"]
+
+    def _histogram_lines(self, name: str, labels: Labels, histogram: Histogram) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else _format_value(bound)
+            lines.append(f"{self.prefix}_{name}_bucket{_format_labels(labels, (('le', le),))} "
+                         f"{cumulative}")
+        lines.append(f"{self.prefix}_{name}_sum{_format_labels(labels)} "
+                     f"{_format_value(histogram.sum)}")
+        lines.append(f"{self.prefix}_{name}_count{_format_labels(labels)} {histogram.count}")
+        return lines
+
+    def write_textfile(self, path: str) -> None:
+        """
+        Write the metrics for node_exporter's textfile collector.
+
+        The file is written next to `path` and renamed over it, so the
+        collector never reads a partial file.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+                f.write(self.render())
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
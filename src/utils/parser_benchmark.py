@@ -0,0 +1,205 @@
+"""
+Parser Benchmark - Throughput, peak memory and accuracy on synthetic documents.
+
+Each case parses one synthetic MasterFormat PDF (see synthetic_masterformat.py)
+with one parser variant, in a fresh process so its peak resident memory is
+its own, and scores the codes against the document's ground truth:
+
+    precision / recall / f1   (division, code, title) matches, as multisets
+    context                   matched codes whose group and subgroup are right
+
+Variants:
+    final              src/parsers/csi_parser_final.py, pdfplumber words
+    final-pymupdf      the same parser on PyMuPDF's word list
+    final-supervised   pdfplumber words in 2 supervised worker processes
+    bbox               src/parsers/csi_parser_bbox.py, column crops
+    v2                 src/parsers/csi_parser_v2.py, layout text split by position
+    text               src/parsers/csi_parser.py, the first layout text parser
+"""
+
+import multiprocessing
+import resource
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+from src.utils.synthetic_masterformat import generate, read_truth
+
+
+DEFAULT_SIZES = (10, 100, 1000)
+
+
+def _final(backend: str = 'pdfplumber', workers: int = 0) -> Callable[[str], List[dict]]:
+    def parse(pdf_path: str) -> List[dict]:
+        from src.parsers.csi_parser_final import CSIParser
+        return CSIParser().parse_pdf(pdf_path, workers=workers, backend=backend)
+    return parse
+
+
+def _bbox(pdf_path: str) -> List[dict]:
+    from src.parsers.csi_parser_bbox import CSIParser
+    return CSIParser(left_bbox=(0, 0, 320, 792), right_bbox=(320, 0, 612, 792)).parse_pdf(pdf_path)
+
+
+def _v2(pdf_path: str) -> List[dict]:
+    from src.parsers.csi_parser_v2 import CSIParser
+    return CSIParser().parse_pdf(pdf_path)
+
+
+def _text(pdf_path: str) -> List[dict]:
+    from src.parsers.csi_parser import CSIParser
+    return CSIParser().parse_pdf(pdf_path)
+
+
+VARIANTS: Dict[str, Callable[[str], List[dict]]] = {
+    'final': _final(),
+    'final-pymupdf': _final(backend='pymupdf'),
+    'final-supervised': _final(workers=2),
+    'bbox': _bbox,
+    'v2': _v2,
+    'text': _text,
+}
+
+
+@dataclass
+class BenchmarkResult:
+    """One variant on one document."""
+    variant: str
+    pages: int
+    seconds: float
+    pages_per_second: float
+    codes: int
+    expected_codes: int
+    precision: float
+    recall: float
+    f1: float
+    context: float                # Share of matched codes with the right group/subgroup
+    peak_rss_mb: float            # Peak resident memory of the largest process (parser or worker)
+    baseline_rss_mb: float        # Resident memory before parsing
+    error: str = ''
+    cpu_seconds: float = 0.0      # CPU time of this process (worker processes not included)
+
+
+def score(truth: List[dict], codes: List[dict]) -> Dict[str, float]:
+    """Precision, recall and F1 of (division, code, title), and context accuracy of the matches."""
+    def key(row):
+        return row['division'], row['code'], row['title']
+
+    expected, found = Counter(map(key, truth)), Counter(map(key, codes))
+    matched = sum((expected & found).values())
+    precision = matched / len(codes) if codes else 0.0
+    recall = matched / len(truth) if truth else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+    context = {key(row): (row['group'], row['subgroup']) for row in truth}
+    remaining = expected & found
+    right = 0
+    for row in codes:
+        if remaining[key(row)] > 0:
+            remaining[key(row)] -= 1
+            right += (row.get('group'), row.get('subgroup')) == context[key(row)]
+    return {'precision': precision, 'recall': recall, 'f1': f1,
+            'context': right / matched if matched else 0.0}
+
+
+def _rss_mb() -> float:
+    """Peak resident memory of this process and its waited-for children, in MB."""
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024  # bytes vs KB
+
+
+def run_case(variant: str, pdf_path: str, truth_path: str) -> BenchmarkResult:
+    """Parse `pdf_path` with `variant` in this process and score it (see run_benchmark)."""
+    truth = read_truth(truth_path)
+    pages = max((row['page_number'] for row in truth), default=0)
+    baseline = _rss_mb()
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    try:
+        codes = VARIANTS[variant](pdf_path)
+        error = ''
+    except Exception as e:
+        codes, error = [], f"{type(e).__name__}: {e}"
+    seconds = time.perf_counter() - started
+    cpu_seconds = time.process_time() - cpu_started
+
+    return BenchmarkResult(
+        variant=variant, pages=pages, seconds=seconds,
+        pages_per_second=pages / seconds if seconds else 0.0,
+        codes=len(codes), expected_codes=len(truth),
+        peak_rss_mb=_rss_mb(), baseline_rss_mb=baseline, error=error, cpu_seconds=cpu_seconds,
+        **score(truth, codes)
+    )
+
+
+def _quiet() -> None:
+    logger.remove()  # Parsers log every page
+
+
+def document(pages: int, seed: int, directory: str) -> tuple:
+    """(pdf path, truth path) of a synthetic document, generated on first use."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    pdf_path = directory / f"synthetic_{pages}p_seed{seed}.pdf"
+    truth_path = directory / f"synthetic_{pages}p_seed{seed}.csv"
+    if not (pdf_path.exists() and truth_path.exists()):
+        logger.info(f"Generating {pdf_path} ({pages} pages)")
+        generate(str(pdf_path), pages, seed=seed, truth_path=str(truth_path))
+    return str(pdf_path), str(truth_path)
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, variants: Optional[List[str]] = None, seed: int = 0,
+                  directory: str = 'data/benchmarks') -> List[BenchmarkResult]:
+    """Run every variant on a synthetic document of every size, each case in a fresh process."""
+    variants = list(variants or VARIANTS)
+    unknown = [name for name in variants if name not in VARIANTS]
+    if unknown:
+        raise ValueError(f"Unknown parser variants {unknown} (expected some of {list(VARIANTS)})")
+
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for pages in sizes:
+        pdf_path, truth_path = document(pages, seed, directory)
+        for variant in variants:
+            logger.info(f"Benchmarking {variant} on {pages} pages...")
+            try:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context,
+                                         initializer=_quiet) as executor:
+                    result = executor.submit(run_case, variant, pdf_path, truth_path).result()
+            except BrokenProcessPool:
+                # E.g. killed by the OOM killer; the other cases still run
+                truth = read_truth(truth_path)
+                result = BenchmarkResult(variant=variant, pages=pages, seconds=0.0,
+                                         pages_per_second=0.0, codes=0,
+                                         expected_codes=len(truth), precision=0.0, recall=0.0,
+                                         f1=0.0, context=0.0, peak_rss_mb=0.0,
+                                         baseline_rss_mb=0.0, error="worker process died")
+            logger.info(f"  {result.pages_per_second:.1f} pages/s, f1 {result.f1:.3f}, "
+                        f"peak {result.peak_rss_mb:.0f} MB")
+            results.append(result)
+    return results
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    lines = [f"{'variant':<18} {'pages':>6} {'seconds':>9} {'pages/s':>9} {'peak MB':>8} "
+             f"{'+MB':>6} {'codes':>8} {'precision':>9} {'recall':>7} {'f1':>6} {'context':>8}"]
+    for r in results:
+        lines.append(
+            f"{r.variant:<18} {r.pages:>6} {r.seconds:>9.2f} {r.pages_per_second:>9.1f} "
+            f"{r.peak_rss_mb:>8.0f} {r.peak_rss_mb - r.baseline_rss_mb:>6.0f} "
+            f"{r.codes:>8} {r.precision:>9.3f} {r.recall:>7.3f} {r.f1:>6.3f} {r.context:>8.3f}"
+            + (f"  {r.error}" if r.error else '')
+        )
+    return '\n'.join(lines)
+
+
+def results_as_dicts(results: List[BenchmarkResult]) -> List[dict]:
+    return [asdict(result) for result in results]
@@ -0,0 +1,330 @@
+"""
+Performance Gate - Benchmark history and a regression check against a stored baseline.
+
+A gate run times a small, fixed suite (SUITE) several times each:
+
+    parse/<variant>/<pages>p     one parser variant on a synthetic document
+                                 (see parser_benchmark.py)
+    agents/<stage>/<rows>        one validation stage on a synthetic dataset
+                                 (see agent_benchmark.py)
+
+Every run is appended to a JSON history with the machine fingerprint, the
+git commit and each benchmark's samples, median and variance. The gate
+compares CPU time of the benchmark process, which other load on the
+machine disturbs far less than wall-clock time (also recorded). A run is
+compared with the latest baseline run recorded on the same machine; a
+benchmark is a significant slowdown when its median is more than
+`threshold` slower *and* a one-sided Mann-Whitney U test on the samples
+gives p < `alpha`. The first run on a machine, or one saved with
+save_baseline, becomes the new baseline.
+"""
+
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+
+DEFAULT_HISTORY = 'data/benchmarks/perf_history.json'
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10   # Relative slowdown of the median
+DEFAULT_ALPHA = 0.05       # Significance level of the Mann-Whitney U test
+
+
+@dataclass(frozen=True)
+class GateBenchmark:
+    """One timed case of the gate suite."""
+    kind: str       # parse or agents
+    target: str     # Parser variant or validation stage
+    size: int       # Pages or rows
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind}/{self.target}/{self.size}{'p' if self.kind == 'parse' else ''}"
+
+
+SUITE = (
+    GateBenchmark('parse', 'final', 20),
+    GateBenchmark('parse', 'final-pymupdf', 20),
+    GateBenchmark('agents', 'validator', 10_000),
+    GateBenchmark('agents', 'auditor', 10_000),
+    GateBenchmark('agents', 'qc', 10_000),
+    GateBenchmark('agents', 'orchestrator', 10_000),
+)
+
+
+@dataclass
+class Measurement:
+    """Samples of one benchmark, in seconds."""
+    samples: List[float] = field(default_factory=list)        # CPU time, compared by the gate
+    wall_samples: List[float] = field(default_factory=list)
+    error: str = ''
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples) if self.samples else 0.0
+
+    @property
+    def variance(self) -> float:
+        return statistics.variance(self.samples) if len(self.samples) > 1 else 0.0
+
+    @property
+    def wall_median(self) -> float:
+        return statistics.median(self.wall_samples) if self.wall_samples else 0.0
+
+    def to_dict(self) -> dict:
+        return {'median': self.median, 'variance': self.variance, 'samples': self.samples,
+                'wall_median': self.wall_median, 'wall_samples': self.wall_samples,
+                'error': self.error}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Measurement':
+        return cls(samples=list(data.get('samples', [])),
+                   wall_samples=list(data.get('wall_samples', [])), error=data.get('error', ''))
+
+
+@dataclass
+class Comparison:
+    """One benchmark of a run against the baseline."""
+    name: str
+    baseline: Optional[Measurement]
+    current: Measurement
+    change: Optional[float] = None      # Relative change of the median (0.1 = 10% slower)
+    p_value: Optional[float] = None     # One-sided: current slower than baseline
+    verdict: str = 'new'                # new, ok, slower, faster or error
+
+
+def machine_fingerprint() -> Dict[str, str]:
+    """What makes timings comparable between runs: hardware, OS and interpreter."""
+    info = {
+        'system': platform.system(),
+        'release': platform.release(),
+        'machine': platform.machine(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': str(os.cpu_count()),
+        'python': platform.python_version(),
+        'node': platform.node(),
+    }
+    info['id'] = hashlib.sha1(json.dumps(info, sort_keys=True).encode()).hexdigest()[:12]
+    return info
+
+
+def git_commit() -> Dict[str, object]:
+    """HEAD commit and whether tracked files have uncommitted changes (empty outside git)."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': '', 'dirty': False}
+    return {'commit': commit, 'dirty': bool(dirty)}
+
+
+@lru_cache(maxsize=None)
+def _u_counts(n1: int, n2: int) -> tuple:
+    """Number of orderings of n1 + n2 distinct samples giving each Mann-Whitney U (0..n1*n2)."""
+    if n1 == 0 or n2 == 0:
+        return (1,)
+    # The largest sample belongs to the first group (adding n2 to U) or to the second
+    with_first, with_second = _u_counts(n1 - 1, n2), _u_counts(n1, n2 - 1)
+    counts = [0] * (n1 * n2 + 1)
+    for u, count in enumerate(with_first):
+        counts[u + n2] += count
+    for u, count in enumerate(with_second):
+        counts[u] += count
+    return tuple(counts)
+
+
+def mann_whitney_greater(current: List[float], baseline: List[float]) -> float:
+    """
+    Exact one-sided p-value that `current` samples tend to be larger than
+    `baseline` ones. Ties count half and U is rounded down, which keeps the
+    p-value conservative.
+    """
+    if not current or not baseline:
+        return 1.0
+    u = sum(1.0 if c > b else 0.5 if c == b else 0.0 for c in current for b in baseline)
+    counts = _u_counts(len(current), len(baseline))
+    at_least = sum(counts[int(u):])
+    return at_least / math.comb(len(current) + len(baseline), len(current))
+
+
+def compare(current: Dict[str, Measurement], baseline: Optional[Dict[str, Measurement]],
+            threshold: float = DEFAULT_THRESHOLD, alpha: float = DEFAULT_ALPHA) -> List[Comparison]:
+    """Compare every benchmark of a run with the baseline run's."""
+    comparisons = []
+    for name, measurement in current.items():
+        before = (baseline or {}).get(name)
+        comparison = Comparison(name, before, measurement)
+        if measurement.error:
+            comparison.verdict = 'error'
+        elif before is not None and not before.error and before.median > 0:
+            comparison.change = measurement.median / before.median - 1
+            comparison.p_value = mann_whitney_greater(measurement.samples, before.samples)
+            faster_p = mann_whitney_greater(before.samples, measurement.samples)
+            if comparison.change > threshold and comparison.p_value < alpha:
+                comparison.verdict = 'slower'
+            elif comparison.change < -threshold and faster_p < alpha:
+                comparison.verdict = 'faster'
+            else:
+                comparison.verdict = 'ok'
+        comparisons.append(comparison)
+    return comparisons
+
+
+def smallest_p_value(repeat: int, baseline_repeat: int = None) -> float:
+    """Smallest p-value the test can reach with these sample counts (must be below alpha)."""
+    baseline_repeat = baseline_repeat or repeat
+    return 1 / math.comb(repeat + baseline_repeat, repeat)
+
+
+def regressions(comparisons: List[Comparison]) -> List[Comparison]:
+    """Comparisons that fail the gate: significant slowdowns and benchmarks that errored."""
+    return [c for c in comparisons if c.verdict in ('slower', 'error')]
+
+
+class PerfHistory:
+    """JSON history of gate runs, oldest first."""
+
+    def __init__(self, path: str = DEFAULT_HISTORY):
+        self.path = Path(path)
+        self.runs: List[dict] = []
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.runs = json.load(f).get('runs', [])
+
+    def baseline(self, fingerprint_id: str, commit: str = None) -> Optional[dict]:
+        """Latest baseline run on this machine (or its latest run of `commit`, a prefix)."""
+        for run in reversed(self.runs):
+            if run['fingerprint']['id'] != fingerprint_id:
+                continue
+            if commit is not None:
+                if run['commit'].startswith(commit):
+                    return run
+            elif run.get('baseline'):
+                return run
+        return None
+
+    def append(self, run: dict) -> None:
+        self.runs.append(run)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'runs': self.runs}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def measurements_of(run: Optional[dict]) -> Optional[Dict[str, Measurement]]:
+    if run is None:
+        return None
+    return {name: Measurement.from_dict(data) for name, data in run['benchmarks'].items()}
+
+
+def _measure(benchmark: GateBenchmark, repeat: int, seed: int, directory: str,
+             config: Optional[dict]) -> Measurement:
+    """Time `benchmark` `repeat` times in this process, after one untimed warm-up run."""
+    if benchmark.kind == 'parse':
+        from src.utils import parser_benchmark
+        pdf_path, truth_path = parser_benchmark.document(benchmark.size, seed, directory)
+
+        def once():
+            return parser_benchmark.run_case(benchmark.target, pdf_path, truth_path)
+    else:
+        from src.utils import agent_benchmark
+
+        def once():
+            return agent_benchmark.run_case(benchmark.target, benchmark.size, seed, config=config)
+
+    measurement = Measurement()
+    for attempt in range(repeat + 1):
+        result = once()
+        if result.error:
+            measurement.error = result.error
+            break
+        if attempt:
+            measurement.samples.append(result.cpu_seconds)
+            measurement.wall_samples.append(result.seconds)
+    return measurement
+
+
+def _quiet() -> None:
+    logger.remove()  # Parsers and agents log every stage
+
+
+def run_suite(suite=SUITE, repeat: int = DEFAULT_REPEAT, seed: int = 0,
+              directory: str = 'data/benchmarks',
+              config: Optional[dict] = None) -> Dict[str, Measurement]:
+    """Time every benchmark of `suite`, each in a fresh process."""
+    context = multiprocessing.get_context('spawn')
+    measurements = {}
+    for benchmark in suite:
+        if benchmark.kind == 'parse':
+            # Generated here so the worker only parses
+            from src.utils.parser_benchmark import document
+            document(benchmark.size, seed, directory)
+        logger.info(f"Timing {benchmark.name} ({repeat} runs)...")
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context,
+                                     initializer=_quiet) as executor:
+                measurement = executor.submit(_measure, benchmark, repeat, seed, directory,
+                                              config).result()
+        except BrokenProcessPool:
+            measurement = Measurement(error='worker process died')
+        logger.info(f"  median {measurement.median:.3f}s CPU, {measurement.wall_median:.3f}s wall"
+                    if not measurement.error
+                    else f"  {measurement.error}")
+        measurements[benchmark.name] = measurement
+    return measurements
+
+
+def new_run(measurements: Dict[str, Measurement], repeat: int, baseline: bool = False) -> dict:
+    """History entry for a run."""
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        **git_commit(),
+        'fingerprint': machine_fingerprint(),
+        'baseline': baseline,
+        'repeat': repeat,
+        'benchmarks': {name: m.to_dict() for name, m in measurements.items()},
+    }
+
+
+def format_comparisons(comparisons: List[Comparison], baseline_run: Optional[dict] = None) -> str:
+    lines = []
+    if baseline_run is not None:
+        dirty = ' (uncommitted changes)' if baseline_run.get('dirty') else ''
+        lines.append(f"Baseline: {baseline_run['commit'][:10] or 'unknown commit'}{dirty}, "
+                     f"{baseline_run['timestamp']}")
+    lines.append(f"{'benchmark':<28} {'baseline':>9} {'current':>9} {'change':>8} "
+                 f"{'noise':>7} {'p':>6} {'wall':>9}  verdict")
+    for c in comparisons:
+        current = c.current
+        noise = (math.sqrt(current.variance) / current.median) if current.median else 0.0
+        lines.append(
+            f"{c.name:<28} "
+            f"{'' if c.baseline is None else f'{c.baseline.median:.3f}s':>9} "
+            f"{'' if current.error else f'{current.median:.3f}s':>9} "
+            f"{'' if c.change is None else f'{c.change:+.1%}':>8} "
+            f"{'' if current.error else f'±{noise:.1%}':>7} "
+            f"{'' if c.p_value is None else f'{c.p_value:.3f}':>6} "
+            f"{'' if current.error else f'{current.wall_median:.3f}s':>9}  "
+            f"{c.verdict.upper() if c.verdict in ('slower', 'error') else c.verdict}"
+            + (f" ({current.error})" if current.error else '')
+        )
+    lines.append("Medians of CPU time; noise is the current run's standard deviation, "
+                 "wall its wall-clock median")
+    return '\n'.join(lines)
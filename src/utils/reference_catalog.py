@@ -0,0 +1,273 @@
+"""
+Reference Catalog - Compiled, memory-mapped MasterFormat code catalog.
+
+A catalog holds the full Level 2/3 codes and titles of one MasterFormat
+edition. It is compiled once from a CSV into a compact binary file:
+
+    header   32 bytes   magic, format version, edition, entry count
+    keys     uint32[n]  packed 6-digit codes, sorted ascending
+    offsets  uint32[n+1] byte offsets of each title in the title blob
+    titles   UTF-8 title blob
+
+The file is opened with mmap (read-only), so worker processes share the same
+pages through the OS page cache and nothing is loaded into Python objects
+until a title is actually requested. Lookups are binary searches over the
+key array.
+
+Usage:
+    python -m src.utils.reference_catalog compile masterformat_2020.csv \\
+        data/reference/masterformat_2020.csic --edition 2020
+"""
+
+import csv
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from src.agents.features import normalize_code_digits, pack_code_key
+
+
+MAGIC = b'CSIC'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHH4sI12x')  # magic, version, reserved, edition, count
+
+
+class CatalogFormatError(ValueError):
+    """Raised when a file is not a valid compiled reference catalog."""
+
+
+class ReferenceCatalog:
+    """
+    Read-only view over a compiled reference catalog file.
+
+    Keys are packed MasterFormat codes (see `src.agents.features.pack_code_key`),
+    e.g. "03 30 00" -> 33000.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open and memory-map a compiled catalog.
+
+        Args:
+            path: Path to a catalog produced by `compile_catalog`
+        """
+        self.path = str(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:  # Empty file
+            self._file.close()
+            raise CatalogFormatError(f"Empty catalog file: {self.path}") from e
+
+        if len(self._mmap) < HEADER.size:
+            self.close()
+            raise CatalogFormatError(f"Truncated catalog header: {self.path}")
+
+        magic, version, _, edition, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise CatalogFormatError(
+                f"Not a reference catalog (magic={magic!r}, version={version}): {self.path}"
+            )
+
+        self.edition = edition.decode('ascii').strip()
+        self._count = count
+
+        keys_offset = HEADER.size
+        offsets_offset = keys_offset + 4 * count
+        self._titles_offset = offsets_offset + 4 * (count + 1)
+        if self._titles_offset > len(self._mmap):
+            self.close()
+            raise CatalogFormatError(f"Truncated catalog index: {self.path}")
+
+        # Zero-copy views over the mapped file
+        self.keys = np.frombuffer(self._mmap, dtype='<u4', count=count, offset=keys_offset)
+        self._title_offsets = np.frombuffer(
+            self._mmap, dtype='<u4', count=count + 1, offset=offsets_offset
+        )
+
+        if self._titles_offset + int(self._title_offsets[-1]) > len(self._mmap):
+            self.close()
+            raise CatalogFormatError(f"Truncated catalog title blob: {self.path}")
+
+    @classmethod
+    def open(cls, path: str) -> 'ReferenceCatalog':
+        """Open a compiled catalog file."""
+        catalog = cls(path)
+        logger.info(f"Reference catalog loaded: MasterFormat {catalog.edition} "
+                    f"({len(catalog)} codes) from {path}")
+        return catalog
+
+    def close(self) -> None:
+        """Release the memory map and file handle."""
+        self.keys = None
+        self._title_offsets = None
+        if getattr(self, '_mmap', None) is not None and not self._mmap.closed:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Views handed out to callers are still alive; the map is
+                # released when they are garbage collected.
+                pass
+        if not self._file.closed:
+            self._file.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    # Catalogs are shared with worker processes by path; each process maps
+    # the file itself and the OS shares the pages.
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def index_of(self, key: int) -> int:
+        """Position of `key` in the catalog, or -1 if absent."""
+        i = int(np.searchsorted(self.keys, key))
+        if i < self._count and int(self.keys[i]) == key:
+            return i
+        return -1
+
+    def __contains__(self, key: int) -> bool:
+        return self.index_of(key) >= 0
+
+    def contains_many(self, keys: np.ndarray) -> np.ndarray:
+        """Vectorized membership test; returns a boolean mask aligned with `keys`."""
+        keys = np.asarray(keys, dtype=np.int64)
+        if self._count == 0:
+            return np.zeros(len(keys), dtype=bool)
+        positions = np.searchsorted(self.keys, keys)
+        positions = np.minimum(positions, self._count - 1)
+        return self.keys[positions] == keys
+
+    def title_at(self, index: int) -> str:
+        """Title of the entry at a catalog position."""
+        start = self._titles_offset + int(self._title_offsets[index])
+        end = self._titles_offset + int(self._title_offsets[index + 1])
+        return self._mmap[start:end].decode('utf-8')
+
+    def lookup(self, key: int) -> Optional[str]:
+        """Title for a packed code key, or None if the code is not in the catalog."""
+        i = self.index_of(key)
+        return self.title_at(i) if i >= 0 else None
+
+    def division_slice(self, division: int) -> slice:
+        """Catalog positions of all codes in a division (e.g. 3 -> 03 xx xx)."""
+        lo = int(np.searchsorted(self.keys, division * 10000))
+        hi = int(np.searchsorted(self.keys, (division + 1) * 10000))
+        return slice(lo, hi)
+
+    def divisions(self) -> List[int]:
+        """Sorted list of divisions present in the catalog."""
+        return [int(d) for d in np.unique(self.keys // 10000)]
+
+
+def format_code_key(key: int) -> str:
+    """Format a packed code key as "XX XX XX"."""
+    digits = f"{key:06d}"
+    return f"{digits[0:2]} {digits[2:4]} {digits[4:6]}"
+
+
+def compile_catalog(entries: Iterable[Tuple[int, str]], output_path: str,
+                    edition: str) -> int:
+    """
+    Write a compiled catalog file from (packed key, title) pairs.
+
+    Later duplicates of a key are ignored. The file is written to a temporary
+    path and renamed into place so readers never see a partial catalog.
+
+    Args:
+        entries: Iterable of (packed code key, title)
+        output_path: Destination catalog path
+        edition: MasterFormat edition label (up to 4 ASCII chars, e.g. "2020")
+
+    Returns:
+        Number of entries written
+    """
+    edition_bytes = edition.encode('ascii')
+    if len(edition_bytes) > 4:
+        raise ValueError(f"Edition label must be at most 4 characters: {edition!r}")
+
+    by_key = {}
+    for key, title in entries:
+        if key < 0:
+            continue
+        by_key.setdefault(key, title.strip())
+
+    keys = sorted(by_key)
+    encoded = [by_key[k].encode('utf-8') for k in keys]
+
+    offsets = np.zeros(len(keys) + 1, dtype='<u4')
+    if encoded:
+        offsets[1:] = np.cumsum([len(t) for t in encoded])
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, edition_bytes.ljust(4), len(keys)))
+        f.write(np.asarray(keys, dtype='<u4').tobytes())
+        f.write(offsets.tobytes())
+        for title in encoded:
+            f.write(title)
+
+    os.replace(tmp_path, output_path)
+    logger.info(f"Compiled {len(keys)} codes for MasterFormat {edition} -> {output_path}")
+    return len(keys)
+
+
+def read_catalog_csv(csv_path: str) -> Iterable[Tuple[int, str]]:
+    """
+    Read (packed key, title) pairs from a CSV with Division, Code, Title columns.
+
+    This is the format written by `parse_csi.py`, so a verified parse of a
+    full edition can be compiled directly into a reference catalog.
+    """
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            digits = normalize_code_digits(row['Code'])
+            key = pack_code_key(row['Division'].strip(), digits)
+            if key < 0:
+                logger.warning(f"Skipping unpackable catalog row: {row}")
+                continue
+            yield key, row['Title']
+
+
+def main(argv: List[str] = None) -> int:
+    """CLI for compiling and inspecting catalogs."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MasterFormat reference catalog tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compile_parser = subparsers.add_parser('compile', help="Compile a CSV into a catalog")
+    compile_parser.add_argument('csv', help="CSV with Division, Code, Title columns")
+    compile_parser.add_argument('output', help="Output catalog path")
+    compile_parser.add_argument('--edition', required=True, help="Edition label, e.g. 2020")
+
+    info_parser = subparsers.add_parser('info', help="Show catalog summary")
+    info_parser.add_argument('catalog', help="Catalog path")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compile':
+        compile_catalog(read_catalog_csv(args.csv), args.output, args.edition)
+    else:
+        catalog = ReferenceCatalog(args.catalog)
+        print(f"MasterFormat {catalog.edition}: {len(catalog)} codes, "
+              f"{len(catalog.divisions())} divisions")
+        catalog.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
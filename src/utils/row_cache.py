@@ -0,0 +1,240 @@
+"""
+Row Result Cache - Persistent memo of row-local check results.
+
+Row-local checks (readability, format, ...) give the same findings for the
+same row content under the same rules and configuration.
+Their findings are stored in a SQLite file keyed by
+
+    (rule-set key, row content hash)
+
+where the rule-set key hashes the agent, its row checks and their versions,
+the registry's rule-set version and the agent configuration. Re-validating
+a dataset after a small edit then only runs the row checks for the rows
+whose content changed.
+
+The cache holds at most `max_entries` rows; the least recently used are
+evicted. Each run is a generation, and rows are stamped with the generation
+that last used them. To keep warm runs cheap, a hit only re-stamps rows whose
+stamp is more than REFRESH_AGE generations old.
+"""
+
+import gc
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from loguru import logger
+
+
+# Eviction trims the cache to this fraction of max_entries, so it does not
+# run again on every following write
+EVICT_TO = 0.9
+
+# Hits re-stamp a row only when its stamp is older than this many generations
+REFRESH_AGE = 8
+
+# Row hashes per lookup query (SQLite's host parameter limit is 999 in old builds)
+LOOKUP_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS row_results (
+    ruleset BLOB NOT NULL,
+    row_hash BLOB NOT NULL,
+    findings BLOB NOT NULL,
+    generation INTEGER NOT NULL,
+    PRIMARY KEY (ruleset, row_hash)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+@contextmanager
+def paused_gc():
+    """
+    Pause the cyclic garbage collector.
+
+    Decoding cached findings allocates many small containers and none of them
+    form cycles; letting allocation counts trigger collections would scan the
+    whole heap repeatedly.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def hash_row(row: Dict[str, Any]) -> bytes:
+    """
+    Content hash of a parsed row.
+
+    Hashes the row's repr, so rows with the same content but a different key
+    order hash differently; that only costs a cache miss, and rows produced
+    by the same parser always share their key order.
+    """
+    return hashlib.blake2b(repr(row).encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+def hash_ruleset(*parts: Any) -> bytes:
+    """Hash of everything that determines row-local findings besides the row itself."""
+    canonical = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).digest()
+
+
+class RowResultCache:
+    """Size-bounded SQLite store of per-row check findings."""
+
+    def __init__(self, path: str, max_entries: int = 1_000_000):
+        """
+        Open (or create) a cache file.
+
+        Args:
+            path: SQLite file path
+            max_entries: Maximum number of cached rows across all rule sets
+        """
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._generation: Optional[int] = None
+        # Upper bound of the row count (replaced rows count as new), so puts
+        # only count the table when eviction may be due
+        self._count: Optional[int] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    @property
+    def generation(self) -> int:
+        """Generation of this cache instance, used as the recency stamp."""
+        if self._generation is None:
+            with self._lock, self.connection as connection:
+                row = connection.execute(
+                    "SELECT value FROM meta WHERE key = 'generation'"
+                ).fetchone()
+                self._generation = (row[0] if row else 0) + 1
+                connection.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)",
+                    (self._generation,)
+                )
+        return self._generation
+
+    def new_generation(self) -> None:
+        """Start a new run: later hits count as more recent than earlier ones."""
+        self._generation = None
+
+    def get_many(self, ruleset: bytes, row_hashes: Iterable[bytes]) -> Dict[bytes, Any]:
+        """
+        Cached findings for the given rows (missing rows are absent from the result).
+
+        Findings are unpickled on every call, so callers may modify them.
+        """
+        wanted = list(set(row_hashes))
+        generation = self.generation
+
+        with self._lock, self.connection as connection:
+            # Primary key lookups of the wanted rows only: the cost follows the
+            # rows being validated, not the size of the cache
+            rows = []
+            for start in range(0, len(wanted), LOOKUP_CHUNK):
+                chunk = wanted[start:start + LOOKUP_CHUNK]
+                rows.extend(connection.execute(
+                    "SELECT row_hash, findings, generation FROM row_results "
+                    f"WHERE ruleset = ? AND row_hash IN ({','.join('?' * len(chunk))})",
+                    (ruleset, *chunk)
+                ))
+            with paused_gc():
+                found = {row_hash: pickle.loads(findings) if findings else {}
+                         for row_hash, findings, _ in rows}
+            refresh = [(generation, ruleset, row_hash)
+                       for row_hash, _, row_generation in rows
+                       if row_generation < generation - REFRESH_AGE]
+            if refresh:
+                connection.executemany(
+                    "UPDATE row_results SET generation = ? WHERE ruleset = ? AND row_hash = ?",
+                    refresh
+                )
+
+        self.hits += len(found)
+        self.misses += len(wanted) - len(found)
+        return found
+
+    def put_many(self, ruleset: bytes, entries: Iterable[Tuple[bytes, Any]]) -> None:
+        """Store findings per row (empty findings are stored as an empty blob)."""
+        generation = self.generation
+        records = [
+            (ruleset, row_hash,
+             pickle.dumps(findings, protocol=pickle.HIGHEST_PROTOCOL) if findings else b'',
+             generation)
+            for row_hash, findings in entries
+        ]
+        if not records:
+            return
+        with self._lock, self.connection as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO row_results (ruleset, row_hash, findings, generation) "
+                "VALUES (?, ?, ?, ?)",
+                records
+            )
+            if self._count is None:
+                self._count = connection.execute("SELECT COUNT(*) FROM row_results").fetchone()[0]
+            else:
+                self._count += len(records)
+        if self._count > self.max_entries:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Drop the least recently used rows once there are more than max_entries.
+
+        Returns:
+            Number of rows dropped
+        """
+        with self._lock, self.connection as connection:
+            count = connection.execute("SELECT COUNT(*) FROM row_results").fetchone()[0]
+            self._count = count
+            if count <= self.max_entries:
+                return 0
+            excess = count - int(self.max_entries * EVICT_TO)
+            connection.execute(
+                "DELETE FROM row_results WHERE (ruleset, row_hash) IN ("
+                "SELECT ruleset, row_hash FROM row_results ORDER BY generation LIMIT ?)",
+                (excess,)
+            )
+            self._count = count - excess
+        logger.debug(f"Evicted {excess} rows from row result cache")
+        return excess
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM row_results").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Worker processes reopen the file by path
+        return {'path': self.path, 'max_entries': self.max_entries}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state['path'], state['max_entries'])
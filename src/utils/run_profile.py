@@ -0,0 +1,228 @@
+"""
+Run Profile - Where one document's parse and validation time goes.
+
+RunProfiler records wall and CPU time for
+
+    pages    each stage of CSIParser.parse_page (extract, line_assembly,
+             classification), with the page's word, character, line and
+             code counts
+    stages   document-level stages (model_conversion, the validator, auditor
+             and qc agents, export)
+    checks   every check the agents run (see src/agents/checks.py)
+
+and runs cProfile over the whole run. `write(directory)` saves
+
+    run.pstats   cProfile stats (snakeviz, flameprof, gprof2dot, pstats)
+    pages.csv    one row per page
+    stages.csv   document stages and checks
+    report.txt   slowest pages, a per-page heatmap, slowest stages and
+                 checks, and the hottest functions
+
+CPU times are per thread (time.thread_time), so they stay meaningful when
+checks run in threads; cProfile itself only sees the thread that started it.
+"""
+
+import cProfile
+import csv
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+
+PAGE_STAGES = ('extract', 'line_assembly', 'classification')
+HEATMAP_SHADES = ' .:-=+*#%@'
+HEATMAP_WIDTH = 50
+
+
+@dataclass
+class Timing:
+    """Accumulated wall and CPU seconds of a stage or check."""
+    calls: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+
+    def add(self, wall: float, cpu: float) -> None:
+        self.calls += 1
+        self.wall += wall
+        self.cpu += cpu
+
+
+@dataclass
+class PageProfile:
+    """Timings and content counts of one page."""
+    page: int
+    words: int = 0
+    chars: int = 0
+    left_lines: int = 0
+    right_lines: int = 0
+    codes: int = 0
+    stages: Dict[str, Timing] = field(default_factory=dict)
+
+    @property
+    def wall(self) -> float:
+        return sum(timing.wall for timing in self.stages.values())
+
+    @property
+    def cpu(self) -> float:
+        return sum(timing.cpu for timing in self.stages.values())
+
+
+class RunProfiler:
+    """Per-page, per-stage and per-check timings plus cProfile stats of one run."""
+
+    def __init__(self):
+        self.pages: Dict[int, PageProfile] = {}
+        self.stages: Dict[str, Timing] = {}
+        self.checks: Dict[Tuple[str, str], Timing] = {}
+        self._lock = threading.Lock()  # Checks of one level may run in threads
+        self._profile = cProfile.Profile()
+        self._running = False
+
+    def start(self) -> None:
+        self._profile.enable()
+        self._running = True
+
+    def stop(self) -> None:
+        if self._running:
+            self._profile.disable()
+            self._running = False
+
+    def page(self, page: int) -> PageProfile:
+        if page not in self.pages:
+            self.pages[page] = PageProfile(page)
+        return self.pages[page]
+
+    def page_stage(self, page: int, stage: str, wall: float, cpu: float) -> None:
+        self.page(page).stages.setdefault(stage, Timing()).add(wall, cpu)
+
+    @contextmanager
+    def _timed(self, timings: dict, key) -> Iterator[None]:
+        started, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - started, time.thread_time() - cpu
+            with self._lock:
+                timings.setdefault(key, Timing()).add(wall, cpu)
+
+    def stage(self, name: str):
+        """Time the enclosed block as a document-level stage."""
+        return self._timed(self.stages, name)
+
+    def check(self, agent: str, name: str):
+        """Time the enclosed block as one run of an agent's check."""
+        return self._timed(self.checks, (agent, name))
+
+    # ------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------
+
+    def slowest_pages(self, top: int = 10) -> List[PageProfile]:
+        return sorted(self.pages.values(), key=lambda p: (-p.wall, p.page))[:top]
+
+    def heatmap(self, width: int = HEATMAP_WIDTH) -> str:
+        """Pages as shaded cells, darker for more wall time (relative to the slowest page)."""
+        if not self.pages:
+            return ''
+        last = max(self.pages)
+        slowest = max(page.wall for page in self.pages.values()) or 1.0
+        lines = []
+        for first in range(1, last + 1, width):
+            cells = []
+            for number in range(first, min(first + width, last + 1)):
+                wall = self.pages[number].wall if number in self.pages else 0.0
+                shade = min(int(wall / slowest * len(HEATMAP_SHADES)), len(HEATMAP_SHADES) - 1)
+                if wall > 0:
+                    shade = max(shade, 1)  # Blank only for pages without timings
+                cells.append(HEATMAP_SHADES[shade])
+            lines.append(f"p{first:<5}|{''.join(cells)}|")
+        lines.append(f"scale: '{HEATMAP_SHADES[1]}' low .. '{HEATMAP_SHADES[-1]}' "
+                     f"{slowest * 1000:.1f} ms (slowest page)")
+        return '\n'.join(lines)
+
+    def hot_functions(self, top: int = 15) -> str:
+        """cProfile functions with the most own time."""
+        self.stop()
+        if not self._profile.getstats():
+            return ''
+        output = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=output)
+        stats.strip_dirs().sort_stats('tottime').print_stats(top)
+        text = output.getvalue()
+        return text[text.find('   ncalls'):].rstrip() if '   ncalls' in text else text.rstrip()
+
+    def format_report(self, top: int = 10) -> str:
+        lines = []
+        pages = self.slowest_pages(top)
+        if pages:
+            total = sum(page.wall for page in self.pages.values())
+            lines.append(f"Slowest pages ({len(self.pages)} pages, {total:.3f}s in parse_page):")
+            lines.append(f"  {'page':>5} {'wall ms':>9} {'cpu ms':>9} {'extract':>9} "
+                         f"{'lines':>8} {'classify':>9} {'words':>7} {'chars':>8} "
+                         f"{'L/R lines':>10} {'codes':>6}")
+            for page in pages:
+                stage = {name: page.stages[name].wall * 1000 if name in page.stages else 0.0
+                         for name in PAGE_STAGES}
+                lines.append(
+                    f"  {page.page:>5} {page.wall * 1000:>9.1f} {page.cpu * 1000:>9.1f} "
+                    f"{stage['extract']:>9.1f} {stage['line_assembly']:>8.1f} "
+                    f"{stage['classification']:>9.1f} {page.words:>7} {page.chars:>8} "
+                    f"{f'{page.left_lines}/{page.right_lines}':>10} {page.codes:>6}"
+                )
+            lines.extend(['', 'Page heatmap (wall time):', self.heatmap()])
+
+        for title, timings in (('Stages', {name: t for name, t in self.stages.items()}),
+                               ('Slowest checks', {f"{agent}: {name}": t for (agent, name), t
+                                                   in self.checks.items()})):
+            if timings:
+                lines.extend(['', f"{title}:"])
+                ranked = sorted(timings.items(), key=lambda item: -item[1].wall)[:top * 2]
+                for name, timing in ranked:
+                    lines.append(f"  {name:<40} {timing.wall * 1000:>9.1f} ms wall "
+                                 f"{timing.cpu * 1000:>9.1f} ms cpu  x{timing.calls}")
+
+        functions = self.hot_functions()
+        if functions:
+            lines.extend(['', 'Hottest functions (own time):', functions])
+        return '\n'.join(lines)
+
+    def write(self, directory: str) -> Path:
+        """Write run.pstats, pages.csv, stages.csv and report.txt into `directory`."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.stop()
+        if self._profile.getstats():
+            self._profile.dump_stats(str(directory / 'run.pstats'))
+
+        with open(directory / 'pages.csv', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['page', 'wall_s', 'cpu_s',
+                             *[f"{stage}_{kind}" for stage in PAGE_STAGES
+                               for kind in ('wall_s', 'cpu_s')],
+                             'words', 'chars', 'left_lines', 'right_lines', 'codes'])
+            for page in sorted(self.pages.values(), key=lambda p: p.page):
+                stage_columns = []
+                for stage in PAGE_STAGES:
+                    timing = page.stages.get(stage, Timing())
+                    stage_columns.extend([f"{timing.wall:.6f}", f"{timing.cpu:.6f}"])
+                writer.writerow([page.page, f"{page.wall:.6f}", f"{page.cpu:.6f}", *stage_columns,
+                                 page.words, page.chars, page.left_lines, page.right_lines,
+                                 page.codes])
+
+        with open(directory / 'stages.csv', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['kind', 'agent', 'name', 'calls', 'wall_s', 'cpu_s'])
+            for name, timing in self.stages.items():
+                writer.writerow(['stage', '', name, timing.calls, f"{timing.wall:.6f}",
+                                 f"{timing.cpu:.6f}"])
+            for (agent, name), timing in self.checks.items():
+                writer.writerow(['check', agent, name, timing.calls, f"{timing.wall:.6f}",
+                                 f"{timing.cpu:.6f}"])
+
+        (directory / 'report.txt').write_text(self.format_report() + '\n', encoding='utf-8')
+        return directory
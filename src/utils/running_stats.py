@@ -0,0 +1,130 @@
+"""
+Running Statistics - One-pass, mergeable accumulators.
+
+RunningStats implements Welford's online algorithm with Chan et al.'s
+parallel merge, so statistics computed over separate chunks (or worker
+processes) combine exactly into the statistics of the whole dataset. An
+accumulator keeps only its summary (count, mean, M2, min, max); callers that
+group or sort the values first still hold those values while they do.
+
+Reservoir keeps a uniform random sample of fixed size from a stream of
+unknown length (Vitter's Algorithm R).
+"""
+
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+
+@dataclass
+class RunningStats:
+    """Count, mean, variance, min and max of a stream of numbers."""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0  # Sum of squared deviations from the mean
+    minimum: float = math.inf
+    maximum: float = -math.inf
+
+    def push(self, value: float) -> None:
+        """Add a single value (Welford update)."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def push_many(self, values: Iterable[float]) -> None:
+        """Add a batch of values by merging their summary statistics."""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        mean = float(values.mean())
+        self.merge(RunningStats(
+            count=len(values),
+            mean=mean,
+            m2=float(((values - mean) ** 2).sum()),
+            minimum=float(values.min()),
+            maximum=float(values.max())
+        ))
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        """Fold another accumulator into this one (Chan et al.); returns self."""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return self
+
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def variance(self) -> float:
+        """Population variance (0.0 for fewer than two values)."""
+        return self.m2 / self.count if self.count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def zscore(self, value: float) -> float:
+        """Standard score of `value`; 0.0 when the spread is zero."""
+        stddev = self.stddev
+        return (value - self.mean) / stddev if stddev > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        """Summary for reports."""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'stddev': self.stddev,
+            'min': self.minimum if self.count else None,
+            'max': self.maximum if self.count else None
+        }
+
+
+def merge_grouped_stats(target: Dict[str, RunningStats],
+                        other: Dict[str, RunningStats]) -> Dict[str, RunningStats]:
+    """Merge per-group accumulators (e.g. per division) from another chunk into `target`."""
+    for group, stats in other.items():
+        target.setdefault(group, RunningStats()).merge(stats)
+    return target
+
+
+@dataclass
+class Reservoir:
+    """Uniform random sample of at most `capacity` items from a stream."""
+    capacity: int
+    items: List[Any] = field(default_factory=list)
+    seen: int = 0
+
+    def reserve(self, rng: random.Random) -> int:
+        """
+        Count the next stream item and pick its slot (Algorithm R).
+
+        Returns the index in `items` the item should be stored at, or -1 if
+        it is not sampled, so callers only build items that are kept.
+        """
+        self.seen += 1
+        if len(self.items) < self.capacity:
+            self.items.append(None)
+            return len(self.items) - 1
+        slot = rng.randrange(self.seen)
+        return slot if slot < self.capacity else -1
+
+    def push(self, item: Any, rng: random.Random) -> None:
+        """Offer an item to the sample."""
+        slot = self.reserve(rng)
+        if slot >= 0:
+            self.items[slot] = item
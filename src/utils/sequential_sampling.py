@@ -0,0 +1,156 @@
+"""
+Sequential Sampling - Wald's sequential probability ratio test (SPRT) for
+spot-check error rates, a stratified sampling order to feed it, and Wilson
+intervals for rates estimated from a sample.
+
+Instead of checking a fixed number of samples, QC checks samples in batches
+and after each batch asks whether the evidence already decides between
+
+    H0: error rate <= p0  (acceptable - clean document)
+    H1: error rate >= p1  (unacceptable - p1 = 1 - confidence_threshold)
+
+with error probabilities alpha (wrongly rejecting a clean document) and beta
+(wrongly accepting a bad one). Clean documents stop after a few dozen clean
+checks; every mismatch moves the test towards rejection and keeps it
+sampling until the evidence is conclusive either way.
+"""
+
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+DECISION_ACCEPT = 'accept'        # Error rate below tolerance
+DECISION_REJECT = 'reject'        # Error rate above tolerance
+DECISION_UNDECIDED = 'undecided'  # Sample budget ran out first
+
+
+@dataclass
+class SequentialProbabilityRatioTest:
+    """Wald SPRT for the error rate of a Bernoulli sequence."""
+    p0: float      # Error rate considered acceptable (H0)
+    p1: float      # Error rate considered unacceptable (H1), p1 > p0
+    alpha: float = 0.05
+    beta: float = 0.05
+    samples: int = 0
+    errors: int = 0
+    log_likelihood_ratio: float = 0.0
+    _error_step: float = field(init=False, repr=False)
+    _clean_step: float = field(init=False, repr=False)
+
+    def __post_init__(self):
+        if not 0 < self.p0 < self.p1 < 1:
+            raise ValueError(f"SPRT requires 0 < p0 < p1 < 1 (got p0={self.p0}, p1={self.p1})")
+        self._error_step = math.log(self.p1 / self.p0)
+        self._clean_step = math.log((1 - self.p1) / (1 - self.p0))
+
+    @property
+    def upper_bound(self) -> float:
+        """Reject H0 (error rate too high) at or above this log-likelihood ratio."""
+        return math.log((1 - self.beta) / self.alpha)
+
+    @property
+    def lower_bound(self) -> float:
+        """Accept H0 (error rate acceptable) at or below this log-likelihood ratio."""
+        return math.log(self.beta / (1 - self.alpha))
+
+    def update(self, error: bool) -> str:
+        """Record one checked sample; returns the current decision."""
+        self.samples += 1
+        if error:
+            self.errors += 1
+            self.log_likelihood_ratio += self._error_step
+        else:
+            self.log_likelihood_ratio += self._clean_step
+        return self.decision
+
+    @property
+    def decision(self) -> str:
+        if self.log_likelihood_ratio >= self.upper_bound:
+            return DECISION_REJECT
+        if self.log_likelihood_ratio <= self.lower_bound:
+            return DECISION_ACCEPT
+        return DECISION_UNDECIDED
+
+    @property
+    def clean_samples_to_accept(self) -> int:
+        """Consecutive clean samples needed to accept from the current state."""
+        remaining = self.lower_bound - self.log_likelihood_ratio
+        return max(0, math.ceil(remaining / self._clean_step))
+
+    def to_dict(self) -> Dict[str, float]:
+        """Summary for reports."""
+        return {
+            'decision': self.decision,
+            'samples': self.samples,
+            'errors': self.errors,
+            'error_rate': self.errors / self.samples if self.samples else 0.0,
+            'acceptable_error_rate': self.p0,
+            'unacceptable_error_rate': self.p1,
+            'log_likelihood_ratio': self.log_likelihood_ratio,
+            'lower_bound': self.lower_bound,
+            'upper_bound': self.upper_bound
+        }
+
+
+def stratified_sample_order(strata: List[str], pages: List[int],
+                            rng: random.Random) -> List[int]:
+    """
+    Random order of row indices whose every prefix is a stratified sample.
+
+    Rows are grouped by stratum (e.g. division); within a stratum, pages are
+    visited in random order, one row per page, before any page is revisited.
+    Each row gets the sort key (rank within its stratum + jitter) / stratum
+    size, so any prefix of the result holds each stratum in proportion to
+    its size and spreads its samples over as many pages as possible.
+
+    Args:
+        strata: Stratum of each row
+        pages: Source page of each row (aligned with `strata`)
+        rng: Random number generator (seed it for reproducible samples)
+
+    Returns:
+        Row indices in sampling order
+    """
+    by_stratum: Dict[str, Dict[int, List[int]]] = {}
+    for row, (stratum, page) in enumerate(zip(strata, pages)):
+        by_stratum.setdefault(stratum, {}).setdefault(page, []).append(row)
+
+    keyed = []
+    for stratum_pages in by_stratum.values():
+        page_rows = list(stratum_pages.values())
+        rng.shuffle(page_rows)
+        for rows in page_rows:
+            rng.shuffle(rows)
+
+        # Round-robin over pages: first row of every page, then second rows, ...
+        total = sum(len(rows) for rows in page_rows)
+        ordered = []
+        depth = 0
+        while len(ordered) < total:
+            ordered.extend(rows[depth] for rows in page_rows if depth < len(rows))
+            depth += 1
+
+        size = len(ordered)
+        for rank, row in enumerate(ordered):
+            keyed.append(((rank + rng.random()) / size, row))
+
+    keyed.sort()
+    return [row for _, row in keyed]
+
+
+def wilson_interval(successes: int, trials: int, z: float = 1.96) -> Tuple[float, float]:
+    """
+    Wilson score interval for a binomial proportion (95% for z=1.96).
+
+    Unlike the normal approximation it stays inside [0, 1] and is usable
+    when no (or every) sampled row is flagged.
+    """
+    if trials <= 0:
+        return 0.0, 1.0
+    rate = successes / trials
+    z2 = z * z
+    denominator = 1 + z2 / trials
+    centre = (rate + z2 / (2 * trials)) / denominator
+    half_width = z * math.sqrt(rate * (1 - rate) / trials + z2 / (4 * trials * trials)) / denominator
+    return max(0.0, centre - half_width), min(1.0, centre + half_width)
@@ -0,0 +1,244 @@
+"""
+Source Spot Check - Re-extract sampled entries from the source PDF.
+
+QC samples parsed entries and compares them with the text on their source
+page. Pages are read with PyMuPDF rather than pdfplumber, and columns are
+split at the middle of the page rather than at the parser's fixed X
+position, so a spot check does not simply repeat the parser's mistakes.
+
+Extracted pages are held in an LRU cache, so several samples on one page
+cost a single page load, and uncached pages are loaded in a small process
+pool (each worker opens its own document handle).
+"""
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from src.utils.reference_catalog import format_code_key
+from src.utils.title_matcher import title_trigrams, dice_similarity, same_title
+
+
+CODE_LINE_PATTERN = re.compile(r'^(\d{2})\s+(\d{2})\s+(\d{2})\s+(.+)$')
+HEADER_PATTERN = re.compile(r'^DIVISION\s+\d{2}|\s(Group|Subgroup)$')
+FOOTER_PATTERN = re.compile(r'CSI grants to .+ a non-exclusive')
+
+# Parallel loading only pays off once there are enough pages to amortize
+# worker start-up (importing PyMuPDF and opening the document)
+PARALLEL_MIN_PAGES = 64
+
+# Spot-check outcomes
+STATUS_MATCH = 'match'
+STATUS_TITLE_MISMATCH = 'title_mismatch'
+STATUS_CODE_MISMATCH = 'code_mismatch'   # Title found on the page under another code
+STATUS_NOT_FOUND = 'not_found'           # Neither code nor title found on the page
+STATUS_PAGE_MISSING = 'page_missing'     # Page number outside the document
+
+
+@dataclass
+class SpotCheckResult:
+    """Outcome of re-extracting one sampled entry."""
+    row: int                          # 0-based index into the parsed codes
+    page_number: int                  # 1-based source page
+    code_key: int
+    status: str
+    parsed_title: str
+    source_title: Optional[str] = None
+    source_code_key: Optional[int] = None
+    similarity: float = 0.0
+
+    @property
+    def code(self) -> str:
+        return format_code_key(self.code_key)
+
+    @property
+    def source_code(self) -> Optional[str]:
+        return format_code_key(self.source_code_key) if self.source_code_key is not None else None
+
+
+def _is_noise(text: str) -> bool:
+    """Footer text or a bare page number."""
+    return bool(FOOTER_PATTERN.search(text)) or (text.isdigit() and len(text) <= 3)
+
+
+def extract_page_entries(page) -> Dict[int, str]:
+    """
+    Extract code entries from a PyMuPDF page.
+
+    Text lines are taken from MuPDF's own line segmentation, assigned to the
+    left or right column by the middle of the page, and read top to bottom.
+    Lines without a code continue the previous entry while they follow it
+    closely; headers, footers and large vertical gaps end it.
+
+    Returns:
+        Packed code key -> title
+    """
+    lines: Dict[Tuple[int, int], List[tuple]] = {}
+    for word in page.get_text("words"):
+        lines.setdefault((word[5], word[6]), []).append(word)
+
+    middle = page.rect.width / 2
+    columns: Tuple[List[tuple], List[tuple]] = ([], [])
+    for words in lines.values():
+        words.sort(key=lambda w: w[0])
+        x0 = words[0][0]
+        top = min(w[1] for w in words)
+        bottom = max(w[3] for w in words)
+        text = ' '.join(w[4] for w in words).strip()
+        if text:
+            columns[0 if x0 < middle else 1].append((top, bottom, text))
+
+    entries: Dict[int, str] = {}
+    for column in columns:
+        column.sort()
+        current_key, previous_bottom, line_height = None, 0.0, 0.0
+        for top, bottom, text in column:
+            match = CODE_LINE_PATTERN.match(text)
+            if match:
+                current_key = int(match.group(1) + match.group(2) + match.group(3))
+                entries.setdefault(current_key, match.group(4).strip())
+                previous_bottom, line_height = bottom, bottom - top
+            elif (current_key is not None and not HEADER_PATTERN.search(text)
+                    and not _is_noise(text) and top - previous_bottom < line_height):
+                entries[current_key] = f"{entries[current_key]} {text}"
+                previous_bottom = bottom
+            else:
+                current_key = None
+
+    return entries
+
+
+def _extract_pages(pdf_path: str, page_numbers: List[int]) -> Dict[int, Optional[Dict[int, str]]]:
+    """Worker: extract entries of several pages with one document handle (None if out of range)."""
+    import fitz
+
+    extracted = {}
+    with fitz.open(pdf_path) as document:
+        for page_number in page_numbers:
+            if 1 <= page_number <= document.page_count:
+                extracted[page_number] = extract_page_entries(document[page_number - 1])
+            else:
+                extracted[page_number] = None
+    return extracted
+
+
+def title_similarity(a: str, b: str) -> float:
+    """Similarity of two titles (1.0 if equal ignoring case and spacing)."""
+    if same_title(a, b):
+        return 1.0
+    return dice_similarity(title_trigrams(a.lower()), title_trigrams(b.lower()))
+
+
+class SourceSpotChecker:
+    """Compares parsed entries with the text re-extracted from their source page."""
+
+    def __init__(self, pdf_path: str, workers: int = 4,
+                 min_similarity: float = 0.9, cache_pages: int = 256):
+        """
+        Initialize the spot checker.
+
+        Args:
+            pdf_path: Source PDF the entries were parsed from
+            workers: Maximum number of worker processes for page loading
+            min_similarity: Minimum title similarity counted as a match
+            cache_pages: Number of extracted pages kept in memory
+        """
+        self.pdf_path = pdf_path
+        self.workers = max(1, workers)
+        self.min_similarity = min_similarity
+        self.cache_pages = cache_pages
+        self._cache: 'OrderedDict[int, Optional[Dict[int, str]]]' = OrderedDict()
+        self.pages_loaded = 0
+        self.cache_hits = 0  # Samples served without loading a page
+
+    def load_pages(self, page_numbers: Iterable[int]) -> None:
+        """Extract all pages not yet cached, in parallel when there are enough of them."""
+        missing = sorted(set(page_numbers) - set(self._cache))
+        if not missing:
+            return
+
+        workers = min(self.workers, len(missing))
+        if workers <= 1 or len(missing) < PARALLEL_MIN_PAGES:
+            self._store(_extract_pages(self.pdf_path, missing))
+        else:
+            # Contiguous page ranges keep each worker's reads local
+            chunk_size = -(-len(missing) // workers)
+            chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+            from concurrent.futures import ProcessPoolExecutor  # Slow to import; rarely needed
+            with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+                for extracted in executor.map(_extract_pages,
+                                              [self.pdf_path] * len(chunks), chunks):
+                    self._store(extracted)
+
+        self.pages_loaded += len(missing)
+        logger.debug(f"Loaded {len(missing)} source pages with {workers} worker(s)")
+
+    def _store(self, extracted: Dict[int, Optional[Dict[int, str]]]) -> None:
+        for page_number, entries in extracted.items():
+            self._cache[page_number] = entries
+            self._cache.move_to_end(page_number)
+        while len(self._cache) > self.cache_pages:
+            self._cache.popitem(last=False)
+
+    def page_entries(self, page_number: int) -> Optional[Dict[int, str]]:
+        """Extracted entries of a page (loaded on demand); None if the page does not exist."""
+        if page_number in self._cache:
+            self._cache.move_to_end(page_number)
+        else:
+            self.load_pages([page_number])
+        return self._cache[page_number]
+
+    def check(self, samples: List[Tuple[int, int, int, str]]) -> List[SpotCheckResult]:
+        """
+        Spot-check sampled entries.
+
+        Args:
+            samples: (row, page_number, code_key, parsed_title) per sampled entry
+
+        Returns:
+            One SpotCheckResult per sample, in input order
+        """
+        # Load every page the samples need up front so uncached pages load in parallel;
+        # batches larger than the cache are loaded as they are reached
+        pages = {page_number for _, page_number, _, _ in samples}
+        self.cache_hits += len(samples) - len(pages - set(self._cache))
+        if len(pages) <= self.cache_pages:
+            self.load_pages(pages)
+
+        return [self._check_one(*sample) for sample in samples]
+
+    def _check_one(self, row: int, page_number: int, code_key: int,
+                   parsed_title: str) -> SpotCheckResult:
+        result = SpotCheckResult(row=row, page_number=page_number, code_key=code_key,
+                                 status=STATUS_NOT_FOUND, parsed_title=parsed_title)
+
+        entries = self.page_entries(page_number)
+        if entries is None:
+            result.status = STATUS_PAGE_MISSING
+            return result
+
+        source_title = entries.get(code_key)
+        if source_title is not None:
+            result.source_title = source_title
+            result.source_code_key = code_key
+            result.similarity = title_similarity(parsed_title, source_title)
+            result.status = (STATUS_MATCH if result.similarity >= self.min_similarity
+                             else STATUS_TITLE_MISMATCH)
+            return result
+
+        # Code not on the page: was the title parsed under the wrong code?
+        best_key, best_score = None, 0.0
+        for key, title in entries.items():
+            score = title_similarity(parsed_title, title)
+            if score > best_score:
+                best_key, best_score = key, score
+        if best_key is not None and best_score >= self.min_similarity:
+            result.status = STATUS_CODE_MISMATCH
+            result.source_code_key = best_key
+            result.source_title = entries[best_key]
+            result.similarity = best_score
+
+        return result
@@ -0,0 +1,161 @@
+"""
+Synthetic Codes - Parsed-code datasets of any size with injected defects.
+
+Rows look like CSIParser output: MasterFormat divisions in order, 4-digit
+codes ("10 00", "11 13") in ascending order, and titles that lead with a word
+of their division's name (so the Auditor's context check sees realistic
+titles). Each row gets at most one defect, drawn at the configured rates:
+
+    format       malformed code ("1000", "10-00", "10 0", "1O 00")
+    duplicate    repeat of the previous row's division, code and title
+    truncation   title cut mid-word and ending in an ellipsis
+    sequence     row swapped with one 20-50 rows later
+    encoding     replacement character (U+FFFD) in the title
+
+Up to 350,000 rows fit the known divisions (10,000 codes each); larger
+datasets also use the unassigned divisions up to 99, for at most 1,000,000.
+"""
+
+import csv
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.synthetic_masterformat import DIVISIONS, TITLE_WORDS, group_of
+
+
+DEFECT_TYPES = ('format', 'duplicate', 'truncation', 'sequence', 'encoding')
+CODES_PER_DIVISION = 10_000
+MAX_ROWS = 100 * CODES_PER_DIVISION
+CSV_COLUMNS = ["Division", "Code", "Title", "Group", "Subgroup", "Page", "Defect"]
+
+
+@dataclass
+class SyntheticCodes:
+    """A generated dataset and where its defects are."""
+    codes: List[dict]
+    defects: Dict[int, str] = field(default_factory=dict)  # First row index -> defect type
+    # Rows a check may flag for each defect (a sequence break is reported on
+    # the row after the one that moved)
+    defect_rows: Dict[int, Tuple[int, ...]] = field(default_factory=dict)
+
+    def counts(self) -> Dict[str, int]:
+        counts = {defect: 0 for defect in DEFECT_TYPES}
+        for defect in self.defects.values():
+            counts[defect] += 1
+        return counts
+
+
+def _divisions(rows: int) -> List[Tuple[str, str]]:
+    """Divisions to spread `rows` over: the known ones, plus unassigned numbers for big datasets."""
+    if rows <= len(DIVISIONS) * CODES_PER_DIVISION:
+        return list(DIVISIONS)
+    known = dict(DIVISIONS)
+    return [(f"{number:02d}", known.get(f"{number:02d}", 'Reserved'))
+            for number in range(100)]
+
+
+def _corrupt_code(rng: random.Random, code: str) -> str:
+    corruption = rng.randrange(4)
+    if corruption == 0:
+        return code.replace(' ', '')
+    if corruption == 1:
+        return code.replace(' ', '-')
+    if corruption == 2:
+        return code[:-1]
+    return code.replace('0', 'O', 1) if '0' in code else code[:-1]
+
+
+def _truncate(rng: random.Random, title: str) -> str:
+    cut = rng.randint(max(3, len(title) // 3), max(3, len(title) - 2))
+    return title[:cut].rstrip() + rng.choice(('...', '…'))
+
+
+def generate_codes(rows: int, seed: int = 0,
+                   defect_rates: Optional[Dict[str, float]] = None) -> SyntheticCodes:
+    """
+    Generate `rows` codes with each defect type injected at its rate (share of rows).
+
+    The same seed and rates always give the same dataset.
+    """
+    if rows > MAX_ROWS:
+        raise ValueError(f"At most {MAX_ROWS:,} distinct codes can be generated, got {rows:,}")
+    rates = dict(defect_rates or {})
+    unknown = set(rates) - set(DEFECT_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown defect types {sorted(unknown)} (expected some of {DEFECT_TYPES})")
+    if sum(rates.values()) > 0.5:
+        raise ValueError("Defect rates must add up to at most 0.5")
+
+    rng = random.Random(seed)
+    divisions = _divisions(rows)
+    keys = sorted(rng.sample(range(len(divisions) * CODES_PER_DIVISION), rows))
+
+    codes = []
+    for key in keys:
+        division, name = divisions[key // CODES_PER_DIVISION]
+        level2, level3 = divmod(key % CODES_PER_DIVISION, 100)
+        group, subgroup = group_of(division)
+        lead = name.split()[0].rstrip(',')
+        words = [rng.choice(TITLE_WORDS) for _ in range(rng.randint(1, 5))]
+        codes.append({'division': division, 'code': f"{level2:02d} {level3:02d}",
+                      'title': ' '.join([lead, *words]), 'group': group, 'subgroup': subgroup,
+                      'page_number': len(codes) // 47 + 1})  # ~47 codes per page, as in the excerpt
+
+    dataset = SyntheticCodes(codes)
+    thresholds = []
+    total = 0.0
+    for defect in DEFECT_TYPES:
+        total += rates.get(defect, 0.0)
+        thresholds.append((total, defect))
+
+    taken = set()
+    for row in range(rows):
+        draw = rng.random()
+        defect = next((name for limit, name in thresholds if draw < limit), None)
+        if defect is None or row in taken:
+            continue
+        entry = codes[row]
+        if defect == 'format':
+            entry['code'] = _corrupt_code(rng, entry['code'])
+            flagged = (row,)
+        elif defect == 'duplicate':
+            if row == 0 or row - 1 in taken:
+                continue
+            previous = codes[row - 1]
+            entry.update(division=previous['division'], code=previous['code'],
+                         title=previous['title'], group=previous['group'],
+                         subgroup=previous['subgroup'])
+            flagged = (row,)
+        elif defect == 'truncation':
+            entry['title'] = _truncate(rng, entry['title'])
+            flagged = (row,)
+        elif defect == 'sequence':
+            other = row + rng.randint(20, 50)
+            if other + 1 >= rows or any(r in taken for r in (row + 1, other, other + 1)):
+                continue
+            codes[row], codes[other] = codes[other], codes[row]
+            for moved in (row, other):
+                codes[moved]['page_number'] = moved // 47 + 1
+            flagged = (row, row + 1, other)
+            taken.update((row + 1, other, other + 1))
+        else:
+            position = rng.randrange(len(entry['title']))
+            entry['title'] = entry['title'][:position] + '�' + entry['title'][position + 1:]
+            flagged = (row,)
+        taken.add(row)
+        dataset.defects[row] = defect
+        dataset.defect_rows[row] = flagged
+    return dataset
+
+
+def write_codes(dataset: SyntheticCodes, path: str) -> None:
+    """Write the dataset as CSV in parse_csi.py's layout, plus each row's injected defect."""
+    defect_of = dataset.defects
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for row, entry in enumerate(dataset.codes):
+            writer.writerow([entry['division'], entry['code'], entry['title'],
+                             entry['group'] or '', entry['subgroup'] or '',
+                             entry['page_number'], defect_of.get(row, '')])
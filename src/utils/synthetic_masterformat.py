@@ -0,0 +1,241 @@
+"""
+Synthetic MasterFormat - Two-column MasterFormat-style PDFs of any length.
+
+The only real input is a 23-page excerpt; this writes documents with the
+same structure at any page count, for scaling benchmarks and parser tests:
+
+    DIVISION 01—General Requirements        (bold division headers)
+    Specifications Group                    (group and subgroup headers)
+    General Requirements Subgroup
+    01 10 00 Summary                        (level 2 and 3 codes)
+    01 11 13 Work Covered by Contract       (long titles wrap onto indented
+             Documents and Related ...       continuation lines)
+    CSI grants to licensee a non-exclusive license ... 17   (footer)
+
+Text is written with PyMuPDF (already a dependency) using an embedded
+Helvetica, so the em dash in division headers survives extraction. The
+ground truth - the codes in reading order with their full titles, group,
+subgroup and page - is returned and can be written as CSV in the same
+layout as parse_csi.py's output.
+"""
+
+import csv
+import random
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792   # US Letter
+COLUMN_X = (50.0, 330.0)             # Left/right column origins (CSIParser splits at 320)
+COLUMN_WIDTH = 250.0
+CONTINUATION_INDENT = 38.0           # Wrapped title lines start under the title
+TOP, BOTTOM = 60.0, 735.0            # Baselines of the first and last body line
+FOOTER_Y = 765.0
+FONT_SIZE, HEADER_FONT_SIZE = 9.0, 10.0
+LINE_HEIGHT, HEADER_LINE_HEIGHT = 11.0, 15.0
+
+FOOTER = "CSI grants to licensee a non-exclusive license for internal use"
+TRUTH_COLUMNS = ["Division", "Code", "Title", "Group", "Subgroup", "Page"]
+
+DIVISIONS = [
+    ('00', 'Procurement and Contracting Requirements'), ('01', 'General Requirements'),
+    ('02', 'Existing Conditions'), ('03', 'Concrete'), ('04', 'Masonry'), ('05', 'Metals'),
+    ('06', 'Wood, Plastics, and Composites'), ('07', 'Thermal and Moisture Protection'),
+    ('08', 'Openings'), ('09', 'Finishes'), ('10', 'Specialties'), ('11', 'Equipment'),
+    ('12', 'Furnishings'), ('13', 'Special Construction'), ('14', 'Conveying Equipment'),
+    ('21', 'Fire Suppression'), ('22', 'Plumbing'),
+    ('23', 'Heating, Ventilating, and Air Conditioning'), ('25', 'Integrated Automation'),
+    ('26', 'Electrical'), ('27', 'Communications'), ('28', 'Electronic Safety and Security'),
+    ('31', 'Earthwork'), ('32', 'Exterior Improvements'), ('33', 'Utilities'),
+    ('34', 'Transportation'), ('35', 'Waterway and Marine Construction'),
+    ('40', 'Process Interconnections'),
+    ('41', 'Material Processing and Handling Equipment'),
+    ('42', 'Process Heating, Cooling, and Drying Equipment'),
+    ('43', 'Process Gas and Liquid Handling, Purification, and Storage Equipment'),
+    ('44', 'Pollution and Waste Control Equipment'),
+    ('45', 'Industry-Specific Manufacturing Equipment'), ('46', 'Water and Wastewater Equipment'),
+    ('48', 'Electrical Power Generation'),
+]
+
+TITLE_WORDS = (
+    'Access Acoustical Adhesives Aggregates Air Anchors Assemblies Barriers Bearings Bonding '
+    'Cabinets Ceilings Coatings Columns Commissioning Components Concrete Connectors Control '
+    'Coordination Decking Demolition Doors Drainage Ducts Equipment Expansion Fabrications '
+    'Facility Finishes Fire Fixtures Flooring Framing Glazing Grouting Hardware Insulation '
+    'Joints Lighting Masonry Membranes Metal Mortar Panels Piping Plaster Protection Pumps '
+    'Railings Reinforcing Roofing Sealants Security Sheathing Signage Site Steel Storage '
+    'Structural Supports Systems Testing Thermal Tile Trim Underlayment Units Valves Veneer '
+    'Wall Waterproofing Windows Wiring Wood'
+).split()
+TITLE_JOINERS = ('and', 'for', 'of', 'with')
+
+
+def group_of(division: str) -> Tuple[str, Optional[str]]:
+    """(group, subgroup) names of a division, as MasterFormat assigns them."""
+    number = int(division)
+    if number == 0:
+        return 'Procurement and Contracting Requirements', None
+    if number == 1:
+        return 'Specifications', 'General Requirements'
+    if number < 20:
+        return 'Specifications', 'Facility Construction'
+    if number < 30:
+        return 'Specifications', 'Facility Services'
+    if number < 40:
+        return 'Specifications', 'Site and Infrastructure'
+    return 'Specifications', 'Process Equipment'
+
+
+@dataclass
+class _Block:
+    """Lines that must stay together in one column."""
+    kind: str                    # division, group, subgroup or code
+    lines: List[str]
+    code: Optional[dict] = None  # Ground-truth row of a code block
+
+
+class SyntheticMasterFormat:
+    """Deterministic generator of MasterFormat-style pages (same seed, same document)."""
+
+    def __init__(self, seed: int = 0, long_title_rate: float = 0.15):
+        self.seed = seed
+        self.long_title_rate = long_title_rate
+        self._rng = random.Random(seed)
+        import fitz
+
+        self._fitz = fitz
+        self._font = fitz.Font('helv')
+        self._bold = fitz.Font('hebo')
+        self._advances = {}  # id(font) -> {character: width at size 1}
+
+    def _width(self, text: str, font, fontsize: float) -> float:
+        # Font.text_length crosses into MuPDF per character; titles reuse few characters
+        advances = self._advances.setdefault(id(font), {})
+        width = 0.0
+        for char in text:
+            advance = advances.get(char)
+            if advance is None:
+                advance = advances[char] = font.text_length(char, 1)
+            width += advance
+        return width * fontsize
+
+    def _title(self) -> str:
+        rng = self._rng
+        if rng.random() < self.long_title_rate:
+            count = rng.randint(8, 16)   # Wraps onto one or two more lines
+        else:
+            count = rng.randint(1, 4)
+        words = [rng.choice(TITLE_WORDS) for _ in range(count)]
+        for i in range(1, len(words) - 1, 3):
+            words[i] = rng.choice(TITLE_JOINERS)
+        return ' '.join(words)
+
+    def _wrap(self, code: str, title: str) -> List[str]:
+        """The code line and its continuation lines, each fitting its column width."""
+        lines, current, width = [], code, COLUMN_WIDTH
+        for word in title.split():
+            candidate = f"{current} {word}"
+            if self._width(candidate, self._font, FONT_SIZE) > width and current != code:
+                lines.append(current)
+                current, width = word, COLUMN_WIDTH - CONTINUATION_INDENT
+            else:
+                current = candidate
+        lines.append(current)
+        return lines
+
+    def _blocks(self) -> Iterator[_Block]:
+        """Headers and code entries in reading order; divisions repeat once exhausted."""
+        rng = self._rng
+        group = subgroup = None
+        while True:
+            for division, name in DIVISIONS:
+                division_group, division_subgroup = group_of(division)
+                yield _Block('division', [f"DIVISION {division}—{name}"])
+                if division_group != group:
+                    group, subgroup = division_group, None
+                    yield _Block('group', [f"{group} Group"])
+                if division_subgroup is not None and division_subgroup != subgroup:
+                    subgroup = division_subgroup
+                    yield _Block('subgroup', [f"{subgroup} Subgroup"])
+
+                level2 = 0
+                for _ in range(rng.randint(4, 30)):
+                    level2 += rng.randint(1, 3)
+                    if level2 > 99:
+                        break
+                    level3 = 0
+                    codes = [f"{level2:02d} 00"]
+                    for _ in range(rng.randint(0, 20)):
+                        level3 += rng.randint(1, 6)
+                        if level3 > 99:
+                            break
+                        codes.append(f"{level2:02d} {level3:02d}")
+                    for code in codes:
+                        title = self._title()
+                        row = {'division': division, 'code': code, 'title': title,
+                               'group': group, 'subgroup': subgroup}
+                        yield _Block('code', self._wrap(f"{division} {code}", title), row)
+
+    def write(self, pdf_path: str, pages: int) -> List[dict]:
+        """Write a `pages`-page PDF; returns the ground-truth codes in reading order."""
+        fitz = self._fitz
+        document = fitz.open()
+        truth: List[dict] = []
+        blocks = self._blocks()
+        pending = next(blocks)
+
+        for page_number in range(1, pages + 1):
+            page = document.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            writer = fitz.TextWriter(page.rect)
+            for x in COLUMN_X:
+                y = TOP
+                while True:
+                    header = pending.kind != 'code'
+                    height = HEADER_LINE_HEIGHT if header else LINE_HEIGHT
+                    if y + height * (len(pending.lines) - 1) > BOTTOM:
+                        break
+                    for i, line in enumerate(pending.lines):
+                        if header:
+                            # Long division names shrink to stay inside their column
+                            width = self._width(line, self._bold, HEADER_FONT_SIZE)
+                            writer.append((x, y), line, font=self._bold,
+                                          fontsize=HEADER_FONT_SIZE * min(1.0, COLUMN_WIDTH / width))
+                        else:
+                            writer.append((x + (CONTINUATION_INDENT if i else 0), y), line,
+                                          font=self._font, fontsize=FONT_SIZE)
+                        y += height
+                    if pending.code is not None:
+                        truth.append({**pending.code, 'page_number': page_number})
+                    pending = next(blocks)
+            writer.append((COLUMN_X[0], FOOTER_Y), f"{FOOTER} {page_number}",
+                          font=self._font, fontsize=7)
+            writer.write_text(page)
+
+        document.save(pdf_path, garbage=3, deflate=True)
+        document.close()
+        return truth
+
+
+def generate(pdf_path: str, pages: int, seed: int = 0, truth_path: str = None) -> List[dict]:
+    """Write a synthetic MasterFormat PDF (and its ground truth CSV); returns the ground truth."""
+    truth = SyntheticMasterFormat(seed=seed).write(pdf_path, pages)
+    if truth_path:
+        write_truth(truth, truth_path)
+    return truth
+
+
+def write_truth(truth: List[dict], path: str) -> None:
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(TRUTH_COLUMNS)
+        for row in truth:
+            writer.writerow([row['division'], row['code'], row['title'], row['group'] or '',
+                             row['subgroup'] or '', row['page_number']])
+
+
+def read_truth(path: str) -> List[dict]:
+    with open(path, newline='', encoding='utf-8') as f:
+        return [{'division': row['Division'], 'code': row['Code'], 'title': row['Title'],
+                 'group': row['Group'] or None, 'subgroup': row['Subgroup'] or None,
+                 'page_number': int(row['Page'])}
+                for row in csv.DictReader(f)]
@@ -0,0 +1,282 @@
+"""
+Title Matcher - Trigram-indexed fuzzy matching of parsed titles against a
+reference catalog.
+
+Each parsed title is compared with the catalog title for the same code. When
+the code itself is not in the catalog, the nearest catalog codes are tried and
+then a trigram inverted index over all catalog titles, with candidate pruning
+so that only titles sharing enough trigrams are ever scored. Similarity is the
+Dice coefficient over padded character trigrams (0.0 - 1.0).
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from src.agents.features import FeatureFrame
+from src.utils.reference_catalog import ReferenceCatalog
+
+
+NON_ALNUM_PATTERN = re.compile(r'[^0-9a-z]+')
+
+# Rounding margin of the shared-trigram threshold in TrigramIndex.best_match
+BOUND_SLACK = 1e-9
+
+# Match methods recorded per row
+METHOD_NONE = 0       # No usable catalog title found
+METHOD_EXACT = 1      # Compared with the title of the same code
+METHOD_NEIGHBOR = 2   # Best of the nearest catalog codes
+METHOD_INDEX = 3      # Best candidate from the trigram index
+
+METHOD_NAMES = {
+    METHOD_NONE: 'none',
+    METHOD_EXACT: 'exact',
+    METHOD_NEIGHBOR: 'neighbor',
+    METHOD_INDEX: 'index',
+}
+
+
+def title_trigrams(title_lower: str) -> FrozenSet[str]:
+    """Padded character trigrams of a lowercased title."""
+    normalized = NON_ALNUM_PATTERN.sub(' ', title_lower).strip()
+    if not normalized:
+        return frozenset()
+    padded = f"  {normalized} "
+    return frozenset([padded[i:i + 3] for i in range(len(padded) - 2)])
+
+
+def dice_similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Dice coefficient between two trigram sets."""
+    if not a or not b:
+        return 0.0
+    return 2.0 * len(a & b) / (len(a) + len(b))
+
+
+def same_title(a: str, b: str) -> bool:
+    """True if two titles are equal ignoring case and spacing."""
+    return ' '.join(a.split()).lower() == ' '.join(b.split()).lower()
+
+
+class TrigramIndex:
+    """Inverted index from trigram to catalog positions."""
+
+    def __init__(self, trigram_sets: List[FrozenSet[str]]):
+        """
+        Build the index.
+
+        Args:
+            trigram_sets: Trigram set of each indexed title, by position
+        """
+        postings: Dict[str, List[int]] = {}
+        for position, grams in enumerate(trigram_sets):
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        # Sorted position arrays, so a query's postings are counted in one pass
+        self.postings = {gram: np.asarray(positions, dtype=np.int32)
+                         for gram, positions in postings.items()}
+        self.sizes = np.fromiter((len(grams) for grams in trigram_sets), dtype=np.int32,
+                                 count=len(trigram_sets))
+
+    def best_match(self, grams: FrozenSet[str],
+                   min_similarity: float) -> Tuple[int, float]:
+        """
+        Find the indexed title most similar to `grams`.
+
+        The postings of all query trigrams are merged into a count of shared
+        trigrams per indexed title. Dice >= t requires at least
+        m = ceil(t * |q| / 2) shared trigrams, so only the titles reaching
+        that count are scored, and scoring needs no set intersection.
+
+        Returns:
+            (position, similarity), or (-1, 0.0) if no candidate qualifies;
+            ties go to the lowest position
+        """
+        postings = self.postings
+        matched = [postings[gram] for gram in grams if gram in postings]
+        if not matched:
+            return -1, 0.0
+
+        # The threshold is lowered by a rounding margin, so candidates scoring
+        # exactly min_similarity are kept
+        query_size = len(grams)
+        min_shared = max(1, math.ceil(min_similarity * query_size / 2 - BOUND_SLACK))
+        shared = np.bincount(np.concatenate(matched), minlength=len(self.sizes))
+        candidates = np.flatnonzero(shared >= min_shared)
+        if not len(candidates):
+            return -1, 0.0
+
+        scores = 2.0 * shared[candidates] / (query_size + self.sizes[candidates])
+        best = int(np.argmax(scores))
+        best_score = float(scores[best])
+        if best_score < min_similarity:
+            return -1, 0.0
+        return int(candidates[best]), best_score
+
+
+@dataclass
+class TitleMatchResult:
+    """Per-row title similarity against the reference catalog."""
+    scores: np.ndarray                      # similarity per row (0-1)
+    methods: np.ndarray                     # uint8 METHOD_* per row
+    matched_positions: np.ndarray           # int32 catalog position per row, -1 if none
+    stats: Dict[str, float] = field(default_factory=dict)
+
+    def method_name(self, row: int) -> str:
+        return METHOD_NAMES[int(self.methods[row])]
+
+
+class TitleMatcher:
+    """Compares parsed titles with reference catalog titles."""
+
+    def __init__(self, catalog: ReferenceCatalog, neighbors: int = 2,
+                 min_similarity: float = 0.5):
+        """
+        Initialize the matcher.
+
+        Args:
+            catalog: Reference catalog to match against
+            neighbors: Catalog codes tried on each side when a code is not in the catalog
+            min_similarity: Minimum similarity for neighbor and index matches
+        """
+        self.catalog = catalog
+        self.neighbors = neighbors
+        self.min_similarity = min_similarity
+        self._catalog_titles: Optional[List[str]] = None
+        self._catalog_title_array: Optional[np.ndarray] = None
+        self._catalog_trigrams: Optional[List[FrozenSet[str]]] = None
+        self._index: Optional[TrigramIndex] = None
+
+    @property
+    def catalog_titles(self) -> List[str]:
+        """Lowercased catalog titles (decoded on first use)."""
+        if self._catalog_titles is None:
+            self._catalog_titles = [
+                self.catalog.title_at(i).lower() for i in range(len(self.catalog))
+            ]
+        return self._catalog_titles
+
+    @property
+    def catalog_title_array(self) -> np.ndarray:
+        """Lowercased catalog titles as an object array, for vectorized comparisons."""
+        if self._catalog_title_array is None:
+            self._catalog_title_array = np.asarray(self.catalog_titles, dtype=object)
+        return self._catalog_title_array
+
+    @property
+    def catalog_trigrams(self) -> List[FrozenSet[str]]:
+        """Trigram sets of all catalog titles (built on first use)."""
+        if self._catalog_trigrams is None:
+            self._catalog_trigrams = [title_trigrams(t) for t in self.catalog_titles]
+        return self._catalog_trigrams
+
+    @property
+    def index(self) -> TrigramIndex:
+        """Trigram inverted index over catalog titles (built on first use)."""
+        if self._index is None:
+            self._index = TrigramIndex(self.catalog_trigrams)
+        return self._index
+
+    def match(self, features: FeatureFrame) -> TitleMatchResult:
+        """
+        Score every parsed title against the reference catalog.
+
+        Args:
+            features: Feature frame of the parsed codes
+
+        Returns:
+            TitleMatchResult aligned with the rows of `features`
+        """
+        count = len(features)
+        scores = np.zeros(count, dtype=np.float64)
+        methods = np.zeros(count, dtype=np.uint8)
+        matched = np.full(count, -1, dtype=np.int32)
+
+        catalog_size = len(self.catalog)
+        if count == 0 or catalog_size == 0:
+            return TitleMatchResult(scores, methods, matched, self._summarize(scores, methods))
+
+        keys = np.asarray(features.code_keys, dtype=np.int64)
+        positions = np.searchsorted(self.catalog.keys, keys)
+        clipped = np.minimum(positions, catalog_size - 1)
+        exact = (keys >= 0) & self.catalog.contains_many(keys)
+
+        # Codes in the catalog: identical titles need no trigram comparison
+        exact_rows = np.flatnonzero(exact)
+        exact_positions = clipped[exact_rows]
+        titles = np.asarray(features.titles_lower, dtype=object)
+        identical = titles[exact_rows] == self.catalog_title_array[exact_positions]
+        methods[exact_rows] = METHOD_EXACT
+        matched[exact_rows] = exact_positions
+        scores[exact_rows[identical]] = 1.0
+
+        differing = ~identical
+        other_rows = np.flatnonzero(~exact)
+        if not differing.any() and not len(other_rows):
+            return TitleMatchResult(scores, methods, matched, self._summarize(scores, methods))
+
+        # Each distinct title is split into trigrams and looked up in the index once
+        title_grams: Dict[str, FrozenSet[str]] = {}
+        index_matches: Dict[FrozenSet[str], Tuple[int, float]] = {}
+
+        def grams_of(title: str) -> FrozenSet[str]:
+            grams = title_grams.get(title)
+            if grams is None:
+                grams = title_grams[title] = title_trigrams(title)
+            return grams
+
+        titles_lower = features.titles_lower
+        catalog_trigrams = self.catalog_trigrams
+        for row, position in zip(exact_rows[differing].tolist(),
+                                 exact_positions[differing].tolist()):
+            scores[row] = dice_similarity(grams_of(titles_lower[row]), catalog_trigrams[position])
+
+        # Codes not in the catalog: try the nearest catalog codes, then the index
+        row_scores, row_methods, row_matched = [], [], []
+        for row, key, center in zip(other_rows.tolist(), keys[other_rows].tolist(),
+                                    positions[other_rows].tolist()):
+            grams = grams_of(titles_lower[row])
+
+            best_position, best_score = -1, 0.0
+            if key >= 0:
+                lo = max(0, center - self.neighbors)
+                hi = min(catalog_size, center + self.neighbors)
+                for position in range(lo, hi):
+                    score = dice_similarity(grams, catalog_trigrams[position])
+                    if score > best_score:
+                        best_position, best_score = position, score
+
+            if best_score >= self.min_similarity:
+                method = METHOD_NEIGHBOR
+            else:
+                found = index_matches.get(grams)
+                if found is None:
+                    found = index_matches[grams] = self.index.best_match(grams,
+                                                                         self.min_similarity)
+                best_position, best_score = found
+                method = METHOD_INDEX if best_position >= 0 else METHOD_NONE
+
+            row_scores.append(best_score)
+            row_methods.append(method)
+            row_matched.append(best_position)
+
+        scores[other_rows] = row_scores
+        methods[other_rows] = row_methods
+        matched[other_rows] = row_matched
+
+        return TitleMatchResult(scores, methods, matched, self._summarize(scores, methods))
+
+    @staticmethod
+    def _summarize(scores: np.ndarray, methods: np.ndarray) -> Dict[str, float]:
+        """Summary statistics for a match run."""
+        exact = methods == METHOD_EXACT
+        return {
+            'rows': int(len(scores)),
+            'exact_matches': int(exact.sum()),
+            'neighbor_matches': int((methods == METHOD_NEIGHBOR).sum()),
+            'index_matches': int((methods == METHOD_INDEX).sum()),
+            'unmatched': int((methods == METHOD_NONE).sum()),
+            'avg_exact_similarity': float(scores[exact].mean()) if exact.any() else 0.0
+        }
@@ -117,13 +117,9 @@ def main():
             logger.info(f"     Reasons: {', '.join(entry['reasons'])}")
 
     # Show edge cases if any
-    if result.qc_result and result.qc_result.edge_cases:
-        logger.info(f"\nEdge Cases Detected: {len(result.qc_result.edge_cases)}")
-        edge_case_types = {}
-        for ec in result.qc_result.edge_cases:
-            edge_case_types[ec['type']] = edge_case_types.get(ec['type'], 0) + 1
-
-        for ec_type, count in edge_case_types.items():
+    if result.qc_result and result.qc_result.edge_case_counts:
+        logger.info(f"\nEdge Cases Detected: {result.qc_result.total_edge_cases}")
+        for ec_type, count in result.qc_result.edge_case_counts.items():
             logger.info(f"  - {ec_type}: {count}")
 
     logger.info("\nDetailed validation report saved to: data/output/validation_test_report.json")
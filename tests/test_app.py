@@ -0,0 +1,144 @@
+"""
+Extraction service (app.py), exercised over HTTP on localhost.
+"""
+
+import json
+import os
+import signal
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import fitz
+import pytest
+
+import app
+
+
+TITLES = ('Summary', 'Price and Payment Procedures', 'Administrative Requirements')
+
+
+@pytest.fixture(scope='module')
+def pdf_path(tmp_path_factory):
+    """Two pages of three codes each, in the parser's left column."""
+    path = tmp_path_factory.mktemp('pdf') / 'mini.pdf'
+    document = fitz.open()
+    for division in ('01', '02'):
+        page = document.new_page()
+        for i, title in enumerate(TITLES):
+            page.insert_text((50, 72 + 14 * i), f"{division} {i + 1}0 00 {title}", fontsize=9)
+    document.save(str(path))
+    return path
+
+
+@pytest.fixture(scope='module')
+def service():
+    with app.ExtractionService(workers=1, config_path=str(app.DEFAULT_CONFIG)) as service:
+        assert len(service.warm_up(timeout=60)) == 1
+        yield service
+
+
+@pytest.fixture(scope='module')
+def base_url(service):
+    server = app.make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, body, content_type):
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': content_type},
+                                     method='POST')
+    with urllib.request.urlopen(request) as response:
+        return [json.loads(line) for line in response]
+
+
+def test_extract_path_streams_pages_codes_and_summary(base_url, pdf_path):
+    records = post(f"{base_url}/extract",
+                   json.dumps({'path': str(pdf_path), 'profile': 'fast'}).encode(),
+                   'application/json')
+
+    assert records[0]['type'] == 'job'
+    pages = [r for r in records if r['type'] == 'page']
+    assert [(r['page'], r['pages'], r['codes']) for r in pages] == [(1, 2, 3), (2, 2, 6)]
+    codes = [r for r in records if r['type'] == 'code']
+    assert [c['code'] for c in codes[:3]] == ['10 00', '20 00', '30 00']
+    assert codes[3]['division'] == '02' and codes[3]['page_number'] == 2
+
+    summary = records[-1]
+    assert summary['type'] == 'summary'
+    assert summary['codes'] == 6 and summary['errors'] == 0
+    assert summary['validation']['status'] in ('PASS', 'REVIEW', 'FAIL')
+    assert summary['validation']['profile']['profile'] == 'fast'
+
+    status = json.load(urllib.request.urlopen(f"{base_url}/jobs/{records[0]['job']}"))
+    assert status['state'] == 'done' and status['codes'] == 6
+
+
+def test_upload_without_validation(base_url, pdf_path, service):
+    records = post(f"{base_url}/extract?validate=false", pdf_path.read_bytes(),
+                   'application/pdf')
+
+    assert records[-1] == {'type': 'summary', 'codes': 6, 'errors': 0, 'validation': None}
+    assert list(service.upload_dir.iterdir()) == []
+
+
+def test_concurrent_requests_for_same_pdf_share_one_job(service, pdf_path):
+    first, coalesced_first = service.submit(pdf_path, 'same-content', validate=False)
+    second, coalesced_second = service.submit(pdf_path, 'same-content', validate=False)
+    other, _ = service.submit(pdf_path, 'same-content', validate=False, profile='fast')
+
+    assert (coalesced_first, coalesced_second) == (False, True)
+    assert second is first and first.requests == 2
+    assert other is not first  # Different options, different job
+
+    streamed = [record for batch in service.stream(second) for record in batch]
+    assert streamed == first.records
+    assert streamed[-1]['type'] == 'summary'
+    for _ in service.stream(other):  # Let it finish before the next test
+        pass
+
+
+def test_bad_requests_are_rejected(base_url):
+    for url, body, content_type in (
+        (f"{base_url}/extract", b'{"path": "/no/such.pdf"}', 'application/json'),
+        (f"{base_url}/extract?profile=bogus", b'%PDF-1.4', 'application/pdf'),
+        (f"{base_url}/extract", b'', 'application/pdf'),
+    ):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            post(url, body, content_type)
+        assert error.value.code == 400
+
+
+def test_job_that_cannot_start_is_answered_503_and_not_kept(base_url, service, pdf_path,
+                                                            monkeypatch):
+    def refuse(*args, **kwargs):
+        raise RuntimeError('cannot schedule new futures after shutdown')
+
+    monkeypatch.setattr(service.pool, 'submit', refuse)
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(f"{base_url}/extract?validate=false", pdf_path.read_bytes(), 'application/pdf')
+
+    assert error.value.code == 503
+    assert service.health()['active_jobs'] == 0
+    assert list(service.upload_dir.iterdir()) == []
+
+
+def test_service_recovers_from_a_killed_worker(pdf_path):
+    with app.ExtractionService(workers=1) as service:
+        pid, = service.warm_up(timeout=60)
+        os.kill(pid, signal.SIGKILL)
+        deadline = time.monotonic() + 30
+        while service.health()['pool'] != 'broken' and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert service.health()['pool'] == 'broken'
+        assert service.health()['ready_workers'] == 0
+
+        job, coalesced = service.submit(pdf_path, 'after-crash', validate=False)
+        records = [record for batch in service.stream(job) for record in batch]
+
+        assert not coalesced
+        assert records[-1] == {'type': 'summary', 'codes': 6, 'errors': 0, 'validation': None}
+        assert service.health()['pool'] == 'ok' and service.health()['active_jobs'] == 0
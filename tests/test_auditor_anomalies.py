@@ -0,0 +1,61 @@
+"""
+Auditor title length and sequence gap anomalies (src/agents/auditor_agent.py).
+"""
+
+import csv
+from pathlib import Path
+
+import pytest
+
+from src.agents.auditor_agent import AuditorAgent
+
+
+PARSED_CSV = (Path(__file__).resolve().parent.parent / 'data' / 'output' /
+              'MasterFormat_2020 - pgs_17-39 - MasterFormat Groups, Subgroups, and Divisions_parsed.csv')
+
+
+@pytest.fixture(scope='module')
+def parsed_codes():
+    with open(PARSED_CSV, newline='', encoding='utf-8') as f:
+        return [{'division': row['Division'], 'code': row['Code'], 'title': row['Title']}
+                for row in csv.DictReader(f)]
+
+
+def anomalies_of(codes, kind):
+    result = AuditorAgent({}).audit(codes)
+    return [a for a in result.anomalies if a['type'] == kind]
+
+
+def test_truncated_title_in_a_normal_division_is_flagged(parsed_codes):
+    codes = [dict(row) for row in parsed_codes]
+    row = next(i for i, c in enumerate(codes)
+               if c['division'] == '09' and c['title'] == 'Plaster and Gypsum Board')
+    codes[row]['title'] = 'Pl'  # Cut off by a column break
+
+    short = anomalies_of(codes, 'unusually_short_title')
+
+    assert row + 1 in [a['line_number'] for a in short]
+    flagged = next(a for a in short if a['line_number'] == row + 1)
+    assert flagged['division'] == '09' and flagged['length'] == 2 and flagged['z_score'] < -3
+    # Short but complete titles of the real data are not all flagged
+    assert len(short) < 10
+
+
+def test_long_titles_are_still_flagged(parsed_codes):
+    codes = [dict(row) for row in parsed_codes]
+    row = next(i for i, c in enumerate(codes) if c['division'] == '09')
+    codes[row]['title'] = ' '.join([codes[row]['title']] * 8)  # Merged with following lines
+
+    long_titles = anomalies_of(codes, 'unusually_long_title')
+
+    assert row + 1 in [a['line_number'] for a in long_titles]
+    assert all(a['z_score'] > 3 for a in long_titles)
+
+
+def test_empty_titles_are_not_anomalies(parsed_codes):
+    codes = [dict(row) for row in parsed_codes]
+    codes[5]['title'] = ''
+
+    result = AuditorAgent({}).audit(codes)
+
+    assert 6 not in [a.get('line_number') for a in result.anomalies]
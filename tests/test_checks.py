@@ -0,0 +1,165 @@
+"""
+Check registry planning and scheduling (src/agents/checks.py).
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from src.agents.checks import ArtifactStore, CheckContext, CheckRegistry, SamplingPlan
+from src.agents.features import FeatureFrame
+
+
+@dataclass
+class Finding:
+    message: str
+    line_number: Optional[int] = None
+
+
+class Agent:
+    config = {}
+    strict = False
+
+
+def context_for(registry, rows=20, artifacts=None):
+    codes = [{'division': '09', 'code': f"{row // 10 + 10:02d} {row % 10:02d}",
+              'title': f"Title {row}" if row % 3 else 'TODO'} for row in range(rows)]
+    return CheckContext(codes=codes, features=FeatureFrame.build(codes), stats={},
+                        registry=registry, artifacts=artifacts or ArtifactStore())
+
+
+def names(levels):
+    return [[check.name for check in level] for level in levels]
+
+
+def chain_registry():
+    registry = CheckRegistry()
+    calls = []
+
+    def make(name, message=None):
+        def func(agent, context):
+            calls.append(name)
+            return [Finding(message or name)]
+        return func
+
+    registry.check('auditor.report', agent='auditor', inputs=['totals', 'shape'])(make('report'))
+    registry.check('auditor.totals', agent='auditor', inputs=['counts'],
+                   outputs=['totals'])(make('totals'))
+    registry.check('auditor.counts', agent='auditor', outputs=['counts'])(make('counts'))
+    registry.check('auditor.shape', agent='auditor', outputs=['shape'],
+                   result='warnings')(make('shape'))
+    registry.check('auditor.strict', agent='auditor', enabled_if='strict')(make('strict'))
+    registry.check('validator.other', agent='validator')(make('other'))
+    return registry, calls
+
+
+def test_plan_orders_checks_by_dependency():
+    registry, _ = chain_registry()
+
+    assert names(registry.plan('auditor', Agent())) == [
+        ['auditor.counts', 'auditor.shape'], ['auditor.totals'], ['auditor.report']]
+
+
+def test_run_collects_findings_by_result_in_registration_order():
+    registry, calls = chain_registry()
+
+    results = registry.run('auditor', Agent(), context_for(registry), workers=4)
+
+    assert [f.message for f in results['issues']] == ['report', 'totals', 'counts']
+    assert [f.message for f in results['warnings']] == ['shape']
+    assert calls.index('counts') < calls.index('totals') < calls.index('report')
+
+
+def test_disabled_checks_skip_their_dependents():
+    registry, calls = chain_registry()
+    strict = Agent()
+    strict.strict = True
+
+    assert names(registry.plan('auditor', Agent(), disabled=['auditor.counts'])) == [
+        ['auditor.shape']]
+    assert names(registry.plan('auditor', strict, disabled=['auditor.shape'])) == [
+        ['auditor.counts', 'auditor.strict'], ['auditor.totals']]
+
+    results = registry.run('auditor', Agent(), context_for(registry), disabled=['auditor.totals'])
+    assert [f.message for f in results['issues']] == ['counts']
+    assert 'report' not in calls and 'totals' not in calls
+
+
+def test_dependency_cycles_are_rejected():
+    registry = CheckRegistry()
+    registry.check('qc.a', agent='qc', inputs=['b'], outputs=['a'])(lambda agent, context: [])
+    registry.check('qc.b', agent='qc', inputs=['a'], outputs=['b'])(lambda agent, context: [])
+    registry.check('qc.c', agent='qc')(lambda agent, context: [])
+
+    with pytest.raises(ValueError, match='Dependency cycle'):
+        registry.plan('qc')
+    assert names(registry.plan('qc', disabled=['qc.a'])) == [['qc.c']]
+
+
+@pytest.mark.parametrize('options', [{'agent': 'reviewer'}, {'agent': 'qc', 'cost': 'huge'},
+                                     {'agent': 'qc', 'scope': 'row', 'outputs': ['x']}])
+def test_invalid_checks_are_rejected(options):
+    with pytest.raises(ValueError):
+        CheckRegistry().check('qc.bad', **options)(lambda agent, context: [])
+
+
+def test_artifacts_are_built_once_per_store_across_agents_and_threads():
+    registry = CheckRegistry()
+    builds = []
+
+    @registry.artifact('titles_upper')
+    def titles_upper(context):
+        builds.append(threading.get_ident())
+        time.sleep(0.05)  # Let concurrent checks ask for it while it is being built
+        return [title.upper() for title in context.features.titles]
+
+    for agent_name in ('validator', 'auditor'):
+        for index in range(3):
+            registry.check(f"{agent_name}.uses_{index}", agent=agent_name,
+                           inputs=['titles_upper'])(
+                lambda agent, context: [Finding(context.get('titles_upper')[0])])
+
+    shared = ArtifactStore()
+    validator = registry.run('validator', Agent(), context_for(registry, artifacts=shared),
+                             workers=3)
+    auditor = registry.run('auditor', Agent(), context_for(registry, artifacts=shared),
+                           workers=3)
+
+    assert len(builds) == 1
+    assert [f.message for f in validator['issues'] + auditor['issues']] == ['TODO'] * 6
+
+    registry.run('auditor', Agent(), context_for(registry))  # A new run builds its own
+    assert len(builds) == 2
+    with pytest.raises(KeyError):
+        context_for(registry).get('missing')
+
+
+def todo_titles(agent, context):
+    return [Finding('todo', line_number=row + 1)
+            for row, title in enumerate(context.features.titles) if title == 'TODO']
+
+
+def test_sampled_row_checks_map_rows_back_and_estimate_rates():
+    registry = CheckRegistry()
+    registry.check('qc.todo', agent='qc', scope='row')(todo_titles)
+    context = context_for(registry, rows=300)
+    plan = SamplingPlan(sizes={'qc.todo': 60}, seed=5)
+
+    issues = registry.run('qc', Agent(), context, sampling=plan)['issues']
+
+    assert issues and all(context.codes[f.line_number - 1]['title'] == 'TODO' for f in issues)
+    stats = context.stats['sampled_checks']['qc.todo']
+    assert stats['sampled_rows'] == 60 and stats['flagged_rows'] == len(issues)
+    low, high = stats['flagged_rate_ci95']
+    assert low < 100 / 300 < high
+    again = registry.run('qc', Agent(), context_for(registry, rows=300), sampling=plan)['issues']
+    assert [f.line_number for f in again] == [f.line_number for f in issues]
+
+    # Samples as large as the dataset run the check on every row
+    full = context_for(registry, rows=30)
+    assert len(registry.run('qc', Agent(), full,
+                            sampling=SamplingPlan(sizes={'qc.todo': 30}))['issues']) == 10
+    assert 'sampled_checks' not in full.stats
@@ -0,0 +1,176 @@
+"""
+Edition diff hash join (src/utils/edition_diff.py) and its CLI (diff_csi.py).
+"""
+
+import csv
+import io
+import json
+import sqlite3
+import sys
+
+import pytest
+
+import diff_csi
+from src.utils.edition_diff import (EditionDiff, read_rows, read_sqlite_rows, write_csv,
+                                    write_jsonl)
+
+
+def row(division, code, title, group='', subgroup=''):
+    return {'division': division, 'code': code, 'title': title,
+            'group': group, 'subgroup': subgroup}
+
+
+OLD = [
+    row('03', '30 00', 'Cast-in-Place Concrete'),
+    row('09', '21 00', 'Plaster and Gypsum Board Assemblies'),
+    row('09', '22 00', 'Supports for Plaster and Gypsum Board'),
+    row('09', '30 00', 'Tiling', 'Facility Construction', 'Finishes'),
+    row('09', '50 00', 'Ceilings'),
+    row('09', '60 00', 'Flooring'),
+]
+
+NEW = [
+    row('03', '30 00', 'Cast-in-Place Concrete'),
+    row('09', '21 00', 'Plaster and Gypsum Board'),                                # Retitled
+    row('09', '30 00', 'Tiling', 'Facility Construction', 'Interiors'),            # Moved
+    row('09', '51 00', 'Acoustical Ceilings'),                                     # Added
+    row('09', '62 00', 'Flooring'),                                                # Renumbered
+    row('09', '29 00', 'Supports for Plaster and Gypsum Boards'),                  # Renumbered
+]
+
+
+def changes(records):
+    return sorted((r.change, r.code, r.old_code) for r in records)
+
+
+def test_classifies_every_kind_of_change():
+    engine = EditionDiff()
+
+    records = list(engine.diff(iter(OLD), iter(NEW)))
+
+    assert changes(records) == [
+        ('added', '09 51 00', None),
+        ('moved', '09 30 00', None),
+        ('removed', '09 50 00', None),
+        ('renumbered', '09 29 00', '09 22 00'),
+        ('renumbered', '09 62 00', '09 60 00'),
+        ('retitled', '09 21 00', None),
+    ]
+    renumbered = {r.code: r for r in records if r.change == 'renumbered'}
+    assert renumbered['09 62 00'].similarity == 1.0
+    assert 0.8 <= renumbered['09 29 00'].similarity < 1.0
+    moved = next(r for r in records if r.change == 'moved')
+    assert (moved.old_subgroup, moved.new_subgroup) == ('Finishes', 'Interiors')
+    assert engine.counts['matched_codes'] == 3 and engine.skipped_rows == 0
+
+
+def test_identical_editions_have_no_differences():
+    engine = EditionDiff()
+
+    assert list(engine.diff(iter(OLD), iter(OLD))) == []
+    assert engine.counts['matched_codes'] == len(OLD)
+
+
+def test_rename_threshold_controls_renumbering():
+    records = list(EditionDiff(rename_threshold=1.0).diff(iter(OLD), iter(NEW)))
+
+    assert ('renumbered', '09 62 00', '09 60 00') in changes(records)
+    assert ('added', '09 29 00', None) in changes(records)
+    assert ('removed', '09 22 00', None) in changes(records)
+
+
+def test_first_of_duplicate_codes_wins_on_either_side():
+    old = [row('09', '21 00', 'Plaster'), row('09', '21 00', 'Duplicate')]
+    new = [row('09', '21 00', 'Plaster'), row('09', '21 00', 'Other duplicate'),
+           row('09', '10 00', 'Added'), row('09', '10 00', 'Added')]
+
+    records = list(EditionDiff().diff(iter(old), iter(new)))
+
+    assert changes(records) == [('added', '09 10 00', None)]
+
+
+def test_equivalent_code_forms_join_and_unparseable_rows_are_counted():
+    old = [row('09', '21 00', 'Plaster'), row('09', '', 'No code')]
+    new = [row('09', '09 21 00', 'Plaster'), row('09', '2l 00', 'OCR error')]
+    engine = EditionDiff()
+
+    assert list(engine.diff(iter(old), iter(new))) == []
+    assert engine.skipped_rows == 2
+
+
+def test_matched_changes_stream_before_the_new_edition_is_read():
+    consumed = []
+
+    def new_rows():
+        for r in NEW:
+            consumed.append(r['code'])
+            yield r
+
+    records = EditionDiff().diff(iter(OLD), new_rows())
+    first = next(records)
+
+    assert (first.change, first.code) == ('retitled', '09 21 00')
+    assert consumed == ['30 00', '21 00']
+
+
+def test_writers_round_trip_records():
+    records = list(EditionDiff().diff(iter(OLD), iter(NEW)))
+
+    jsonl, table = io.StringIO(), io.StringIO()
+    assert write_jsonl(iter(records), jsonl) == len(records)
+    assert write_csv(iter(records), table) == len(records)
+
+    assert [json.loads(line) for line in jsonl.getvalue().splitlines()] == \
+        [r.to_dict() for r in records]
+    assert [r['code'] for r in csv.DictReader(io.StringIO(table.getvalue()))] == \
+        [r.code for r in records]
+
+
+def write_sqlite(path, rows, table='codes'):
+    connection = sqlite3.connect(path)
+    connection.execute(f'CREATE TABLE "{table}" (Division, Code, Title, "Group", Subgroup)')
+    connection.executemany(f'INSERT INTO "{table}" VALUES (?, ?, ?, ?, ?)',
+                           [tuple(r.values()) for r in rows])
+    connection.commit()
+    connection.close()
+
+
+def test_reads_each_format(tmp_path):
+    csv_path, jsonl_path, sqlite_path = (tmp_path / 'old.csv', tmp_path / 'old.jsonl',
+                                         tmp_path / 'old.sqlite')
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['Division', 'Code', 'Title', 'Group', 'Subgroup'])
+        writer.writeheader()
+        writer.writerows({k.title(): v for k, v in r.items()} for r in OLD)
+    jsonl_path.write_text(''.join(json.dumps(r) + '\n' for r in OLD))
+    write_sqlite(str(sqlite_path), OLD, table='edition 2018')
+
+    for path in (csv_path, jsonl_path):
+        assert list(read_rows(str(path))) == OLD
+    assert list(read_rows(str(sqlite_path), table='edition 2018')) == OLD
+    with pytest.raises(ValueError, match='Unsupported input format'):
+        read_rows(str(tmp_path / 'old.xlsx'))
+
+
+@pytest.mark.parametrize('table', ['missing', 'codes" UNION SELECT 1,2,3,4,5 --', 'codes"'])
+def test_sqlite_table_must_exist(tmp_path, table):
+    path = str(tmp_path / 'old.sqlite')
+    write_sqlite(path, OLD)
+
+    with pytest.raises(ValueError, match='No table'):
+        list(read_sqlite_rows(path, table=table))
+
+
+def test_cli_writes_csv_diff(tmp_path, monkeypatch):
+    old_path, new_path, output = tmp_path / 'old.jsonl', tmp_path / 'new.jsonl', tmp_path / 'd.csv'
+    old_path.write_text(''.join(json.dumps(r) + '\n' for r in OLD))
+    new_path.write_text(''.join(json.dumps(r) + '\n' for r in NEW))
+
+    monkeypatch.setattr(sys, 'argv', ['diff_csi.py', str(old_path), str(new_path),
+                                      '-f', 'csv', '-o', str(output)])
+    assert diff_csi.main() == 0
+    with open(output, newline='') as f:
+        assert len(list(csv.DictReader(f))) == 6
+
+    monkeypatch.setattr(sys, 'argv', ['diff_csi.py', str(old_path), str(tmp_path / 'new.xlsx')])
+    assert diff_csi.main() == 1
@@ -0,0 +1,106 @@
+"""
+Shared feature frame (src/agents/features.py) against the values each agent
+used to derive for itself.
+"""
+
+import random
+import re
+
+import pytest
+
+from src.agents.features import FeatureFrame, code_level, pack_code_key
+from src.utils.synthetic_codes import DEFECT_TYPES, generate_codes
+
+
+EDGE_ROWS = [
+    {'division': '09', 'code': '21 16', 'title': 'Gypsum Board Assemblies'},
+    {'division': '09', 'code': '09 21 16', 'title': 'Six-digit code'},
+    {'division': '09', 'code': '21\t00', 'title': 'Tab in code'},
+    {'division': '03', 'code': ' 30 00 ', 'title': ''},
+    {'division': '03', 'code': '1O 00', 'title': 'OCR letter O'},
+    {'division': '03', 'code': '١٠ ٠٠', 'title': 'Arabic-Indic digits'},
+    {'division': '00', 'code': '00 00', 'title': 'Division zero'},
+    {'division': '9', 'code': '21 00', 'title': 'One-digit division'},
+    {'division': '26', 'code': '', 'title': 'No code'},
+    {'division': '26', 'code': '05 19', 'title': 'ÉLECTRICAL Çables'},
+]
+
+
+@pytest.fixture(scope='module')
+def codes():
+    rates = {defect: 0.03 for defect in DEFECT_TYPES}
+    return generate_codes(3000, seed=11, defect_rates=rates).codes + EDGE_ROWS
+
+
+def legacy_values(code_entry):
+    """Per-row values as the Validator, Auditor and QC computed them before the frame."""
+    code = code_entry.get('code', '')
+    title = code_entry.get('title', '')
+    digits = re.sub(r'\s+', '', code)
+    try:
+        code_int = int(digits)
+    except (ValueError, AttributeError):
+        code_int = None
+    return digits, code_int, len(title), title.lower()
+
+
+def test_build_matches_the_per_agent_derivations(codes):
+    frame = FeatureFrame.build(codes)
+
+    assert len(frame) == len(codes)
+    assert frame.divisions == [c['division'] for c in codes]
+    assert frame.titles == [c['title'] for c in codes]
+    for row, code_entry in enumerate(codes):
+        digits, code_int, length, lower = legacy_values(code_entry)
+        assert (frame.code_digits[row], frame.code_ints[row],
+                frame.title_lengths[row], frame.titles_lower[row]) == \
+            (digits, code_int, length, lower), code_entry
+
+    lengths = [len(c['title']) for c in codes]
+    assert frame.stats['avg_title_length'] == sum(lengths) / len(lengths)
+    assert frame.stats['max_title_length'] == max(lengths)
+    assert frame.stats['divisions'] == sorted({c['division'] for c in codes})
+    assert sum(frame.stats['level_counts'].values()) == len(codes)
+
+
+def test_code_keys_and_levels(codes):
+    frame = FeatureFrame.build(codes[-len(EDGE_ROWS):])
+
+    assert frame.code_keys == [92116, 92116, 92100, 33000, -1, -1, 0, -1, -1, 260519]
+    assert frame.levels == [3, 3, 2, 2, 0, 0, 1, 0, 0, 3]
+    assert all(code_level(key) == level for key, level in zip(frame.code_keys, frame.levels))
+    assert pack_code_key('09', '2116') == pack_code_key('', '092116') == 92116
+
+
+def test_hierarchy_prefixes_match_the_old_parent_scan(codes):
+    frame = FeatureFrame.build(codes)
+    prefixes = {digits[:4] for digits in frame.code_digits}
+
+    for code_entry in random.Random(0).sample(codes, 200):
+        wanted = f"{code_entry['division']}{code_entry['code'].replace(' ', '')[:2]}"
+        # The Auditor used to rescan every code for each parent lookup
+        assert (wanted in prefixes) == any(
+            c.get('code', '').replace(' ', '')[:4] == wanted for c in codes if '\t' not in c['code'])
+
+
+def test_non_string_values_become_text():
+    frame = FeatureFrame.build([{'division': 9, 'code': None, 'title': 1234},
+                                {'division': '09'}])
+
+    assert frame.divisions == ['9', '09'] and frame.codes == ['', '']
+    assert frame.titles == ['1234', ''] and frame.code_ints == [None, None]
+    assert frame.code_keys == [-1, -1]
+
+
+def test_take_selects_rows_and_keeps_dataset_stats(codes):
+    frame = FeatureFrame.build(codes)
+    rows = [len(codes) - 1, 0, 17, 17, 2500]
+
+    taken = frame.take(rows)
+    rebuilt = FeatureFrame.build([codes[row] for row in rows])
+
+    for name in ('divisions', 'codes', 'titles', 'code_digits', 'code_ints', 'code_keys',
+                 'levels', 'title_lengths', 'titles_lower'):
+        assert getattr(taken, name) == getattr(rebuilt, name), name
+    assert taken.stats is frame.stats and len(taken) == 5
+    assert len(frame.take([])) == 0
@@ -0,0 +1,359 @@
+"""
+The watch-folder daemon processes each PDF's content once and publishes only
+finished jobs (src/utils/ingest.py, src/utils/folder_watch.py).
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+from src.utils import ingest
+from src.utils.folder_watch import SettleTracker
+from src.utils.ingest import LEDGER_NAME, IngestDaemon, IngestLedger, hash_file
+
+
+# Process functions run in worker processes, so they live at module level
+
+def write_output(pdf_path, work_dir):
+    """Copy the PDF's content into `<stem>.out`."""
+    data = Path(pdf_path).read_bytes()
+    (Path(work_dir) / f"{Path(pdf_path).stem}.out").write_bytes(data)
+    return {'bytes': len(data)}
+
+
+def die(pdf_path, work_dir):
+    os._exit(1)
+
+
+def die_once(pdf_path, work_dir):
+    """Kill the worker on the first attempt; succeed on the next."""
+    marker = Path(pdf_path + '.attempted')
+    if not marker.exists():
+        marker.touch()
+        os._exit(1)
+    return write_output(pdf_path, work_dir)
+
+
+def wait_for_gate(pdf_path, work_dir):
+    """Write the output, then hold the job open until `<pdf>.go` exists."""
+    summary = write_output(pdf_path, work_dir)
+    gate = Path(pdf_path + '.go')
+    deadline = time.monotonic() + 30
+    while not gate.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return summary
+
+
+def fail(pdf_path, work_dir):
+    raise ValueError("not a MasterFormat PDF")
+
+
+@pytest.fixture
+def folders(tmp_path):
+    folders = {name: tmp_path / name for name in ('input', 'output', 'temp')}
+    folders['input'].mkdir()
+    return folders
+
+
+def make_daemon(folders, process, **kwargs):
+    kwargs.setdefault('workers', 1)
+    return IngestDaemon(str(folders['input']), str(folders['output']), str(folders['temp']),
+                        process, settle_seconds=0.0, use_inotify=False,
+                        poll_interval=0.02, **kwargs)
+
+
+def run_once(folders, process, **kwargs):
+    daemon = make_daemon(folders, process, **kwargs)
+    try:
+        return daemon.run(once=True), daemon
+    finally:
+        daemon.close()
+
+
+def ledger_entry(folders, path):
+    ledger = IngestLedger(folders['output'] / LEDGER_NAME)
+    try:
+        return ledger.get(hash_file(path))
+    finally:
+        ledger.close()
+
+
+def test_processes_new_pdfs_and_records_them(folders):
+    (folders['input'] / 'a.pdf').write_bytes(b'%PDF a')
+    (folders['input'] / 'notes.txt').write_bytes(b'ignored')
+
+    stats, _ = run_once(folders, write_output)
+
+    assert stats == {'processed': 1, 'failed': 0, 'skipped': 0}
+    assert (folders['output'] / 'a.out').read_bytes() == b'%PDF a'
+    entry = ledger_entry(folders, folders['input'] / 'a.pdf')
+    assert entry['state'] == 'done'
+    assert entry['summary'] == {'bytes': 6}
+    assert entry['outputs'] == ['a.out']
+    assert not list((folders['temp'] / 'ingest').iterdir())
+
+
+def test_same_content_is_skipped_whatever_its_name(folders):
+    (folders['input'] / 'a.pdf').write_bytes(b'%PDF same')
+    (folders['input'] / 'b.pdf').write_bytes(b'%PDF same')
+
+    stats, _ = run_once(folders, write_output)
+    assert stats == {'processed': 1, 'failed': 0, 'skipped': 1}
+    assert not (folders['output'] / 'b.out').exists()
+
+    # A rename after a restart is still the same content
+    (folders['input'] / 'b.pdf').unlink()
+    (folders['input'] / 'a.pdf').rename(folders['input'] / 'renamed.pdf')
+    stats, _ = run_once(folders, write_output)
+    assert stats == {'processed': 0, 'failed': 0, 'skipped': 1}
+    assert not (folders['output'] / 'renamed.out').exists()
+
+
+def test_changed_content_under_the_same_name_is_processed(folders):
+    pdf = folders['input'] / 'a.pdf'
+    pdf.write_bytes(b'%PDF first')
+    run_once(folders, write_output)
+
+    pdf.write_bytes(b'%PDF second edition')
+    stats, _ = run_once(folders, write_output)
+
+    assert stats['processed'] == 1
+    assert (folders['output'] / 'a.out').read_bytes() == b'%PDF second edition'
+
+
+def test_interrupted_jobs_are_retried_on_restart(folders):
+    interrupted = folders['input'] / 'interrupted.pdf'
+    finished = folders['input'] / 'finished.pdf'
+    interrupted.write_bytes(b'%PDF interrupted')
+    finished.write_bytes(b'%PDF finished')
+
+    # A previous daemon stopped mid-job, leaving a stale work directory
+    ledger = IngestLedger(folders['output'] / LEDGER_NAME)
+    assert ledger.claim(hash_file(interrupted), interrupted.name) is None
+    assert ledger.claim(hash_file(finished), finished.name) is None
+    ledger.finish(hash_file(finished), 'done', summary={}, outputs=[])
+    ledger.close()
+    stale = folders['temp'] / 'ingest' / 'stale'
+    stale.mkdir(parents=True)
+    (stale / 'partial.out').write_bytes(b'half')
+
+    stats, _ = run_once(folders, write_output)
+
+    assert stats == {'processed': 1, 'failed': 0, 'skipped': 1}
+    assert ledger_entry(folders, interrupted)['state'] == 'done'
+    assert (folders['output'] / 'interrupted.out').exists()
+    assert not (folders['output'] / 'finished.out').exists()
+    assert not stale.exists()
+    assert not (folders['output'] / 'partial.out').exists()
+
+
+def test_reset_interrupted_keeps_finished_rows(tmp_path):
+    ledger = IngestLedger(tmp_path / LEDGER_NAME)
+    for sha256 in ('running', 'done', 'failed'):
+        ledger.claim(sha256, f'{sha256}.pdf')
+    ledger.finish('done', 'done')
+    ledger.finish('failed', 'failed', error='boom')
+
+    assert ledger.reset_interrupted() == 1
+    assert ledger.get('running') is None
+    assert ledger.get('done')['state'] == 'done'
+    assert ledger.get('failed')['error'] == 'boom'
+    assert ledger.claim('done', 'other.pdf')['source'] == 'done.pdf'
+    ledger.close()
+
+
+def test_killed_worker_is_retried_in_a_fresh_pool(folders):
+    pdf = folders['input'] / 'a.pdf'
+    pdf.write_bytes(b'%PDF a')
+
+    stats, daemon = run_once(folders, die_once)
+
+    assert stats == {'processed': 1, 'failed': 0, 'skipped': 0}
+    assert daemon._attempts[hash_file(pdf)] == 1
+    assert ledger_entry(folders, pdf)['state'] == 'done'
+    assert (folders['output'] / 'a.out').exists()
+
+
+def test_retries_wait_for_a_free_worker(folders):
+    pdf = folders['input'] / 'a.pdf'
+    pdf.write_bytes(b'%PDF a')
+    daemon = make_daemon(folders, write_output)
+    try:
+        sha256 = hash_file(pdf)
+        daemon.ledger.claim(sha256, pdf.name)
+        busy = Future()                     # The only worker is taken by another job
+        daemon._running[busy] = ('other', folders['input'] / 'other.pdf',
+                                 folders['temp'], None, 0.0)
+
+        daemon._retry_or_fail(sha256, pdf, "Worker process died")
+
+        assert list(daemon._running) == [busy]
+        assert list(daemon._waiting) == [pdf]
+        assert daemon.ledger.get(sha256) is None
+    finally:
+        daemon.close()
+
+
+def test_several_killed_jobs_are_all_retried(folders):
+    for name in ('a.pdf', 'b.pdf', 'c.pdf'):
+        (folders['input'] / name).write_bytes(f'%PDF {name}'.encode())
+
+    # One worker: a crash breaks the whole pool, so with more workers a retry
+    # could also be killed by another job's first attempt
+    stats, _ = run_once(folders, die_once, workers=1)
+
+    assert stats == {'processed': 3, 'failed': 0, 'skipped': 0}
+    assert sorted(path.name for path in folders['output'].glob('*.out')) == \
+        ['a.out', 'b.out', 'c.out']
+
+
+def test_killed_worker_fails_after_max_attempts(folders, monkeypatch):
+    monkeypatch.setattr(ingest, 'MAX_ATTEMPTS', 3)
+    pdf = folders['input'] / 'a.pdf'
+    pdf.write_bytes(b'%PDF a')
+
+    stats, daemon = run_once(folders, die)
+
+    assert stats == {'processed': 0, 'failed': 1, 'skipped': 0}
+    assert daemon._attempts[hash_file(pdf)] == 3
+    entry = ledger_entry(folders, pdf)
+    assert entry['state'] == 'failed'
+    assert entry['error'] == "Worker process died"
+    assert not list((folders['temp'] / 'ingest').iterdir())
+
+    # Failed content is not tried again after a restart
+    stats, _ = run_once(folders, die)
+    assert stats == {'processed': 0, 'failed': 0, 'skipped': 1}
+
+
+def test_exceptions_fail_without_retrying(folders):
+    pdf = folders['input'] / 'a.pdf'
+    pdf.write_bytes(b'%PDF a')
+
+    stats, daemon = run_once(folders, fail)
+
+    assert stats == {'processed': 0, 'failed': 1, 'skipped': 0}
+    assert daemon._attempts == {}
+    assert ledger_entry(folders, pdf)['error'] == "ValueError: not a MasterFormat PDF"
+    assert list(folders['output'].iterdir()) == [folders['output'] / LEDGER_NAME]
+
+
+def test_outputs_are_published_only_when_the_job_finishes(folders):
+    pdf = folders['input'] / 'a.pdf'
+    pdf.write_bytes(b'%PDF a')
+    finished = []
+    daemon = make_daemon(folders, wait_for_gate,
+                         on_finished=lambda path, summary, seconds: finished.append(path))
+    stop = threading.Event()
+    thread = threading.Thread(target=daemon.run, kwargs={'stop': stop})
+    thread.start()
+    try:
+        # The job has written its output into its work directory...
+        deadline = time.monotonic() + 30
+        while not list(folders['temp'].glob('ingest/*/a.out')):
+            assert time.monotonic() < deadline, "job never started"
+            time.sleep(0.01)
+        # ...which stays out of the output folder while the job runs
+        time.sleep(0.2)
+        assert not (folders['output'] / 'a.out').exists()
+        assert ledger_entry(folders, pdf)['state'] == 'running'
+        assert finished == []
+
+        Path(str(pdf) + '.go').touch()
+        while not finished:
+            assert time.monotonic() < deadline, "job never finished"
+            time.sleep(0.01)
+    finally:
+        stop.set()
+        thread.join()
+        daemon.close()
+
+    assert finished == [pdf]
+    assert (folders['output'] / 'a.out').read_bytes() == b'%PDF a'
+    assert not list((folders['temp'] / 'ingest').iterdir())
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_settle_tracker_waits_for_quiet_files(tmp_path):
+    clock = FakeClock()
+    tracker = SettleTracker(settle_seconds=2.0, clock=clock)
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(b'%PDF')
+    tracker.touch(path)
+
+    assert tracker.ready() == []          # First look records the size
+    clock.now += 1.9
+    assert tracker.ready() == []
+    clock.now += 0.1
+    assert tracker.ready() == [path]
+    assert len(tracker) == 0
+
+
+def test_settle_tracker_holds_growing_files(tmp_path):
+    clock = FakeClock()
+    tracker = SettleTracker(settle_seconds=2.0, clock=clock)
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(b'%PDF')
+    tracker.touch(path)
+    tracker.ready()
+
+    # A slow copy keeps growing without new watcher events
+    for _ in range(5):
+        clock.now += 1.5
+        with open(path, 'ab') as f:
+            f.write(b' more')
+        assert tracker.ready() == []
+
+    clock.now += 1.9
+    assert tracker.ready() == []
+    clock.now += 0.1
+    assert tracker.ready() == [path]
+
+
+def test_settle_tracker_restarts_on_touch(tmp_path):
+    clock = FakeClock()
+    tracker = SettleTracker(settle_seconds=2.0, clock=clock)
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(b'%PDF')
+    tracker.touch(path)
+    tracker.ready()
+    clock.now += 1.5
+    tracker.touch(path)
+    clock.now += 1.0
+
+    assert tracker.ready() == []
+    clock.now += 1.0
+    assert tracker.ready() == [path]
+
+
+def test_settle_tracker_holds_empty_and_drops_deleted_files(tmp_path):
+    clock = FakeClock()
+    tracker = SettleTracker(settle_seconds=2.0, clock=clock)
+    empty = tmp_path / 'empty.pdf'
+    empty.touch()
+    deleted = tmp_path / 'deleted.pdf'
+    deleted.write_bytes(b'%PDF')
+    tracker.touch(empty)
+    tracker.touch(deleted)
+    tracker.ready()
+
+    deleted.unlink()
+    clock.now += 60
+    assert tracker.ready() == []
+    assert len(tracker) == 1                # The empty file is still pending
+
+    empty.write_bytes(b'%PDF')              # Written at last
+    assert tracker.ready() == []
+    clock.now += 2.0
+    assert tracker.ready() == [empty]
@@ -0,0 +1,94 @@
+"""
+Persistent job queue (src/utils/job_queue.py): leases, retries and stats.
+"""
+
+import pytest
+
+from src.utils.job_queue import BACKOFF_BASE, JobQueue, backoff
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite'), clock=clock)
+    yield queue
+    queue.close()
+
+
+def test_leases_by_priority_then_age(queue):
+    low = queue.enqueue('low.pdf')
+    high = queue.enqueue('high.pdf', {'format': 'json'}, priority=5)
+    later_low = queue.enqueue('low2.pdf')
+
+    leased = [queue.lease('w1') for _ in range(3)]
+
+    assert [job.id for job in leased] == [high, low, later_low]
+    assert leased[0].options == {'format': 'json'} and leased[0].attempts == 1
+    assert queue.lease('w1') is None
+
+
+def test_failed_attempts_back_off_then_fail(queue, clock):
+    job_id = queue.enqueue('bad.pdf', max_attempts=2)
+
+    assert queue.fail(queue.lease('w1'), 'boom') == 'queued'
+    assert queue.lease('w1') is None  # Still backing off
+    clock.now += backoff(1)
+    job = queue.lease('w1')
+    assert job.attempts == 2
+    assert queue.fail(job, 'boom again') == 'failed'
+
+    record = queue.get(job_id)
+    assert record['state'] == 'failed' and record['error'] == 'boom again'
+    assert queue.retry_failed() == 1
+    assert queue.lease('w1').attempts == 1
+
+
+def test_expired_lease_is_requeued_and_old_owner_is_fenced_off(queue, clock):
+    queue.enqueue('slow.pdf')
+    crashed = queue.lease('w1', lease_seconds=60)
+    clock.now += 30
+    assert queue.heartbeat(crashed, lease_seconds=60, page=3, pages=10, codes=40)
+
+    clock.now += 61
+    assert queue.lease('w2') is None  # Expired, but waiting out its backoff
+    clock.now += BACKOFF_BASE
+    retried = queue.lease('w2')
+
+    assert retried.id == crashed.id and retried.attempts == 2
+    assert queue.get(retried.id)['page'] is None  # Progress restarts with the attempt
+    assert not queue.heartbeat(crashed)
+    assert not queue.complete(crashed, {'codes': 1})
+    assert queue.fail(crashed, 'late') is None
+    assert queue.complete(retried, {'codes': 40}, {'parse': 1.5})
+    assert queue.get(retried.id)['summary'] == {'codes': 40}
+
+
+def test_stats_report_depth_and_throughput(queue, clock):
+    for name in ('a.pdf', 'b.pdf', 'c.pdf'):
+        queue.enqueue(name)
+    first = queue.lease('w1')
+    queue.heartbeat(first, pages=20)
+    clock.now += 10
+    queue.complete(first)
+    second = queue.lease('w2')
+    queue.fail(second, 'boom')
+
+    stats = queue.stats(window=60)
+
+    assert stats.counts == {'queued': 2, 'running': 0, 'done': 1, 'failed': 0}
+    assert (stats.ready, stats.delayed, stats.expired) == (1, 1, 0)
+    assert stats.finished == 1 and stats.mean_seconds == 10
+    assert stats.jobs_per_hour == 60 and stats.pages_per_second == pytest.approx(20 / 60)
+    assert 'Jobs: 2 queued, 0 running, 1 done, 0 failed' in stats.format()
@@ -0,0 +1,65 @@
+"""
+Run metrics (src/utils/metrics.py): Prometheus textfile output and merging.
+"""
+
+import re
+
+from src.utils.metrics import RunMetrics
+
+
+SAMPLE = re.compile(r'^[a-z_]+(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? \S+$')
+
+
+def sample_metrics():
+    metrics = RunMetrics()
+    metrics.inc('pages_total', 10)
+    metrics.inc('codes_total', 40)
+    metrics.inc('documents_total', status='PASS')
+    metrics.inc('document_seconds_total', 4.0)
+    for seconds in (0.002, 0.003, 0.2):
+        metrics.observe('extract', seconds)
+    metrics.cache('row_results', hits=3, misses=1)
+    metrics.workers('page_extraction', busy_seconds=3.0, capacity_seconds=4.0)
+    return metrics
+
+
+def test_textfile_is_valid_prometheus_exposition(tmp_path):
+    path = tmp_path / 'textfile' / 'csi.prom'
+    sample_metrics().write_textfile(str(path))
+
+    text = path.read_text()
+    lines = text.splitlines()
+    assert [p.name for p in path.parent.iterdir()] == ['csi.prom']  # No temp file left
+    for line in lines:
+        assert line.startswith('# HELP ') or line.startswith('# TYPE ') or SAMPLE.match(line), line
+
+    assert '# TYPE csi_stage_duration_seconds histogram' in lines
+    assert 'csi_stage_duration_seconds_bucket{stage="extract",le="0.0025"} 1' in lines
+    assert 'csi_stage_duration_seconds_bucket{stage="extract",le="0.005"} 2' in lines
+    assert 'csi_stage_duration_seconds_bucket{stage="extract",le="+Inf"} 3' in lines
+    assert 'csi_stage_duration_seconds_count{stage="extract"} 3' in lines
+    assert 'csi_documents_total{status="PASS"} 1' in lines
+    assert 'csi_pages_per_second 2.5' in lines
+    assert 'csi_cache_hit_ratio{cache="row_results"} 0.75' in lines
+    assert 'csi_worker_utilization{pool="page_extraction"} 0.75' in lines
+
+
+def test_summary_reports_throughput_stages_and_ratios():
+    summary = sample_metrics().summary()
+
+    assert summary['pages_per_second'] == 2.5 and summary['codes_per_second'] == 10.0
+    assert summary['stages']['extract']['count'] == 3
+    assert summary['stages']['extract']['p95'] == 0.2  # Capped at the slowest observation
+    assert summary['cache_hit_ratio'] == {'row_results': 0.75}
+    assert summary['worker_utilization'] == {'page_extraction': 0.75}
+
+
+def test_snapshots_from_workers_merge():
+    combined = RunMetrics()
+    for _ in range(2):
+        combined.merge(sample_metrics().snapshot())
+
+    summary = combined.summary()
+    assert summary['pages'] == 20 and summary['documents'] == 2
+    assert summary['stages']['extract']['count'] == 6
+    assert summary['cache_hit_ratio'] == {'row_results': 0.75}
@@ -0,0 +1,126 @@
+"""
+The Auditor/QC stage gives the same results on every executor
+(src/agents/orchestrator.py).
+"""
+
+import asyncio
+import dataclasses
+
+import numpy as np
+import pytest
+
+from src.agents.features import normalize_code_digits, pack_code_key
+from src.agents.orchestrator import ValidationOrchestrator
+from src.utils.metrics import RunMetrics
+from src.utils.reference_catalog import compile_catalog
+from src.utils.synthetic_masterformat import generate
+
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('executors')
+    pdf_path = str(directory / 'source.pdf')
+    truth = generate(pdf_path, 4, seed=5)
+    catalog_path = str(directory / 'catalog.csic')
+    compile_catalog(((pack_code_key(row['division'], normalize_code_digits(row['code'])),
+                      row['title']) for row in truth), catalog_path, '2020')
+
+    codes = [dict(row) for row in truth]
+    for row in range(0, len(codes), 23):
+        codes[row]['title'] = codes[row]['title'][:6] + '...'   # Truncated
+    for row in range(5, len(codes), 41):
+        codes[row]['title'] = codes[row]['title'].upper()        # Header-like
+    del codes[100:104]                                            # Missing codes
+    return codes, pdf_path, catalog_path
+
+
+def snapshot(result):
+    """Everything a run reports, without its timestamp."""
+    summary = result.to_dict()
+    del summary['timestamp']
+    auditor, qc = result.auditor_result, result.qc_result
+    return {
+        'summary': summary,
+        'validator': [dataclasses.asdict(i) for i in result.validator_result.errors
+                      + result.validator_result.warnings],
+        'auditor': [dataclasses.asdict(i) for i in auditor.issues],
+        'anomalies': auditor.anomalies,
+        'auditor_stats': auditor.stats,
+        'qc': [dataclasses.asdict(i) for i in qc.issues],
+        'qc_stats': qc.stats,
+        'low_confidence': qc.low_confidence_entries,
+        'edge_cases': qc.edge_cases,
+        'edge_case_flags': np.asarray(qc.edge_case_flags).tolist(),
+        'profile': result.profile,
+    }
+
+
+def run(dataset, executor, use_async=False):
+    codes, pdf_path, catalog_path = dataset
+    config = {'executor': executor, 'reference_catalog': catalog_path,
+              'qc': {'random_seed': 7, 'spot_check_workers': 1}}
+    with ValidationOrchestrator(config) as orchestrator:
+        if use_async:
+            result = asyncio.run(orchestrator.validate_async(codes, source_pdf=pdf_path,
+                                                             export_report=False))
+        else:
+            result = orchestrator.validate(codes, source_pdf=pdf_path, export_report=False)
+    return snapshot(result)
+
+
+def test_executors_give_identical_results(dataset):
+    sequential = run(dataset, 'none')
+
+    # The run reaches both agents and they have something to report
+    assert sequential['auditor'] and sequential['qc'] and sequential['anomalies']
+    assert sequential['qc_stats']['spot_check']['samples'] > 0
+    assert sequential['auditor_stats']['catalog_missing'] == 4
+
+    assert run(dataset, 'thread') == sequential
+    assert run(dataset, 'process') == sequential
+    assert run(dataset, 'thread', use_async=True) == sequential
+    assert run(dataset, 'none', use_async=True) == sequential
+
+
+def test_unknown_executor_is_rejected():
+    with pytest.raises(ValueError, match='Unknown executor'):
+        ValidationOrchestrator({'executor': 'gpu'})
+
+
+def test_close_releases_the_catalog(dataset):
+    codes, _, catalog_path = dataset
+
+    with ValidationOrchestrator({'reference_catalog': catalog_path}) as orchestrator:
+        orchestrator.validate(codes, export_report=False)
+        catalog = orchestrator.catalog
+        assert orchestrator.auditor.catalog is catalog and not catalog._file.closed
+
+    assert catalog._file.closed and catalog.keys is None
+
+
+def row_cache_lookups(dataset, executor, cache_path):
+    """Row-cache (hits, misses) counted in the metrics of a cold and a warm run."""
+    codes, pdf_path, catalog_path = dataset
+    config = {'executor': executor, 'reference_catalog': catalog_path,
+              'row_cache': cache_path, 'qc': {'random_seed': 7, 'spot_check_workers': 1}}
+    counts = []
+    with ValidationOrchestrator(config) as orchestrator:
+        for _ in range(2):
+            orchestrator.metrics = RunMetrics()
+            orchestrator.validate(codes, export_report=False)
+            counts.append(tuple(orchestrator.metrics.total('cache_requests_total',
+                                                           cache='row_results', result=result)
+                                for result in ('hit', 'miss')))
+    return counts
+
+
+def test_row_cache_lookups_of_every_agent_are_counted(dataset, tmp_path):
+    (cold_hits, cold_misses), (warm_hits, warm_misses) = row_cache_lookups(
+        dataset, 'none', str(tmp_path / 'none.sqlite'))
+    assert cold_hits == 0 and cold_misses > 0
+    assert (warm_hits, warm_misses) == (cold_misses, 0)
+
+    # Worker processes look up their own copies of the cache
+    for executor in ('thread', 'process'):
+        assert row_cache_lookups(dataset, executor, str(tmp_path / f'{executor}.sqlite')) == \
+            [(cold_hits, cold_misses), (warm_hits, warm_misses)]
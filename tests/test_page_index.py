@@ -0,0 +1,75 @@
+"""
+Spatial grid index over page objects (src/parsers/page_index.py).
+"""
+
+import random
+from math import inf
+
+import pdfplumber
+import pytest
+
+from src.parsers.csi_parser_bbox import CSIParser
+from src.parsers.page_index import PageIndex, SpatialGrid
+from src.utils.synthetic_masterformat import generate
+
+
+def random_objects(count, seed=0):
+    rng = random.Random(seed)
+    objects = []
+    for _ in range(count):
+        x0, top = rng.uniform(-20, 600), rng.uniform(0, 800)
+        if rng.random() < 0.2:
+            objects.append({'x0': x0, 'top': top})  # Point, as PyMuPDF words
+        else:
+            objects.append({'x0': x0, 'top': top, 'x1': x0 + rng.uniform(0, 150),
+                            'bottom': top + rng.uniform(0, 60)})
+    return objects
+
+
+def extent(obj):
+    return obj['x0'], obj['top'], obj.get('x1', obj['x0']), obj.get('bottom', obj['top'])
+
+
+@pytest.mark.parametrize('bbox', [(100, 200, 300, 260), (0, 0, 612, 792), (-inf, -inf, 320, inf),
+                                  (320, -inf, inf, inf), (700, 900, 800, 1000), (64, 64, 64, 96)])
+def test_queries_match_a_scan_of_every_object(bbox):
+    objects = random_objects(2000)
+    grid = SpatialGrid(objects, cell_size=25)
+    x0, top, x1, bottom = bbox
+
+    def overlaps(e):
+        width, height = min(e[2], x1) - max(e[0], x0), min(e[3], bottom) - max(e[1], top)
+        return width >= 0 and height >= 0 and width + height > 0
+
+    assert grid.intersecting(bbox) == [o for o in objects if overlaps(extent(o))]
+    assert grid.within(bbox) == [o for o in objects if x0 <= extent(o)[0] and top <= extent(o)[1]
+                                 and extent(o)[2] <= x1 and extent(o)[3] <= bottom]
+    assert grid.anchored(bbox) == [o for o in objects
+                                   if x0 <= o['x0'] < x1 and top <= o['top'] < bottom]
+
+
+def test_adjacent_regions_split_objects_once():
+    objects = random_objects(500, seed=3)
+    grid = SpatialGrid(objects)
+
+    left, right = grid.anchored((-inf, -inf, 320, inf)), grid.anchored((320, -inf, inf, inf))
+
+    assert len(left) + len(right) == len(objects)
+    assert SpatialGrid([]).intersecting((-inf, -inf, inf, inf)) == []
+
+
+def test_page_text_and_bbox_parser_match_page_crops(tmp_path):
+    pdf_path = str(tmp_path / 'doc.pdf')
+    generate(pdf_path, 2, seed=4)
+    parser = CSIParser()
+
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            index = PageIndex(page)
+            for x0, top, x1, bottom in (parser.left_bbox, parser.right_bbox, (40, 700, 400, 792)):
+                bbox = (x0, top, min(x1, page.width), min(bottom, page.height))  # crop() needs it on the page
+                assert index.text_in(bbox) == page.crop(bbox).extract_text()
+            assert index.words.anchored((0, 0, 300, 800)) == [
+                w for w in page.extract_words(x_tolerance=3, y_tolerance=3)
+                if w['x0'] < 300 and w['top'] < 800]
+            assert parser.parse_page(page, page.page_number)  # Column boxes run past the page
@@ -0,0 +1,76 @@
+"""
+Supervised page extraction (src/parsers/page_watchdog.py): time limits and fallback.
+"""
+
+import fitz
+import pytest
+
+from src.parsers.csi_parser_final import CSIParser
+from src.parsers.page_watchdog import REASON_DOCUMENT_TIMEOUT, REASON_TIMEOUT
+
+
+TITLES = ('Summary', 'Price and Payment Procedures', 'Administrative Requirements')
+
+
+def write_pdf(path, dense_page=None):
+    """Three pages of three codes each; `dense_page` also gets ~75k tiny characters,
+    which take pdfplumber several seconds but PyMuPDF a fraction of one."""
+    document = fitz.open()
+    for number, division in enumerate(('01', '02', '03'), start=1):
+        page = document.new_page()
+        for i, title in enumerate(TITLES):
+            page.insert_text((50, 72 + 14 * i), f"{division} {i + 1}0 00 {title}", fontsize=9)
+        if number == dense_page:
+            for row in range(300):
+                page.insert_text((330, 120 + row * 2.2), 'x' * 250, fontsize=2)
+    document.save(str(path))
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def dense_pdf(tmp_path_factory):
+    return write_pdf(tmp_path_factory.mktemp('pdf') / 'dense.pdf', dense_page=2)
+
+
+def pages_of(codes):
+    return sorted({code['page_number'] for code in codes})
+
+
+def test_supervised_parse_matches_in_process_parse(tmp_path):
+    pdf = write_pdf(tmp_path / 'plain.pdf')
+    seen = []
+
+    supervised = CSIParser().parse_pdf(pdf, workers=2, page_timeout=30,
+                                       on_page=lambda page, pages, codes: seen.append(page))
+
+    assert supervised == CSIParser().parse_pdf(pdf)
+    assert seen == [1, 2, 3]
+
+
+def test_stalled_page_times_out_without_blocking_the_rest(dense_pdf):
+    parser = CSIParser()
+
+    codes = parser.parse_pdf(dense_pdf, workers=2, page_timeout=1.0)
+
+    assert pages_of(codes) == [1, 3]
+    assert [(f.page, f.reason, f.backend) for f in parser.page_failures] == [
+        (2, REASON_TIMEOUT, 'pdfplumber')]
+
+
+def test_fallback_backend_recovers_the_page(dense_pdf):
+    parser = CSIParser()
+
+    codes = parser.parse_pdf(dense_pdf, workers=1, page_timeout=1.0, fallback='pymupdf')
+
+    assert pages_of(codes) == [1, 2, 3] and parser.page_failures == []
+    assert [c['code'] for c in codes if c['page_number'] == 2] == ['10 00', '20 00', '30 00']
+
+
+def test_document_time_limit_marks_remaining_pages(dense_pdf):
+    parser = CSIParser()
+
+    codes = parser.parse_pdf(dense_pdf, workers=1, document_timeout=1.5)
+
+    assert pages_of(codes) == [1]
+    assert [(f.page, f.reason) for f in parser.page_failures] == [
+        (2, REASON_DOCUMENT_TIMEOUT), (3, REASON_DOCUMENT_TIMEOUT)]
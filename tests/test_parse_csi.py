@@ -0,0 +1,34 @@
+"""
+parse_csi.parse_pdf with validation (parse_csi.py).
+"""
+
+import yaml
+
+from parse_csi import parse_pdf
+from src.agents.orchestrator import ValidationOrchestrator
+from src.utils.synthetic_masterformat import generate
+
+
+def test_validation_closes_the_orchestrator(tmp_path, monkeypatch):
+    pdf_path = str(tmp_path / 'source.pdf')
+    generate(pdf_path, 2, seed=1)
+    config_path = tmp_path / 'config.yaml'
+    config_path.write_text(yaml.safe_dump({'row_cache': str(tmp_path / 'rows.sqlite'),
+                                           'qc': {'random_seed': 1}}))
+    orchestrators = []
+    original_close = ValidationOrchestrator.close
+
+    def close(self):
+        orchestrators.append(self)
+        original_close(self)
+
+    monkeypatch.setattr(ValidationOrchestrator, 'close', close)
+
+    for _ in range(2):  # As a queue or watcher would, in one process
+        codes, errors, result = parse_pdf(pdf_path, str(tmp_path / 'out.csv'),
+                                          config_path=str(config_path),
+                                          report_path=str(tmp_path / 'report.json'))
+        assert codes and result is not None
+
+    assert len(orchestrators) == 2
+    assert all(o._executor is None and o.row_cache._connection is None for o in orchestrators)
@@ -0,0 +1,52 @@
+"""
+Performance regression gate (src/utils/perf_gate.py).
+"""
+
+import pytest
+
+from src.utils.perf_gate import (Measurement, PerfHistory, compare, machine_fingerprint,
+                                 mann_whitney_greater, new_run, regressions, smallest_p_value)
+
+
+def test_mann_whitney_exact_p_values():
+    assert mann_whitney_greater([4, 5, 6], [1, 2, 3]) == pytest.approx(1 / 20)
+    assert mann_whitney_greater([1, 2, 3], [4, 5, 6]) == 1.0
+    # U = 8 of 9: orderings with U >= 8 are U = 8 and U = 9
+    assert mann_whitney_greater([3, 5, 6], [1, 2, 4]) == pytest.approx(2 / 20)
+    assert smallest_p_value(5) == pytest.approx(1 / 252)
+
+
+def test_only_significant_slowdowns_fail_the_gate():
+    baseline = {'steady': Measurement([1.00, 1.01, 0.99, 1.02, 1.00]),
+                'noisy': Measurement([1.0, 1.5, 0.7, 1.3, 0.9]),
+                'small': Measurement([1.00, 1.01, 0.99, 1.02, 1.00]),
+                'faster': Measurement([1.00, 1.01, 0.99, 1.02, 1.00])}
+    current = {'steady': Measurement([1.20, 1.22, 1.19, 1.21, 1.25]),   # +20%, separated
+               'noisy': Measurement([1.2, 0.8, 1.6, 1.1, 1.4]),         # +20%, overlapping
+               'small': Measurement([1.05, 1.06, 1.04, 1.05, 1.07]),    # Significant, under 10%
+               'faster': Measurement([0.5, 0.51, 0.49, 0.5, 0.52]),
+               'added': Measurement([1.0, 1.0]),
+               'broken': Measurement(error='worker process died')}
+
+    verdicts = {c.name: c.verdict for c in compare(current, baseline)}
+
+    assert verdicts == {'steady': 'slower', 'noisy': 'ok', 'small': 'ok', 'faster': 'faster',
+                        'added': 'new', 'broken': 'error'}
+    assert [c.name for c in regressions(compare(current, baseline))] == ['steady', 'broken']
+
+
+def test_history_baseline_is_per_machine(tmp_path):
+    path = str(tmp_path / 'history.json')
+    history = PerfHistory(path)
+    first = new_run({'a': Measurement([1.0, 1.1])}, repeat=2, baseline=True)
+    second = new_run({'a': Measurement([2.0, 2.1])}, repeat=2)
+    other = dict(first, fingerprint=dict(first['fingerprint'], id='elsewhere'))
+    for run in (first, second, other):
+        history.append(run)
+
+    reloaded = PerfHistory(path)
+    machine = machine_fingerprint()['id']
+
+    assert reloaded.baseline(machine)['benchmarks']['a']['median'] == pytest.approx(1.05)
+    assert reloaded.baseline('elsewhere')['fingerprint']['id'] == 'elsewhere'
+    assert reloaded.baseline('unknown') is None
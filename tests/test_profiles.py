@@ -0,0 +1,163 @@
+"""
+Validation profiles and time-budget planning (src/agents/profiles.py).
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.agents.checks import CheckRegistry
+from src.agents.orchestrator import ValidationOrchestrator
+from src.agents.profiles import MIN_SAMPLE_SIZE, PIPELINE_ROW_COST, get_profile, plan_profile
+from src.utils.synthetic_codes import generate_codes
+
+
+ROWS = 100_000
+
+
+class Agent:
+    def __init__(self, *disabled):
+        self.disabled_checks = set(disabled)
+
+
+def no_findings(agent, context):
+    return []
+
+
+@pytest.fixture
+def registry():
+    registry = CheckRegistry()
+    registry.check('validator.format', agent='validator', scope='row', severity='MEDIUM',
+                   row_cost=1e-5)(no_findings)
+    registry.check('auditor.gaps', agent='auditor', severity='HIGH', row_cost=0.0,
+                   fixed_cost=0.5)(no_findings)
+    registry.check('auditor.context', agent='auditor', scope='row', severity='LOW',
+                   row_cost=6e-5)(no_findings)
+    registry.check('qc.readability', agent='qc', scope='row', severity='LOW',
+                   row_cost=4e-5)(no_findings)
+    registry.check('qc.spot_check', agent='qc', severity='HIGH', cost='expensive',
+                   fixed_cost=2.0)(no_findings)
+    return registry
+
+
+def plan(registry, profile, time_budget=None, rows=ROWS, qc=None):
+    agents = {'validator': Agent(), 'auditor': Agent(), 'qc': qc or Agent()}
+    return plan_profile(get_profile(profile), agents, rows, time_budget=time_budget,
+                        inactive=['qc.spot_check'], registry=registry)
+
+
+# Pipeline 1.5s + validator.format 1.0s + auditor.gaps 0.5s; the two LOW row
+# checks cost 1e-4s per row, 10s in full
+FIXED = PIPELINE_ROW_COST * ROWS + 1.5
+LOW_ROW_COST = 1e-4
+SAMPLED = {'auditor.context', 'qc.readability'}
+
+
+def test_standard_runs_everything_without_a_budget(registry):
+    result = plan(registry, 'standard')
+
+    assert result.sample_sizes == {}
+    assert result.estimated_seconds == pytest.approx(FIXED + LOW_ROW_COST * ROWS)
+    assert result.within_budget
+
+
+def test_budget_shrinks_only_low_severity_row_checks(registry):
+    result = plan(registry, 'standard', time_budget=8.0)
+
+    assert set(result.sample_sizes) == SAMPLED
+    assert set(result.sample_sizes.values()) == {int((8.0 - FIXED) / LOW_ROW_COST)}
+    assert result.estimated_seconds == pytest.approx(8.0)
+    assert result.within_budget and result.to_dict()['sampled_checks'] == result.sample_sizes
+
+
+def test_budget_the_full_checks_exceed_is_reported_as_missed(registry):
+    result = plan(registry, 'standard', time_budget=1.0)
+
+    assert set(result.sample_sizes.values()) == {MIN_SAMPLE_SIZE}
+    assert result.estimated_seconds == pytest.approx(FIXED + LOW_ROW_COST * MIN_SAMPLE_SIZE)
+    assert not result.within_budget and result.to_dict()['within_budget'] is False
+
+
+def test_generous_budget_samples_nothing(registry):
+    assert plan(registry, 'standard', time_budget=60.0).sample_sizes == {}
+
+
+def test_fast_samples_whatever_the_budget(registry):
+    assert set(plan(registry, 'fast').sample_sizes.values()) == {1000}
+    assert set(plan(registry, 'fast', time_budget=60.0).sample_sizes.values()) == {1000}
+    assert set(plan(registry, 'fast', time_budget=3.02).sample_sizes.values()) == {200}
+    assert plan(registry, 'fast', rows=800).sample_sizes == {}
+
+
+def test_exhaustive_ignores_the_budget(registry):
+    result = plan(registry, 'exhaustive', time_budget=1.0)
+
+    assert result.sample_sizes == {}
+    assert not result.within_budget
+
+
+def test_disabled_and_inactive_checks_are_not_counted(registry):
+    result = plan(registry, 'standard', qc=Agent('qc.readability'))
+
+    assert result.estimated_seconds == pytest.approx(FIXED + 6e-5 * ROWS)
+    assert set(plan(registry, 'fast', qc=Agent('qc.readability')).sample_sizes) == {
+        'auditor.context'}
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError, match='Unknown validation profile'):
+        get_profile('thorough')
+
+
+def test_orchestrator_samples_under_a_tight_budget():
+    codes = generate_codes(3000, seed=2).codes
+
+    with ValidationOrchestrator({'qc': {'random_seed': 1}}) as orchestrator:
+        result = orchestrator.validate(codes, export_report=False, time_budget=1e-3)
+        full = orchestrator.validate(codes, export_report=False, profile='exhaustive',
+                                     time_budget=1e-3)
+
+    assert result.profile['sampled_checks'] and not result.profile['within_budget']
+    assert set(result.profile['sampled_checks'].values()) == {MIN_SAMPLE_SIZE}
+    sampled = {**result.validator_result.stats.get('sampled_checks', {}),
+               **result.auditor_result.stats.get('sampled_checks', {}),
+               **result.qc_result.stats.get('sampled_checks', {})}
+    assert set(sampled) == set(result.profile['sampled_checks'])
+    assert all(stats['sampled_rows'] == MIN_SAMPLE_SIZE for stats in sampled.values())
+    assert full.profile['sampled_checks'] == {} and full.profile['profile'] == 'exhaustive'
+
+
+def test_overlapping_async_runs_keep_their_own_profiles():
+    codes = generate_codes(3000, seed=2).codes
+
+    def sampled(result):
+        return {**result.validator_result.stats.get('sampled_checks', {}),
+                **result.auditor_result.stats.get('sampled_checks', {}),
+                **result.qc_result.stats.get('sampled_checks', {})}
+
+    async def overlapping(orchestrator):
+        return await asyncio.gather(
+            orchestrator.validate_async(codes, export_report=False, profile='fast'),
+            orchestrator.validate_async(codes, export_report=False, profile='exhaustive'))
+
+    with ValidationOrchestrator({'executor': 'thread', 'qc': {'random_seed': 1}}) as orchestrator:
+        alone = {profile: sampled(orchestrator.validate(codes, export_report=False,
+                                                        profile=profile))
+                 for profile in ('fast', 'exhaustive')}
+
+        # Both runs plan their profile before either one starts validating
+        barrier = threading.Barrier(2, timeout=30)
+        validate = orchestrator.validator.validate
+
+        def validate_together(*args, **kwargs):
+            barrier.wait()
+            return validate(*args, **kwargs)
+
+        orchestrator.validator.validate = validate_together
+        fast, exhaustive = asyncio.run(overlapping(orchestrator))
+
+    assert alone['fast'] and alone['exhaustive'] == {}
+    assert sampled(fast) == alone['fast']
+    assert sampled(exhaustive) == {}
+    assert fast.profile['profile'] == 'fast' and exhaustive.profile['profile'] == 'exhaustive'
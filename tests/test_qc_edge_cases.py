@@ -0,0 +1,103 @@
+"""
+QC edge case counts, per-row flags and bounded example samples
+(src/agents/qc_agent.py, Reservoir in src/utils/running_stats.py).
+"""
+
+import random
+from collections import Counter
+
+import pytest
+
+from src.agents.qc_agent import EDGE_CASE_TYPES, QCResult, QualityControlAgent
+from src.utils.running_stats import Reservoir
+
+
+def test_reservoir_is_bounded():
+    sample = Reservoir(5)
+    rng = random.Random(0)
+
+    for item in range(3):
+        sample.push(item, rng)
+    assert sample.items == [0, 1, 2] and sample.seen == 3
+
+    for item in range(3, 1000):
+        sample.push(item, rng)
+    assert len(sample.items) == 5 and sample.seen == 1000
+    assert len(set(sample.items)) == 5 and set(sample.items) <= set(range(1000))
+
+
+def test_reservoir_sample_is_uniform():
+    rng = random.Random(1)
+    kept = Counter()
+    for _ in range(5000):
+        sample = Reservoir(5)
+        for item in range(50):
+            sample.push(item, rng)
+        kept.update(sample.items)
+
+    # Each item is kept with probability 5/50: 500 +- 21 (one standard deviation)
+    assert set(kept) == set(range(50))
+    assert all(abs(count - 500) < 100 for count in kept.values())
+
+
+def codes_with_edge_cases(rows=600, seed=0):
+    rng = random.Random(seed)
+    codes = []
+    for row in range(rows):
+        code = f"{row // 100 + 10:02d} {row % 100:02d}"
+        title = f"Finish {row % 37} Assemblies"
+        roll = rng.random()
+        if roll < 0.05:
+            title = 'PLASTER AND GYPSUM BOARD'
+        elif roll < 0.1:
+            title = f"Section {row + 1000} Reference"
+        elif roll < 0.15:
+            title = 'Board Board Assemblies'
+        elif roll < 0.2:
+            title = 'Plaster #2 Board'
+        elif roll < 0.22:
+            code = '9'
+        codes.append({'division': '09', 'code': code, 'title': title})
+    return codes
+
+
+@pytest.fixture(scope='module')
+def result():
+    agent = QualityControlAgent({'random_seed': 3, 'edge_case_examples': 4})
+    return agent.verify(codes_with_edge_cases())
+
+
+def test_counts_match_flags_and_examples_are_bounded(result):
+    assert set(result.edge_case_counts) == set(EDGE_CASE_TYPES)
+    for case_type, count in result.edge_case_counts.items():
+        assert count == len(result.edge_case_lines(case_type)) > 4, case_type
+    assert result.stats['edge_cases_found'] == result.total_edge_cases
+
+    examples = Counter(example['type'] for example in result.edge_cases)
+    assert examples == {case_type: 4 for case_type in EDGE_CASE_TYPES}
+    for example in result.edge_cases:
+        assert example['type'] in result.edge_case_types_at(example['line_number'])
+
+
+def test_flags_decode_every_type_of_an_entry():
+    codes = [{'division': '09', 'code': '10 00', 'title': 'CONCRETE 1234 #'},
+             {'division': '09', 'code': '21 16', 'title': 'Gypsum Board Assemblies'},
+             {'division': '09', 'code': '5', 'title': 'Board Board'}]
+
+    result = QualityControlAgent({'random_seed': 1}).verify(codes)
+
+    assert result.edge_case_types_at(1) == ['category_code', 'special_characters',
+                                            'numeric_content', 'all_caps']
+    assert result.edge_case_types_at(2) == []
+    assert result.edge_case_types_at(3) == ['short_code', 'repeated_words']
+    assert result.edge_case_lines('all_caps') == [1]
+    assert result.edge_case_counts == {'category_code': 1, 'special_characters': 1,
+                                       'numeric_content': 1, 'all_caps': 1, 'short_code': 1,
+                                       'repeated_words': 1}
+
+
+def test_results_without_flags():
+    empty = QCResult(passed=False, overall_confidence=0.0, requires_human_review=True)
+
+    assert empty.edge_case_lines('all_caps') == [] and empty.edge_case_types_at(1) == []
+    assert empty.total_edge_cases == 0
@@ -0,0 +1,120 @@
+"""
+Compiled reference catalog (src/utils/reference_catalog.py) and the
+Auditor's catalog cross-reference and coverage figures.
+"""
+
+import pickle
+
+import numpy as np
+import pytest
+
+from src.agents.auditor_agent import AuditorAgent
+from src.utils.reference_catalog import (CatalogFormatError, ReferenceCatalog, compile_catalog,
+                                         format_code_key, main)
+
+
+ENTRIES = [
+    (92116, 'Gypsum Board Assemblies'),
+    (33000, ' Cast-in-Place Concrete '),
+    (92100, 'Plaster and Gypsum Board Assemblies'),
+    (92116, 'Duplicate (ignored)'),
+    (-1, 'Unpackable (ignored)'),
+    (260500, 'Common Work Results for Électrical'),
+    (92200, 'Supports for Plaster and Gypsum Board'),
+]
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / 'masterformat.csic'
+    assert compile_catalog(ENTRIES, str(path), '2020') == 5
+    catalog = ReferenceCatalog.open(str(path))
+    yield catalog
+    catalog.close()
+
+
+def test_compile_round_trips(catalog):
+    assert catalog.edition == '2020' and len(catalog) == 5
+    assert catalog.keys.tolist() == [33000, 92100, 92116, 92200, 260500]
+    assert catalog.lookup(33000) == 'Cast-in-Place Concrete'
+    assert catalog.lookup(92116) == 'Gypsum Board Assemblies'
+    assert catalog.lookup(260500) == 'Common Work Results for Électrical'
+    assert catalog.divisions() == [3, 9, 26]
+    assert catalog.keys[catalog.division_slice(9)].tolist() == [92100, 92116, 92200]
+    assert format_code_key(33000) == '03 30 00'
+
+
+@pytest.mark.parametrize('key', [0, 33001, 92117, 260499, 260501, 999999])
+def test_absent_codes_are_not_found(catalog, key):
+    assert catalog.index_of(key) == -1 and catalog.lookup(key) is None and key not in catalog
+
+
+def test_contains_many_matches_single_lookups(catalog):
+    keys = np.array([-1, 0, 33000, 92116, 92150, 260500, 999999])
+
+    assert catalog.contains_many(keys).tolist() == [key in catalog for key in keys.tolist()]
+    assert catalog.contains_many(keys).tolist() == [False, False, True, True, False, True, False]
+
+
+def test_empty_catalog(tmp_path):
+    path = str(tmp_path / 'empty.csic')
+    compile_catalog([], path, '2018')
+    catalog = ReferenceCatalog(path)
+
+    assert len(catalog) == 0 and catalog.lookup(33000) is None
+    assert catalog.contains_many(np.array([33000])).tolist() == [False]
+    catalog.close()
+
+
+def test_pickles_by_path(catalog):
+    copy = pickle.loads(pickle.dumps(catalog))
+
+    assert copy.path == catalog.path and copy.lookup(92200) == catalog.lookup(92200)
+    copy.close()
+
+
+@pytest.mark.parametrize('content', [b'', b'CSIC', b'NOPE' + bytes(28),
+                                     b'CSIC\x01\x00\x00\x002020\x05' + bytes(15)])
+def test_invalid_files_are_rejected(tmp_path, content):
+    path = tmp_path / 'bad.csic'
+    path.write_bytes(content)
+
+    with pytest.raises(CatalogFormatError):
+        ReferenceCatalog(str(path))
+
+
+def test_compiles_from_parsed_csv(tmp_path):
+    csv_path, output = tmp_path / 'parsed.csv', tmp_path / 'out.csic'
+    csv_path.write_text('Division,Code,Title\n09,21 00,Plaster\n09,09 22 00,Supports\n'
+                        '09,2l 00,OCR error\n', encoding='utf-8')
+
+    assert main(['compile', str(csv_path), str(output), '--edition', '2020']) == 0
+    catalog = ReferenceCatalog(str(output))
+    assert catalog.keys.tolist() == [92100, 92200] and catalog.lookup(92200) == 'Supports'
+    catalog.close()
+
+
+def test_auditor_catalog_figures(catalog):
+    codes = [
+        {'division': '09', 'code': '21 00', 'title': 'Plaster and Gypsum Board Assemblies'},
+        {'division': '09', 'code': '21 16', 'title': 'Gypsum Board Assemblies'},
+        {'division': '09', 'code': '21 16', 'title': 'Gypsum Board Assemblies'},
+        {'division': '09', 'code': '99 00', 'title': 'Not in the catalog'},
+        {'division': '26', 'code': '05 00', 'title': 'Common Work Results for Electrical'},
+        {'division': '26', 'code': '05 19', 'title': 'Not in the catalog either'},
+    ]
+    auditor = AuditorAgent({}, catalog=catalog)
+
+    result = auditor.audit(codes)
+
+    # 09 22 00 is missing; division 03 is not in the document, so its codes are not
+    assert result.stats['catalog_edition'] == '2020'
+    assert result.stats['catalog_matched'] == 4
+    assert result.stats['catalog_unexpected'] == 2
+    assert result.stats['catalog_missing'] == 1
+    unexpected = [i for i in result.issues if i.category == 'CrossReference'
+                  and 'unexpected_codes' in i.details]
+    assert [(i.details['unexpected_codes'], i.details['line_numbers']) for i in unexpected] == [
+        (['09 99 00'], [4]), (['26 05 19'], [6])]
+    coverage = [i for i in result.issues if i.category == 'Coverage' and 'missing_codes' in i.details]
+    assert [(i.code, i.details['missing_codes']) for i in coverage] == [('09', ['09 22 00'])]
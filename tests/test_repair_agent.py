@@ -0,0 +1,151 @@
+"""
+LLM repair pass (src/agents/repair_agent.py) against a local stub of the Messages API.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.agents.orchestrator import ValidationOrchestrator
+from src.agents.repair_agent import RepairAgent
+
+
+class StubMessages:
+    """Messages API stub: strips a trailing '...' from titles, or answers with `reply`."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.reply = None
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def answer(self, entries):
+        if self.reply is not None:
+            return self.reply(entries)
+        return json.dumps([{'id': e['id'], 'code': e['code'], 'title': e['title'].rstrip('.'),
+                            'confidence': 0.9, 'note': ''} for e in entries])
+
+
+@pytest.fixture
+def stub():
+    messages = StubMessages()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            with messages.lock:
+                messages.requests += 1
+                messages.in_flight += 1
+                messages.max_in_flight = max(messages.max_in_flight, messages.in_flight)
+            time.sleep(messages.delay)
+            text = messages.answer(json.loads(body['messages'][0]['content']))
+            with messages.lock:
+                messages.in_flight -= 1
+            payload = json.dumps({
+                'id': 'msg_stub', 'type': 'message', 'role': 'assistant', 'model': body['model'],
+                'content': [{'type': 'text', 'text': text}],
+                'stop_reason': 'end_turn', 'stop_sequence': None,
+                'usage': {'input_tokens': 10, 'output_tokens': 5}
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    messages.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield messages
+    server.shutdown()
+    server.server_close()
+
+
+def dataset(rows):
+    codes = [{'division': '09', 'code': f"{i // 100:02d} {i % 100:02d}",
+              'title': f"Finish {i}...", 'page_number': None} for i in range(rows)]
+    entries = [{'line_number': i + 1, 'division': c['division'], 'code': c['code'],
+                'title': c['title'], 'confidence': 0.6, 'reasons': ['Truncated title']}
+               for i, c in enumerate(codes)]
+    return codes, entries
+
+
+def agent(stub, tmp_path, **config):
+    return RepairAgent(dict({'base_url': stub.url, 'cache': str(tmp_path / 'repairs.sqlite'),
+                             'max_retries': 0}, **config))
+
+
+def test_batches_entries_and_reruns_from_cache(stub, tmp_path):
+    codes, entries = dataset(45)
+
+    first = agent(stub, tmp_path, batch_size=20).repair(codes, entries)
+
+    assert stub.requests == 3
+    assert first.stats['repaired'] == 45 and first.stats['input_tokens'] == 30
+    assert first.repairs[0].suggested_title == 'Finish 0'
+    assert [r.title for r in first.applicable(0.9)] == [e['title'] for e in entries]
+    assert first.applicable(0.95) == []
+
+    # A new run over the same input is answered from the cache
+    second = agent(stub, tmp_path, batch_size=7).repair(codes, entries)
+
+    assert stub.requests == 3
+    assert second.stats['cache_hits'] == 45 and all(r.cached for r in second.repairs)
+    assert [r.suggested_title for r in second.repairs] == [r.suggested_title for r in first.repairs]
+
+
+def test_concurrency_is_bounded(stub, tmp_path):
+    stub.delay = 0.1
+    codes, entries = dataset(40)
+
+    result = agent(stub, tmp_path, batch_size=5, max_concurrency=2).repair(codes, entries)
+
+    assert stub.requests == 8 and stub.max_in_flight == 2
+    assert result.stats['repaired'] == 40
+
+
+def test_invalid_answers_are_reported_and_not_cached(stub, tmp_path):
+    codes, entries = dataset(3)
+    stub.reply = lambda batch: 'Repairs:\n' + json.dumps(
+        [{'id': 1, 'code': '10 1O', 'title': 'Finish', 'confidence': 1.0},
+         {'id': 2, 'code': '00 01', 'title': 'Finish 1...', 'confidence': 1.0}])
+
+    result = agent(stub, tmp_path, max_entries=2).repair(codes, entries)
+
+    assert [r.status for r in result.repairs] == ['invalid', 'unchanged', 'skipped']
+    stub.reply = None
+    rerun = agent(stub, tmp_path).repair(codes, entries[:2])
+    assert stub.requests == 2
+    assert [(r.status, r.cached) for r in rerun.repairs] == [('repaired', False),
+                                                              ('unchanged', True)]
+
+
+def test_repairs_run_from_validate_async(stub, tmp_path):
+    codes, _ = dataset(30)
+    for row in codes[::5]:
+        row['title'] = row['title'].rstrip('.') + ','  # QC: "Title ends with punctuation"
+    stub.reply = lambda batch: json.dumps([{'id': e['id'], 'code': e['code'],
+                                            'title': e['title'].rstrip(','), 'confidence': 0.9}
+                                           for e in batch])
+    config = {'repair': {'enabled': True, 'base_url': stub.url, 'max_retries': 0,
+                         'cache': str(tmp_path / 'repairs.sqlite')}}
+
+    with ValidationOrchestrator(config) as orchestrator:
+        # The repair cache is opened here and used on the event loop's executor thread
+        result = asyncio.run(orchestrator.validate_async(codes, export_report=False))
+        rerun = asyncio.run(orchestrator.validate_async(codes, export_report=False))
+
+    assert len(result.qc_result.low_confidence_entries) == 6
+    assert result.repair_result.stats['repaired'] == 6
+    assert rerun.repair_result.stats['cache_misses'] == 0
+    assert stub.requests == result.repair_result.stats['requests']
@@ -0,0 +1,199 @@
+"""
+Persistent row result cache (src/utils/row_cache.py) and the memoized row
+checks of the check registry.
+"""
+
+import pickle
+import sqlite3
+from dataclasses import dataclass
+from typing import Optional
+
+from src.agents.checks import CheckContext, CheckRegistry, build_row_hashes
+from src.agents.features import FeatureFrame
+from src.utils.row_cache import EVICT_TO, REFRESH_AGE, RowResultCache, hash_row, hash_ruleset
+
+
+@dataclass
+class Finding:
+    message: str
+    line_number: Optional[int] = None
+
+
+def generations(path):
+    connection = sqlite3.connect(path)
+    try:
+        return dict(connection.execute("SELECT row_hash, generation FROM row_results"))
+    finally:
+        connection.close()
+
+
+def test_hits_and_misses(tmp_path):
+    cache = RowResultCache(str(tmp_path / 'rows.sqlite'))
+    ruleset = hash_ruleset('validator', [('validator.format', 1)], {})
+    cache.put_many(ruleset, [(b'a', {'check': [('x', (1,))]}), (b'b', {})])
+
+    found = cache.get_many(ruleset, [b'a', b'b', b'c'])
+
+    assert found == {b'a': {'check': [('x', (1,))]}, b'b': {}}
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert cache.get_many(hash_ruleset('validator', [('validator.format', 2)], {}), [b'a']) == {}
+    cache.close()
+
+
+def test_eviction_keeps_the_most_recently_used_rows(tmp_path):
+    path = str(tmp_path / 'rows.sqlite')
+    cache = RowResultCache(path, max_entries=100)
+    for run in range(10):
+        cache.put_many(b'r', [(f"{run}-{row}".encode(), {}) for row in range(10)])
+        cache.new_generation()
+    assert len(cache) == 100
+
+    cache.put_many(b'r', [(b'one more', {})])
+
+    assert len(cache) == int(100 * EVICT_TO)
+    kept = generations(path)
+    assert b'one more' in kept and not any(key.startswith(b'0-') for key in kept)
+    assert min(kept.values()) == 2  # Whole older generations went first
+    cache.close()
+
+
+def lookup_steps(cache, ruleset, row_hashes):
+    """SQLite VM steps (in hundreds) spent by one get_many call."""
+    steps = [0]
+
+    def count():
+        steps[0] += 1
+
+    cache.connection.set_progress_handler(count, 100)
+    try:
+        assert len(cache.get_many(ruleset, row_hashes)) == len(row_hashes)
+    finally:
+        cache.connection.set_progress_handler(None, 100)
+    return steps[0]
+
+
+def test_lookups_cost_the_same_whatever_the_cache_size(tmp_path):
+    cache = RowResultCache(str(tmp_path / 'rows.sqlite'))
+    cache.put_many(b'r', [(f"row {row}".encode(), {}) for row in range(600)])
+    wanted = [f"row {row}".encode() for row in range(0, 600, 10)]
+    small = lookup_steps(cache, b'r', wanted)
+
+    # Many more rows of the same rule set, as in a cache shared across documents
+    cache.put_many(b'r', [(f"other {row}".encode(), {}) for row in range(30_000)])
+
+    assert lookup_steps(cache, b'r', wanted) <= small * 2
+    assert len(cache.get_many(b'r', [f"other {row}".encode() for row in range(1200)])) == 1200
+    cache.close()
+
+
+def test_writes_count_the_table_only_when_eviction_may_be_due(tmp_path):
+    cache = RowResultCache(str(tmp_path / 'rows.sqlite'), max_entries=100)
+    statements = []
+    cache.connection.set_trace_callback(statements.append)
+
+    for run in range(9):
+        cache.put_many(b'r', [(f"{run}-{row}".encode(), {}) for row in range(10)])
+    counts = [sql for sql in statements if 'COUNT(*)' in sql]
+    assert len(counts) == 1                 # Once, to seed the running count
+
+    # Rewriting the same rows overestimates the count; the check then finds no excess
+    cache.put_many(b'r', [(f"0-{row}".encode(), {}) for row in range(10)])
+    cache.put_many(b'r', [(f"1-{row}".encode(), {}) for row in range(10)])
+    assert len(cache) == 90
+    cache.put_many(b'r', [(f"9-{row}".encode(), {}) for row in range(11)])
+    assert len(cache) == int(100 * EVICT_TO)
+    cache.close()
+
+
+def test_hits_restamp_rows_only_when_their_stamp_is_old(tmp_path):
+    path = str(tmp_path / 'rows.sqlite')
+    cache = RowResultCache(path)
+    cache.put_many(b'r', [(b'a', {}), (b'b', {})])
+    first = cache.generation
+
+    # Stamps up to REFRESH_AGE generations old are left alone
+    for _ in range(REFRESH_AGE - 1):
+        cache.new_generation()
+        cache.get_many(b'r', [b'other'])  # Runs that did not use these rows
+    cache.new_generation()
+    assert len(cache.get_many(b'r', [b'a', b'b'])) == 2
+    assert generations(path) == {b'a': first, b'b': first}
+
+    cache.new_generation()
+    cache.get_many(b'r', [b'a'])
+
+    assert generations(path) == {b'a': first + REFRESH_AGE + 1, b'b': first}
+    cache.close()
+
+
+def test_generation_advances_per_instance(tmp_path):
+    path = str(tmp_path / 'rows.sqlite')
+    first = RowResultCache(path)
+    generation = first.generation
+    first.close()
+
+    assert RowResultCache(path).generation == generation + 1
+
+
+def test_pickles_by_path(tmp_path):
+    cache = RowResultCache(str(tmp_path / 'rows.sqlite'), max_entries=50)
+    cache.put_many(b'r', [(b'a', {'check': []})])
+
+    copy = pickle.loads(pickle.dumps(cache))
+
+    assert (copy.path, copy.max_entries, copy.hits) == (cache.path, 50, 0)
+    assert copy.get_many(b'r', [b'a']) == {b'a': {'check': []}}
+    cache.close()
+    copy.close()
+
+
+def short_titles(agent, context):
+    return [Finding(f"short: {title}", line_number=row + 1)
+            for row, title in enumerate(context.features.titles) if len(title) < 6]
+
+
+class Agent:
+    def __init__(self, config=None):
+        self.config = config or {}
+
+
+def run_checks(registry, codes, cache, agent=None):
+    context = CheckContext(codes=codes, features=FeatureFrame.build(codes), stats={},
+                           registry=registry)
+    issues = registry.run('validator', agent or Agent(), context, cache=cache)['issues']
+    cache.new_generation()
+    return issues, context.stats['row_cache']['validator']
+
+
+def test_warm_runs_reuse_findings_with_current_line_numbers(tmp_path):
+    registry = CheckRegistry()
+    registry.artifact('row_hashes')(build_row_hashes)
+    registry.check('validator.short_titles', agent='validator', scope='row',
+                   cost='moderate')(short_titles)
+    cache = RowResultCache(str(tmp_path / 'rows.sqlite'))
+    codes = [{'division': '09', 'code': f"{10 + row:02d} 00",
+              'title': 'Tile' if row % 4 == 0 else f"Flooring {row}"} for row in range(20)]
+
+    cold, stats = run_checks(registry, codes, cache)
+    assert stats == {'rows': 20, 'rows_checked': 20, 'rows_cached': 0, 'hits': 0, 'misses': 20}
+    assert [f.line_number for f in cold] == [1, 5, 9, 13, 17]
+
+    warm, stats = run_checks(registry, codes, cache)
+    assert stats['rows_checked'] == 0 and stats['rows_cached'] == 20 and stats['hits'] == 20
+    assert warm == cold
+
+    # An inserted row shifts the line numbers of the cached findings after it
+    edited = [dict(codes[0], code='05 00', title='Wood')] + codes[1:]
+    edited.insert(2, {'division': '09', 'code': '99 00', 'title': 'Paint'})
+    issues, stats = run_checks(registry, edited, cache)
+    assert stats == {'rows': 21, 'rows_checked': 2, 'rows_cached': 19, 'hits': 19,
+                     'misses': 2}
+    assert [(f.line_number, f.message) for f in issues] == [
+        (1, 'short: Wood'), (3, 'short: Paint'), (6, 'short: Tile'), (10, 'short: Tile'),
+        (14, 'short: Tile'), (18, 'short: Tile')]
+
+    # A configuration change is a new rule set
+    issues, stats = run_checks(registry, edited, cache, Agent({'strict': True}))
+    assert stats['rows_checked'] == 21
+    assert hash_row(codes[1]) != hash_row(dict(codes[1], title='Flooring'))
+    cache.close()
@@ -0,0 +1,71 @@
+"""
+Run profiling (src/utils/run_profile.py): per-page and per-check timings.
+"""
+
+import csv
+
+import fitz
+
+from src.agents.checks import CheckContext, CheckRegistry
+from src.agents.features import FeatureFrame
+from src.parsers.csi_parser_final import CSIParser
+from src.utils.run_profile import RunProfiler
+
+
+def write_pdf(path, pages=3):
+    document = fitz.open()
+    for number in range(1, pages + 1):
+        page = document.new_page()
+        for i, title in enumerate(('Summary', 'Price and Payment Procedures')):
+            page.insert_text((50, 72 + 14 * i), f"{number:02d} {i + 1}0 00 {title}", fontsize=9)
+    document.save(str(path))
+    return str(path)
+
+
+def test_parser_records_each_page(tmp_path):
+    profiler = RunProfiler()
+    parser = CSIParser()
+    parser.profiler = profiler
+
+    profiler.start()
+    codes = parser.parse_pdf(write_pdf(tmp_path / 'doc.pdf'))
+    profiler.write(str(tmp_path / 'profile'))
+
+    assert sorted(profiler.pages) == [1, 2, 3]
+    page = profiler.pages[2]
+    assert set(page.stages) == {'extract', 'line_assembly', 'classification'}
+    assert (page.left_lines, page.right_lines, page.codes) == (2, 0, 2)
+    assert page.words == 11 and page.chars > 0
+    assert sum(p.codes for p in profiler.pages.values()) == len(codes)
+
+    with open(tmp_path / 'profile' / 'pages.csv', newline='') as f:
+        assert [row['page'] for row in csv.DictReader(f)] == ['1', '2', '3']
+    assert (tmp_path / 'profile' / 'run.pstats').stat().st_size > 0
+    assert 'Slowest pages (3 pages' in (tmp_path / 'profile' / 'report.txt').read_text()
+
+
+def test_registry_times_every_check():
+    registry = CheckRegistry()
+    registry.check('demo.first', agent='validator', result='issues')(lambda agent, context: [])
+    registry.check('demo.second', agent='validator', result='issues')(lambda agent, context: [])
+    profiler = RunProfiler()
+
+    codes = [{'code': '01 10 00'}]
+    context = CheckContext(codes=codes, features=FeatureFrame.build(codes), stats={},
+                           registry=registry)
+
+    registry.run('validator', None, context, workers=2, profiler=profiler)
+
+    assert {key: timing.calls for key, timing in profiler.checks.items()} == {
+        ('validator', 'demo.first'): 1, ('validator', 'demo.second'): 1}
+
+
+def test_heatmap_shades_pages_relative_to_the_slowest():
+    profiler = RunProfiler()
+    for page, seconds in ((1, 0.001), (2, 0.1), (4, 0.05)):
+        profiler.page_stage(page, 'extract', seconds, seconds)
+
+    row, scale = profiler.heatmap().splitlines()
+
+    assert row == 'p1    |.@ +|'
+    assert '100.0 ms' in scale
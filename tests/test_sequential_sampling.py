@@ -0,0 +1,138 @@
+"""
+Sequential spot-check sampling (src/utils/sequential_sampling.py) and QC's
+batched use of it (QualityControlAgent._spot_check_sample).
+"""
+
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from src.agents import qc_agent
+from src.agents.features import FeatureFrame
+from src.agents.qc_agent import QualityControlAgent
+from src.utils.sequential_sampling import (DECISION_ACCEPT, DECISION_REJECT, DECISION_UNDECIDED,
+                                           SequentialProbabilityRatioTest,
+                                           stratified_sample_order, wilson_interval)
+from src.utils.source_spot_check import STATUS_MATCH, STATUS_TITLE_MISMATCH, SpotCheckResult
+
+
+def test_sprt_boundaries():
+    test = SequentialProbabilityRatioTest(p0=0.0125, p1=0.05, alpha=0.05, beta=0.05)
+
+    assert test.upper_bound == pytest.approx(math.log(19))
+    assert test.lower_bound == pytest.approx(-math.log(19))
+
+    # Each clean sample moves log((1 - p1) / (1 - p0)); 77 of them reach the lower bound
+    needed = test.clean_samples_to_accept
+    assert needed == math.ceil(math.log(19) / math.log(0.9875 / 0.95)) == 77
+    for _ in range(needed - 1):
+        assert test.update(False) == DECISION_UNDECIDED
+    assert test.update(False) == DECISION_ACCEPT
+
+    # Each error moves log(p1 / p0) = log(4); three of them reach the upper bound
+    test = SequentialProbabilityRatioTest(p0=0.0125, p1=0.05)
+    assert [test.update(True) for _ in range(3)] == [DECISION_UNDECIDED, DECISION_UNDECIDED,
+                                                     DECISION_REJECT]
+    assert test.to_dict()['error_rate'] == 1.0
+
+
+@pytest.mark.parametrize('p0, p1', [(0.05, 0.05), (0.0, 0.05), (0.05, 1.0)])
+def test_sprt_rejects_invalid_rates(p0, p1):
+    with pytest.raises(ValueError):
+        SequentialProbabilityRatioTest(p0=p0, p1=p1)
+
+
+@pytest.mark.parametrize('error_rate, wrong_decision', [(0.0125, DECISION_REJECT),
+                                                        (0.05, DECISION_ACCEPT)])
+def test_sprt_error_probabilities_at_the_hypotheses(error_rate, wrong_decision):
+    rng = random.Random(7)
+    decisions = Counter()
+    for _ in range(2000):
+        test = SequentialProbabilityRatioTest(p0=0.0125, p1=0.05, alpha=0.05, beta=0.05)
+        while test.decision == DECISION_UNDECIDED:
+            test.update(rng.random() < error_rate)
+        decisions[test.decision] += 1
+
+    assert decisions[wrong_decision] / 2000 < 0.06
+
+
+def test_wilson_interval_at_the_extremes():
+    z2 = 1.96 ** 2
+
+    assert wilson_interval(0, 50) == (0.0, pytest.approx(z2 / (50 + z2)))
+    assert wilson_interval(50, 50) == (pytest.approx(50 / (50 + z2)), 1.0)
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    low, high = wilson_interval(5, 10)
+    assert low == pytest.approx(1 - high) and low < 0.5 < high
+
+
+def test_stratified_order_keeps_strata_proportional_and_spreads_pages():
+    strata = ['09'] * 300 + ['26'] * 100
+    pages = [row // 10 for row in range(300)] + [100 + row // 25 for row in range(100)]
+
+    order = stratified_sample_order(strata, pages, random.Random(3))
+
+    assert sorted(order) == list(range(400))
+    assert order == stratified_sample_order(strata, pages, random.Random(3))
+    for size in range(1, 401):
+        share = sum(strata[row] == '09' for row in order[:size])
+        assert abs(share - size * 0.75) <= 2
+    # Every page of a stratum is visited once before any is revisited
+    first_rows = [row for row in order if strata[row] == '09'][:30]
+    assert len({pages[row] for row in first_rows}) == 30
+
+
+class FakeChecker:
+    """SourceSpotChecker stand-in; the first sample of each batch mismatches if `errors`."""
+    errors = False
+    batches = []
+
+    def __init__(self, pdf_path, workers=4, min_similarity=0.9):
+        self.pages_loaded = 0
+        self.cache_hits = 0
+
+    def check(self, samples):
+        FakeChecker.batches.append(len(samples))
+        return [SpotCheckResult(row=row, page_number=page, code_key=key, parsed_title=title,
+                                status=STATUS_TITLE_MISMATCH if self.errors and i == 0
+                                else STATUS_MATCH)
+                for i, (row, page, key, title) in enumerate(samples)]
+
+
+@pytest.fixture
+def spot_check(monkeypatch):
+    monkeypatch.setattr(qc_agent, 'SourceSpotChecker', FakeChecker)
+    FakeChecker.batches = []
+    codes = [{'division': '09', 'code': f"{10 + row // 100:02d} {row % 100:02d}",
+              'title': f"Finish {row}", 'page_number': 1 + row // 10} for row in range(1000)]
+
+    def run(errors, **config):
+        FakeChecker.errors = errors
+        agent = QualityControlAgent(dict({'random_seed': 1}, **config))
+        stats = {}
+        issues = agent._spot_check_sample(codes, FeatureFrame.build(codes), 'source.pdf', stats)
+        return issues, stats['spot_check']
+
+    return run
+
+
+def test_clean_batches_stay_small_and_stop_on_acceptance(spot_check):
+    issues, summary = spot_check(errors=False)
+
+    assert summary['decision'] == DECISION_ACCEPT and summary['samples'] == 77
+    assert FakeChecker.batches == [10] * 8
+    assert issues == []
+
+
+def test_batches_double_after_mismatches_up_to_the_maximum(spot_check):
+    issues, summary = spot_check(errors=True, spot_check_alpha=1e-9, spot_check_beta=1e-9,
+                                 spot_check_max_samples=300)
+
+    assert FakeChecker.batches == [10, 20, 40, 80, 80, 70]
+    assert summary['decision'] == DECISION_UNDECIDED
+    assert summary['samples'] == 300 and summary['errors'] == 6
+    assert [i.details['status'] for i in issues if i.category == 'SpotCheck'
+            and 'status' in i.details] == [STATUS_TITLE_MISMATCH] * 6
+    assert 'inconclusive' in issues[-1].message
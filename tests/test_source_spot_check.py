@@ -0,0 +1,111 @@
+"""
+Source spot checks and their LRU page cache (src/utils/source_spot_check.py).
+"""
+
+import pytest
+
+from src.agents.features import normalize_code_digits, pack_code_key
+from src.utils import source_spot_check
+from src.utils.source_spot_check import (STATUS_CODE_MISMATCH, STATUS_MATCH, STATUS_NOT_FOUND,
+                                         STATUS_PAGE_MISSING, STATUS_TITLE_MISMATCH,
+                                         SourceSpotChecker)
+from src.utils.synthetic_masterformat import generate
+
+
+@pytest.fixture(scope='module')
+def source(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('spot') / 'source.pdf')
+    truth = generate(path, 6, seed=2)
+    return path, truth
+
+
+def samples(truth, rows):
+    return [(row, truth[row]['page_number'],
+             pack_code_key(truth[row]['division'], normalize_code_digits(truth[row]['code'])),
+             truth[row]['title']) for row in rows]
+
+
+def first_row_on(truth, page_number):
+    return next(row for row, entry in enumerate(truth) if entry['page_number'] == page_number)
+
+
+def test_every_entry_matches_its_source_page(source):
+    path, truth = source
+    checker = SourceSpotChecker(path, workers=1)
+
+    results = checker.check(samples(truth, range(len(truth))))
+
+    assert [r.status for r in results] == [STATUS_MATCH] * len(truth)
+    assert [r.row for r in results] == list(range(len(truth)))
+    assert checker.pages_loaded == 6 and checker.cache_hits == len(truth) - 6
+
+
+def test_pages_are_loaded_once_and_evicted_least_recently_used(source):
+    path, truth = source
+    checker = SourceSpotChecker(path, workers=1, cache_pages=2)
+
+    checker.page_entries(1)
+    checker.page_entries(2)
+    checker.page_entries(1)  # Page 1 is now the most recently used
+    checker.page_entries(3)
+
+    assert list(checker._cache) == [1, 3] and checker.pages_loaded == 3
+    checker.page_entries(1)
+    assert checker.pages_loaded == 3
+    checker.page_entries(2)
+    assert list(checker._cache) == [1, 2] and checker.pages_loaded == 4
+
+
+def test_batches_count_cache_hits_per_sample(source):
+    path, truth = source
+    checker = SourceSpotChecker(path, workers=1)
+    page_one = [row for row, entry in enumerate(truth) if entry['page_number'] == 1][:3]
+
+    checker.check(samples(truth, page_one))
+    assert (checker.pages_loaded, checker.cache_hits) == (1, 2)
+    checker.check(samples(truth, page_one))
+    assert (checker.pages_loaded, checker.cache_hits) == (1, 5)
+
+
+def test_batches_larger_than_the_cache_load_pages_as_reached(source):
+    path, truth = source
+    checker = SourceSpotChecker(path, workers=1, cache_pages=2)
+    rows = [first_row_on(truth, page) for page in (1, 2, 3, 4, 1)]
+
+    results = checker.check(samples(truth, rows))
+
+    assert [r.status for r in results] == [STATUS_MATCH] * 5
+    assert checker.pages_loaded == 5 and len(checker._cache) == 2
+
+
+def test_parallel_loading_matches_serial(source, monkeypatch):
+    path, truth = source
+    monkeypatch.setattr(source_spot_check, 'PARALLEL_MIN_PAGES', 2)
+    parallel = SourceSpotChecker(path, workers=3)
+    serial = SourceSpotChecker(path, workers=1)
+
+    parallel.load_pages(range(1, 7))
+    serial.load_pages(range(1, 7))
+
+    assert parallel._cache == serial._cache and parallel.pages_loaded == 6
+
+
+def test_mismatch_outcomes(source):
+    path, truth = source
+    checker = SourceSpotChecker(path, workers=1)
+    row = first_row_on(truth, 2)
+    (_, page, key, title), = samples(truth, [row])
+    missing_key = 999900  # Not on the page
+    assert missing_key not in checker.page_entries(page)
+
+    results = checker.check([
+        (0, page, key, title + ' Assemblies and Accessories'),
+        (1, page, missing_key, title),
+        (2, page, 999999, 'Nothing Like Any Title'),
+        (3, 99, key, title),
+    ])
+
+    assert [r.status for r in results] == [STATUS_TITLE_MISMATCH, STATUS_CODE_MISMATCH,
+                                           STATUS_NOT_FOUND, STATUS_PAGE_MISSING]
+    assert results[1].source_code_key == key and results[1].source_title == title
+    assert results[3].code == results[0].code and 99 in checker._cache
@@ -0,0 +1,49 @@
+"""
+CLI start-up budget: heavy dependencies must only load when a run needs them.
+"""
+
+from pathlib import Path
+
+from src.utils.import_profile import parse_importtime, profile_command
+
+
+CLI = str(Path(__file__).resolve().parent.parent / 'parse_csi.py')
+
+# Generous against the ~30 ms measured, so only a new eager import trips it
+HELP_IMPORT_BUDGET_MS = 150
+
+HEAVY_MODULES = ('pdfplumber', 'pydantic', 'numpy', 'loguru', 'src.agents.orchestrator')
+
+
+def test_help_stays_within_import_budget():
+    profile = profile_command([CLI, '--help'])
+
+    assert profile.returncode == 0
+    assert profile.total_ms < HELP_IMPORT_BUDGET_MS, profile.format()
+    for module in HEAVY_MODULES:
+        assert module not in profile.modules, f"--help imported {module}"
+
+
+def test_no_validate_skips_agents(tmp_path):
+    profile = profile_command([CLI, str(tmp_path / 'missing.pdf'), '--no-validate'])
+
+    assert profile.returncode == 1  # Missing input, after the parser was imported
+    assert 'pdfplumber' in profile.modules
+    assert 'src.agents.orchestrator' not in profile.modules
+    assert 'numpy' not in profile.modules
+
+
+def test_parse_importtime_skips_interpreter_startup():
+    stderr = '\n'.join([
+        'import time: self [us] | cumulative | imported package',
+        'import time:       100 |        100 |   encodings',
+        'import time:       300 |        400 | site',
+        'import time:        50 |         50 |   json.decoder',
+        'import time:       200 |        250 | json',
+        'a warning'
+    ])
+
+    modules, other_lines = parse_importtime(stderr)
+
+    assert modules == {'json.decoder': 50, 'json': 200}
+    assert other_lines == ['a warning']
@@ -0,0 +1,64 @@
+"""
+Synthetic code datasets (src/utils/synthetic_codes.py) and agent benchmark
+scoring (src/utils/agent_benchmark.py).
+"""
+
+import pytest
+
+from src.utils.agent_benchmark import BUDGETS, AgentResult, run_case, scaling_exponents
+from src.utils.synthetic_codes import DEFECT_TYPES, generate_codes
+
+
+RATES = {defect: 0.02 for defect in DEFECT_TYPES}
+
+
+def test_clean_dataset_is_ordered_and_unique():
+    codes = generate_codes(5000, seed=3).codes
+
+    keys = [(row['division'], row['code']) for row in codes]
+    assert keys == sorted(keys) and len(set(keys)) == 5000
+    assert all(len(row['code']) == 5 and row['code'][2] == ' ' for row in codes)
+    assert generate_codes(5000, seed=3).codes == codes
+
+
+def test_defects_are_injected_at_their_rates():
+    dataset = generate_codes(20000, seed=1, defect_rates=RATES)
+    codes = dataset.codes
+
+    for defect, count in dataset.counts().items():
+        assert 250 < count < 450, defect  # ~2% of 20,000 rows each
+    for row, defect in dataset.defects.items():
+        if defect == 'duplicate':
+            assert codes[row]['code'] == codes[row - 1]['code']
+        elif defect == 'encoding':
+            assert '�' in codes[row]['title']
+        elif defect == 'truncation':
+            assert codes[row]['title'].endswith(('...', '…'))
+        elif defect == 'sequence':
+            moved = codes[dataset.defect_rows[row][-1]]
+            assert (moved['division'], moved['code']) < (codes[row]['division'], codes[row]['code'])
+
+    with pytest.raises(ValueError):
+        generate_codes(10, defect_rates={'typo': 0.1})
+
+
+def test_orchestrator_case_detects_every_defect_type_within_budget():
+    result = run_case('orchestrator', 2000, seed=5, defect_rate=0.01)
+
+    assert result.error == '' and not result.over_budget
+    assert result.budget_seconds == pytest.approx(2.0)
+    assert result.budget_mb == BUDGETS['orchestrator'].memory_mb
+    assert set(result.detection) == set(DEFECT_TYPES)
+    assert all(rate == 1.0 for rate in result.detection.values())
+    assert 0.0 <= result.false_positive_rate <= 1.0
+
+
+def test_scaling_exponent_is_loglog_slope():
+    results = [AgentResult('qc', rows, seconds, 0.0, 0, 1.0, 1.0)
+               for rows, seconds in ((1000, 0.1), (10000, 1.0), (100000, 100.0))]
+
+    exponents = scaling_exponents(results)
+
+    assert exponents[('qc', 10000)] == pytest.approx(1.0)
+    assert exponents[('qc', 100000)] == pytest.approx(2.0)
+    assert ('qc', 1000) not in exponents
@@ -0,0 +1,68 @@
+"""
+Synthetic MasterFormat documents (src/utils/synthetic_masterformat.py) and
+parser benchmark scoring (src/utils/parser_benchmark.py).
+"""
+
+import fitz
+import pytest
+
+from src.parsers.csi_parser_final import CSIParser
+from src.utils.parser_benchmark import run_case, score
+from src.utils.synthetic_masterformat import generate, read_truth
+
+
+@pytest.fixture(scope='module')
+def synthetic(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('synthetic')
+    pdf_path, truth_path = str(directory / 'doc.pdf'), str(directory / 'doc.csv')
+    truth = generate(pdf_path, 3, seed=7, truth_path=truth_path)
+    return pdf_path, truth_path, truth
+
+
+def test_pages_have_headers_wrapped_titles_and_footers(synthetic):
+    pdf_path, truth_path, truth = synthetic
+    text = fitz.open(pdf_path)[0].get_text()
+
+    assert 'DIVISION 00—Procurement and Contracting Requirements' in text
+    assert 'Procurement and Contracting Requirements Group' in text
+    assert 'CSI grants to licensee a non-exclusive license for internal use 1' in text
+    assert any(len(row['title'].split()) >= 8 for row in truth)  # Wrapped titles
+    assert {row['page_number'] for row in truth} == {1, 2, 3}
+    assert read_truth(truth_path) == truth
+
+
+def test_same_seed_same_document(tmp_path, synthetic):
+    assert generate(str(tmp_path / 'again.pdf'), 3, seed=7) == synthetic[2]
+    assert generate(str(tmp_path / 'other.pdf'), 3, seed=8) != synthetic[2]
+
+
+@pytest.mark.parametrize('backend', ['pdfplumber', 'pymupdf'])
+def test_final_parser_recovers_every_code(synthetic, backend):
+    pdf_path, _, truth = synthetic
+
+    scores = score(truth, CSIParser().parse_pdf(pdf_path, backend=backend))
+
+    assert scores['precision'] == scores['recall'] == 1.0
+
+
+def test_score_counts_misses_and_wrong_context():
+    truth = [{'division': '01', 'code': '10 00', 'title': 'Summary',
+              'group': 'Specifications', 'subgroup': 'General Requirements'},
+             {'division': '01', 'code': '20 00', 'title': 'Price',
+              'group': 'Specifications', 'subgroup': 'General Requirements'}]
+    codes = [dict(truth[0], subgroup=None),
+             dict(truth[1], title='Price and')]
+
+    scores = score(truth, codes)
+
+    assert scores['precision'] == scores['recall'] == scores['f1'] == 0.5
+    assert scores['context'] == 0.0
+
+
+def test_benchmark_case_reports_throughput_and_memory(synthetic):
+    pdf_path, truth_path, truth = synthetic
+
+    result = run_case('final-pymupdf', pdf_path, truth_path)
+
+    assert (result.pages, result.codes, result.f1, result.error) == (3, len(truth), 1.0, '')
+    assert result.pages_per_second > 0 and result.peak_rss_mb >= result.baseline_rss_mb > 0
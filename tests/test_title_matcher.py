@@ -0,0 +1,158 @@
+"""
+Trigram title matching (src/utils/title_matcher.py).
+"""
+
+import csv
+import random
+import time
+
+import pytest
+
+from src.agents.features import FeatureFrame, normalize_code_digits, pack_code_key
+from src.utils.reference_catalog import ReferenceCatalog, compile_catalog
+from src.utils.title_matcher import (METHOD_EXACT, METHOD_INDEX, METHOD_NEIGHBOR, METHOD_NONE,
+                                     TitleMatcher, TrigramIndex, dice_similarity, title_trigrams)
+from src.utils.synthetic_codes import generate_codes
+from tests.test_auditor_anomalies import PARSED_CSV
+
+
+@pytest.fixture(scope='module')
+def titles():
+    with open(PARSED_CSV, newline='', encoding='utf-8') as f:
+        return [row['Title'] for row in csv.DictReader(f)]
+
+
+def perturb(title, rng):
+    """A title as a parse might mangle it: truncated, a character lost, or words dropped."""
+    words = title.split()
+    choice = rng.randrange(4)
+    if choice == 0:
+        return title[:max(1, int(len(title) * rng.uniform(0.4, 0.9)))]
+    if choice == 1 and len(title) > 2:
+        cut = rng.randrange(len(title))
+        return title[:cut] + title[cut + 1:]
+    if choice == 2 and len(words) > 1:
+        return ' '.join(w for i, w in enumerate(words) if i != rng.randrange(len(words)))
+    return title.upper()
+
+
+def test_trigrams_and_dice():
+    assert title_trigrams('') == title_trigrams(' - ') == frozenset()
+    assert title_trigrams('ab') == {'  a', ' ab', 'ab '}
+    assert title_trigrams('cast-in-place') == title_trigrams('cast in place')
+    grams = title_trigrams('gypsum board')
+    assert dice_similarity(grams, grams) == 1.0
+    assert dice_similarity(grams, frozenset()) == dice_similarity(frozenset(), frozenset()) == 0.0
+    assert dice_similarity(grams, title_trigrams('roofing')) == 0.0
+
+
+@pytest.mark.parametrize('threshold', [0.0, 0.3, 0.5, 0.8, 1.0])
+def test_pruned_index_finds_the_brute_force_best_match(titles, threshold):
+    indexed = [title_trigrams(t.lower()) for t in titles]
+    index = TrigramIndex(indexed)
+    rng = random.Random(2)
+    queries = [perturb(rng.choice(titles), rng) for _ in range(200)] + ['A', 'Pl', 'xyz qrs']
+
+    for query in queries:
+        grams = title_trigrams(query.lower())
+        best = max((dice_similarity(grams, candidate) for candidate in indexed), default=0.0)
+
+        position, score = index.best_match(grams, threshold)
+
+        if grams and best >= threshold and best > 0:
+            assert score == pytest.approx(best), query
+            assert dice_similarity(grams, indexed[position]) == pytest.approx(best)
+        else:
+            assert (position, score) == (-1, 0.0), query
+
+
+def test_empty_query_and_empty_index():
+    assert TrigramIndex([title_trigrams('tiling')]).best_match(frozenset(), 0.5) == (-1, 0.0)
+    assert TrigramIndex([]).best_match(title_trigrams('tiling'), 0.5) == (-1, 0.0)
+
+
+@pytest.fixture
+def matcher(tmp_path):
+    path = str(tmp_path / 'catalog.csic')
+    compile_catalog([(92100, 'Plaster and Gypsum Board Assemblies'),
+                     (92200, 'Supports for Plaster and Gypsum Board'),
+                     (93000, 'Tiling'),
+                     (265100, 'Interior Lighting'),
+                     (265600, 'Exterior Lighting')], path, '2020')
+    catalog = ReferenceCatalog(path)
+    yield TitleMatcher(catalog, neighbors=1, min_similarity=0.5)
+    catalog.close()
+
+
+def test_match_methods(matcher):
+    codes = [
+        {'division': '09', 'code': '21 00', 'title': 'Plaster and Gypsum Board Assemblies'},
+        {'division': '09', 'code': '21 00', 'title': 'Plaster and Gypsum Board Assem'},
+        {'division': '09', 'code': '22 50', 'title': 'Supports for Plaster & Gypsum Board'},
+        {'division': '09', 'code': '99 00', 'title': 'Plaster and Gypsum Board Assemblys'},
+        {'division': '09', 'code': '2l 00', 'title': 'Tiling'},
+        {'division': '09', 'code': '99 00', 'title': 'Paints and Coatings'},
+        {'division': '09', 'code': '99 10', 'title': ''},
+        {'division': '09', 'code': '93 00', 'title': 'Ti'},
+    ]
+
+    result = matcher.match(FeatureFrame.build(codes))
+
+    assert [result.method_name(row) for row in range(len(codes))] == [
+        'exact', 'exact', 'neighbor', 'index', 'index', 'none', 'none', 'none']
+    assert result.scores[0] == 1.0 and 0.5 < result.scores[1] < 1.0
+    assert result.matched_positions.tolist() == [0, 0, 1, 0, 2, -1, -1, -1]
+    assert result.stats == {'rows': 8, 'exact_matches': 2, 'neighbor_matches': 1,
+                            'index_matches': 2, 'unmatched': 3,
+                            'avg_exact_similarity': pytest.approx(result.scores[:2].mean())}
+
+
+def test_exact_codes_are_scored_even_with_short_titles(matcher):
+    codes = [{'division': '09', 'code': '30 00', 'title': 'T'},
+             {'division': '09', 'code': '30 00', 'title': ''}]
+
+    result = matcher.match(FeatureFrame.build(codes))
+
+    assert result.methods.tolist() == [METHOD_EXACT, METHOD_EXACT]
+    assert result.scores.tolist() == [dice_similarity(title_trigrams('t'),
+                                                      title_trigrams('tiling')), 0.0]
+    assert matcher.match(FeatureFrame.build([])).stats['rows'] == 0
+    assert {METHOD_NONE, METHOD_NEIGHBOR, METHOD_INDEX}.isdisjoint(result.methods.tolist())
+
+
+def test_100k_codes_against_a_10k_catalog_match_in_under_a_second(tmp_path):
+    entries = {}
+    for row in generate_codes(10_500, seed=1, defect_rates={}).codes:
+        entries.setdefault(pack_code_key(row['division'], normalize_code_digits(row['code'])),
+                           (row['division'], row['code'], row['title']))
+    catalog_rows = list(entries.values())[:10_000]
+    path = str(tmp_path / 'catalog.csic')
+    compile_catalog(((pack_code_key(d, normalize_code_digits(c)), t) for d, c, t in catalog_rows),
+                    path, '2020')
+
+    # Mostly catalog codes; 2% renumbered with a damaged title, 2% with a damaged title only
+    rng = random.Random(4)
+    codes = []
+    for row in range(100_000):
+        division, code, title = catalog_rows[row % len(catalog_rows)]
+        defect = rng.random()
+        if defect < 0.02:
+            code, title = f"99 {rng.randrange(100):02d}", perturb(title, rng)
+        elif defect < 0.04:
+            title = perturb(title, rng)
+        codes.append({'division': division, 'code': code, 'title': title})
+    features = FeatureFrame.build(codes)
+
+    catalog = ReferenceCatalog(path)
+    timings = []
+    for _ in range(3):
+        matcher = TitleMatcher(catalog)  # Cold: titles, trigrams and the index are built
+        started = time.perf_counter()
+        result = matcher.match(features)
+        timings.append(time.perf_counter() - started)
+    catalog.close()
+
+    assert min(timings) < 1.0, timings
+    assert result.stats['rows'] == 100_000
+    assert result.stats['exact_matches'] > 95_000
+    assert result.stats['neighbor_matches'] + result.stats['index_matches'] > 1_000
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Watch-folder daemon: parse, validate and export every PDF dropped into INPUT_DIR.
+
+Folders and worker count default to INPUT_DIR, OUTPUT_DIR, TEMP_DIR and
+MAX_WORKERS from the environment or `.env` (see .env.example). Each PDF's
+content is processed once: outputs (`<name>_parsed.csv` and
+`<name>_validation.json`) appear in OUTPUT_DIR when the job is complete, and
+the ledger there (`.ingest_ledger.sqlite`) keeps finished files from being
+processed again after a restart.
+"""
+import argparse
+import functools
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from loguru import logger
+from parse_csi import extraction_limits, parse_pdf
+from src.agents.profiles import PROFILES
+from src.utils.ingest import IngestDaemon
+from src.utils.metrics import RunMetrics
+
+
+def setup_logging(level: str = "INFO", log_file: str = None):
+    """Configure logging (also used in every worker process)."""
+    logger.remove()
+    logger.add(sys.stdout, level=level)
+    if log_file:
+        logger.add(log_file, level=level)
+
+
+def ingest_pdf(pdf_path: str, work_dir: str, format: str = "csv", validate: bool = True,
+               config_path: str = None, profile: str = None, page_timeout: float = None,
+               document_timeout: float = None, fallback: str = None) -> dict:
+    """
+    Parse, validate and export one PDF into `work_dir` (runs in a worker process).
+
+    Pages are extracted in one supervised child process, so a page that stalls
+    the extractor times out instead of blocking the worker. The job's metrics
+    are returned as a snapshot for the daemon to merge.
+    """
+    stem = Path(pdf_path).stem
+    metrics = RunMetrics()
+    codes, errors, validation_result = parse_pdf(
+        pdf_path,
+        output_path=str(Path(work_dir) / f"{stem}_parsed.{format}"),
+        format=format,
+        validate=validate,
+        config_path=config_path,
+        profile=profile,
+        report_path=str(Path(work_dir) / f"{stem}_validation.json"),
+        page_workers=1,
+        page_timeout=page_timeout,
+        document_timeout=document_timeout,
+        fallback=fallback,
+        metrics=metrics
+    )
+    return {
+        'codes': len(codes),
+        'errors': len(errors),
+        'status': validation_result.status if validation_result else None,
+        'metrics': metrics.snapshot()
+    }
+
+
+class MetricsRecorder:
+    """Merges each finished job's metrics and rewrites the Prometheus textfile."""
+
+    def __init__(self, path: str = None, workers: int = 1):
+        self.path = path
+        self.workers = workers
+        self.metrics = RunMetrics()
+        self._since = time.monotonic()
+
+    def __call__(self, pdf_path: Path, summary: dict, seconds: float) -> None:
+        snapshot = summary.pop('metrics', None)  # Too bulky for the ledger
+        if snapshot:
+            self.metrics.merge(snapshot)
+        self.metrics.workers('ingest', seconds, 0.0)
+        self.write()
+
+    def write(self) -> None:
+        """Count pool capacity up to now and write the textfile, if one is configured."""
+        now = time.monotonic()
+        self.metrics.workers('ingest', 0.0, self.workers * (now - self._since))
+        self._since = now
+        if self.path:
+            self.metrics.write_textfile(self.path)
+
+
+def main():
+    """Main CLI entry point."""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+    parser = argparse.ArgumentParser(
+        description="Watch a folder and ingest every new CSI MasterFormat PDF once"
+    )
+    parser.add_argument("--input-dir", default=os.getenv("INPUT_DIR", "data/input"),
+                       help="Folder to watch (default: $INPUT_DIR or data/input)")
+    parser.add_argument("--output-dir", default=os.getenv("OUTPUT_DIR", "data/output"),
+                       help="Folder for finished outputs (default: $OUTPUT_DIR or data/output)")
+    parser.add_argument("--temp-dir", default=os.getenv("TEMP_DIR", "data/temp"),
+                       help="Folder for jobs in progress (default: $TEMP_DIR or data/temp)")
+    parser.add_argument("-w", "--workers", type=int, default=int(os.getenv("MAX_WORKERS", 4)),
+                       help="Worker processes (default: $MAX_WORKERS or 4)")
+    parser.add_argument("-f", "--format", choices=["csv", "json"], default="csv",
+                       help="Output format")
+    parser.add_argument("--no-validate", action="store_true",
+                       help="Skip multi-agent validation")
+    parser.add_argument("-c", "--config", help="Path to validation config YAML file")
+    parser.add_argument("-p", "--profile", choices=list(PROFILES),
+                       help="Validation profile (default: from config, else standard)")
+    parser.add_argument("--page-timeout", type=float, metavar="SECONDS",
+                       help="Time limit per page (default: $PAGE_TIMEOUT_SECONDS or 60)")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS",
+                       help="Time limit for page extraction of each PDF (default: $TIMEOUT_SECONDS)")
+    parser.add_argument("--fallback", choices=["pymupdf"],
+                       help="Retry pages that time out or fail with this extraction backend")
+    parser.add_argument("--metrics-file", default=os.getenv("METRICS_FILE"), metavar="PATH",
+                       help="Prometheus textfile rewritten after every job (default: $METRICS_FILE)")
+    parser.add_argument("--settle", type=float, default=2.0, metavar="SECONDS",
+                       help="Wait until a file has not changed for this long")
+    parser.add_argument("--poll", action="store_true",
+                       help="Poll the folder instead of using inotify")
+    parser.add_argument("--poll-interval", type=float, default=1.0, metavar="SECONDS",
+                       help="Seconds between folder listings when polling")
+    parser.add_argument("--once", action="store_true",
+                       help="Process the folder's current PDFs, then exit")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Verbose logging")
+
+    args = parser.parse_args()
+
+    log_level = "DEBUG" if args.verbose else os.getenv("LOG_LEVEL", "INFO")
+    log_file = os.getenv("LOG_FILE")
+    setup_logging(log_level, log_file)
+
+    _, page_timeout, document_timeout = extraction_limits(1, args.page_timeout, args.timeout)
+    process = functools.partial(ingest_pdf, format=args.format, validate=not args.no_validate,
+                                config_path=args.config, profile=args.profile,
+                                page_timeout=page_timeout, document_timeout=document_timeout,
+                                fallback=args.fallback)
+    recorder = MetricsRecorder(args.metrics_file, args.workers)
+    daemon = IngestDaemon(
+        args.input_dir, args.output_dir, args.temp_dir, process,
+        workers=args.workers,
+        settle_seconds=args.settle,
+        use_inotify=not args.poll,
+        poll_interval=args.poll_interval,
+        initializer=setup_logging,
+        initargs=(log_level, log_file),
+        on_finished=recorder
+    )
+
+    # SIGTERM/Ctrl-C stop watching; running jobs still finish and are recorded
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    try:
+        stats = daemon.run(stop=stop, once=args.once)
+    finally:
+        daemon.close()
+        recorder.write()
+
+    logger.info(f"Processed {stats['processed']} PDFs ({stats['failed']} failed, "
+                f"{stats['skipped']} already seen)")
+    if stats['processed']:
+        logger.info(recorder.metrics.format_summary())
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())